@@ -0,0 +1,146 @@
+"""
+Comparison of benchmark results against a baseline.
+
+Cases are matched by profile, target and cache state. A case regresses when its throughput
+drops, or its peak RSS grows, by more than the given tolerance relative to the baseline,
+or when the page cache it leaves behind grows by more than the tolerance of its corpus.
+Results measured on different corpora are not comparable, and are rejected.
+
+Usage:
+    python -m benchmarks.compare BASELINE CURRENT [--tolerance FRACTION]
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, NamedTuple, Optional
+
+__all__ = ("Regression", "compare_results", "format_regressions", "main")
+
+CaseKey = tuple[str, str, str]
+
+
+class Regression(NamedTuple):
+    profile: str
+    target: str
+    cache: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        return self.current / self.baseline - 1 if self.baseline else 0.0
+
+
+def _index(results: dict[str, Any]) -> dict[CaseKey, dict[str, Any]]:
+    return {
+        (result["profile"], result["target"], result["cache"]): result
+        for result in results["results"]
+    }
+
+
+def compare_results(
+    baseline: dict[str, Any], current: dict[str, Any], tolerance: float = 0.15
+) -> list[Regression]:
+    """
+    :param baseline: Results to compare against
+    :type baseline: dict[str, Any]
+
+    :param current: Results to compare
+    :type current: dict[str, Any]
+
+    :param tolerance: Relative change of a metric beyond which it is considered a regression
+    :type tolerance: float
+
+    :return: Regressed metrics of cases present in both results
+    :rtype: list[Regression]
+    """
+    for profile, corpus in current["corpora"].items():
+        baseline_corpus: Optional[dict[str, Any]] = baseline["corpora"].get(profile)
+        if (
+            baseline_corpus is not None
+            and baseline_corpus["fingerprint"] != corpus["fingerprint"]
+        ):
+            raise ValueError(f"Corpora of profile {profile} differ from the baseline's")
+
+    regressions: list[Regression] = []
+    baseline_cases: dict[CaseKey, dict[str, Any]] = _index(baseline)
+    for key, result in _index(current).items():
+        baseline_result: Optional[dict[str, Any]] = baseline_cases.get(key)
+        if baseline_result is None:
+            continue
+        if result["files_per_second"] < baseline_result["files_per_second"] * (
+            1 - tolerance
+        ):
+            regressions.append(
+                Regression(
+                    *key,
+                    "files_per_second",
+                    baseline_result["files_per_second"],
+                    result["files_per_second"],
+                )
+            )
+        if (
+            result["peak_rss_kb"]
+            and baseline_result["peak_rss_kb"]
+            and result["peak_rss_kb"] > baseline_result["peak_rss_kb"] * (1 + tolerance)
+        ):
+            regressions.append(
+                Regression(
+                    *key,
+                    "peak_rss_kb",
+                    baseline_result["peak_rss_kb"],
+                    result["peak_rss_kb"],
+                )
+            )
+        # Absent from results predating it, and near zero for advised cases
+        if (
+            result.get("cached_kb") is not None
+            and baseline_result.get("cached_kb") is not None
+            and result["cached_kb"] - baseline_result["cached_kb"]
+            > tolerance * result["bytes"] / 1024
+        ):
+            regressions.append(
+                Regression(
+                    *key,
+                    "cached_kb",
+                    baseline_result["cached_kb"],
+                    result["cached_kb"],
+                )
+            )
+    return regressions
+
+
+def format_regressions(regressions: list[Regression], tolerance: float) -> str:
+    if not regressions:
+        return f"No regressions beyond {tolerance:.0%}"
+    lines: list[str] = [f"{len(regressions)} regression(s) beyond {tolerance:.0%}:"]
+    for regression in regressions:
+        lines.append(
+            f"  {regression.profile} {regression.target} ({regression.cache}) "
+            f"{regression.metric}: {regression.baseline:,.1f} -> "
+            f"{regression.current:,.1f} ({regression.change:+.1%})"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="python -m benchmarks.compare", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument("baseline", help="Baseline results")
+    parser.add_argument("current", help="Results to compare against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    with open(args.baseline) as baseline_file, open(args.current) as current_file:
+        regressions: list[Regression] = compare_results(
+            json.load(baseline_file), json.load(current_file), args.tolerance
+        )
+    print(format_regressions(regressions, args.tolerance))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""
+Deterministic synthetic corpora for benchmarking.
+
+A corpus is fully described by a CorpusProfile: generating the same profile twice yields
+byte-identical trees, so that results measured on different machines or revisions are
+comparable. Profiles vary the file size distribution, tree depth and fan-out, comment and
+blank line density, line length, and language mix.
+"""
+
+import hashlib
+import json
+import math
+import os
+import random
+import shutil
+from dataclasses import asdict, dataclass
+from typing import Final, NamedTuple, Optional
+
+__all__ = (
+    "CorpusProfile",
+    "CorpusManifest",
+    "PROFILES",
+    "generate_corpus",
+    "ensure_corpus",
+)
+
+# Comment symbols of the languages corpora are made of, as in languages.json
+COMMENT_STYLES: Final[dict[str, tuple[Optional[str], Optional[str], Optional[str]]]] = {
+    "py": ("#", None, None),
+    "c": ("//", "/*", "*/"),
+    "js": ("//", "/*", "*/"),
+    "go": ("//", None, None),
+    "rs": ("//", "/*", "*/"),
+    "sh": ("#", None, None),
+    "sql": ("--", None, None),
+    "html": (None, "<!--", "-->"),
+}
+VOCABULARY: Final[tuple[str, ...]] = (
+    "value", "index", "result", "buffer", "count", "node", "parent", "child",
+    "return", "if", "else", "for", "while", "self", "config", "data", "path",
+    "=", "+", "(", ")", "{", "}", "[", "]", ",", ":", ";", "0", "1", "42",
+)  # fmt: skip
+MANIFEST_SUFFIX: Final[str] = ".manifest.json"
+
+
+@dataclass(frozen=True, slots=True)
+class CorpusProfile:
+    name: str
+    seed: int
+    files: int
+    # File sizes in lines follow a log-normal distribution with this median and shape
+    median_lines: int
+    size_sigma: float
+    depth: int
+    fanout: int
+    comment_density: float
+    blank_density: float
+    line_length: int
+    languages: tuple[tuple[str, float], ...]
+
+    def scaled(self, scale: float) -> "CorpusProfile":
+        """Copy of the profile with its number of files scaled, for quicker or longer runs"""
+        return CorpusProfile(
+            **{**asdict(self), "files": max(1, round(self.files * scale))}
+        )
+
+    @property
+    def fingerprint(self) -> str:
+        encoded: bytes = json.dumps(asdict(self), sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+class CorpusManifest(NamedTuple):
+    root: str
+    fingerprint: str
+    files: int
+    bytes: int
+    lines: int
+
+
+MIXED_LANGUAGES: Final[tuple[tuple[str, float], ...]] = (
+    ("py", 0.3),
+    ("c", 0.2),
+    ("js", 0.2),
+    ("go", 0.1),
+    ("rs", 0.1),
+    ("sh", 0.05),
+    ("sql", 0.03),
+    ("html", 0.02),
+)
+
+PROFILES: Final[dict[str, CorpusProfile]] = {
+    profile.name: profile
+    for profile in (
+        # Typical repository: mostly small files, moderately nested
+        CorpusProfile(
+            name="mixed",
+            seed=1,
+            files=2000,
+            median_lines=80,
+            size_sigma=1.0,
+            depth=4,
+            fanout=4,
+            comment_density=0.15,
+            blank_density=0.1,
+            line_length=40,
+            languages=MIXED_LANGUAGES,
+        ),
+        # Per file overhead dominates: many near-empty files in a deep tree
+        CorpusProfile(
+            name="tiny",
+            seed=2,
+            files=5000,
+            median_lines=3,
+            size_sigma=0.3,
+            depth=6,
+            fanout=3,
+            comment_density=0.2,
+            blank_density=0.1,
+            line_length=20,
+            languages=MIXED_LANGUAGES,
+        ),
+        # Throughput dominates: few large files in a flat tree
+        CorpusProfile(
+            name="large",
+            seed=3,
+            files=16,
+            median_lines=8000,
+            size_sigma=0.5,
+            depth=1,
+            fanout=4,
+            comment_density=0.1,
+            blank_density=0.05,
+            line_length=60,
+            languages=MIXED_LANGUAGES,
+        ),
+        # Long lines and dense, multiline heavy comments
+        CorpusProfile(
+            name="dense",
+            seed=4,
+            files=300,
+            median_lines=150,
+            size_sigma=0.8,
+            depth=3,
+            fanout=4,
+            comment_density=0.5,
+            blank_density=0.05,
+            line_length=200,
+            languages=(("c", 0.4), ("js", 0.3), ("rs", 0.2), ("html", 0.1)),
+        ),
+    )
+}
+
+
+def _directories(profile: CorpusProfile) -> list[str]:
+    """Relative paths of every directory in a tree of the profile's depth and fan-out"""
+    directories: list[str] = [""]
+    level: list[str] = [""]
+    for depth in range(profile.depth):
+        level = [
+            os.path.join(parent, f"d{depth}_{index}")
+            for parent in level
+            for index in range(profile.fanout)
+        ]
+        directories.extend(level)
+    return directories
+
+
+def _code_line(rng: random.Random, length: int) -> str:
+    words: list[str] = []
+    width: int = 0
+    target: int = max(1, round(rng.gauss(length, length / 4)))
+    while width < target:
+        word: str = rng.choice(VOCABULARY)
+        words.append(word)
+        width += len(word) + 1
+    return " ".join(words)
+
+
+def _file_lines(
+    rng: random.Random, profile: CorpusProfile, extension: str, lines: int
+) -> list[str]:
+    singleline, multiline_start, multiline_end = COMMENT_STYLES[extension]
+    indentation: str = " " * 4
+    content: list[str] = []
+    while len(content) < lines:
+        roll: float = rng.random()
+        if roll < profile.blank_density:
+            content.append("")
+        elif roll < profile.blank_density + profile.comment_density:
+            if multiline_start and (not singleline or rng.random() < 0.3):
+                block: list[str] = [
+                    _code_line(rng, profile.line_length)
+                    for _ in range(rng.randint(1, 4))
+                ]
+                block[0] = f"{multiline_start} {block[0]}"
+                block[-1] = f"{block[-1]} {multiline_end}"
+                content.extend(block)
+            else:
+                content.append(
+                    f"{indentation * rng.randint(0, 2)}{singleline} "
+                    + _code_line(rng, profile.line_length)
+                )
+        else:
+            content.append(
+                indentation * rng.randint(0, 3) + _code_line(rng, profile.line_length)
+            )
+    return content[:lines]
+
+
+def generate_corpus(profile: CorpusProfile, root: str) -> CorpusManifest:
+    """
+    Write a corpus for the given profile under a root directory, and a manifest
+    describing it alongside the root
+
+    :param profile: Profile describing the corpus
+    :type profile: CorpusProfile
+
+    :param root: Empty or missing directory to generate the corpus in
+    :type root: str
+
+    :return: Summary of the generated corpus
+    :rtype: CorpusManifest
+    """
+    if os.path.isdir(root) and os.listdir(root):
+        raise ValueError(f"Corpus directory {root} is not empty")
+    rng: random.Random = random.Random(profile.seed)
+    directories: list[str] = _directories(profile)
+    for directory in directories:
+        os.makedirs(os.path.join(root, directory), exist_ok=True)
+
+    extensions: list[str] = [extension for extension, _ in profile.languages]
+    weights: list[float] = [weight for _, weight in profile.languages]
+    total_bytes: int = 0
+    total_lines: int = 0
+    for index in range(profile.files):
+        extension: str = rng.choices(extensions, weights)[0]
+        lines: int = max(
+            1,
+            round(
+                rng.lognormvariate(math.log(profile.median_lines), profile.size_sigma)
+            ),
+        )
+        encoded: bytes = (
+            "\n".join(_file_lines(rng, profile, extension, lines)) + "\n"
+        ).encode()
+        filepath: str = os.path.join(
+            root, rng.choice(directories), f"f{index}.{extension}"
+        )
+        with open(filepath, "wb") as corpus_file:
+            corpus_file.write(encoded)
+        total_bytes += len(encoded)
+        total_lines += lines
+
+    manifest: CorpusManifest = CorpusManifest(
+        os.path.abspath(root),
+        profile.fingerprint,
+        profile.files,
+        total_bytes,
+        total_lines,
+    )
+    with open(root.rstrip(os.sep) + MANIFEST_SUFFIX, "w") as manifest_file:
+        json.dump(manifest._asdict(), manifest_file, indent=2)
+    return manifest
+
+
+def ensure_corpus(profile: CorpusProfile, root: str) -> CorpusManifest:
+    """
+    Reuse a corpus previously generated under root for the same profile, or generate it.
+    Corpora generated for other profiles are replaced
+    """
+    try:
+        with open(root.rstrip(os.sep) + MANIFEST_SUFFIX) as manifest_file:
+            manifest: CorpusManifest = CorpusManifest(**json.load(manifest_file))
+    except (OSError, ValueError, TypeError):
+        return generate_corpus(profile, root)
+
+    if manifest.fingerprint == profile.fingerprint and os.path.isdir(root):
+        return manifest
+    # The manifest marks the directory as generated, and hence safe to replace
+    shutil.rmtree(root, ignore_errors=True)
+    return generate_corpus(profile, root)
@@ -0,0 +1,359 @@
+"""
+Benchmark file parsers and directory walkers over synthetic corpora.
+
+Each case is measured in a fresh interpreter, so that peak RSS is attributable to it.
+Hot cache cases are preceded by an untimed warm-up run. Cold cache cases evict file
+contents from the page cache before every run through `posix_fadvise`, which does not
+require privileges but leaves directory entries cached. Advised cases are cold cases
+scanned with page cache advice, as by --no-cache-pollution.
+
+Every case records the corpus bytes it leaves in the page cache, measured through
+`mincore`, as the page cache neighbouring workloads lose to scans: pages cached by a
+scan are pages evicted from someone else's working set once memory is scarce.
+
+Usage:
+    python -m benchmarks.run [--profile NAME ...] [--cold] [--advised] [--output FILE]
+                             [--baseline FILE] [--tolerance FRACTION]
+"""
+
+import argparse
+import ctypes
+import json
+import mmap
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from array import array
+from typing import Any, Callable, Final, Optional
+
+from benchmarks.compare import compare_results, format_regressions
+from benchmarks.corpus import PROFILES, CorpusManifest, CorpusProfile, ensure_corpus
+
+__all__ = ("BenchmarkCase", "cached_bytes", "run_case", "run_benchmarks", "main")
+
+RESULTS_VERSION: Final[int] = 1
+PARSE_MODES: Final[tuple[str, ...]] = ("BUF", "MMAP", "COMP", "AUTO")
+WALKERS: Final[tuple[str, ...]] = ("bare", "record", "verbose", "stream")
+
+BenchmarkCase = dict[str, Any]
+
+
+class _DiscardingSink:
+    """Record sink dropping every record, isolating the streaming walker's own cost"""
+
+    def enter_directory(self, path: str, /) -> None:
+        pass
+
+    def add_file(self, path: str, line_data: Any, /) -> None:
+        pass
+
+    def exit_directory(self, path: str, line_data: Any, /) -> None:
+        pass
+
+
+def cached_bytes(filepaths: list[str]) -> Optional[int]:
+    """
+    :return: Bytes of the given files resident in the page cache, rounded to pages, or
+    None where residency cannot be inspected
+    :rtype: Optional[int]
+    """
+    try:
+        mincore = ctypes.CDLL(None, use_errno=True).mincore
+    except (AttributeError, OSError):
+        return None
+    mincore.argtypes = (ctypes.c_void_p, ctypes.c_size_t, ctypes.c_void_p)
+
+    resident_pages: int = 0
+    for filepath in filepaths:
+        with open(filepath, "rb") as file:
+            size: int = os.fstat(file.fileno()).st_size
+            if not size:
+                continue
+            # Copy-on-write mappings are writable buffers, whose address ctypes exposes
+            with mmap.mmap(file.fileno(), size, access=mmap.ACCESS_COPY) as mapping:
+                pages: int = -(-size // mmap.PAGESIZE)
+                vector = (ctypes.c_ubyte * pages)()
+                anchor = ctypes.c_char.from_buffer(mapping)
+                try:
+                    if mincore(ctypes.addressof(anchor), size, vector):
+                        return None
+                finally:
+                    del anchor
+                resident_pages += sum(page & 1 for page in vector)
+    return resident_pages * mmap.PAGESIZE
+
+
+def _walker_function(
+    walker: str, root: str, kwargs: dict[str, Any]
+) -> Callable[[], None]:
+    from locstat.parsing.directory import (
+        parse_directory,
+        parse_directory_record,
+        parse_directory_stream,
+        parse_directory_verbose,
+    )
+
+    def walk() -> None:
+        with os.scandir(root) as directory_data:
+            if walker == "bare":
+                parse_directory(
+                    directory_data, line_data=array("Q", (0, 0, 0)), **kwargs
+                )
+            elif walker == "record":
+                parse_directory_record(
+                    directory_data,
+                    line_data=array("Q", (0, 0, 0)),
+                    language_record={},
+                    **kwargs,
+                )
+            elif walker == "verbose":
+                parse_directory_verbose(directory_data, language_record={}, **kwargs)
+            else:
+                parse_directory_stream(
+                    directory_data,
+                    directory_path=root,
+                    language_record={},
+                    record_sink=_DiscardingSink(),
+                    **kwargs,
+                )
+
+    return walk
+
+
+def run_case(case: BenchmarkCase) -> BenchmarkCase:
+    """
+    Measure a single case, meant to be called in a fresh interpreter
+
+    :param case: Case to measure, holding the corpus root, target, cache state and repeats
+    :type case: BenchmarkCase
+
+    :return: Case alongside its measurements
+    :rtype: BenchmarkCase
+    """
+    from locstat.api import load_language_table
+    from locstat.data_structures.parse_modes import ParseMode
+    from locstat.utilities.calibration import evict_from_page_cache
+    from locstat.utilities.core import derive_file_parser, set_cache_advice
+    from locstat.utilities.instrumentation import peak_rss_kb
+
+    root: str = case["root"]
+    kind, name = case["target"].split(":", 1)
+    symbol_mapping = load_language_table().symbol_mapping
+
+    filepaths: list[str] = [
+        os.path.join(directory, filename)
+        for directory, _, filenames in os.walk(root)
+        for filename in filenames
+    ]
+    measured: Callable[[], None]
+    if kind == "parser":
+        parser = derive_file_parser(ParseMode(name))
+        arguments: list[tuple[str, Any, Any, Any]] = [
+            (filepath, *symbol_mapping[filepath.rsplit(".", 1)[-1]])
+            for filepath in filepaths
+        ]
+
+        def measured() -> None:
+            for filepath, singleline, multiline_start, multiline_end in arguments:
+                parser(filepath, singleline, multiline_start, multiline_end, 1)
+
+    else:
+        measured = _walker_function(
+            name,
+            root,
+            {
+                "config": load_language_table(),
+                "depth": -1,
+                "file_parsing_function": derive_file_parser(ParseMode.BUFFERED),
+                "directory_filter_function": lambda _: True,
+                "minimum_characters": 1,
+            },
+        )
+
+    cold: bool = case["cache"] in ("cold", "advised")
+    set_cache_advice(case["cache"] == "advised")
+    if not cold:
+        measured()
+
+    timings: list[float] = []
+    for _ in range(case["repeat"]):
+        if cold:
+            evict_from_page_cache(filepaths)
+        start: float = time.perf_counter()
+        measured()
+        timings.append(time.perf_counter() - start)
+
+    seconds: float = statistics.median(timings)
+    cached: Optional[int] = cached_bytes(filepaths)
+    return {
+        **case,
+        "seconds": round(seconds, 6),
+        "seconds_min": round(min(timings), 6),
+        "files_per_second": round(case["files"] / seconds, 1),
+        "mb_per_second": round(case["bytes"] / seconds / 1e6, 2),
+        "per_file_us": round(seconds / case["files"] * 1e6, 3),
+        "peak_rss_kb": peak_rss_kb(),
+        "cached_kb": None if cached is None else cached // 1024,
+    }
+
+
+def _cases(
+    manifest: CorpusManifest, profile: str, caches: tuple[str, ...], repeat: int
+) -> list[BenchmarkCase]:
+    targets: list[str] = [f"parser:{mode}" for mode in PARSE_MODES]
+    targets.extend(f"walker:{walker}" for walker in WALKERS)
+    return [
+        {
+            "profile": profile,
+            "target": target,
+            "cache": cache,
+            "root": manifest.root,
+            "files": manifest.files,
+            "bytes": manifest.bytes,
+            "repeat": repeat,
+        }
+        for target in targets
+        for cache in caches
+    ]
+
+
+def run_benchmarks(
+    profiles: list[CorpusProfile],
+    corpus_directory: str,
+    caches: tuple[str, ...] = ("hot",),
+    repeat: int = 5,
+) -> dict[str, Any]:
+    """
+    Generate (or reuse) corpora for the given profiles and measure every case over them
+
+    :return: Results, alongside the environment and corpora they were measured on
+    :rtype: dict[str, Any]
+    """
+    import locstat
+
+    corpora: dict[str, dict[str, Any]] = {}
+    results: list[BenchmarkCase] = []
+    # Spawned interpreters start with a clean heap, so peak RSS reflects a single case
+    context = multiprocessing.get_context("spawn")
+    for profile in profiles:
+        manifest: CorpusManifest = ensure_corpus(
+            profile, os.path.join(corpus_directory, profile.name)
+        )
+        corpora[profile.name] = {
+            "fingerprint": manifest.fingerprint,
+            "files": manifest.files,
+            "bytes": manifest.bytes,
+            "lines": manifest.lines,
+        }
+        for case in _cases(manifest, profile.name, caches, repeat):
+            with context.Pool(1) as pool:
+                result: BenchmarkCase = pool.apply(run_case, (case,))
+            del result["root"]
+            results.append(result)
+            print(
+                f"{profile.name:>8} {result['target']:>16} {result['cache']:>7}: "
+                f"{result['files_per_second']:>12,.0f} files/s "
+                f"{result['mb_per_second']:>9,.2f} MB/s "
+                f"{result['per_file_us']:>9,.2f} us/file "
+                f"{result['peak_rss_kb'] or 0:>8,} KB "
+                f"{result['cached_kb'] or 0:>9,} KB cached",
+                file=sys.stderr,
+            )
+
+    return {
+        "version": RESULTS_VERSION,
+        "environment": {
+            "locstat": locstat.__version__,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "corpora": corpora,
+        "results": results,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="+",
+        choices=tuple(PROFILES),
+        default=list(PROFILES),
+        help="Corpus profiles to benchmark, all by default",
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Factor to scale the number of files of each profile by",
+    )
+    parser.add_argument(
+        "--corpus-dir",
+        help="Directory to generate corpora in, reused across runs. Temporary by default",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+    parser.add_argument(
+        "--cold",
+        action="store_true",
+        help="Additionally measure every case on a cold page cache",
+    )
+    parser.add_argument(
+        "--advised",
+        action="store_true",
+        help="Additionally measure every case on a cold page cache, with cache advice",
+    )
+    parser.add_argument("--output", help="File to write results to as JSON")
+    parser.add_argument(
+        "--baseline", help="Results to compare against, flagging regressions"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.15,
+        help="Relative slowdown or memory growth over the baseline considered a regression",
+    )
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    if (args.cold or args.advised) and not hasattr(os, "posix_fadvise"):
+        print("Cold cache runs require posix_fadvise, skipping", file=sys.stderr)
+        args.cold = args.advised = False
+    caches: tuple[str, ...] = (
+        ("hot",) + ("cold",) * args.cold + ("advised",) * args.advised
+    )
+    profiles: list[CorpusProfile] = [
+        PROFILES[name].scaled(args.scale) for name in args.profile
+    ]
+
+    if args.corpus_dir:
+        results: dict[str, Any] = run_benchmarks(
+            profiles, args.corpus_dir, caches, args.repeat
+        )
+    else:
+        with tempfile.TemporaryDirectory(prefix="locstat-bench-") as corpus_directory:
+            results = run_benchmarks(profiles, corpus_directory, caches, args.repeat)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+            output_file.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline: dict[str, Any] = json.load(baseline_file)
+        regressions = compare_results(baseline, results, args.tolerance)
+        print(format_regressions(regressions, args.tolerance), file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,25 @@
 """locstat: Count lines of code"""
 
+from typing import Any
+
 __version__ = "1.3.2"
 __author__ = "Parth Acharya"
 __tool_name__ = "locstat"
+
+__all__ = (
+    "LanguageTable",
+    "ScanFilters",
+    "ScanResult",
+    "load_language_table",
+    "scan",
+    "scan_many",
+)
+
+
+def __getattr__(name: str) -> Any:
+    # The scanning API pulls in the parsing extension, and is only imported once used
+    if name in __all__:
+        from locstat import api
+
+        return getattr(api, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,23 +1,29 @@
 import argparse
 import os
-import platform
 import sys
 import time
 from array import array
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Callable, Final, NoReturn, Union
+from typing import IO, TYPE_CHECKING, Any, Callable, Final, NoReturn, Optional, Union
 
 from locstat.argparser import initialize_parser, parse_arguments
 from locstat import __version__, __tool_name__
 from locstat.data_structures.config import ClocConfig
-from locstat.data_structures.typing import FileParsingFunction, LanguageMetadata
+from locstat.data_structures.metrics import metrics_mapping, summarize_metrics
+from locstat.data_structures.tokens import compile_tokens
+from locstat.data_structures.typing import (
+    FileParsingFunction,
+    LanguageMetadata,
+    RecordSink,
+    ScandirFunction,
+)
 from locstat.data_structures.verbosity import Verbosity
 from locstat.data_structures.output_keys import OutputKeys
 from locstat.parsing.directory import (
     parse_directory,
     parse_directory_record,
-    parse_directory_verbose,
+    parse_directory_stream,
 )
 from locstat.utilities.core import (
     construct_directory_filter,
@@ -25,11 +31,30 @@ from locstat.utilities.core import (
     derive_file_parser,
 )
 from locstat.utilities.presentation import (
+    COMPRESSED_SUFFIX,
+    FLEET_OUTPUT_MAPPING,
     OUTPUT_MAPPING,
+    STREAMING_OUTPUT_MAPPING,
+    FleetOutputWriter,
+    NDJSONRecordWriter,
     OutputFunction,
+    dump_json_output,
+    dump_std_diff_output,
     dump_std_output,
+    open_output,
 )
 
+# Feature modules are imported by the functions using them, see LAZY_MODULES in
+# tests/unit/test_startup.py
+if TYPE_CHECKING:
+    from locstat.data_structures.results import DetailedResultStore, DirectoryView
+    from locstat.data_structures.sketches import DistributionReport
+    from locstat.utilities.instrumentation import ScanStatistics
+    from locstat.utilities.manifest import FileManifest
+    from locstat.utilities.matching import PathMatcher
+    from locstat.utilities.progress import ProgressReporter
+    from locstat.utilities.tracing import ScanTrace
+
 __all__ = ("main",)
 
 
@@ -52,10 +77,22 @@ def main() -> int:
         config.write_language_metadata(Path(args.copy_language_metadata))
         return 0
 
+    if args.calibrate is not None:
+        return _run_calibrate(args, config)
+
+    if args.diff:
+        return _run_diff(args)
+
+    if args.merge:
+        return _run_merge(args)
+
+    if args.roots_from:
+        return _run_fleet(args, config)
+
     # Because of nargs="*" in argparser's config argument,
     # the only way to determine whether --config was passed
     # is by negation of remaining args in the same mutually exclusive group
-    if not (args.file or args.dir):
+    if not (args.file or args.dir or args.files_from):
         if not args.config:  # View current configurations
             print(config.configurations_string)
             return 0
@@ -64,19 +101,83 @@ def main() -> int:
             config.update_configuration(key, value)
         return 0
 
+    return _run_scan(args, config)
+
+
+def _run_scan(args: argparse.Namespace, config: ClocConfig) -> int:
+    """Scan a file, or a directory tree, writing its results"""
+    manifest: Optional[FileManifest] = None
+    if args.files_from:
+        from locstat.utilities.manifest import FileManifest, read_manifest
+
+        if args.files_from == "-":
+            listed: list[str] = read_manifest(sys.stdin.buffer)
+        else:
+            with open(args.files_from, "rb") as manifest_file:
+                listed = read_manifest(manifest_file)
+        manifest = FileManifest(listed)
+        # Listed files are scanned as the directory tree they imply, in place of args.dir
+        args.dir = manifest.root
+
     output_mapping: dict[str, Any] = {}
 
-    file_parser_function: Final[FileParsingFunction] = derive_file_parser(
-        args.parsing_mode
+    # Output target is resolved before parsing, since streaming formats
+    # consume records as the directory tree is being walked
+    output_file: Union[int, str] = sys.stdout.fileno()
+    output_handler: OutputFunction = dump_std_output
+    output_extension: str = ""
+    if args.output:
+        assert isinstance(args.output, str)
+        output_file = args.output.strip()
+        output_extension = output_file.removesuffix(COMPRESSED_SUFFIX).split(".")[-1]
+        # Fetch output function based on file extension, default to standard write logic
+        output_handler = OUTPUT_MAPPING.get(output_extension, output_handler)
+
+    output_stream: Optional[IO[str]] = None
+    record_writer: Optional[NDJSONRecordWriter] = None
+
+    file_parser_function: FileParsingFunction = derive_file_parser(
+        args.parsing_mode,
+        (
+            config.auto_complete_threshold,
+            config.auto_mmap_threshold,
+            config.auto_chunk_size,
+        ),
+        max_memory=args.max_memory or None,
+        cache_advice=args.no_cache_pollution,
+        extended_metrics=args.extended_metrics,
+        tokens=(
+            compile_tokens(args.count_tokens) if args.count_tokens is not None else None
+        ),
     )
+    # Instrumentation wraps the functions handed to walkers, scans without it run unchanged
+    statistics: Optional[ScanStatistics] = None
+    if args.stats:
+        from locstat.utilities.instrumentation import ScanStatistics
+
+        statistics = ScanStatistics(
+            args.stats, manifest.scandir if manifest is not None else None
+        )
+        file_parser_function = statistics.time_parser(file_parser_function)
+    trace: Optional[ScanTrace] = None
+    if args.trace:
+        from locstat.utilities.tracing import ScanTrace
+
+        trace = ScanTrace()
+        file_parser_function = trace.trace_parser(file_parser_function)
+
     # Single file, no need to check and validate other default values
     if args.file:
         comment_data: LanguageMetadata = config.symbol_mapping.get(
             args.file.rsplit(".", 1)[-1], (None, None, None)
         )
         singleline_symbol, multiline_start_symbol, multiline_end_symbol = comment_data
-        epoch: float = time.time()
-        total, loc, commented_lines, blank = file_parser_function(
+        if statistics is not None:
+            statistics.start()
+        if trace is not None:
+            trace.start()
+        epoch: float = time.perf_counter()
+        total, loc, commented_lines, blank, *metrics = file_parser_function(
             args.file,
             singleline_symbol,
             multiline_start_symbol,
@@ -88,16 +189,28 @@ def main() -> int:
             OutputKeys.LOC: loc,
             OutputKeys.TOTAL: total,
             OutputKeys.COMMENTED: commented_lines,
-            OutputKeys.COMMENTED: blank,
+            OutputKeys.BLANK: blank,
         }
+        if metrics:
+            output_mapping[OutputKeys.GENERAL].update(metrics_mapping(total, metrics))
 
     else:
         extension_set: frozenset[str] = frozenset(
             extension for extension in (args.exclude_type or args.include_type or [])
         )
-        file_set: frozenset[str] = frozenset(
-            file for file in (args.exclude_file or args.include_file or [])
-        )
+        file_set: Union[frozenset[str], PathMatcher] = frozenset()
+        if (
+            args.exclude_file
+            or args.include_file
+            or args.exclude_dir
+            or args.exclude_from
+        ):
+            from locstat.utilities.matching import PathMatcher
+
+            # Paths, names, globs and regular expressions are compiled into a single matcher
+            file_set = PathMatcher(
+                args.exclude_file or args.include_file or [], args.dir
+            )
 
         file_filter: Callable[[str, str], bool] = construct_file_filter(
             extension_set,
@@ -109,29 +222,110 @@ def main() -> int:
         )
 
         directory_filter: Callable[[str], bool] = lambda directory: True
-        if args.include_dir or args.exclude_dir:
-            directory_set: frozenset[str] = frozenset(
-                directory for directory in (args.include_dir or args.exclude_dir)
+        if args.include_dir:
+            directory_filter = construct_directory_filter(
+                frozenset(args.include_dir), include=True
             )
+        elif args.exclude_dir:
             directory_filter = construct_directory_filter(
-                directory_set,
-                include=bool(args.include_dir),
-                exclude=bool(args.exclude_dir),
+                PathMatcher(args.exclude_dir, args.dir), exclude=True
+            )
+
+        if args.exclude_from:
+            file_filter, directory_filter = PathMatcher.from_file(
+                args.exclude_from, args.dir
+            ).compose_exclusion(file_filter, directory_filter)
+
+        if args.gitignore:
+            from locstat.utilities.ignore import GitIgnoreFilter
+
+            file_filter, directory_filter = GitIgnoreFilter(args.dir).compose(
+                file_filter, directory_filter
+            )
+
+        if manifest is not None:
+            file_filter = manifest.compose(file_filter)
+
+        scandir_function: ScandirFunction = (
+            manifest.scandir if manifest is not None else os.scandir
+        )
+        if statistics is not None:
+            file_filter, directory_filter = statistics.time_filters(
+                file_filter, directory_filter
+            )
+            scandir_function = statistics.scandir
+            statistics.start()
+
+        progress: Optional[ProgressReporter] = None
+        if args.progress:
+            from locstat.utilities.progress import ProgressReporter
+
+            # Redrawing a line is only meaningful on a terminal
+            if ProgressReporter.supported(sys.stderr):
+                progress = ProgressReporter(
+                    sys.stderr,
+                    count_pending=args.max_depth < 0,
+                    scandir_function=scandir_function,
+                )
+                directory_filter = progress.filter_directories(directory_filter)
+                scandir_function = progress.scandir
+                progress.start()
+
+        # Traced last, so that directory spans last until their entries are exhausted
+        if trace is not None:
+            file_filter, directory_filter = trace.trace_filters(
+                file_filter, directory_filter
             )
+            scandir_function = trace.trace_scandir(scandir_function)
+            trace.start()
 
         kwargs: dict[str, Any] = {
-            "directory_data": os.scandir(os.path.abspath(args.dir)),
+            "directory_data": scandir_function(os.path.abspath(args.dir)),
             "config": config,
             "file_parsing_function": file_parser_function,
             "file_filter_function": file_filter,
             "directory_filter_function": directory_filter,
             "minimum_characters": args.min_chars,
             "depth": args.max_depth,
+            "scandir_function": scandir_function,
         }
+        if args.shard:
+            from locstat.utilities.sharding import shard_entries
+
+            kwargs["directory_data"] = shard_entries(
+                kwargs["directory_data"], *args.shard
+            )
         output_mapping = {}
+        # Rankings and distributions are computed from per file records
+        distribution_report: Optional[DistributionReport] = None
         epoch: float = time.perf_counter()
-        if args.verbosity == Verbosity.BARE:
-            line_data: array = array("L", (0, 0, 0))
+        line_data: array = array("L", (0, 0, 0))
+        if args.sample:
+            from locstat.utilities.sampling import sample_directory
+
+            output_mapping.update(
+                sample_directory(
+                    kwargs["directory_data"],
+                    config,
+                    file_parser_function,
+                    args.sample,
+                    depth=args.max_depth,
+                    file_filter_function=file_filter,
+                    directory_filter_function=directory_filter,
+                    minimum_characters=args.min_chars,
+                    scandir_function=scandir_function,
+                ).to_mapping()
+            )
+        # Metrics and token counts are summed from those of extensions, which BARE
+        # scans leave unrecorded
+        elif (
+            args.verbosity == Verbosity.BARE
+            and not args.top
+            and not args.extended_metrics
+            and args.count_tokens is None
+        ):
+            if progress is not None:
+                progress.line_data = line_data
             parse_directory(**kwargs, line_data=line_data)
             output_mapping[OutputKeys.GENERAL] = {
                 OutputKeys.TOTAL: line_data[0],
@@ -143,16 +337,40 @@ def main() -> int:
             language_record: dict[str, dict[str, int]] = {}
             kwargs.update({"language_record": language_record})
 
+            record_sink: Optional[RecordSink] = None
+            result_store: Optional[DetailedResultStore] = None
             if args.verbosity == Verbosity.DETAILED:
-                output_mapping.update(parse_directory_verbose(**kwargs))
+                from locstat.data_structures.results import DetailedResultStore
+
+                if output_extension in STREAMING_OUTPUT_MAPPING:
+                    output_stream = open_output(output_file)
+                    record_sink = record_writer = STREAMING_OUTPUT_MAPPING[
+                        output_extension
+                    ](output_stream)
+                else:
+                    record_sink = result_store = DetailedResultStore()
+            if args.top:
+                from locstat.data_structures.sketches import DistributionReport
+
+                record_sink = distribution_report = DistributionReport(
+                    args.top, downstream=record_sink
+                )
+
+            if record_sink is not None:
+                total, loc, commented_lines, blank = parse_directory_stream(
+                    **kwargs,
+                    directory_path=os.path.abspath(args.dir),
+                    record_sink=record_sink,
+                )
                 output_mapping[OutputKeys.GENERAL] = {
-                    OutputKeys.TOTAL: output_mapping.pop(OutputKeys.TOTAL),
-                    OutputKeys.LOC: output_mapping.pop(OutputKeys.LOC),
-                    OutputKeys.COMMENTED: output_mapping.pop(OutputKeys.COMMENTED),
-                    OutputKeys.BLANK: output_mapping.pop(OutputKeys.BLANK),
+                    OutputKeys.TOTAL: total,
+                    OutputKeys.LOC: loc,
+                    OutputKeys.COMMENTED: commented_lines,
+                    OutputKeys.BLANK: blank,
                 }
             else:
-                line_data: array = array("L", (0, 0, 0))
+                if progress is not None:
+                    progress.line_data = line_data
                 parse_directory_record(**kwargs, line_data=line_data)
                 output_mapping[OutputKeys.GENERAL] = {
                     OutputKeys.TOTAL: line_data[0],
@@ -161,7 +379,31 @@ def main() -> int:
                     OutputKeys.BLANK: line_data[0] - line_data[1] - line_data[2],
                 }
 
-            output_mapping[OutputKeys.LANGUAGES] = language_record
+            if result_store is not None:
+                root_view: DirectoryView = result_store.root_view()
+                output_mapping[OutputKeys.FILES] = root_view[OutputKeys.FILES]
+                output_mapping[OutputKeys.SUBDIRECTORIES] = root_view[
+                    OutputKeys.SUBDIRECTORIES
+                ]
+
+            output_mapping[OutputKeys.GENERAL].update(
+                summarize_metrics(language_record.values())
+            )
+            if args.verbosity != Verbosity.BARE or args.top:
+                output_mapping[OutputKeys.LANGUAGES] = language_record
+            if distribution_report is not None:
+                output_mapping.update(distribution_report.to_mapping())
+
+        if progress is not None:
+            progress.stop()
+
+    if trace is not None:
+        trace.stop()
+    if statistics is not None:
+        statistics.stop()
+        output_mapping[OutputKeys.STATS] = statistics.to_mapping()
+
+    import platform
 
     general_metadata: dict[str, str] = {
         OutputKeys.TIME: f"{time.perf_counter()-epoch:.3f}s",
@@ -169,18 +411,197 @@ def main() -> int:
         OutputKeys.PLATFORM: platform.system(),
     }
     output_mapping[OutputKeys.GENERAL].update(general_metadata)  # type: ignore
+    root: str = os.path.abspath(args.dir or args.file)
+    if args.shard:
+        output_mapping[OutputKeys.SHARD] = {
+            "index": args.shard[0],
+            "count": args.shard[1],
+            "verbosity": args.verbosity,
+            "root": root,
+        }
 
     # Emit results
-    output_file: Union[int, str] = sys.stdout.fileno()
-    output_handler: OutputFunction = dump_std_output
+    output_epoch: float = time.perf_counter()
+    if record_writer is not None:
+        assert output_stream is not None
+        with output_stream:
+            record_writer.write_summary(output_mapping)
+    else:
+        output_handler(
+            output_mapping=output_mapping,
+            filepath=output_file,
+            sort_keys=args.sort_output,
+            root=root,
+        )
+
+    # Traces are written last, so that writing them does not delay results
+    if trace is not None:
+        with open_output(args.trace.strip()) as trace_file:
+            trace.dump(trace_file)
+        if trace.dropped:
+            sys.stderr.write(
+                f"Trace buffer full, {trace.dropped} native spans were dropped\n"
+            )
+
+    # Serialization can only be timed once results have been emitted
+    if statistics is not None:
+        sys.stderr.write(
+            f"Output serialization: {time.perf_counter() - output_epoch:.6f}s\n"
+        )
+    return 0
+
+
+def _run_calibrate(args: argparse.Namespace, config: ClocConfig) -> int:
+    """Measure parsing strategies on this machine, and store the thresholds derived"""
+    from locstat.utilities.calibration import (
+        CalibrationResult,
+        calibrate,
+        format_calibration,
+    )
+
+    calibration: CalibrationResult = calibrate(
+        directory=args.calibrate or None,
+        progress=lambda size: sys.stderr.write(f"Measuring {size:,} byte files\n"),
+    )
+    print(format_calibration(calibration))
+    for key, value in calibration.configurations.items():
+        config.update_configuration(key, value)
+    return 0
+
+
+def _run_diff(args: argparse.Namespace) -> int:
+    """Compare two snapshots, writing per file, directory and extension deltas"""
+    from locstat.utilities.snapshot import Snapshot, diff_snapshots
+
+    try:
+        with Snapshot(args.diff[0]) as before, Snapshot(args.diff[1]) as after:
+            diff_mapping: dict[str, Any] = diff_snapshots(before, after)
+    except ValueError as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+
+    diff_output: Union[int, str] = sys.stdout.fileno()
+    diff_handler: OutputFunction = dump_std_diff_output
     if args.output:
-        assert isinstance(args.output, str)
-        output_file = args.output.strip()
-        output_extension: str = output_file.split(".")[-1]
-        # Fetch output function based on file extension, default to standard write logic
-        output_handler = OUTPUT_MAPPING.get(output_extension, output_handler)
+        diff_output = args.output.strip()
+        if diff_output.removesuffix(COMPRESSED_SUFFIX).endswith(".json"):
+            diff_handler = dump_json_output
+    diff_handler(
+        output_mapping=diff_mapping,
+        filepath=diff_output,
+        sort_keys=args.sort_output,
+    )
+    return 0
+
+
+def _run_merge(args: argparse.Namespace) -> int:
+    """Merge partial results of shards into the result of a single scan"""
+    from locstat.utilities.sharding import load_partial, merge_partials
+
+    partials: list[dict[str, Any]] = [load_partial(filepath) for filepath in args.merge]
+    try:
+        merged_mapping: dict[str, Any] = merge_partials(partials)
+    except ValueError as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+
+    merge_output: Union[int, str] = sys.stdout.fileno()
+    merge_handler: OutputFunction = dump_std_output
+    if args.output:
+        merge_output = args.output.strip()
+        merge_handler = OUTPUT_MAPPING.get(
+            merge_output.removesuffix(COMPRESSED_SUFFIX).split(".")[-1],
+            merge_handler,
+        )
+    merge_handler(
+        output_mapping=merged_mapping,
+        filepath=merge_output,
+        sort_keys=args.sort_output,
+        root=partials[0][OutputKeys.SHARD]["root"],
+    )
+    return 0
+
+
+def _run_fleet(args: argparse.Namespace, config: ClocConfig) -> int:
+    """Scan every listed root through one pool, writing each root's results as it completes"""
+    import platform
 
-    output_handler(output_mapping=output_mapping, filepath=output_file)
+    from locstat.api import LanguageTable, ScanFilters, scan_many
+    from locstat.utilities.fleet import FleetAggregate, read_roots
+
+    if args.roots_from == "-":
+        roots: list[str] = read_roots(sys.stdin)
+    else:
+        with open(args.roots_from, encoding="utf-8") as roots_file:
+            roots = read_roots(roots_file)
+    missing_roots: list[str] = [root for root in roots if not os.path.exists(root)]
+    if missing_roots:
+        for root in missing_roots:
+            sys.stderr.write(f"Root {root} could not be found\n")
+        return 1
+
+    filters: ScanFilters = ScanFilters(
+        include_files=frozenset(args.include_file or ()),
+        exclude_files=frozenset(args.exclude_file or ()),
+        include_types=frozenset(args.include_type or ()),
+        exclude_types=frozenset(args.exclude_type or ()),
+        include_directories=frozenset(args.include_dir or ()),
+        exclude_directories=frozenset(args.exclude_dir or ()),
+        exclude_from=args.exclude_from,
+    )
+
+    fleet_output: Union[int, str] = sys.stdout.fileno()
+    fleet_writer_type: type[FleetOutputWriter] = FleetOutputWriter
+    if args.output:
+        fleet_output = args.output.strip()
+        fleet_writer_type = FLEET_OUTPUT_MAPPING.get(
+            fleet_output.removesuffix(COMPRESSED_SUFFIX).split(".")[-1],
+            fleet_writer_type,
+        )
+
+    aggregate: FleetAggregate = FleetAggregate()
+    fleet_epoch: float = time.perf_counter()
+    with fleet_writer_type(fleet_output, args.sort_output) as fleet_writer:
+        for result in scan_many(
+            roots,
+            verbosity=args.verbosity,
+            parse_mode=args.parsing_mode,
+            min_chars=args.min_chars,
+            max_depth=args.max_depth,
+            filters=filters,
+            languages=LanguageTable(config.symbol_mapping),
+            gitignore=args.gitignore,
+            jobs=args.jobs,
+            max_memory=args.max_memory,
+            cache_advice=args.no_cache_pollution,
+            extended_metrics=args.extended_metrics,
+            tokens=args.count_tokens,
+            auto_thresholds=(
+                config.auto_complete_threshold,
+                config.auto_mmap_threshold,
+                config.auto_chunk_size,
+            ),
+        ):
+            root_mapping: dict[str, Any] = result.to_mapping()
+            root_general: dict[str, Any] = root_mapping[OutputKeys.GENERAL]
+            root_general[OutputKeys.SCANNED_AT] = datetime.now().strftime(
+                "%d/%m/%y, at %H:%M:%S"
+            )
+            root_general[OutputKeys.PLATFORM] = platform.system()
+            # Root last, labelling results that are otherwise those of a single scan
+            root_general[OutputKeys.ROOT] = root_general.pop(OutputKeys.ROOT)
+            aggregate.add(root_mapping)
+            fleet_writer.write_root(root_mapping)
+
+        fleet_mapping: dict[str, Any] = aggregate.to_mapping()
+        fleet_mapping[OutputKeys.GENERAL].update(
+            {
+                OutputKeys.TIME: f"{time.perf_counter() - fleet_epoch:.3f}s",
+                OutputKeys.SCANNED_AT: datetime.now().strftime("%d/%m/%y, at %H:%M:%S"),
+                OutputKeys.PLATFORM: platform.system(),
+            }
+        )
+        fleet_writer.write_fleet(fleet_mapping)
     return 0
 
 
@@ -190,6 +611,10 @@ def _run_guarded() -> NoReturn:
     except KeyboardInterrupt:
         sys.stdout.write(f"{__tool_name__} interrupted\n")
         sys.exit()
+    except FileNotFoundError as e:
+        # Files removed while scanning, or a missing --files-from listing
+        sys.stderr.write(f"File {e.filename} could not be found\n")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,798 @@
+"""
+Programmatic scanning interface, independent of the command line and of configuration files.
+
+Language tables and filters are compiled once and reused across scans. Settings of a scan
+are bound to the parser it derives, rather than set process-wide, so that scans can be
+issued concurrently with different settings. Process-wide instrumentation, i.e. parsing
+statistics, progress and tracing, is left to the command line.
+"""
+
+import os
+import time
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from pathlib import Path
+from queue import Empty, SimpleQueue
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Union,
+)
+
+from locstat.data_structures.config import ClocConfig
+from locstat.data_structures.metrics import (
+    finalize_metrics,
+    merge_language_data,
+    metrics_mapping,
+    summarize_metrics,
+)
+from locstat.data_structures.output_keys import OutputKeys
+from locstat.data_structures.parse_modes import ParseMode
+from locstat.data_structures.results import DetailedResultStore
+from locstat.data_structures.tokens import TokenSpec, TokenTable, compile_tokens
+from locstat.data_structures.typing import FileParsingFunction, LanguageMetadata
+from locstat.data_structures.verbosity import Verbosity
+from locstat.parsing.directory import (
+    parse_directory,
+    parse_directory_record,
+    parse_directory_stream,
+    parse_directory_verbose,
+)
+from locstat.utilities.core import (
+    construct_directory_filter,
+    construct_file_filter,
+    derive_file_parser,
+)
+from locstat.utilities.ignore import GitIgnoreFilter
+from locstat.utilities.matching import PathMatcher
+
+__all__ = (
+    "LanguageTable",
+    "ScanFilters",
+    "ScanResult",
+    "load_language_table",
+    "scan",
+    "scan_many",
+)
+
+
+class LanguageTable(NamedTuple):
+    """Compiled comment symbols per file extension, used by walkers in place of a ClocConfig"""
+
+    symbol_mapping: Mapping[str, LanguageMetadata]
+
+
+@lru_cache(maxsize=8)
+def load_language_table(filepath: Optional[str] = None) -> LanguageTable:
+    """
+    Load and compile a language metadata file, once per filepath
+
+    :param filepath: JSON file mapping extensions to their comment symbols,
+    defaults to the language metadata shipped with the package
+    :type filepath: Optional[str]
+
+    :return: Compiled language table
+    :rtype: LanguageTable
+    """
+    return LanguageTable(
+        ClocConfig.load_symbol_mapping(
+            Path(filepath or Path(__file__).parent / "languages.json")
+        )
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class ScanFilters:
+    """
+    Inclusion and exclusion rules for files, file extensions and directories.
+    Including and excluding the same kind of entry is mutually exclusive.
+
+    Files and excluded directories are given as paths, names, globs or regular
+    expressions prefixed with 're:', see PathMatcher. Included directories are given
+    as paths. Patterns listed in `exclude_from` exclude both files and directories
+    """
+
+    include_files: frozenset[str] = frozenset()
+    exclude_files: frozenset[str] = frozenset()
+    include_types: frozenset[str] = frozenset()
+    exclude_types: frozenset[str] = frozenset()
+    include_directories: frozenset[str] = frozenset()
+    exclude_directories: frozenset[str] = frozenset()
+    exclude_from: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        for kind in ("files", "types", "directories"):
+            if getattr(self, f"include_{kind}") and getattr(self, f"exclude_{kind}"):
+                raise ValueError(f"Cannot both include and exclude {kind}")
+            for rule in ("include", "exclude"):
+                object.__setattr__(
+                    self,
+                    f"{rule}_{kind}",
+                    frozenset(getattr(self, f"{rule}_{kind}")),
+                )
+
+
+@lru_cache(maxsize=64)
+def _compile_filters(
+    filters: ScanFilters, root: str
+) -> tuple[Callable[[str, str], bool], Callable[[str], bool]]:
+    file_filter: Callable[[str, str], bool] = construct_file_filter(
+        filters.include_types or filters.exclude_types,
+        PathMatcher(filters.include_files or filters.exclude_files, root),
+        bool(filters.include_files),
+        bool(filters.exclude_files),
+        bool(filters.include_types),
+        bool(filters.exclude_types),
+    )
+    directory_filter: Callable[[str], bool] = construct_directory_filter(
+        (filters.include_directories or PathMatcher(filters.exclude_directories, root)),
+        include=bool(filters.include_directories),
+        exclude=bool(filters.exclude_directories),
+    )
+    if filters.exclude_from:
+        file_filter, directory_filter = PathMatcher.from_file(
+            filters.exclude_from, root
+        ).compose_exclusion(file_filter, directory_filter)
+    return file_filter, directory_filter
+
+
+@dataclass(frozen=True, slots=True)
+class ScanResult:
+    """Line counts of a scanned file or directory"""
+
+    path: str
+    total: int
+    loc: int
+    commented: int
+    blank: int
+    duration: float
+
+    # Per extension line counts, not reported for BARE verbosity
+    languages: Mapping[str, Mapping[str, int]] = field(default_factory=dict)
+    # Per file and per subdirectory line counts, only reported for DETAILED verbosity
+    files: Mapping[str, Mapping[str, int]] = field(default_factory=dict)
+    subdirectories: Mapping[str, Mapping[str, Any]] = field(default_factory=dict)
+    # Extended metrics and token counts across scanned files, only reported if requested
+    metrics: Mapping[str, Any] = field(default_factory=dict)
+
+    def to_mapping(self) -> dict[str, Any]:
+        """
+        :return: Mapping laid out identically to the one emitted by the command line,
+        usable with any of the output handlers
+        :rtype: dict[str, Any]
+        """
+        output_mapping: dict[str, Any] = {
+            OutputKeys.GENERAL: {
+                OutputKeys.TOTAL: self.total,
+                OutputKeys.LOC: self.loc,
+                OutputKeys.COMMENTED: self.commented,
+                OutputKeys.BLANK: self.blank,
+                **self.metrics,
+                OutputKeys.TIME: f"{self.duration:.3f}s",
+                OutputKeys.ROOT: self.path,
+            }
+        }
+        if self.files or self.subdirectories:
+            output_mapping[OutputKeys.FILES] = self.files
+            output_mapping[OutputKeys.SUBDIRECTORIES] = self.subdirectories
+        if self.languages:
+            output_mapping[OutputKeys.LANGUAGES] = self.languages
+        return output_mapping
+
+
+def _merge_language_records(
+    language_record: dict[str, dict[str, int]],
+    other: Mapping[str, Mapping[str, int]],
+) -> None:
+    for extension, language_data in other.items():
+        merge_language_data(language_record.setdefault(extension, {}), language_data)
+
+
+def _scan_subtree(
+    directory_path: str,
+    verbosity: Verbosity,
+    kwargs: dict[str, Any],
+) -> tuple[array, dict[str, dict[str, int]], Optional[dict[str, Any]]]:
+    line_data: array = array("Q", (0, 0, 0))
+    language_record: dict[str, dict[str, int]] = {}
+    subtree: Optional[dict[str, Any]] = None
+    with os.scandir(directory_path) as directory_data:
+        if verbosity == Verbosity.BARE:
+            parse_directory(directory_data, line_data=line_data, **kwargs)
+        elif verbosity == Verbosity.REPORT:
+            parse_directory_record(
+                directory_data,
+                line_data=line_data,
+                language_record=language_record,
+                **kwargs,
+            )
+        else:
+            subtree = parse_directory_verbose(
+                directory_data, language_record=language_record, **kwargs
+            )
+            line_data[:] = array(
+                "Q",
+                (
+                    subtree[OutputKeys.TOTAL],
+                    subtree[OutputKeys.LOC],
+                    subtree[OutputKeys.COMMENTED],
+                ),
+            )
+    return line_data, language_record, subtree
+
+
+def _list_top_level(
+    directory_path: str, kwargs: dict[str, Any]
+) -> tuple[list[os.DirEntry[str]], list[os.DirEntry[str]]]:
+    """Files directly under a directory, and its subdirectories to scan"""
+    depth: int = kwargs["depth"]
+    directory_filter: Callable[[str], bool] = kwargs["directory_filter_function"]
+    with os.scandir(directory_path) as directory_data:
+        entries: list[os.DirEntry[str]] = [
+            entry for entry in directory_data if not entry.is_symlink()
+        ]
+    file_entries: list[os.DirEntry[str]] = [
+        entry for entry in entries if entry.is_file(follow_symlinks=False)
+    ]
+    directory_entries: list[os.DirEntry[str]] = (
+        [
+            entry
+            for entry in entries
+            if entry.is_dir(follow_symlinks=False) and directory_filter(entry.path)
+        ]
+        if depth
+        else []
+    )
+    return file_entries, directory_entries
+
+
+def _scan_files(
+    file_entries: list[os.DirEntry[str]],
+    verbosity: Verbosity,
+    kwargs: dict[str, Any],
+) -> tuple[array, dict[str, dict[str, int]], dict[str, Any]]:
+    # Parsed with depth 0, since subdirectories are scanned as subtrees of their own
+    files_kwargs: dict[str, Any] = {**kwargs, "depth": 0}
+    line_data: array = array("Q", (0, 0, 0))
+    language_record: dict[str, dict[str, int]] = {}
+    files: dict[str, Any] = {}
+    if verbosity == Verbosity.BARE:
+        parse_directory(iter(file_entries), line_data=line_data, **files_kwargs)
+    elif verbosity == Verbosity.REPORT:
+        parse_directory_record(
+            iter(file_entries),
+            line_data=line_data,
+            language_record=language_record,
+            **files_kwargs,
+        )
+    else:
+        files = parse_directory_verbose(
+            iter(file_entries), language_record=language_record, **files_kwargs
+        )[OutputKeys.FILES]
+        for file_data in files.values():
+            line_data[0] += file_data[OutputKeys.TOTAL]
+            line_data[1] += file_data[OutputKeys.LOC]
+            line_data[2] += file_data[OutputKeys.COMMENTED]
+    return line_data, language_record, files
+
+
+def _merge_subtrees(
+    line_data: array,
+    language_record: dict[str, dict[str, int]],
+    directory_entries: list[os.DirEntry[str]],
+    subtree_results: list[
+        tuple[array, dict[str, dict[str, int]], Optional[dict[str, Any]]]
+    ],
+) -> dict[str, Any]:
+    """Add subtrees' line counts to those of their parent, returning their trees"""
+    subdirectories: dict[str, Any] = {}
+    for entry, (subtree_line_data, subtree_languages, subtree) in zip(
+        directory_entries, subtree_results
+    ):
+        for i in range(3):
+            line_data[i] += subtree_line_data[i]
+        _merge_language_records(language_record, subtree_languages)
+        if subtree is not None:
+            subdirectories[entry.name] = subtree
+    return subdirectories
+
+
+def _scan_directory_parallel(
+    directory_path: str, verbosity: Verbosity, jobs: int, kwargs: dict[str, Any]
+) -> tuple[array, dict[str, dict[str, int]], dict[str, Any], dict[str, Any]]:
+    """
+    Scan files directly under a directory in the calling thread, and each of its
+    subdirectories as an independent task in a thread pool. File parsing releases
+    the GIL, allowing subtrees to be parsed in parallel
+    """
+    file_entries, directory_entries = _list_top_level(directory_path, kwargs)
+    subtree_kwargs: dict[str, Any] = {**kwargs, "depth": kwargs["depth"] - 1}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures: list[Future] = [
+            executor.submit(_scan_subtree, entry.path, verbosity, subtree_kwargs)
+            for entry in directory_entries
+        ]
+        line_data, language_record, files = _scan_files(file_entries, verbosity, kwargs)
+        subdirectories: dict[str, Any] = _merge_subtrees(
+            line_data,
+            language_record,
+            directory_entries,
+            [future.result() for future in futures],
+        )
+
+    return line_data, language_record, files, subdirectories
+
+
+def scan(
+    path: Union[str, os.PathLike[str]],
+    *,
+    verbosity: Verbosity = Verbosity.REPORT,
+    parse_mode: ParseMode = ParseMode.BUFFERED,
+    min_chars: int = 1,
+    max_depth: int = -1,
+    filters: Optional[ScanFilters] = None,
+    languages: Optional[LanguageTable] = None,
+    gitignore: bool = False,
+    jobs: int = 1,
+    max_memory: Optional[int] = None,
+    cache_advice: bool = False,
+    extended_metrics: bool = False,
+    tokens: Optional[TokenSpec] = None,
+    auto_thresholds: Optional[tuple[int, int, int]] = None,
+) -> ScanResult:
+    """
+    Count lines of a file, or of all files under a directory
+
+    :param path: File or directory to scan
+    :type path: Union[str, os.PathLike[str]]
+
+    :param verbosity: Amount of detail reported, see Verbosity
+    :type verbosity: Verbosity
+
+    :param parse_mode: File parsing strategy, see ParseMode
+    :type parse_mode: ParseMode
+
+    :param min_chars: Minimum characters per line for it to be counted as a line of code
+    :type min_chars: int
+
+    :param max_depth: Sub-directory traversal depth, negative values are treated as infinite
+    :type max_depth: int
+
+    :param filters: Rules to include/exclude files, file extensions and directories
+    :type filters: Optional[ScanFilters]
+
+    :param languages: Comment symbols per file extension, defaults to the language
+    metadata shipped with the package
+    :type languages: Optional[LanguageTable]
+
+    :param gitignore: Whether to skip files and directories ignored by gitignore rules
+    :type gitignore: bool
+
+    :param jobs: Number of threads to scan top level subdirectories with
+    :type jobs: int
+
+    :param max_memory: Bytes file buffers may hold at once across all jobs of the scan,
+    independently of concurrent scans. Unbounded if None
+    :type max_memory: Optional[int]
+
+    :param cache_advice: Whether to drop parsed files from the page cache, unless they
+    were cached beforehand
+    :type cache_advice: bool
+
+    :param extended_metrics: Whether to gather byte counts, line lengths, trailing
+    whitespace and indentation alongside line counts, see `derive_file_parser`.
+    Reported overall, per extension and per file as line counts are
+    :type extended_metrics: bool
+
+    :param tokens: Tokens to count alongside line counts, mapping extensions, or "*"
+    for every extension, to regions ("code", "comment" or "any") mapped to tokens
+    counted in them, see locstat.data_structures.tokens. Reported overall, per
+    extension and per file as line counts are
+    :type tokens: Optional[TokenSpec]
+
+    :param auto_thresholds: For AUTO parsing, the file size in bytes up to which files
+    are read at once, the file size from which files are memory mapped, and the chunk
+    size in bytes files in between are read in, see `derive_file_parser`
+    :type auto_thresholds: Optional[tuple[int, int, int]]
+
+    :return: Line counts of the scanned path
+    :rtype: ScanResult
+    """
+    if jobs < 1:
+        raise ValueError("Number of jobs must be positive")
+    if min_chars < 0:
+        raise ValueError("Minimum characters cannot be negative")
+    if max_memory is not None and max_memory <= 0:
+        raise ValueError("Memory budget must be positive")
+
+    token_table: Optional[TokenTable] = (
+        compile_tokens(tokens) if tokens is not None else None
+    )
+    # Metrics and token counts are summed from those of extensions, which BARE scans
+    # leave unrecorded
+    bare_metrics: bool = (extended_metrics or token_table is not None) and Verbosity(
+        verbosity
+    ) == Verbosity.BARE
+    result: ScanResult = _scan(
+        path,
+        Verbosity.REPORT if bare_metrics else verbosity,
+        derive_file_parser(
+            ParseMode(parse_mode),
+            auto_thresholds,
+            max_memory=max_memory,
+            cache_advice=cache_advice,
+            extended_metrics=extended_metrics,
+            tokens=token_table,
+        ),
+        min_chars,
+        max_depth,
+        filters,
+        languages,
+        gitignore,
+        jobs,
+    )
+    return replace(result, languages={}) if bare_metrics else result
+
+
+def _scan_kwargs(
+    path: str,
+    language_table: LanguageTable,
+    file_parser: FileParsingFunction,
+    min_chars: int,
+    max_depth: int,
+    filters: Optional[ScanFilters],
+    gitignore: bool,
+) -> dict[str, Any]:
+    """Keyword arguments of walkers scanning the directory at path"""
+    file_filter, directory_filter = _compile_filters(filters or ScanFilters(), path)
+    if gitignore:
+        # Ignore rules depend on the scanned tree, and are compiled per scan
+        file_filter, directory_filter = GitIgnoreFilter(path).compose(
+            file_filter, directory_filter
+        )
+    return {
+        "config": language_table,
+        "depth": max_depth,
+        "file_parsing_function": file_parser,
+        "file_filter_function": file_filter,
+        "directory_filter_function": directory_filter,
+        "minimum_characters": min_chars,
+    }
+
+
+def _scan_file(
+    path: str,
+    language_table: LanguageTable,
+    file_parser: FileParsingFunction,
+    min_chars: int,
+) -> ScanResult:
+    epoch: float = time.perf_counter()
+    singleline, multiline_start, multiline_end = language_table.symbol_mapping.get(
+        os.path.basename(path).rsplit(".", 1)[-1], (None, None, None)
+    )
+    total, loc, commented, blank, *metrics = file_parser(
+        path, singleline, multiline_start, multiline_end, min_chars
+    )
+    return ScanResult(
+        path,
+        total,
+        loc,
+        commented,
+        blank,
+        time.perf_counter() - epoch,
+        metrics=metrics_mapping(total, metrics) if metrics else {},
+    )
+
+
+def _directory_result(
+    path: str,
+    line_data: Union[array, tuple[int, int, int]],
+    language_record: dict[str, dict[str, int]],
+    files: Mapping[str, Any],
+    subdirectories: Mapping[str, Any],
+    duration: float,
+) -> ScanResult:
+    total, loc, commented = line_data
+    for language_data in language_record.values():
+        language_data[OutputKeys.BLANK] = (
+            language_data[OutputKeys.TOTAL]
+            - language_data[OutputKeys.LOC]
+            - language_data[OutputKeys.COMMENTED]
+        )
+        finalize_metrics(language_data)
+    return ScanResult(
+        path,
+        total,
+        loc,
+        commented,
+        total - loc - commented,
+        duration,
+        languages=language_record,
+        files=files,
+        subdirectories=subdirectories,
+        metrics=summarize_metrics(language_record.values()),
+    )
+
+
+def _scan(
+    path: Union[str, os.PathLike[str]],
+    verbosity: Verbosity,
+    file_parser: FileParsingFunction,
+    min_chars: int,
+    max_depth: int,
+    filters: Optional[ScanFilters],
+    languages: Optional[LanguageTable],
+    gitignore: bool,
+    jobs: int,
+) -> ScanResult:
+    path = os.path.abspath(path)
+    language_table: LanguageTable = languages or load_language_table()
+    verbosity = Verbosity(verbosity)
+
+    epoch: float = time.perf_counter()
+    if not os.path.isdir(path):
+        return _scan_file(path, language_table, file_parser, min_chars)
+
+    kwargs: dict[str, Any] = _scan_kwargs(
+        path, language_table, file_parser, min_chars, max_depth, filters, gitignore
+    )
+
+    files: Mapping[str, Any] = {}
+    subdirectories: Mapping[str, Any] = {}
+    if jobs > 1:
+        line_data, language_record, files, subdirectories = _scan_directory_parallel(
+            path, verbosity, jobs, kwargs
+        )
+        total, loc, commented = line_data
+    elif verbosity == Verbosity.DETAILED:
+        language_record = {}
+        result_store: DetailedResultStore = DetailedResultStore()
+        with os.scandir(path) as directory_data:
+            total, loc, commented, _ = parse_directory_stream(
+                directory_data,
+                path,
+                language_record=language_record,
+                record_sink=result_store,
+                **kwargs,
+            )
+        root_view = result_store.root_view()
+        files, subdirectories = (
+            root_view[OutputKeys.FILES],
+            root_view[OutputKeys.SUBDIRECTORIES],
+        )
+    else:
+        line_data, language_record, _ = _scan_subtree(path, verbosity, kwargs)
+        total, loc, commented = line_data
+
+    return _directory_result(
+        path,
+        (total, loc, commented),
+        language_record,
+        files,
+        subdirectories,
+        time.perf_counter() - epoch,
+    )
+
+
+def scan_many(
+    paths: Iterable[Union[str, os.PathLike[str]]],
+    *,
+    verbosity: Verbosity = Verbosity.REPORT,
+    parse_mode: ParseMode = ParseMode.BUFFERED,
+    min_chars: int = 1,
+    max_depth: int = -1,
+    filters: Optional[ScanFilters] = None,
+    languages: Optional[LanguageTable] = None,
+    gitignore: bool = False,
+    jobs: int = os.cpu_count() or 1,
+    max_memory: Optional[int] = None,
+    cache_advice: bool = False,
+    extended_metrics: bool = False,
+    tokens: Optional[TokenSpec] = None,
+    auto_thresholds: Optional[tuple[int, int, int]] = None,
+) -> Iterator[ScanResult]:
+    """
+    Count lines of many files and directories through a single thread pool, yielding
+    the results of each as soon as it has been scanned entirely.
+
+    Directories are split into their top level subdirectories and the files directly
+    under them, and every such task of every path is queued in the same pool, so that
+    threads idle at the end of one path pick up work of others. Results are yielded in
+    order of completion, and their durations span from listing a path to its last task
+    completing. Options are those of `scan`, applied to every path
+
+    :param paths: Files and directories to scan
+    :type paths: Iterable[Union[str, os.PathLike[str]]]
+
+    :param jobs: Number of threads shared by all paths
+    :type jobs: int
+
+    :return: Line counts of every scanned path, in order of completion
+    :rtype: Iterator[ScanResult]
+    """
+    if jobs < 1:
+        raise ValueError("Number of jobs must be positive")
+    if min_chars < 0:
+        raise ValueError("Minimum characters cannot be negative")
+    if max_memory is not None and max_memory <= 0:
+        raise ValueError("Memory budget must be positive")
+
+    token_table: Optional[TokenTable] = (
+        compile_tokens(tokens) if tokens is not None else None
+    )
+    bare_metrics: bool = (extended_metrics or token_table is not None) and Verbosity(
+        verbosity
+    ) == Verbosity.BARE
+    for result in _scan_many(
+        paths,
+        Verbosity.REPORT if bare_metrics else Verbosity(verbosity),
+        languages or load_language_table(),
+        derive_file_parser(
+            ParseMode(parse_mode),
+            auto_thresholds,
+            max_memory=max_memory,
+            cache_advice=cache_advice,
+            extended_metrics=extended_metrics,
+            tokens=token_table,
+        ),
+        min_chars,
+        max_depth,
+        filters,
+        gitignore,
+        jobs,
+    ):
+        yield replace(result, languages={}) if bare_metrics else result
+
+
+class _PendingDirectory:
+    """Tasks of a directory scanned by `scan_many`, and their results so far"""
+
+    __slots__ = (
+        "path",
+        "directory_entries",
+        "listing_duration",
+        "remaining",
+        "first_start",
+        "last_end",
+        "files_result",
+        "subtree_results",
+    )
+
+    def __init__(
+        self,
+        path: str,
+        directory_entries: list[os.DirEntry[str]],
+        listing_duration: float,
+    ) -> None:
+        self.path: str = path
+        self.directory_entries: list[os.DirEntry[str]] = directory_entries
+        self.listing_duration: float = listing_duration
+        # Subtrees and the files directly under the directory
+        self.remaining: int = len(directory_entries) + 1
+        self.first_start: float = float("inf")
+        self.last_end: float = 0.0
+        self.files_result: Any = None
+        self.subtree_results: list[Any] = [None] * len(directory_entries)
+
+    def complete(self, slot: int, start: float, end: float, result: Any) -> bool:
+        """Record the result of a task, returning whether it was the last one"""
+        self.first_start = min(self.first_start, start)
+        self.last_end = max(self.last_end, end)
+        if slot < 0:
+            self.files_result = result
+        else:
+            self.subtree_results[slot] = result
+        self.remaining -= 1
+        return not self.remaining
+
+    def result(self) -> ScanResult:
+        line_data, language_record, files = self.files_result
+        subdirectories: dict[str, Any] = _merge_subtrees(
+            line_data, language_record, self.directory_entries, self.subtree_results
+        )
+        return _directory_result(
+            self.path,
+            line_data,
+            language_record,
+            files,
+            subdirectories,
+            self.listing_duration + self.last_end - self.first_start,
+        )
+
+
+def _timed(function: Callable[..., Any], *args: Any) -> tuple[float, float, Any]:
+    start: float = time.perf_counter()
+    result: Any = function(*args)
+    return start, time.perf_counter(), result
+
+
+def _scan_many(
+    paths: Iterable[Union[str, os.PathLike[str]]],
+    verbosity: Verbosity,
+    language_table: LanguageTable,
+    file_parser: FileParsingFunction,
+    min_chars: int,
+    max_depth: int,
+    filters: Optional[ScanFilters],
+    gitignore: bool,
+    jobs: int,
+) -> Iterator[ScanResult]:
+    executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=jobs)
+    # Directory and task slot of every pending task, -1 for the files directly
+    # under the directory, None for file paths scanned whole
+    futures: dict[Future, tuple[Optional[_PendingDirectory], int]] = {}
+    # Tasks are queued as they complete, so that results are yielded while paths are
+    # still being listed
+    completed: SimpleQueue[Future] = SimpleQueue()
+
+    def submit(
+        task: tuple[Optional[_PendingDirectory], int],
+        function: Callable[..., Any],
+        *args: Any,
+    ) -> None:
+        future: Future = executor.submit(function, *args)
+        futures[future] = task
+        future.add_done_callback(completed.put)
+
+    def finished(block: bool) -> Iterator[ScanResult]:
+        """Results of paths whose last task completed, waiting for one if blocking"""
+        while futures:
+            try:
+                future: Future = completed.get(block=block)
+            except Empty:
+                return
+            pending, slot = futures.pop(future)
+            if pending is None:
+                yield future.result()
+            elif pending.complete(slot, *future.result()):
+                yield pending.result()
+
+    try:
+        for path in map(os.path.abspath, paths):
+            if not os.path.isdir(path):
+                submit(
+                    (None, 0), _scan_file, path, language_table, file_parser, min_chars
+                )
+                yield from finished(block=False)
+                continue
+
+            epoch: float = time.perf_counter()
+            kwargs: dict[str, Any] = _scan_kwargs(
+                path,
+                language_table,
+                file_parser,
+                min_chars,
+                max_depth,
+                filters,
+                gitignore,
+            )
+            file_entries, directory_entries = _list_top_level(path, kwargs)
+            directory: _PendingDirectory = _PendingDirectory(
+                path, directory_entries, time.perf_counter() - epoch
+            )
+            subtree_kwargs: dict[str, Any] = {**kwargs, "depth": max_depth - 1}
+            submit(
+                (directory, -1), _timed, _scan_files, file_entries, verbosity, kwargs
+            )
+            for slot, entry in enumerate(directory_entries):
+                submit(
+                    (directory, slot),
+                    _timed,
+                    _scan_subtree,
+                    entry.path,
+                    verbosity,
+                    subtree_kwargs,
+                )
+            yield from finished(block=False)
+
+        yield from finished(block=True)
+    finally:
+        # Abandoned when the consumer stops early, or a path fails to be scanned
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -9,6 +9,7 @@ from typing import Any, Final, Sequence
 from locstat import __tool_name__
 from locstat.data_structures.config import ClocConfig
 from locstat.data_structures.parse_modes import ParseMode
+from locstat.data_structures.tokens import TokenSpec, load_tokens
 from locstat.data_structures.verbosity import Verbosity
 from locstat.utilities.presentation import OUTPUT_MAPPING, dump_std_output
 
@@ -31,6 +32,41 @@ def _validate_filepath(arg: str) -> str:
     return arg
 
 
+def _validate_path_pattern(arg: str) -> str:
+    from locstat.utilities.matching import REGEX_PREFIX, compile_expression
+
+    if arg.strip().startswith(REGEX_PREFIX):
+        try:
+            compile_expression(arg.strip().removeprefix(REGEX_PREFIX))
+        except ValueError as e:
+            sys.stderr.write(f"{e}\n")
+            sys.exit(1)
+    return arg
+
+
+def _validate_patterns_file(arg: str) -> str:
+    arg = _validate_filepath(arg)
+    with open(arg, "r", encoding="utf-8", errors="surrogateescape") as source:
+        for line in source:
+            _validate_path_pattern(line)
+    return arg
+
+
+def _validate_listing_file(arg: str) -> str:
+    arg = arg.strip()
+    # Listings are read from stdin when given '-'
+    return arg if arg == "-" else _validate_filepath(arg)
+
+
+def _validate_tokens_file(arg: str) -> TokenSpec:
+    arg = _validate_filepath(arg)
+    try:
+        return load_tokens(arg)
+    except ValueError as e:
+        sys.stderr.write(f"Invalid tokens in {arg}: {e}\n")
+        sys.exit(1)
+
+
 def _validate_min_chars(arg: str) -> int:
     min_chars: int = int(arg)
     if min_chars < 0:
@@ -63,6 +99,84 @@ def _validate_max_depth(arg: str) -> int:
     return depth
 
 
+def _validate_top(arg: str) -> int:
+    try:
+        top: int = int(arg)
+    except ValueError:
+        sys.stderr.write("Number of top files must be integer value\n")
+        sys.exit(1)
+    if top <= 0:
+        sys.stderr.write("Number of top files must be positive\n")
+        sys.exit(1)
+    return top
+
+
+def _validate_stats(arg: str) -> int:
+    try:
+        slowest: int = int(arg)
+    except ValueError:
+        sys.stderr.write("Number of slowest files must be integer value\n")
+        sys.exit(1)
+    if slowest <= 0:
+        sys.stderr.write("Number of slowest files must be positive\n")
+        sys.exit(1)
+    return slowest
+
+
+MEMORY_UNITS: Final[dict[str, int]] = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def _validate_memory_size(arg: str) -> int:
+    # Binary units, optionally followed by B or iB
+    normalized: str = arg.strip().upper().removesuffix("IB").removesuffix("B")
+    unit: str = normalized[-1:] if normalized[-1:] in MEMORY_UNITS else ""
+    try:
+        size: int = int(normalized.removesuffix(unit)) * MEMORY_UNITS[unit]
+    except ValueError:
+        sys.stderr.write(f"Invalid memory size {arg}, expected e.g. 512M or 2G\n")
+        sys.exit(1)
+    if size <= 0:
+        sys.stderr.write("Memory budget must be positive\n")
+        sys.exit(1)
+    return size
+
+
+def _validate_sample_fraction(arg: str) -> float:
+    try:
+        fraction: float = float(arg)
+    except ValueError:
+        sys.stderr.write("Sample fraction must be a decimal value\n")
+        sys.exit(1)
+    if not 0 < fraction <= 1:
+        sys.stderr.write("Sample fraction must be within (0, 1]\n")
+        sys.exit(1)
+    return fraction
+
+
+def _validate_shard(arg: str) -> tuple[int, int]:
+    try:
+        index, count = map(int, arg.split("/"))
+    except ValueError:
+        sys.stderr.write(f"Invalid shard {arg}, expected I/N, e.g. 1/4\n")
+        sys.exit(1)
+    if not 1 <= index <= count:
+        sys.stderr.write("Shard index must be within 1 and the number of shards\n")
+        sys.exit(1)
+    return index, count
+
+
+def _validate_jobs(arg: str) -> int:
+    try:
+        jobs: int = int(arg)
+    except ValueError:
+        sys.stderr.write("Number of jobs must be integer value\n")
+        sys.exit(1)
+    if jobs <= 0:
+        sys.stderr.write("Number of jobs must be positive\n")
+        sys.exit(1)
+    return jobs
+
+
 def _validate_verbosity(arg: str) -> Verbosity:
     arg = arg.strip().upper()
     try:
@@ -182,6 +296,23 @@ def initialize_parser(config: ClocConfig) -> argparse.ArgumentParser:
         help="Copy language metadata to a specified file",
     )
 
+    required_group.add_argument(
+        "-cal",
+        "--calibrate",
+        nargs="?",
+        const="",
+        type=_validate_directory,
+        metavar="DIR",
+        help=" ".join(
+            (
+                "Time each reading strategy of the AUTO parsing mode across a sweep of",
+                "file sizes, and persist the resulting thresholds to the configuration.",
+                "Files are generated in a temporary directory within DIR if given,",
+                "which should reside on the file system to be scanned",
+            )
+        ),
+    )
+
     # Target
     required_group.add_argument(
         "-d",
@@ -197,6 +328,64 @@ def initialize_parser(config: ClocConfig) -> argparse.ArgumentParser:
         help="Specify the file to scan. Either this or '-d' must be used",
     )
 
+    required_group.add_argument(
+        "-df",
+        "--diff",
+        nargs=2,
+        metavar=("BEFORE", "AFTER"),
+        type=_validate_filepath,
+        help=" ".join(
+            (
+                "Report per file, per directory and per extension line deltas",
+                "between two snapshots, written using '-o' with an lsnap file",
+            )
+        ),
+    )
+
+    required_group.add_argument(
+        "-mg",
+        "--merge",
+        nargs="+",
+        metavar="PARTIAL",
+        type=_validate_filepath,
+        help=" ".join(
+            (
+                "Merge the partial results of every shard of a scan, written using",
+                "'--shard', into the results of scanning it at once",
+            )
+        ),
+    )
+
+    required_group.add_argument(
+        "-rf",
+        "--roots-from",
+        type=_validate_listing_file,
+        metavar="FILE",
+        help=" ".join(
+            (
+                "Scan every file and directory listed in FILE, one per line, or in",
+                "stdin if '-', through a single pool of threads. Results of every root",
+                "are written as soon as it has been scanned, followed by line counts",
+                "across all roots",
+            )
+        ),
+    )
+
+    required_group.add_argument(
+        "-ff",
+        "--files-from",
+        type=_validate_listing_file,
+        metavar="FILE",
+        help=" ".join(
+            (
+                "Scan the files listed in FILE, or in stdin if '-', delimited by NUL",
+                "characters (e.g. 'git ls-files -z') or newlines, without reading",
+                "directories. Listed files are reported as the directory tree they",
+                "imply, rooted at the current directory",
+            )
+        ),
+    )
+
     # Parsing logic manipulation
     parser.add_argument(
         "-mc",
@@ -248,11 +437,29 @@ def initialize_parser(config: ClocConfig) -> argparse.ArgumentParser:
     )
 
     file_filter_group.add_argument(
-        "-xf", "--exclude-file", nargs="+", help="Exclude files by name"
+        "-xf",
+        "--exclude-file",
+        nargs="+",
+        type=_validate_path_pattern,
+        help=" ".join(
+            (
+                "Exclude files by path, name, glob (e.g. '**/test_*.py')",
+                "or regular expression prefixed with 're:'",
+            )
+        ),
     )
 
     file_filter_group.add_argument(
-        "-if", "--include-file", nargs="+", help="Include files by name"
+        "-if",
+        "--include-file",
+        nargs="+",
+        type=_validate_path_pattern,
+        help=" ".join(
+            (
+                "Include files by path, name, glob (e.g. 'src/**/*.py')",
+                "or regular expression prefixed with 're:'",
+            )
+        ),
     )
 
     dir_filter_group: argparse._MutuallyExclusiveGroup = (
@@ -260,7 +467,16 @@ def initialize_parser(config: ClocConfig) -> argparse.ArgumentParser:
     )
 
     dir_filter_group.add_argument(
-        "-xd", "--exclude-dir", nargs="+", help="Exclude directories by name"
+        "-xd",
+        "--exclude-dir",
+        nargs="+",
+        type=_validate_path_pattern,
+        help=" ".join(
+            (
+                "Exclude directories by path, name, glob (e.g. 'vendor/**')",
+                "or regular expression prefixed with 're:'",
+            )
+        ),
     )
 
     dir_filter_group.add_argument(
@@ -286,6 +502,32 @@ def initialize_parser(config: ClocConfig) -> argparse.ArgumentParser:
         ),
     )
 
+    parser.add_argument(
+        "-xfr",
+        "--exclude-from",
+        type=_validate_patterns_file,
+        metavar="FILE",
+        help=" ".join(
+            (
+                "Exclude files and directories matching patterns listed in a file,",
+                "one per line, using the same syntax as --exclude-file",
+            )
+        ),
+    )
+
+    parser.add_argument(
+        "-gi",
+        "--gitignore",
+        action="store_true",
+        help=" ".join(
+            (
+                "Skip files and directories ignored by .gitignore files,",
+                "including nested ones, and by the repository's .git/info/exclude.",
+                "Ignored directories are never scanned",
+            )
+        ),
+    )
+
     # Output control
     parser.add_argument(
         "-vb",
@@ -301,6 +543,51 @@ def initialize_parser(config: ClocConfig) -> argparse.ArgumentParser:
         default=config.verbosity,
     )
 
+    parser.add_argument(
+        "-t",
+        "--top",
+        type=_validate_top,
+        metavar="N",
+        help=" ".join(
+            (
+                "Report the N largest files by total lines, LOC and comment ratio,",
+                "alongside percentiles of file sizes per extension.",
+                "Computed during the walk, without retaining per file data.",
+                "Implies at least REPORT verbosity",
+            )
+        ),
+    )
+
+    parser.add_argument(
+        "-sh",
+        "--shard",
+        type=_validate_shard,
+        metavar="I/N",
+        help=" ".join(
+            (
+                "Scan shard I of N of a directory, assigned its top level files and",
+                "subdirectories by a stable hash of their names, and write a partial",
+                "result to a JSON output file. Partial results of every shard are",
+                "combined using '--merge'",
+            )
+        ),
+    )
+
+    parser.add_argument(
+        "-sm",
+        "--sample",
+        type=_validate_sample_fraction,
+        metavar="FRACTION",
+        help=" ".join(
+            (
+                "Estimate line counts of a directory by parsing a random FRACTION of its",
+                "files, stratified by extension and size, e.g. 0.05. Totals are",
+                "extrapolated per extension and reported in the REPORT layout,",
+                "alongside margins of error at 95%% confidence",
+            )
+        ),
+    )
+
     parser.add_argument(
         "-o",
         "--output",
@@ -315,6 +602,132 @@ def initialize_parser(config: ClocConfig) -> argparse.ArgumentParser:
         ),
     )
 
+    parser.add_argument(
+        "-so",
+        "--sort-output",
+        action="store_true",
+        help=" ".join(
+            (
+                "Sort files and subdirectories by name when emitting results,",
+                "for deterministic output. By default, entries are emitted",
+                "in the order they were parsed in",
+            )
+        ),
+    )
+
+    parser.add_argument(
+        "-st",
+        "--stats",
+        nargs="?",
+        const=10,
+        type=_validate_stats,
+        metavar="N",
+        help=" ".join(
+            (
+                "Report time spent per scan phase (directory enumeration, filtering,",
+                "I/O and parsing), bytes read, throughput, system calls, peak memory",
+                "usage and the N slowest files to parse (10 by default)",
+            )
+        ),
+    )
+
+    parser.add_argument(
+        "-pg",
+        "--progress",
+        action="store_true",
+        help=" ".join(
+            (
+                "Report files parsed, throughput, directories scanned and pending and",
+                "running line totals on stderr while scanning a directory.",
+                "Ignored when stderr is not a terminal",
+            )
+        ),
+    )
+
+    parser.add_argument(
+        "-tr",
+        "--trace",
+        metavar="FILE",
+        help=" ".join(
+            (
+                "Write a Chrome trace (JSON, readable by chrome://tracing and Perfetto)",
+                "of the scan to FILE, with spans of every directory, filter callback,",
+                "file, and of opening, reading, mapping, parsing and closing files.",
+                "Spans are buffered, and written once results have been emitted",
+            )
+        ),
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=_validate_jobs,
+        default=os.cpu_count() or 1,
+        metavar="N",
+        help=" ".join(
+            (
+                "Number of threads scanning the roots of '--roots-from',",
+                "defaults to the number of CPUs",
+            )
+        ),
+    )
+
+    parser.add_argument(
+        "-mm",
+        "--max-memory",
+        type=_validate_memory_size,
+        metavar="SIZE",
+        help=" ".join(
+            (
+                "Bound the memory held by file buffers at once, e.g. 512M or 2G.",
+                "Files not fitting in the budget are read in chunks instead,",
+                "and reads wait while outstanding buffers exhaust the budget",
+            )
+        ),
+    )
+
+    parser.add_argument(
+        "-nc",
+        "--no-cache-pollution",
+        action="store_true",
+        help=" ".join(
+            (
+                "Read files sequentially and drop them from the page cache once parsed,",
+                "unless they were cached beforehand, so that scans do not evict",
+                "the working sets of neighbouring workloads",
+            )
+        ),
+    )
+
+    parser.add_argument(
+        "-em",
+        "--extended-metrics",
+        action="store_true",
+        help=" ".join(
+            (
+                "Report bytes, the longest and average line length, lines with",
+                "trailing whitespace and the indentation style alongside line counts,",
+                "overall, per extension and per file, gathered in the same pass",
+            )
+        ),
+    )
+
+    parser.add_argument(
+        "-ct",
+        "--count-tokens",
+        type=_validate_tokens_file,
+        metavar="FILE",
+        help=" ".join(
+            (
+                "Count occurrences of the tokens listed in the JSON file FILE, e.g.",
+                '{"*": {"comment": ["TODO", "FIXME"]}, "rs": {"code": ["unsafe"]}},',
+                "in the code or comments of files of each extension ('*' for all),",
+                "alongside line counts, overall, per extension and per file,",
+                "in the same pass",
+            )
+        ),
+    )
+
     parser.add_argument(
         "-pm",
         "--parsing-mode",
@@ -344,6 +757,63 @@ def parse_arguments(
             "Invalid syntax for configuration, must either be empty or in pairs"
         )
 
+    if parsed_arguments.sample and (parsed_arguments.file or parsed_arguments.top):
+        sys.stderr.write("Sampling estimates directories, and cannot rank files\n")
+        sys.exit(1)
+
+    if parsed_arguments.sample and (
+        parsed_arguments.extended_metrics or parsed_arguments.count_tokens is not None
+    ):
+        sys.stderr.write("Sampling only estimates line counts\n")
+        sys.exit(1)
+
+    output: str = (parsed_arguments.output or "").strip()
+    if output.endswith(".lsnap.gz"):
+        sys.stderr.write(
+            "Snapshots are memory mapped when read, and cannot be compressed\n"
+        )
+        sys.exit(1)
+
+    if parsed_arguments.shard:
+        if parsed_arguments.file or parsed_arguments.sample or parsed_arguments.top:
+            sys.stderr.write("Sharding splits exact scans of directories\n")
+            sys.exit(1)
+        if not output.removesuffix(".gz").endswith(".json"):
+            sys.stderr.write("Partial results of shards are written to JSON files\n")
+            sys.exit(1)
+
+    if parsed_arguments.roots_from:
+        if (
+            parsed_arguments.top
+            or parsed_arguments.sample
+            or parsed_arguments.shard
+            or parsed_arguments.stats
+            or parsed_arguments.trace
+            or parsed_arguments.progress
+        ):
+            sys.stderr.write(
+                "Roots are scanned exactly, without rankings, sampling, sharding, "
+                "statistics, traces or progress\n"
+            )
+            sys.exit(1)
+        if output.removesuffix(".gz").endswith(".lsnap"):
+            sys.stderr.write("Snapshots record a single root\n")
+            sys.exit(1)
+
+    # Snapshots are made of per file records, which only DETAILED scans keep
+    if output.removesuffix(".gz").endswith(".lsnap") and (
+        parsed_arguments.dir or parsed_arguments.files_from or parsed_arguments.file
+    ):
+        if (
+            parsed_arguments.verbosity != Verbosity.DETAILED
+            or parsed_arguments.file
+            or parsed_arguments.sample
+        ):
+            sys.stderr.write(
+                "Snapshots are written from DETAILED scans of directories\n"
+            )
+            sys.exit(1)
+
     # Format parsed_arguments.config into list of key, value pairs
     parsed_arguments.config = [
         (parsed_arguments.config[i], parsed_arguments.config[i + 1])
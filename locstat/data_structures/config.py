@@ -1,13 +1,12 @@
 import io
 import json
+import marshal
+import os
 import tomllib
 from dataclasses import dataclass, field
-from importlib.metadata import metadata
 from pathlib import Path
 from types import MappingProxyType
-from typing import Any, Mapping, Optional
-from urllib import error, request
-from uuid import uuid4
+from typing import Any, Final, Mapping, Optional
 
 from locstat.data_structures.exceptions import InvalidConfigurationException
 from locstat.data_structures.singleton import SingletonMeta
@@ -17,6 +16,10 @@ from locstat.data_structures.parse_modes import ParseMode
 
 __all__ = ("ClocConfig",)
 
+# Bumped whenever the layout of the cached language table changes
+LANGUAGE_CACHE_VERSION: Final[int] = 1
+LANGUAGE_CACHE_FILENAME: Final[str] = "languages.marshal"
+
 
 @dataclass(init=False, slots=True, weakref_slot=True)
 class ClocConfig(metaclass=SingletonMeta):
@@ -27,6 +30,10 @@ class ClocConfig(metaclass=SingletonMeta):
     minimum_characters: int = 0
     max_depth: int = -1
     parsing_mode: ParseMode = ParseMode.BUFFERED
+    # File sizes in bytes deciding how files are read in AUTO parsing mode
+    auto_complete_threshold: int = 4 * 1024 * 1024
+    auto_mmap_threshold: int = 64 * 1024 * 1024
+    auto_chunk_size: int = 4 * 1024 * 1024
     archive_filename: str = field(default="settings.archive.toml")
 
     # Language metadata
@@ -44,6 +51,9 @@ class ClocConfig(metaclass=SingletonMeta):
                 "minimum_characters",
                 "max_depth",
                 "parsing_mode",
+                "auto_complete_threshold",
+                "auto_mmap_threshold",
+                "auto_chunk_size",
                 "language_metadata_path",
             ]
         )
@@ -104,9 +114,16 @@ class ClocConfig(metaclass=SingletonMeta):
             if instance.language_metadata_path
             else working_directory / "languages.json"
         )
-        with open(languages_filepath, "rb") as langauges_source:
-            comments_data: dict[str, list[str]] = json.loads(langauges_source.read())
+        symbol_mapping: dict[str, LanguageMetadata] = cls.load_symbol_mapping(
+            languages_filepath, working_directory / "__pycache__"
+        )
+        object.__setattr__(instance, "symbol_mapping", symbol_mapping)
+        return instance
 
+    @staticmethod
+    def compile_symbol_mapping(
+        comments_data: Mapping[str, list[Optional[str]]],
+    ) -> dict[str, LanguageMetadata]:
         symbol_mapping: dict[str, LanguageMetadata] = {}
         for language, comment_data in comments_data.items():
             if len(comment_data) != 3:
@@ -126,8 +143,72 @@ class ClocConfig(metaclass=SingletonMeta):
                 multistart.encode() if multistart else None,
                 multiend.encode() if multiend else None,
             )
-        object.__setattr__(instance, "symbol_mapping", symbol_mapping)
-        return instance
+        return symbol_mapping
+
+    @classmethod
+    def load_symbol_mapping(
+        cls, languages_filepath: Path, cache_directory: Optional[Path] = None
+    ) -> dict[str, LanguageMetadata]:
+        """
+        Load comment symbols per file extension from a language metadata file.
+
+        The compiled table is cached in the given directory using marshal, and is only
+        recompiled once the metadata file's modification time or size changes
+
+        :param languages_filepath: JSON file mapping extensions to their comment symbols
+        :type languages_filepath: Path
+
+        :param cache_directory: Directory to cache the compiled table in, caching is
+        skipped if not given
+        :type cache_directory: Optional[Path]
+
+        :return: Mapping of file extensions to encoded comment symbols
+        :rtype: dict[str, LanguageMetadata]
+        """
+        source_stat: os.stat_result = os.stat(languages_filepath)
+        cache_key: tuple[int, str, int, int] = (
+            LANGUAGE_CACHE_VERSION,
+            os.path.abspath(languages_filepath),
+            source_stat.st_mtime_ns,
+            source_stat.st_size,
+        )
+
+        cache_filepath: Optional[Path] = (
+            cache_directory / LANGUAGE_CACHE_FILENAME if cache_directory else None
+        )
+        if cache_filepath:
+            try:
+                with open(cache_filepath, "rb") as cache_file:
+                    cached_key, cached_mapping = marshal.load(cache_file)
+                if cached_key == cache_key:
+                    return cached_mapping
+            except (OSError, EOFError, ValueError, TypeError):
+                # Missing, unreadable or malformed cache, fall back to compiling
+                pass
+
+        with open(languages_filepath, "rb") as langauges_source:
+            comments_data: dict[str, list[Optional[str]]] = json.loads(
+                langauges_source.read()
+            )
+        symbol_mapping: dict[str, LanguageMetadata] = cls.compile_symbol_mapping(
+            comments_data
+        )
+
+        if cache_filepath:
+            # Write through a temporary file, so that concurrent runs never read a partial cache
+            temp_filepath: Path = cache_filepath.with_name(
+                f"{cache_filepath.name}.{os.getpid()}"
+            )
+            try:
+                cache_filepath.parent.mkdir(exist_ok=True)
+                with open(temp_filepath, "wb") as cache_file:
+                    marshal.dump((cache_key, symbol_mapping), cache_file)
+                os.replace(temp_filepath, cache_filepath)
+            except OSError:
+                # Read-only installations simply go without a cache
+                temp_filepath.unlink(missing_ok=True)
+
+        return symbol_mapping
 
     @property
     def configurations(self) -> dict[str, Any]:
@@ -219,6 +300,10 @@ class ClocConfig(metaclass=SingletonMeta):
             )
         )
 
+        from importlib.metadata import metadata
+        from urllib import error, request
+        from uuid import uuid4
+
         assert __package__
         package_metadata = metadata(__package__.split(".")[0])
         repository_url_metadata: str = package_metadata["Project-URL"]
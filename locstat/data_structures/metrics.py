@@ -0,0 +1,152 @@
+"""
+Extended metrics of files, gathered by the parsing extension in the same pass as their
+line counts by parsers derived with `extended_metrics`, see `derive_file_parser`.
+
+Such parsers return the counters of METRIC_KEYS past their line counts. Counters are
+summed per extension and overall, except for the longest line, of which the maximum is
+kept. Average line lengths and indentation styles are derived from aggregated counters,
+so that aggregates merge exactly, e.g. across shards or roots of a fleet.
+
+Token counts, see locstat.data_structures.tokens, are returned last by parsers counting
+them, and are carried alongside metrics by the helpers below.
+"""
+
+from typing import Any, Final, Iterable, Mapping, Optional, Sequence
+
+from locstat.data_structures.output_keys import OutputKeys
+from locstat.data_structures.tokens import add_tokens
+
+__all__ = (
+    "METRIC_KEYS",
+    "DERIVED_KEYS",
+    "indentation_style",
+    "add_metrics",
+    "finalize_metrics",
+    "metrics_mapping",
+    "merge_metrics",
+    "merge_language_data",
+    "summarize_metrics",
+)
+
+METRIC_KEYS: Final[tuple[str, ...]] = (
+    OutputKeys.BYTES,
+    OutputKeys.CHARACTERS,
+    OutputKeys.MAX_LINE_LENGTH,
+    OutputKeys.TRAILING_WHITESPACE,
+    OutputKeys.TAB_INDENTED,
+    OutputKeys.SPACE_INDENTED,
+)
+DERIVED_KEYS: Final[tuple[str, ...]] = (
+    OutputKeys.AVERAGE_LINE_LENGTH,
+    OutputKeys.INDENTATION,
+)
+
+
+def indentation_style(tab_indented: int, space_indented: int) -> str:
+    """
+    :return: "tabs" or "spaces" if lines are only indented with either, "mixed" if
+    with both, and "none" if no line is indented
+    :rtype: str
+    """
+    if tab_indented:
+        return "mixed" if space_indented else "tabs"
+    return "spaces" if space_indented else "none"
+
+
+def _split_tokens(
+    metrics: Sequence[Any],
+) -> tuple[Sequence[int], Optional[Mapping[str, int]]]:
+    if metrics and metrics[-1].__class__ is dict:
+        return metrics[:-1], metrics[-1]
+    return metrics, None
+
+
+def add_metrics(record: dict[str, Any], metrics: Sequence[Any]) -> None:
+    """
+    Add the metrics of a file, as returned past its line counts, to a record, alongside
+    its token counts if returned
+    """
+    counters, tokens = _split_tokens(metrics)
+    for key, value in zip(METRIC_KEYS, counters):
+        if key == OutputKeys.MAX_LINE_LENGTH:
+            record[key] = max(record.get(key, 0), value)
+        else:
+            record[key] = record.get(key, 0) + value
+    if tokens is not None:
+        add_tokens(record, tokens)
+
+
+def _derive(record: dict[str, Any], total: int) -> None:
+    record[OutputKeys.AVERAGE_LINE_LENGTH] = (
+        round(record[OutputKeys.CHARACTERS] / total, 2) if total else 0.0
+    )
+    record[OutputKeys.INDENTATION] = indentation_style(
+        record[OutputKeys.TAB_INDENTED], record[OutputKeys.SPACE_INDENTED]
+    )
+
+
+def finalize_metrics(record: dict[str, Any]) -> None:
+    """Derive average line length and indentation style of a record, if it has metrics"""
+    if OutputKeys.CHARACTERS in record:
+        _derive(record, record[OutputKeys.TOTAL])
+
+
+def metrics_mapping(total: int, metrics: Sequence[Any]) -> dict[str, Any]:
+    """
+    :return: Metrics of a file with total lines, alongside those derived from them, and
+    its token counts if returned
+    :rtype: dict[str, Any]
+    """
+    counters, tokens = _split_tokens(metrics)
+    mapping: dict[str, Any] = dict(zip(METRIC_KEYS, counters))
+    if counters:
+        _derive(mapping, total)
+    if tokens is not None:
+        mapping[OutputKeys.TOKENS] = dict(tokens)
+    return mapping
+
+
+def merge_metrics(merged: dict[str, Any], data: Mapping[str, Any]) -> None:
+    """
+    Add the metrics and token counts of a mapping in the layout of regular output, if
+    it has any, to those merged so far. Derived metrics are left to `finalize_metrics`
+    """
+    if OutputKeys.CHARACTERS in data:
+        add_metrics(merged, [data[key] for key in METRIC_KEYS])
+    if OutputKeys.TOKENS in data:
+        add_tokens(merged, data[OutputKeys.TOKENS])
+
+
+def merge_language_data(
+    merged: dict[str, Any], language_data: Mapping[str, Any]
+) -> None:
+    """
+    Add the line counts, metrics and token counts of an extension, in the layout of
+    regular output, to those merged so far, deriving metrics anew from merged counters
+    """
+    for key, value in language_data.items():
+        if (
+            key not in METRIC_KEYS
+            and key not in DERIVED_KEYS
+            and key != OutputKeys.TOKENS
+        ):
+            merged[key] = merged.get(key, 0) + value
+    merge_metrics(merged, language_data)
+    finalize_metrics(merged)
+
+
+def summarize_metrics(languages: Iterable[Mapping[str, Any]]) -> dict[str, Any]:
+    """
+    :return: Metrics and token counts across every extension, empty if none were
+    gathered
+    :rtype: dict[str, Any]
+    """
+    summary: dict[str, Any] = {}
+    total: int = 0
+    for language_data in languages:
+        merge_metrics(summary, language_data)
+        if OutputKeys.CHARACTERS in language_data:
+            total += language_data[OutputKeys.TOTAL]
+    if OutputKeys.CHARACTERS in summary:
+        _derive(summary, total)
+    return summary
@@ -10,10 +10,30 @@ class OutputKeys(StrEnum):
     COMMENTED = "comments"
     BLANK = "blank"
 
+    BYTES = "bytes"
+    CHARACTERS = "characters"
+    MAX_LINE_LENGTH = "max_line_length"
+    AVERAGE_LINE_LENGTH = "average_line_length"
+    TRAILING_WHITESPACE = "trailing_whitespace"
+    TAB_INDENTED = "tab_indented"
+    SPACE_INDENTED = "space_indented"
+    INDENTATION = "indentation"
+    TOKENS = "tokens"
+
     FILES = "files"
     SUBDIRECTORIES = "subdirectories"
+    DIRECTORIES = "directories"
     LANGUAGES = "languages"
+    TOP = "top"
+    DISTRIBUTION = "distribution"
+    STATS = "stats"
+    SAMPLE = "sample"
+    SHARD = "shard"
+    ROOTS = "roots"
+    FLEET = "fleet"
 
     TIME = "time"
     SCANNED_AT = "scanned"
     PLATFORM = "platform"
+    ROOT = "root"
+    STATUS = "status"
@@ -7,3 +7,5 @@ class ParseMode(StrEnum):
     MMAP = "MMAP"
     BUFFERED = "BUF"
     COMPLETE = "COMP"
+    # Picks one of the above per file, by its size
+    AUTO = "AUTO"
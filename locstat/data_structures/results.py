@@ -0,0 +1,405 @@
+import os
+import sys
+from array import array
+from typing import Any, Final, Iterator, Mapping, Optional
+
+from locstat.data_structures.metrics import METRIC_KEYS, metrics_mapping
+from locstat.data_structures.output_keys import OutputKeys
+from locstat.data_structures.typing import FileLineData
+
+__all__ = ("DetailedResultStore", "DirectoryView", "FilesView", "SubdirectoriesView")
+
+NO_PARENT: Final[int] = 0xFFFFFFFF
+
+
+class DetailedResultStore:
+    """
+    Struct-of-arrays container for per file and per directory line data.
+
+    Rather than a mapping per file keyed by its absolute path, every entry is stored
+    as its path segment alongside the index of its parent directory, with line counts
+    kept in typed counter columns. Directory names are interned, file names are packed
+    into a single byte blob. Since a directory's files are recorded consecutively until
+    one of its subdirectories is entered, parents of files are stored as runs rather
+    than per file. Counters of files are 32 bits wide, and only widened to 64 bits once
+    a file overflows them. Extended metrics of files, if gathered, are kept in a single column
+    of METRIC_KEYS-sized strides, and token counts in a mapping by index of files counting
+    tokens. Nested mappings are only materialized lazily through views.
+
+    The store implements the RecordSink protocol, and is populated during a directory walk
+    """
+
+    __slots__ = (
+        "directory_names",
+        "directory_parents",
+        "directory_totals",
+        "directory_locs",
+        "directory_commented",
+        "file_names",
+        "file_name_lengths",
+        "file_totals",
+        "file_locs",
+        "file_commented",
+        "file_metrics",
+        "file_tokens",
+        "run_parents",
+        "run_starts",
+        "run_name_offsets",
+        "_directory_stack",
+        "_prefix_lengths",
+        "_run_index",
+        "_directory_index",
+    )
+
+    def __init__(self) -> None:
+        self.directory_names: list[str] = []
+        self.directory_parents: array = array("I")
+        self.directory_totals: array = array("Q")
+        self.directory_locs: array = array("Q")
+        self.directory_commented: array = array("Q")
+
+        self.file_names: bytearray = bytearray()
+        self.file_name_lengths: array = array("H")
+        self.file_totals: array = array("I")
+        self.file_locs: array = array("I")
+        self.file_commented: array = array("I")
+        # Either empty, or holding the metrics of every file
+        self.file_metrics: array = array("Q")
+        self.file_tokens: dict[int, dict[str, int]] = {}
+
+        # Runs of consecutive files sharing a parent directory
+        self.run_parents: array = array("I")
+        self.run_starts: array = array("Q")
+        self.run_name_offsets: array = array("Q")
+
+        self._directory_stack: list[int] = []
+        self._prefix_lengths: list[int] = []
+
+        # Children indices, built on first access through views
+        self._run_index: Optional[tuple[array, array]] = None
+        self._directory_index: Optional[tuple[array, array]] = None
+
+    # RecordSink protocol
+    def enter_directory(self, path: str, /) -> None:
+        if self._directory_stack:
+            parent: int = self._directory_stack[-1]
+            name: str = sys.intern(path[self._prefix_lengths[-1] :])
+        else:
+            parent, name = NO_PARENT, path
+
+        self._directory_stack.append(len(self.directory_names))
+        # Entries of a directory are joined to its path with a separator, unless it already
+        # ends with one (i.e. filesystem roots)
+        self._prefix_lengths.append(
+            len(path) if path.endswith(os.sep) else len(path) + len(os.sep)
+        )
+
+        self.directory_names.append(name)
+        self.directory_parents.append(parent)
+        self.directory_totals.append(0)
+        self.directory_locs.append(0)
+        self.directory_commented.append(0)
+
+        self._run_index = self._directory_index = None
+
+    def add_file(self, path: str, line_data: FileLineData, /) -> None:
+        parent: int = self._directory_stack[-1]
+        if not self.run_parents or self.run_parents[-1] != parent:
+            self.run_parents.append(parent)
+            self.run_starts.append(len(self.file_name_lengths))
+            self.run_name_offsets.append(len(self.file_names))
+            self._run_index = None
+
+        name: bytes = path[self._prefix_lengths[-1] :].encode(
+            "utf-8", "surrogateescape"
+        )
+        self.file_names += name
+        self.file_name_lengths.append(len(name))
+        try:
+            self.file_totals.append(line_data[0])
+        except OverflowError:
+            # Lines of code and comments never exceed the total, which bounds all columns
+            self.file_totals = array("Q", self.file_totals)
+            self.file_locs = array("Q", self.file_locs)
+            self.file_commented = array("Q", self.file_commented)
+            self.file_totals.append(line_data[0])
+        self.file_locs.append(line_data[1])
+        self.file_commented.append(line_data[2])
+        if len(line_data) > 4:
+            extras: FileLineData = line_data[4:]
+            if extras[-1].__class__ is dict:
+                self.file_tokens[len(self.file_totals) - 1] = extras[-1]
+                extras = extras[:-1]
+            self.file_metrics.extend(extras)
+
+    def exit_directory(self, path: str, line_data: FileLineData, /) -> None:
+        directory_index: int = self._directory_stack.pop()
+        self._prefix_lengths.pop()
+        self.directory_totals[directory_index] = line_data[0]
+        self.directory_locs[directory_index] = line_data[1]
+        self.directory_commented[directory_index] = line_data[2]
+
+    # Lookups
+    @property
+    def file_count(self) -> int:
+        return len(self.file_name_lengths)
+
+    @property
+    def directory_count(self) -> int:
+        return len(self.directory_names)
+
+    def directory_path(self, directory_index: int) -> str:
+        segments: list[str] = []
+        while directory_index != NO_PARENT:
+            segments.append(self.directory_names[directory_index])
+            directory_index = self.directory_parents[directory_index]
+        return os.path.join(*reversed(segments))
+
+    def file_line_data(self, file_index: int) -> FileLineData:
+        total, loc, commented = (
+            self.file_totals[file_index],
+            self.file_locs[file_index],
+            self.file_commented[file_index],
+        )
+        line_data: FileLineData = (total, loc, commented, total - loc - commented)
+        if self.file_metrics:
+            stride: int = len(METRIC_KEYS)
+            line_data += tuple(
+                self.file_metrics[file_index * stride : (file_index + 1) * stride]
+            )
+        if file_index in self.file_tokens:
+            line_data += (self.file_tokens[file_index],)
+        return line_data
+
+    def directory_line_data(self, directory_index: int) -> FileLineData:
+        total, loc, commented = (
+            self.directory_totals[directory_index],
+            self.directory_locs[directory_index],
+            self.directory_commented[directory_index],
+        )
+        return total, loc, commented, total - loc - commented
+
+    @staticmethod
+    def _build_children_index(parents: array, parent_count: int) -> tuple[array, array]:
+        """Counting sort of child indices by parent, preserving insertion order per parent"""
+        offsets: array = array("Q", bytes(8 * (parent_count + 1)))
+        for parent in parents:
+            if parent != NO_PARENT:
+                offsets[parent + 1] += 1
+        for i in range(parent_count):
+            offsets[i + 1] += offsets[i]
+
+        cursors: array = array("Q", offsets)
+        children: array = array("I", bytes(4 * offsets[parent_count]))
+        for child, parent in enumerate(parents):
+            if parent != NO_PARENT:
+                children[cursors[parent]] = child
+                cursors[parent] += 1
+        return offsets, children
+
+    def child_runs(self, directory_index: int) -> array:
+        if self._run_index is None:
+            self._run_index = self._build_children_index(
+                self.run_parents, self.directory_count
+            )
+        offsets, children = self._run_index
+        return children[offsets[directory_index] : offsets[directory_index + 1]]
+
+    def child_directories(self, directory_index: int) -> array:
+        if self._directory_index is None:
+            self._directory_index = self._build_children_index(
+                self.directory_parents, self.directory_count
+            )
+        offsets, children = self._directory_index
+        return children[offsets[directory_index] : offsets[directory_index + 1]]
+
+    def run_end(self, run: int) -> int:
+        return (
+            self.run_starts[run + 1]
+            if run + 1 < len(self.run_starts)
+            else self.file_count
+        )
+
+    def iter_files(self, runs: array) -> Iterator[tuple[int, str]]:
+        """Iterate over indices and names of files belonging to the given runs"""
+        for run in runs:
+            name_offset: int = self.run_name_offsets[run]
+            for file_index in range(self.run_starts[run], self.run_end(run)):
+                name_end: int = name_offset + self.file_name_lengths[file_index]
+                yield file_index, self.file_names[name_offset:name_end].decode(
+                    "utf-8", "surrogateescape"
+                )
+                name_offset = name_end
+
+    def root_view(self) -> "DirectoryView":
+        if not self.directory_names:
+            raise ValueError("No directory recorded in result store")
+        return DirectoryView(self, 0, self.directory_names[0])
+
+
+class FilesView(Mapping[str, dict[str, int]]):
+    """Lazy mapping of a directory's file paths to their line data"""
+
+    __slots__ = ("_store", "_directory_path", "_runs", "_indices")
+
+    def __init__(
+        self, store: DetailedResultStore, directory_index: int, directory_path: str
+    ) -> None:
+        self._store = store
+        self._directory_path = directory_path
+        self._runs: array = store.child_runs(directory_index)
+        # File indices by name, built on first lookup
+        self._indices: Optional[dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return sum(
+            self._store.run_end(run) - self._store.run_starts[run] for run in self._runs
+        )
+
+    def __iter__(self) -> Iterator[str]:
+        return (
+            os.path.join(self._directory_path, name)
+            for _, name in self._store.iter_files(self._runs)
+        )
+
+    def _file_index(self, key: object) -> Optional[int]:
+        if not isinstance(key, str):
+            return None
+        if self._indices is None:
+            self._indices = {
+                name: file_index
+                for file_index, name in self._store.iter_files(self._runs)
+            }
+        name: str = os.path.basename(key)
+        if os.path.join(self._directory_path, name) != key:
+            return None
+        return self._indices.get(name)
+
+    def __contains__(self, key: object) -> bool:
+        return self._file_index(key) is not None
+
+    def __getitem__(self, key: str) -> dict[str, int]:
+        file_index: Optional[int] = self._file_index(key)
+        if file_index is None:
+            raise KeyError(key)
+        return self._line_data_mapping(file_index)
+
+    def _line_data_mapping(self, file_index: int) -> dict[str, int]:
+        total, loc, commented, blank, *metrics = self._store.file_line_data(file_index)
+        mapping: dict[str, Any] = {
+            OutputKeys.LOC: loc,
+            OutputKeys.TOTAL: total,
+            OutputKeys.COMMENTED: commented,
+            OutputKeys.BLANK: blank,
+        }
+        if metrics:
+            mapping.update(metrics_mapping(total, metrics))
+        return mapping
+
+    def items(self) -> Iterator[tuple[str, dict[str, int]]]:  # type: ignore[override]
+        for file_index, name in self._store.iter_files(self._runs):
+            yield os.path.join(self._directory_path, name), self._line_data_mapping(
+                file_index
+            )
+
+
+class SubdirectoriesView(Mapping[str, "DirectoryView"]):
+    """Lazy mapping of a directory's subdirectory names to their views"""
+
+    __slots__ = ("_store", "_directory_path", "_directory_indices", "_indices")
+
+    def __init__(
+        self, store: DetailedResultStore, directory_index: int, directory_path: str
+    ) -> None:
+        self._store = store
+        self._directory_path = directory_path
+        self._directory_indices: array = store.child_directories(directory_index)
+        # Directory indices by name, built on first lookup
+        self._indices: Optional[dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self._directory_indices)
+
+    def __iter__(self) -> Iterator[str]:
+        return (
+            self._store.directory_names[directory_index]
+            for directory_index in self._directory_indices
+        )
+
+    def __getitem__(self, key: str) -> "DirectoryView":
+        if self._indices is None:
+            self._indices = {
+                self._store.directory_names[directory_index]: directory_index
+                for directory_index in self._directory_indices
+            }
+        return self._view(self._indices[key])
+
+    def _view(self, directory_index: int) -> "DirectoryView":
+        return DirectoryView(
+            self._store,
+            directory_index,
+            os.path.join(
+                self._directory_path, self._store.directory_names[directory_index]
+            ),
+        )
+
+    def items(self) -> Iterator[tuple[str, "DirectoryView"]]:  # type: ignore[override]
+        for directory_index in self._directory_indices:
+            yield self._store.directory_names[directory_index], self._view(
+                directory_index
+            )
+
+
+class DirectoryView(Mapping[str, Any]):
+    """
+    Lazy mapping over a single directory of a DetailedResultStore,
+    laid out identically to the mappings returned by parse_directory_verbose
+    """
+
+    __slots__ = ("_store", "_directory_index", "_directory_path")
+
+    KEYS: Final[tuple[OutputKeys, ...]] = (
+        OutputKeys.FILES,
+        OutputKeys.SUBDIRECTORIES,
+        OutputKeys.TOTAL,
+        OutputKeys.LOC,
+        OutputKeys.COMMENTED,
+        OutputKeys.BLANK,
+    )
+
+    def __init__(
+        self, store: DetailedResultStore, directory_index: int, directory_path: str
+    ) -> None:
+        self._store = store
+        self._directory_index = directory_index
+        self._directory_path = directory_path
+
+    @property
+    def path(self) -> str:
+        return self._directory_path
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.KEYS)
+
+    def __getitem__(self, key: str) -> Any:
+        if key == OutputKeys.FILES:
+            return FilesView(self._store, self._directory_index, self._directory_path)
+        if key == OutputKeys.SUBDIRECTORIES:
+            return SubdirectoriesView(
+                self._store, self._directory_index, self._directory_path
+            )
+        total, loc, commented, blank = self._store.directory_line_data(
+            self._directory_index
+        )
+        if key == OutputKeys.TOTAL:
+            return total
+        if key == OutputKeys.LOC:
+            return loc
+        if key == OutputKeys.COMMENTED:
+            return commented
+        if key == OutputKeys.BLANK:
+            return blank
+        raise KeyError(key)
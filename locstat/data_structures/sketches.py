@@ -0,0 +1,196 @@
+import heapq
+import math
+import os
+from itertools import count
+from typing import Any, Final, Iterator, Optional
+
+from locstat.data_structures.output_keys import OutputKeys
+from locstat.data_structures.typing import FileLineData, RecordSink
+
+__all__ = ("TopN", "QuantileSketch", "DistributionReport")
+
+
+class TopN:
+    """
+    Bounded min-heap retaining the highest scoring entries pushed into it.
+    Ties are resolved in favour of entries pushed first
+    """
+
+    __slots__ = ("limit", "_heap", "_counter")
+
+    def __init__(self, limit: int) -> None:
+        if limit <= 0:
+            raise ValueError("Number of retained entries must be positive")
+        self.limit: int = limit
+        self._heap: list[tuple[float, int, Any]] = []
+        self._counter: Iterator[int] = count(0, -1)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, score: float, entry: Any) -> None:
+        if len(self._heap) < self.limit:
+            heapq.heappush(self._heap, (score, next(self._counter), entry))
+        elif score > self._heap[0][0]:
+            heapq.heapreplace(self._heap, (score, next(self._counter), entry))
+
+    def ranked(self) -> list[tuple[float, Any]]:
+        """Retained entries alongside their scores, highest scoring first"""
+        return [(score, entry) for score, _, entry in sorted(self._heap, reverse=True)]
+
+
+class QuantileSketch:
+    """
+    Streaming quantile estimator over non-negative values, with bounded relative error.
+
+    Values are counted in logarithmically sized buckets, such that any estimated quantile
+    lies within `relative_accuracy` of the true value. The number of buckets grows with the
+    logarithm of the largest value added, and not with the number of values
+    """
+
+    __slots__ = (
+        "relative_accuracy",
+        "count",
+        "minimum",
+        "maximum",
+        "_gamma",
+        "_log_gamma",
+        "_zero_count",
+        "_buckets",
+    )
+
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("Relative accuracy must lie between 0 and 1")
+        self.relative_accuracy: float = relative_accuracy
+        self.count: int = 0
+        self.minimum: int = 0
+        self.maximum: int = 0
+        self._gamma: float = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma: float = math.log(self._gamma)
+        self._zero_count: int = 0
+        self._buckets: dict[int, int] = {}
+
+    def add(self, value: int) -> None:
+        if not self.count:
+            self.minimum = self.maximum = value
+        elif value < self.minimum:
+            self.minimum = value
+        elif value > self.maximum:
+            self.maximum = value
+        self.count += 1
+
+        if value <= 0:
+            self._zero_count += 1
+            return
+        bucket: int = math.ceil(math.log(value) / self._log_gamma)
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+
+    def quantile(self, q: float) -> int:
+        """
+        Estimate the value at the given quantile
+
+        :param q: Quantile to estimate, between 0 and 1
+        :type q: float
+
+        :return: Estimated value, rounded to the nearest integer. 0 if no values were added
+        :rtype: int
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must lie between 0 and 1")
+        if not self.count:
+            return 0
+
+        # Nearest rank, i.e. the smallest value with at least q of all values at or below it
+        rank: int = max(math.ceil(q * self.count), 1)
+        seen: int = self._zero_count
+        if rank <= seen:
+            return 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= rank:
+                estimate: float = 2 * self._gamma**bucket / (self._gamma + 1)
+                return min(max(round(estimate), self.minimum), self.maximum)
+        return self.maximum
+
+
+class DistributionReport:
+    """
+    Record sink ranking the largest files and estimating file size percentiles per
+    file extension, using memory independent of the number of files parsed.
+
+    Records are optionally forwarded to a downstream sink, so that the report can be
+    computed alongside any other consumer of a directory walk
+    """
+
+    __slots__ = ("_rankings", "_sketches", "_downstream")
+
+    COMMENT_RATIO: Final[str] = "comment_ratio"
+    QUANTILES: Final[tuple[float, ...]] = (0.5, 0.9, 0.99)
+
+    def __init__(self, limit: int, downstream: Optional[RecordSink] = None) -> None:
+        self._rankings: dict[str, TopN] = {
+            OutputKeys.TOTAL: TopN(limit),
+            OutputKeys.LOC: TopN(limit),
+            self.COMMENT_RATIO: TopN(limit),
+        }
+        self._sketches: dict[str, QuantileSketch] = {}
+        self._downstream: Optional[RecordSink] = downstream
+
+    # RecordSink protocol
+    def enter_directory(self, path: str, /) -> None:
+        if self._downstream is not None:
+            self._downstream.enter_directory(path)
+
+    def add_file(self, path: str, line_data: FileLineData, /) -> None:
+        total, loc, commented, *_ = line_data
+        self._rankings[OutputKeys.TOTAL].push(total, (path, line_data))
+        self._rankings[OutputKeys.LOC].push(loc, (path, line_data))
+        self._rankings[self.COMMENT_RATIO].push(
+            commented / total if total else 0.0, (path, line_data)
+        )
+
+        extension: str = os.path.basename(path).rsplit(".", 1)[-1]
+        sketch: Optional[QuantileSketch] = self._sketches.get(extension)
+        if sketch is None:
+            sketch = self._sketches[extension] = QuantileSketch()
+        sketch.add(total)
+
+        if self._downstream is not None:
+            self._downstream.add_file(path, line_data)
+
+    def exit_directory(self, path: str, line_data: FileLineData, /) -> None:
+        if self._downstream is not None:
+            self._downstream.exit_directory(path, line_data)
+
+    def to_mapping(self) -> dict[str, Any]:
+        """
+        :return: Mapping of rankings to their files, and of file extensions to percentiles
+        of their files' total lines
+        :rtype: dict[str, Any]
+        """
+        top: dict[str, list[dict[str, Any]]] = {}
+        for ranking, heap in self._rankings.items():
+            entries: list[dict[str, Any]] = []
+            for score, (path, (total, loc, commented, blank, *_)) in heap.ranked():
+                entry: dict[str, Any] = {
+                    "path": path,
+                    OutputKeys.TOTAL: total,
+                    OutputKeys.LOC: loc,
+                    OutputKeys.COMMENTED: commented,
+                    OutputKeys.BLANK: blank,
+                }
+                if ranking == self.COMMENT_RATIO:
+                    entry[self.COMMENT_RATIO] = round(score, 4)
+                entries.append(entry)
+            top[ranking] = entries
+
+        distribution: dict[str, dict[str, int]] = {}
+        for extension, sketch in self._sketches.items():
+            percentiles: dict[str, int] = {OutputKeys.FILES: sketch.count}
+            for q in self.QUANTILES:
+                percentiles[f"p{q * 100:g}"] = sketch.quantile(q)
+            percentiles["max"] = sketch.maximum
+            distribution[extension] = percentiles
+
+        return {OutputKeys.TOP: top, OutputKeys.DISTRIBUTION: distribution}
@@ -0,0 +1,110 @@
+"""
+Tokens counted per extension by the parsing extension, in the same pass as line counts,
+by parsers derived with `tokens`, see `derive_file_parser`.
+
+Tokens are given per extension, and per region they are counted in: "code", "comment"
+or "any". Tokens of the "*" extension are counted for every extension. Tokens made of
+identifier characters only, e.g. TODO or unsafe, are matched as whole words, whereas
+others, e.g. "eval(" or "#pragma", are matched wherever they occur. Matching is case
+sensitive, and string literals count as code.
+
+Parsers of files with tokens to count return a mapping of every token to its count past
+their line counts, and extended metrics if gathered. Counts are summed per extension and
+overall, under TOKENS.
+"""
+
+import json
+from typing import Any, Final, Iterable, Mapping
+
+from locstat.data_structures.output_keys import OutputKeys
+
+__all__ = (
+    "TOKEN_REGIONS",
+    "TokenSpec",
+    "TokenTable",
+    "compile_tokens",
+    "load_tokens",
+    "add_tokens",
+)
+
+TOKEN_REGIONS: Final[dict[str, int]] = {"code": 1, "comment": 2, "any": 3}
+# Extensions mapped to regions, mapped to tokens counted in them
+TokenSpec = Mapping[str, Mapping[str, Iterable[str]]]
+# Extensions of files to tokens counted in them, and the regions they are counted in
+TokenTable = dict[str, tuple[tuple[bytes, int], ...]]
+
+
+def compile_tokens(tokens: TokenSpec) -> TokenTable:
+    """
+    Compile tokens to count per extension and region into the table expected by the
+    parsing extension, adding tokens of the "*" extension to those of every extension
+
+    :param tokens: Extensions mapped to regions, mapped to tokens counted in them
+    :type tokens: TokenSpec
+
+    :raises ValueError: If a region is unknown, a token is not a non-empty string, or
+    is counted in several regions of an extension
+
+    :return: Token table of every extension
+    :rtype: TokenTable
+    """
+    regions: dict[str, dict[str, int]] = {}
+    for extension, extension_tokens in tokens.items():
+        extension_regions: dict[str, int] = regions.setdefault(extension, {})
+        for region, region_tokens in extension_tokens.items():
+            if region not in TOKEN_REGIONS:
+                raise ValueError(
+                    f"Unknown region {region} of .{extension} tokens, supported regions: {', '.join(TOKEN_REGIONS)}"
+                )
+            if isinstance(region_tokens, str):
+                raise ValueError(f"Tokens of .{extension} must be given as a list")
+            for token in region_tokens:
+                if not isinstance(token, str) or not token:
+                    raise ValueError(
+                        f"Tokens of .{extension} must be non-empty strings"
+                    )
+                if extension_regions.get(token, TOKEN_REGIONS[region]) != (
+                    TOKEN_REGIONS[region]
+                ):
+                    raise ValueError(
+                        f"Token {token} of .{extension} is given for several regions, count it in 'any' instead"
+                    )
+                extension_regions[token] = TOKEN_REGIONS[region]
+
+    shared: dict[str, int] = regions.get("*", {})
+    table: TokenTable = {}
+    for extension, extension_regions in regions.items():
+        merged: dict[str, int] = dict(shared)
+        for token, region in extension_regions.items():
+            # Tokens counted in different regions everywhere and for an extension
+            merged[token] = merged.get(token, region) | region
+        table[extension] = tuple(
+            (token.encode("utf-8", "surrogateescape"), region)
+            for token, region in merged.items()
+        )
+    return table
+
+
+def load_tokens(filepath: str) -> TokenSpec:
+    """
+    :return: Tokens of a JSON file mapping extensions to regions, mapped to lists of
+    tokens, e.g. {"*": {"comment": ["TODO"]}, "rs": {"code": ["unsafe"]}}
+    :rtype: TokenSpec
+
+    :raises ValueError: If the file is not valid JSON, or tokens are invalid
+    """
+    with open(filepath, "r", encoding="utf-8") as file:
+        tokens: Any = json.load(file)
+    if not isinstance(tokens, dict) or not all(
+        isinstance(extension_tokens, dict) for extension_tokens in tokens.values()
+    ):
+        raise ValueError("Tokens must map extensions to regions, mapped to tokens")
+    compile_tokens(tokens)
+    return tokens
+
+
+def add_tokens(record: dict[str, Any], tokens: Mapping[str, int]) -> None:
+    """Add token counts, of a file or of a record, to those of a record"""
+    counts: dict[str, int] = record.setdefault(OutputKeys.TOKENS, {})
+    for token, count in tokens.items():
+        counts[token] = counts.get(token, 0) + count
@@ -1,5 +1,14 @@
 import os
-from typing import Any, Optional, Protocol, TypeAlias, TypeVar, Union
+from typing import (
+    Any,
+    Callable,
+    Iterator,
+    Optional,
+    Protocol,
+    TypeAlias,
+    TypeVar,
+    Union,
+)
 
 __all__ = (
     "LanguageMetadata",
@@ -8,10 +17,15 @@ __all__ = (
     "SupportsBuffer",
     "FileParsingFunction",
     "SupportsMembershipChecks",
+    "RecordSink",
+    "DirectoryEntries",
+    "ScandirFunction",
 )
 
 LanguageMetadata: TypeAlias = tuple[Optional[bytes], Optional[bytes], Optional[bytes]]
-FileLineData: TypeAlias = tuple[int, int, int, int]
+# Total, loc, commented and blank lines, followed by extended metrics if gathered, and
+# by a mapping of token counts if counted
+FileLineData: TypeAlias = tuple[Any, ...]
 
 
 class OutputFunction(Protocol):
@@ -19,6 +33,8 @@ class OutputFunction(Protocol):
         self,
         output_mapping: dict[str, Any],
         filepath: Union[str, os.PathLike[str], int],
+        sort_keys: bool = False,
+        root: Optional[str] = None,
     ) -> None: ...
 
 
@@ -45,3 +61,26 @@ T = TypeVar("T", covariant=True)
 
 class SupportsMembershipChecks(Protocol[T]):
     def __contains__(self, o: object, /) -> bool: ...
+
+
+class RecordSink(Protocol):
+    def enter_directory(self, path: str, /) -> None: ...
+
+    def add_file(self, path: str, line_data: FileLineData, /) -> None: ...
+
+    def exit_directory(self, path: str, line_data: FileLineData, /) -> None: ...
+
+
+class DirectoryEntries(Protocol):
+    """Iterator over a directory's entries, closed on exit as done by os.scandir"""
+
+    def __iter__(self) -> Iterator[os.DirEntry[str]]: ...
+
+    def __next__(self) -> os.DirEntry[str]: ...
+
+    def __enter__(self) -> "DirectoryEntries": ...
+
+    def __exit__(self, *args: Any) -> Any: ...
+
+
+ScandirFunction: TypeAlias = Callable[[str], DirectoryEntries]
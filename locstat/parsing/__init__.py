@@ -1,12 +1,19 @@
 """Subpackage to encapsulate parsing logic"""
 
-from .directory import parse_directory, parse_directory_verbose
-from .extensions._parsing import _parse_file, _parse_file_no_chunk, _parse_file_vm_map
+from .directory import parse_directory, parse_directory_stream, parse_directory_verbose
+from .extensions._parsing import (
+    _parse_file,
+    _parse_file_auto,
+    _parse_file_no_chunk,
+    _parse_file_vm_map,
+)
 
 __all__ = (
     "_parse_file",
+    "_parse_file_auto",
     "_parse_file_no_chunk",
     "_parse_file_vm_map",
     "parse_directory",
+    "parse_directory_stream",
     "parse_directory_verbose",
 )
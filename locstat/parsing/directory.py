@@ -3,10 +3,25 @@ from array import array
 from typing import Any, Callable, Iterator, Optional
 
 from locstat.data_structures.config import ClocConfig
-from locstat.data_structures.typing import FileParsingFunction
+from locstat.data_structures.metrics import (
+    add_metrics,
+    finalize_metrics,
+    metrics_mapping,
+)
+from locstat.data_structures.typing import (
+    FileLineData,
+    FileParsingFunction,
+    RecordSink,
+    ScandirFunction,
+)
 from locstat.data_structures.output_keys import OutputKeys
 
-__all__ = ("parse_directory", "parse_directory_record", "parse_directory_verbose")
+__all__ = (
+    "parse_directory",
+    "parse_directory_record",
+    "parse_directory_verbose",
+    "parse_directory_stream",
+)
 
 
 def parse_directory(
@@ -18,6 +33,7 @@ def parse_directory(
     file_filter_function: Callable[[str, str], bool] = lambda filename, extension: True,
     directory_filter_function: Callable = lambda _: False,
     minimum_characters: int = 0,
+    scandir_function: Optional[ScandirFunction] = None,
 ) -> None:
     """
     Parse directory and calculate LOC and total lines
@@ -43,12 +59,16 @@ def parse_directory(
     :param minimum_characters: Minimum characters per line for it to be counted as a line of code
     :type minimum_characters: int
 
+    :param scandir_function: Function listing subdirectories' entries, os.scandir by default
+    :type scandir_function: Optional[ScandirFunction]
+
     :param depth: Sub-directory traversal depth
     :type depth: int
 
     :return: Passed line_data array is updated
     :rtype: NoneType
     """
+    scandir: ScandirFunction = scandir_function or os.scandir
     for dir_entry in directory_data:
         if dir_entry.is_symlink():
             continue
@@ -76,7 +96,7 @@ def parse_directory(
         if not directory_filter_function(dir_entry.path):
             continue
         parse_directory(
-            os.scandir(dir_entry.path),
+            scandir(dir_entry.path),
             config,
             line_data,
             depth - 1,
@@ -84,6 +104,7 @@ def parse_directory(
             file_filter_function,
             directory_filter_function,
             minimum_characters,
+            scandir,
         )
 
 
@@ -97,6 +118,7 @@ def parse_directory_record(
     file_filter_function: Callable[[str, str], bool] = lambda filename, extension: True,
     directory_filter_function: Callable = lambda _: False,
     minimum_characters: int = 0,
+    scandir_function: Optional[ScandirFunction] = None,
 ) -> None:
     """
     Parse directory and calculate LOC and total lines, aggregating by file extensions as well
@@ -110,7 +132,8 @@ def parse_directory_record(
     :param line_data: 2-element integer sequence to store total lines and LOC
     :type line_data: array.array
 
-    :param language_record: Mapping to store total lines and LOC per file extension
+    :param language_record: Mapping to store total lines and LOC per file extension,
+    alongside extended metrics if gathered
     :type language_record: dict[str, dict[str, int]]
 
     :param file_parsing_function: Parsing function called for each file
@@ -125,12 +148,16 @@ def parse_directory_record(
     :param minimum_characters: Minimum characters per line for it to be counted as a line of code
     :type minimum_characters: int
 
+    :param scandir_function: Function listing subdirectories' entries, os.scandir by default
+    :type scandir_function: Optional[ScandirFunction]
+
     :param depth: Sub-directory traversal depth
     :type depth: int
 
     :return: Passed line_data array is updated
     :rtype: NoneType
     """
+    scandir: ScandirFunction = scandir_function or os.scandir
     for dir_entry in directory_data:
         if dir_entry.is_symlink():
             continue
@@ -154,7 +181,7 @@ def parse_directory_record(
                     OutputKeys.FILES: 0,
                 },
             )
-            tl, l, c, *_ = file_parsing_function(
+            tl, l, c, _, *metrics = file_parsing_function(
                 dir_entry.path, singleLine, multi_start, multi_end, minimum_characters
             )
             line_data[0] += tl
@@ -165,6 +192,8 @@ def parse_directory_record(
             language_record[extension][OutputKeys.LOC] += l
             language_record[extension][OutputKeys.COMMENTED] += c
             language_record[extension][OutputKeys.FILES] += 1
+            if metrics:
+                add_metrics(language_record[extension], metrics)
             continue
 
         if not depth:
@@ -173,7 +202,7 @@ def parse_directory_record(
         if not directory_filter_function(dir_entry.path):
             continue
         parse_directory_record(
-            os.scandir(dir_entry.path),
+            scandir(dir_entry.path),
             config,
             line_data,
             language_record,
@@ -182,6 +211,7 @@ def parse_directory_record(
             file_filter_function,
             directory_filter_function,
             minimum_characters,
+            scandir,
         )
 
     for extension in language_record:
@@ -190,6 +220,7 @@ def parse_directory_record(
             - language_record[extension][OutputKeys.LOC]
             - language_record[extension][OutputKeys.COMMENTED]
         )
+        finalize_metrics(language_record[extension])
 
 
 def parse_directory_verbose(
@@ -201,6 +232,7 @@ def parse_directory_verbose(
     file_filter_function: Callable[[str, str], bool] = lambda filename, extension: True,
     directory_filter_function: Callable = lambda _: False,
     minimum_characters: int = 0,
+    scandir_function: Optional[ScandirFunction] = None,
     *,
     output_mapping: Optional[dict[str, Any]] = None,
 ) -> dict[str, Any]:
@@ -213,7 +245,8 @@ def parse_directory_verbose(
     :param config: Caller's configuration instance
     :type config: ClocConfig
 
-    :param language_record: Mapping to store total lines and LOC per file extension
+    :param language_record: Mapping to store total lines and LOC per file extension,
+    alongside extended metrics if gathered
     :type language_record: dict[str, dict[str, int]]
 
     :param file_parsing_function: Parsing function called for each file
@@ -228,6 +261,9 @@ def parse_directory_verbose(
     :param minimum_characters: Minimum characters per line for it to be counted as a line of code
     :type minimum_characters: int
 
+    :param scandir_function: Function listing subdirectories' entries, os.scandir by default
+    :type scandir_function: Optional[ScandirFunction]
+
     :param depth: Sub-directory traversal depth
     :type depth: int
 
@@ -238,6 +274,7 @@ def parse_directory_verbose(
     :return: Mapping of LOC and line information
     :rtype: dict[str, Any]
     """
+    scandir: ScandirFunction = scandir_function or os.scandir
 
     if output_mapping is None:
         output_mapping = {}
@@ -270,7 +307,7 @@ def parse_directory_verbose(
                 },
             )
 
-            file_total, file_loc, commented, blank = file_parsing_function(
+            file_total, file_loc, commented, blank, *metrics = file_parsing_function(
                 dir_entry.path,
                 single,
                 multi_start,
@@ -293,9 +330,12 @@ def parse_directory_verbose(
                 OutputKeys.COMMENTED: commented,
                 OutputKeys.BLANK: blank,
             }
+            if metrics:
+                add_metrics(language_record[extension], metrics)
+                files[dir_entry.path].update(metrics_mapping(file_total, metrics))
 
         elif depth and dir_entry.is_dir() and directory_filter_function(dir_entry.path):
-            with os.scandir(dir_entry.path) as directory_iterator:
+            with scandir(dir_entry.path) as directory_iterator:
                 child = parse_directory_verbose(
                     directory_iterator,
                     config,
@@ -305,6 +345,7 @@ def parse_directory_verbose(
                     file_filter_function,
                     directory_filter_function,
                     minimum_characters,
+                    scandir,
                 )
 
             subdirectories[dir_entry.name] = child
@@ -329,5 +370,151 @@ def parse_directory_verbose(
             - language_record[extension][OutputKeys.LOC]
             - language_record[extension][OutputKeys.COMMENTED]
         )
+        finalize_metrics(language_record[extension])
 
     return output_mapping
+
+
+def parse_directory_stream(
+    directory_data: Iterator[os.DirEntry[str]],
+    directory_path: str,
+    config: ClocConfig,
+    language_record: dict[str, dict[str, int]],
+    record_sink: RecordSink,
+    depth: int,
+    file_parsing_function: FileParsingFunction,
+    file_filter_function: Callable[[str, str], bool] = lambda filename, extension: True,
+    directory_filter_function: Callable = lambda _: False,
+    minimum_characters: int = 0,
+    scandir_function: Optional[ScandirFunction] = None,
+) -> FileLineData:
+    """
+    Parse directory and hand over per file and per directory line data to a record sink
+    as soon as it is available, without retaining it. Memory usage is bounded by the depth
+    of the directory tree rather than the number of files in it
+
+    :param directory_data: Iterator over top directory
+    :type directory_data: Iterator[os.DirEntry[str]]
+
+    :param directory_path: Path of the directory being iterated over
+    :type directory_path: str
+
+    :param config: Caller's configuration instance
+    :type config: ClocConfig
+
+    :param language_record: Mapping to store total lines and LOC per file extension,
+    alongside extended metrics if gathered
+    :type language_record: dict[str, dict[str, int]]
+
+    :param record_sink: Sink receiving file records, and directory records once
+    all of the directory's children have been parsed
+    :type record_sink: RecordSink
+
+    :param file_parsing_function: Parsing function called for each file
+    :type config: FileParsingFunction
+
+    :param file_filter_function: Filter function to include/exclude files
+    :type file_filter_function: Callable
+
+    :param directory_filter_function: Filter function to exclude/include directories
+    :type directory_filter_function: Callable
+
+    :param minimum_characters: Minimum characters per line for it to be counted as a line of code
+    :type minimum_characters: int
+
+    :param scandir_function: Function listing subdirectories' entries, os.scandir by default
+    :type scandir_function: Optional[ScandirFunction]
+
+    :param depth: Sub-directory traversal depth
+    :type depth: int
+
+    :return: Total lines, LOC, commented lines and blank lines of the directory
+    :rtype: FileLineData
+    """
+    scandir: ScandirFunction = scandir_function or os.scandir
+    record_sink.enter_directory(directory_path)
+    directory_total = directory_loc = directory_commented = 0
+
+    for dir_entry in directory_data:
+        if dir_entry.is_symlink():
+            continue
+        if dir_entry.is_file(follow_symlinks=False):
+            extension = dir_entry.name.rsplit(".", 1)[-1]
+            if not file_filter_function(dir_entry.path, extension):
+                continue
+
+            single, multi_start, multi_end = config.symbol_mapping.get(
+                extension, (None, None, None)
+            )
+            if not (single or multi_start):
+                continue
+
+            language_record.setdefault(
+                extension,
+                {
+                    OutputKeys.TOTAL: 0,
+                    OutputKeys.LOC: 0,
+                    OutputKeys.COMMENTED: 0,
+                    OutputKeys.FILES: 0,
+                },
+            )
+
+            file_line_data: FileLineData = file_parsing_function(
+                dir_entry.path,
+                single,
+                multi_start,
+                multi_end,
+                minimum_characters,
+            )
+            file_total, file_loc, commented, _, *metrics = file_line_data
+
+            language_record[extension][OutputKeys.TOTAL] += file_total
+            language_record[extension][OutputKeys.LOC] += file_loc
+            language_record[extension][OutputKeys.COMMENTED] += commented
+            language_record[extension][OutputKeys.FILES] += 1
+            if metrics:
+                add_metrics(language_record[extension], metrics)
+
+            directory_total += file_total
+            directory_loc += file_loc
+            directory_commented += commented
+
+            record_sink.add_file(dir_entry.path, file_line_data)
+
+        elif depth and dir_entry.is_dir() and directory_filter_function(dir_entry.path):
+            with scandir(dir_entry.path) as directory_iterator:
+                child_total, child_loc, child_commented, _ = parse_directory_stream(
+                    directory_iterator,
+                    dir_entry.path,
+                    config,
+                    language_record,
+                    record_sink,
+                    depth - 1,
+                    file_parsing_function,
+                    file_filter_function,
+                    directory_filter_function,
+                    minimum_characters,
+                    scandir,
+                )
+
+            directory_total += child_total
+            directory_loc += child_loc
+            directory_commented += child_commented
+
+    directory_line_data: FileLineData = (
+        directory_total,
+        directory_loc,
+        directory_commented,
+        directory_total - directory_loc - directory_commented,
+    )
+    record_sink.exit_directory(directory_path, directory_line_data)
+
+    for extension in language_record:
+        language_record[extension][OutputKeys.BLANK] = (
+            language_record[extension][OutputKeys.TOTAL]
+            - language_record[extension][OutputKeys.LOC]
+            - language_record[extension][OutputKeys.COMMENTED]
+        )
+        finalize_metrics(language_record[extension])
+
+    return directory_line_data
@@ -1,14 +1,53 @@
 #include <stdbool.h>
 #include "_parsing_prinitives.h"
 #include "_comment_data.h"
+#include "_parsing_stats.h"
+#include "_parsing_memory.h"
+#include "_parsing_trace.h"
+#include "_parsing_cache.h"
+#include "_parsing_metrics.h"
+#include "_parsing_tokens.h"
+#include "_parsing_options.h"
 
 #define uchar_sentinel '0'
+// Buffers of files up to this size live on the stack, sparing an allocation
+#define auto_stack_buffer_size (16 * 1024)
+/* Memory mapped files are mapped, parsed and unmapped in windows of this size, a multiple
+   of every page size, so that huge files reserve bounded address ranges */
+#define mmap_window_size (16 * 1024 * 1024)
+// Mappings of files up to this size are populated at once, sparing a fault per page
+#define mmap_populate_size (1024 * 1024)
+
+// Arguments of parsers are positional only, but for their options
+static char *parser_keywords[] = {"", "", "", "", "", "options", NULL};
+
+/* Parse a chunk of a file, gathering extended metrics and counting tokens alongside its
+   lines if requested */
+static inline void
+_parse_chunk(unsigned char *buffer, size_t buffer_size,
+             Py_ssize_t minimum_characters, int *valid_symbols,
+             int *total_lines, int *loc, int *commented_lines,
+             struct CommentData *comment_data, struct FileMetrics *metrics,
+             struct TokenCounts *tokens){
+    if (metrics || tokens){
+        _parse_buffer_extended(buffer, buffer_size,
+                               minimum_characters, valid_symbols,
+                               total_lines, loc, commented_lines,
+                               comment_data, metrics, tokens);
+    } else {
+        _parse_buffer(buffer, buffer_size,
+                      minimum_characters, valid_symbols,
+                      total_lines, loc, commented_lines,
+                      comment_data);
+    }
+}
 
 #ifdef _WIN32
 
 #include <windows.h>
+#include <io.h>
 static PyObject *
-_parse_file_vm_map(PyObject *self, PyObject *args){
+_parse_file_vm_map(PyObject *self, PyObject *args, PyObject *kwargs){
     const char *filename,
     *singleline_character,
     *multiline_start_character, *multiline_end_character;
@@ -18,30 +57,51 @@ _parse_file_vm_map(PyObject *self, PyObject *args){
     multiline_end_length,
     minimum_characters;
 
-    if (!PyArg_ParseTuple(args,
-        "sz#z#z#n",
+    PyObject *options_capsule = NULL;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs,
+        "sz#z#z#n|$O", parser_keywords,
         &filename,
         &singleline_character, &singleline_length,
         &multiline_start_character, &multiline_start_length,
         &multiline_end_character, &multiline_end_length,
-        &minimum_characters)){
+        &minimum_characters, &options_capsule)){
             return NULL;
     }
+    struct ParseOptions default_options;
+    const struct ParseOptions *options = options_resolve(options_capsule, &default_options);
+    if (!options){
+        return NULL;
+    }
 
+    const bool collect = stats_collecting();
+    struct FileMetrics file_metrics;
+    struct FileMetrics *metrics = options->metrics ? metrics_init(&file_metrics) : NULL;
+    uint64_t mark = collect ? monotonic_ns() : 0;
     const HANDLE file_handle = CreateFile(filename, GENERIC_READ, FILE_SHARE_READ, NULL,
         OPEN_EXISTING, FILE_ATTRIBUTE_READONLY, NULL);
+    if (collect){
+        stats_add(&parsing_stats.open_calls, 1);
+        stats_add(&parsing_stats.stat_calls, 1);
+    }
 
     if (file_handle == INVALID_HANDLE_VALUE){
         PyErr_SetFromWindowsErrWithFilename(0, filename);
         return NULL;
     }
+    struct TokenCounts file_tokens;
+    struct TokenCounts *tokens = tokens_acquire(options->tokens, filename, &file_tokens);
 
     LARGE_INTEGER filesize;
     GetFileSizeEx(file_handle, &filesize);
 
     if (filesize.QuadPart == 0){
         CloseHandle(file_handle);
-        return Py_BuildValue("iiii", 0, 0, 0, 0);
+        if (collect){
+            stats_lap(&parsing_stats.io_ns, &mark, SPAN_OPEN);
+            stats_add(&parsing_stats.files, 1);
+        }
+        progress_add(0);
+        return line_data_value(0, 0, 0, metrics, tokens);
     }
 
     const HANDLE mapping_handle = CreateFileMapping(file_handle, NULL, PAGE_READONLY, 0, 0, NULL);
@@ -59,6 +119,11 @@ _parse_file_vm_map(PyObject *self, PyObject *args){
         return NULL;
     }
 
+    if (collect){
+        stats_add(&parsing_stats.map_calls, 1);
+        stats_lap(&parsing_stats.io_ns, &mark, SPAN_MAP);
+    }
+
     const unsigned char *view = (unsigned char *) mapped_region;
     int total_lines = 0, loc = 0, commented_lines = 0, valid_symbols = 0;
 
@@ -73,10 +138,15 @@ _parse_file_vm_map(PyObject *self, PyObject *args){
         multiline_end_length
     );
 
-    _parse_buffer(view, filesize.QuadPart,
+    Py_BEGIN_ALLOW_THREADS
+    _parse_chunk(view, filesize.QuadPart,
                   minimum_characters, &valid_symbols,
                   &total_lines, &loc, &commented_lines,
-                  &comment_data);
+                  &comment_data, metrics, tokens);
+    Py_END_ALLOW_THREADS
+    if (collect){
+        stats_lap(&parsing_stats.parse_ns, &mark, SPAN_PARSE);
+    }
 
     // Files not terminating with newline
     if (view[filesize.QuadPart-1] != '\n'){
@@ -88,14 +158,79 @@ _parse_file_vm_map(PyObject *self, PyObject *args){
     UnmapViewOfFile(mapped_region);
     CloseHandle(mapping_handle);
     CloseHandle(file_handle);
-    return Py_BuildValue("iiii", total_lines, loc, commented_lines, total_lines - loc - commented_lines);
+    if (collect){
+        stats_lap(&parsing_stats.io_ns, &mark, SPAN_CLOSE);
+        stats_add(&parsing_stats.files, 1);
+        stats_add(&parsing_stats.bytes_read, (uint64_t) filesize.QuadPart);
+    }
+    progress_add((uint64_t) filesize.QuadPart);
+    return line_data_value(total_lines, loc, commented_lines, metrics, tokens);
 }
 
 #else
 
+#include <errno.h>
 #include <sys/mman.h>
+
+/* Parse an opened file through windows of up to mmap_window_size bytes, each mapped,
+   advised, parsed and unmapped in turn, with parser state carried across windows as it
+   is across chunks of buffered reads. Touches no Python objects, so may be called with
+   the GIL released. Returns false with errno set if a window could not be mapped */
+static bool
+_parse_mapped_windows(int fd, size_t size, bool collect, uint64_t *mark,
+                      Py_ssize_t minimum_characters, int *valid_symbols,
+                      int *total_lines, int *loc, int *commented_lines,
+                      struct CommentData *comment_data, struct FileMetrics *metrics,
+                      struct TokenCounts *tokens, unsigned char *last_byte){
+    int flags = MAP_PRIVATE;
+    bool populated = false;
+#ifdef MAP_POPULATE
+    if (size <= mmap_populate_size){
+        flags |= MAP_POPULATE;
+        populated = true;
+    }
+#endif
+    for (size_t offset = 0; offset < size; offset += mmap_window_size){
+        const size_t window_size = size - offset < mmap_window_size
+            ? size - offset
+            : mmap_window_size;
+        unsigned char *window = mmap(NULL, window_size, PROT_READ, flags, fd, (off_t) offset);
+        if (window == MAP_FAILED){
+            return false;
+        }
+        // Populated windows are read in full already, others are read ahead as a whole
+        if (!populated){
+#ifdef MADV_SEQUENTIAL
+            madvise(window, window_size, MADV_SEQUENTIAL);
+#endif
+#ifdef MADV_WILLNEED
+            madvise(window, window_size, MADV_WILLNEED);
+#endif
+            if (collect){
+                stats_add(&parsing_stats.advise_calls, 2);
+            }
+        }
+        if (collect){
+            stats_add(&parsing_stats.map_calls, 1);
+            stats_lap(&parsing_stats.io_ns, mark, SPAN_MAP);
+        }
+
+        // Pages are faulted in while parsing, hence counted as parsing time
+        _parse_chunk(window, window_size,
+                      minimum_characters, valid_symbols,
+                      total_lines, loc, commented_lines,
+                      comment_data, metrics, tokens);
+        if (collect){
+            stats_lap(&parsing_stats.parse_ns, mark, SPAN_PARSE);
+        }
+        *last_byte = window[window_size-1];
+        munmap(window, window_size);
+    }
+    return true;
+}
+
 static PyObject *
-_parse_file_vm_map(PyObject *self, PyObject *args){
+_parse_file_vm_map(PyObject *self, PyObject *args, PyObject *kwargs){
     const char *filename,
     *singleline_character,
     *multiline_start_character, *multiline_end_character;
@@ -105,43 +240,61 @@ _parse_file_vm_map(PyObject *self, PyObject *args){
     multiline_end_length,
     minimum_characters;
 
-    if (!PyArg_ParseTuple(args,
-        "sz#z#z#n",
+    PyObject *options_capsule = NULL;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs,
+        "sz#z#z#n|$O", parser_keywords,
         &filename,
         &singleline_character, &singleline_length,
         &multiline_start_character, &multiline_start_length,
         &multiline_end_character, &multiline_end_length,
-        &minimum_characters)){
+        &minimum_characters, &options_capsule)){
             return NULL;
     }
+    struct ParseOptions default_options;
+    const struct ParseOptions *options = options_resolve(options_capsule, &default_options);
+    if (!options){
+        return NULL;
+    }
 
-    FILE *file = fopen(filename, "rb");
+    const bool collect = stats_collecting();
+    struct FileMetrics file_metrics;
+    struct FileMetrics *metrics = options->metrics ? metrics_init(&file_metrics) : NULL;
+    const bool advise = options->cache_advice;
+    uint64_t mark = collect ? monotonic_ns() : 0;
+    FILE *file;
+    Py_BEGIN_ALLOW_THREADS
+    file = fopen(filename, "rb");
+    Py_END_ALLOW_THREADS
+    if (collect){
+        stats_add(&parsing_stats.open_calls, 1);
+    }
     if (!file){
         PyErr_SetFromErrnoWithFilename(PyExc_OSError, filename);
         return NULL;
     }
 
     struct stat st;
+    if (collect){
+        stats_add(&parsing_stats.stat_calls, 1);
+    }
     if (fstat(fileno(file), &st) == -1){
         fclose(file);
         PyErr_SetFromErrnoWithFilename(PyExc_OSError, filename);
         return NULL;
     }
+    struct TokenCounts file_tokens;
+    struct TokenCounts *tokens = tokens_acquire(options->tokens, filename, &file_tokens);
 
     if (st.st_size == 0){
         fclose(file);
-        return Py_BuildValue("iiii", 0, 0, 0, 0);
+        if (collect){
+            stats_lap(&parsing_stats.io_ns, &mark, SPAN_OPEN);
+            stats_add(&parsing_stats.files, 1);
+        }
+        progress_add(0);
+        return line_data_value(0, 0, 0, metrics, tokens);
     }
-    void *mapped_region = mmap(NULL, st.st_size, PROT_READ, MAP_PRIVATE, fileno(file), 0);
-    if (mapped_region == MAP_FAILED){
-        fclose(file);
-        PyErr_SetFromErrnoWithFilename(PyExc_OSError, filename);
-        return NULL;
-    }
-
-    const unsigned char *view = (unsigned char *) mapped_region;
     int total_lines = 0, loc = 0, commented_lines = 0, valid_symbols = 0;
-
     struct CommentData comment_data;
     initialize_comment_data(
         &comment_data,
@@ -152,29 +305,53 @@ _parse_file_vm_map(PyObject *self, PyObject *args){
         multiline_start_length,
         multiline_end_length
     );
+    unsigned char last_byte = uchar_sentinel;
 
-    _parse_buffer(view, st.st_size,
-                  minimum_characters, &valid_symbols,
-                  &total_lines, &loc, &commented_lines,
-                  &comment_data);
+    bool mapped, drop = false;
+    int mapping_errno = 0;
+    // Windows only touch mapped regions and locals, other threads may run meanwhile
+    Py_BEGIN_ALLOW_THREADS
+    if (advise){
+        drop = cache_advise(fileno(file), collect);
+    }
+    mapped = _parse_mapped_windows(fileno(file), (size_t) st.st_size, collect, &mark,
+                                   minimum_characters, &valid_symbols,
+                                   &total_lines, &loc, &commented_lines,
+                                   &comment_data, metrics, tokens, &last_byte);
+    if (!mapped){
+        mapping_errno = errno;
+    }
+    if (drop){
+        cache_release(fileno(file), collect);
+    }
+    fclose(file);
+    if (collect && mapped){
+        stats_lap(&parsing_stats.io_ns, &mark, SPAN_CLOSE);
+        stats_add(&parsing_stats.files, 1);
+        stats_add(&parsing_stats.bytes_read, (uint64_t) st.st_size);
+    }
+    Py_END_ALLOW_THREADS
+    if (!mapped){
+        errno = mapping_errno;
+        PyErr_SetFromErrnoWithFilename(PyExc_OSError, filename);
+        return NULL;
+    }
 
     // Files not terminating with newline
-    if (view[st.st_size-1] != '\n'){
+    if (last_byte != '\n'){
         total_lines++;
         loc += (valid_symbols >= minimum_characters);
         commented_lines += (comment_data.had_multiline && valid_symbols < minimum_characters);
     }
-
-    fclose(file);
-    munmap(mapped_region, st.st_size);
-    return Py_BuildValue("iiii", total_lines, loc, commented_lines, total_lines - loc - commented_lines);
+    progress_add((uint64_t) st.st_size);
+    return line_data_value(total_lines, loc, commented_lines, metrics, tokens);
 }
 
 
 #endif
 
 static PyObject *
-_parse_file(PyObject *self, PyObject *args){
+_parse_file(PyObject *self, PyObject *args, PyObject *kwargs){
     const char *filename,
     *singleline_character,
     *multiline_start_character, *multiline_end_character;
@@ -184,25 +361,56 @@ _parse_file(PyObject *self, PyObject *args){
     multiline_end_length,
     minimum_characters;
 
-    if (!PyArg_ParseTuple(args,
-        "sz#z#z#n",
+    PyObject *options_capsule = NULL;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs,
+        "sz#z#z#n|$O", parser_keywords,
         &filename,
         &singleline_character, &singleline_length,
         &multiline_start_character, &multiline_start_length,
         &multiline_end_character, &multiline_end_length,
-        &minimum_characters)){
+        &minimum_characters, &options_capsule)){
             return NULL;
     }
+    struct ParseOptions default_options;
+    const struct ParseOptions *options = options_resolve(options_capsule, &default_options);
+    if (!options){
+        return NULL;
+    }
 
-    FILE *file = fopen(filename, "rb");
+    const bool collect = stats_collecting();
+    struct FileMetrics file_metrics;
+    struct FileMetrics *metrics = options->metrics ? metrics_init(&file_metrics) : NULL;
+    const bool advise = options->cache_advice;
+    uint64_t mark = collect ? monotonic_ns() : 0;
+    FILE *file;
+    Py_BEGIN_ALLOW_THREADS
+    file = fopen(filename, "rb");
+    Py_END_ALLOW_THREADS
+    if (collect){
+        stats_add(&parsing_stats.open_calls, 1);
+    }
     if (!file){
         PyErr_SetFromErrnoWithFilename(PyExc_OSError, filename);
         return NULL;
     }
+    struct TokenCounts file_tokens;
+    struct TokenCounts *tokens = tokens_acquire(options->tokens, filename, &file_tokens);
 
     int total_lines = 0, loc = 0, commented_lines = 0, valid_symbols = 0;
-    const size_t buffer_size = 4 * 1024 * 1024;
-    unsigned char *buffer = malloc(buffer_size);
+    const size_t buffer_size = memory_buffer_size(options->memory, chunk_buffer_size);
+    bool accounted;
+    unsigned char *buffer;
+    Py_BEGIN_ALLOW_THREADS
+    accounted = memory_acquire(options->memory, buffer_size, collect);
+    buffer = malloc(buffer_size);
+    Py_END_ALLOW_THREADS
+    if (!buffer){
+        if (accounted){
+            memory_release(options->memory, buffer_size);
+        }
+        fclose(file);
+        return PyErr_NoMemory();
+    }
     unsigned char last_byte = uchar_sentinel;
     size_t chunk_size;
 
@@ -217,13 +425,35 @@ _parse_file(PyObject *self, PyObject *args){
         multiline_end_length
     );
 
+    uint64_t bytes_read = 0;
+    bool drop = false;
+    // Reads and parsing only touch C buffers and locals, other threads may run meanwhile
+    Py_BEGIN_ALLOW_THREADS
+    if (advise){
+        drop = cache_advise(fileno(file), collect);
+    }
+    if (collect){
+        stats_lap(&parsing_stats.io_ns, &mark, SPAN_OPEN);
+    }
     while ((chunk_size = fread(buffer, 1, buffer_size, file)) > 0){
+        bytes_read += chunk_size;
+        if (collect){
+            stats_add(&parsing_stats.read_calls, 1);
+            stats_lap(&parsing_stats.io_ns, &mark, SPAN_READ);
+        }
         last_byte = buffer[chunk_size-1];
-        _parse_buffer(buffer, chunk_size,
+        _parse_chunk(buffer, chunk_size,
                       minimum_characters, &valid_symbols,
                       &total_lines, &loc, &commented_lines,
-                      &comment_data);
+                      &comment_data, metrics, tokens);
+        if (collect){
+            stats_lap(&parsing_stats.parse_ns, &mark, SPAN_PARSE);
+        }
+    }
+    if (drop){
+        cache_release(fileno(file), collect);
     }
+    Py_END_ALLOW_THREADS
     // Files not terminating with newline
     if (last_byte != '\n'
         && last_byte != uchar_sentinel){
@@ -233,12 +463,23 @@ _parse_file(PyObject *self, PyObject *args){
     }
 
     free(buffer);
+    if (accounted){
+        memory_release(options->memory, buffer_size);
+    }
     fclose(file);
-    return Py_BuildValue("iiii", total_lines, loc, commented_lines, total_lines - loc - commented_lines);
+    if (collect){
+        // The final, empty read
+        stats_add(&parsing_stats.read_calls, 1);
+        stats_lap(&parsing_stats.io_ns, &mark, SPAN_CLOSE);
+        stats_add(&parsing_stats.files, 1);
+        stats_add(&parsing_stats.bytes_read, bytes_read);
+    }
+    progress_add(bytes_read);
+    return line_data_value(total_lines, loc, commented_lines, metrics, tokens);
 }
 
 static PyObject *
-_parse_file_no_chunk(PyObject *self, PyObject *args){
+_parse_file_no_chunk(PyObject *self, PyObject *args, PyObject *kwargs){
     const char *filename,
     *singleline_character,
     *multiline_start_character, *multiline_end_character;
@@ -248,44 +489,81 @@ _parse_file_no_chunk(PyObject *self, PyObject *args){
     multiline_end_length,
     minimum_characters;
 
-    if (!PyArg_ParseTuple(args,
-        "sz#z#z#n",
+    PyObject *options_capsule = NULL;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs,
+        "sz#z#z#n|$O", parser_keywords,
         &filename,
         &singleline_character, &singleline_length,
         &multiline_start_character, &multiline_start_length,
         &multiline_end_character, &multiline_end_length,
-        &minimum_characters)){
+        &minimum_characters, &options_capsule)){
             return NULL;
     }
+    struct ParseOptions default_options;
+    const struct ParseOptions *options = options_resolve(options_capsule, &default_options);
+    if (!options){
+        return NULL;
+    }
 
-    FILE *file = fopen(filename, "rb");
+    const bool collect = stats_collecting();
+    struct FileMetrics file_metrics;
+    struct FileMetrics *metrics = options->metrics ? metrics_init(&file_metrics) : NULL;
+    const bool advise = options->cache_advice;
+    uint64_t mark = collect ? monotonic_ns() : 0;
+    FILE *file;
+    Py_BEGIN_ALLOW_THREADS
+    file = fopen(filename, "rb");
+    Py_END_ALLOW_THREADS
+    if (collect){
+        stats_add(&parsing_stats.open_calls, 1);
+    }
     if (!file){
         PyErr_SetFromErrnoWithFilename(PyExc_OSError, filename);
         return NULL;
     }
 
     struct stat st;
+    if (collect){
+        stats_add(&parsing_stats.stat_calls, 1);
+    }
     if (fstat(fileno(file), &st) == -1){
         fclose(file);
         PyErr_SetFromErrnoWithFilename(PyExc_OSError, filename);
         return NULL;
     }
+    struct TokenCounts file_tokens;
+    struct TokenCounts *tokens = tokens_acquire(options->tokens, filename, &file_tokens);
 
     if (st.st_size == 0){
         fclose(file);
-        return Py_BuildValue("iiii", 0, 0, 0, 0);
+        if (collect){
+            stats_lap(&parsing_stats.io_ns, &mark, SPAN_OPEN);
+            stats_add(&parsing_stats.files, 1);
+        }
+        progress_add(0);
+        return line_data_value(0, 0, 0, metrics, tokens);
     }
 
-    unsigned char *buffer = malloc(st.st_size);
+    // Files not fitting in the memory budget are read in chunks instead
+    const size_t buffer_size = memory_buffer_size(options->memory, (size_t) st.st_size) == (size_t) st.st_size
+        ? (size_t) st.st_size
+        : memory_buffer_size(options->memory, chunk_buffer_size);
+    bool accounted;
+    unsigned char *buffer;
+    Py_BEGIN_ALLOW_THREADS
+    accounted = memory_acquire(options->memory, buffer_size, collect);
+    buffer = malloc(buffer_size);
+    Py_END_ALLOW_THREADS
     if (!buffer){
+        if (accounted){
+            memory_release(options->memory, buffer_size);
+        }
         fclose(file);
         PyErr_Format(PyExc_MemoryError,
-            "Failed to load file %s of size %d bytes",
-            filename, st.st_size);
+            "Failed to allocate %zu bytes to load file %s",
+            buffer_size, filename);
         return NULL;
     }
-    fread(buffer, 1, st.st_size, file);
-
     int total_lines = 0, loc = 0, commented_lines = 0, valid_symbols = 0;
     struct CommentData comment_data;
     initialize_comment_data(
@@ -298,46 +576,427 @@ _parse_file_no_chunk(PyObject *self, PyObject *args){
         multiline_end_length
     );
 
-    _parse_buffer(buffer, st.st_size,
-                  minimum_characters, &valid_symbols,
-                  &total_lines, &loc, &commented_lines,
-                  &comment_data);
+    // Nothing read counts as terminated
+    unsigned char last_byte = '\n';
+    size_t chunk_size;
+    bool drop = false;
+    // Reads and parsing only touch C buffers and locals, other threads may run meanwhile
+    Py_BEGIN_ALLOW_THREADS
+    if (advise){
+        drop = cache_advise(fileno(file), collect);
+    }
+    if (collect){
+        stats_lap(&parsing_stats.io_ns, &mark, SPAN_OPEN);
+    }
+    while ((chunk_size = fread(buffer, 1, buffer_size, file)) > 0){
+        if (collect){
+            stats_add(&parsing_stats.read_calls, 1);
+            stats_lap(&parsing_stats.io_ns, &mark, SPAN_READ);
+        }
+        last_byte = buffer[chunk_size-1];
+        _parse_chunk(buffer, chunk_size,
+                      minimum_characters, &valid_symbols,
+                      &total_lines, &loc, &commented_lines,
+                      &comment_data, metrics, tokens);
+        if (collect){
+            stats_lap(&parsing_stats.parse_ns, &mark, SPAN_PARSE);
+        }
+        // Files read at once take a single read
+        if (buffer_size == (size_t) st.st_size){
+            break;
+        }
+    }
+    if (drop){
+        cache_release(fileno(file), collect);
+    }
+    Py_END_ALLOW_THREADS
 
     // Files not terminating with newline
-    if (buffer[st.st_size-1] != '\n'){
+    if (last_byte != '\n'){
         total_lines++;
         loc += (valid_symbols >= minimum_characters);
         commented_lines += (comment_data.had_multiline && valid_symbols < minimum_characters);
     }
 
     free(buffer);
+    if (accounted){
+        memory_release(options->memory, buffer_size);
+    }
+    fclose(file);
+    if (collect){
+        stats_lap(&parsing_stats.io_ns, &mark, SPAN_CLOSE);
+        stats_add(&parsing_stats.files, 1);
+        stats_add(&parsing_stats.bytes_read, (uint64_t) st.st_size);
+    }
+    progress_add((uint64_t) st.st_size);
+    return line_data_value(total_lines, loc, commented_lines, metrics, tokens);
+}
+
+static PyObject *
+_parse_file_auto(PyObject *self, PyObject *args, PyObject *kwargs){
+    const char *filename,
+    *singleline_character,
+    *multiline_start_character, *multiline_end_character;
+
+    Py_ssize_t singleline_length,
+    multiline_start_length,
+    multiline_end_length,
+    minimum_characters;
+
+    PyObject *options_capsule = NULL;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs,
+        "sz#z#z#n|$O", parser_keywords,
+        &filename,
+        &singleline_character, &singleline_length,
+        &multiline_start_character, &multiline_start_length,
+        &multiline_end_character, &multiline_end_length,
+        &minimum_characters, &options_capsule)){
+            return NULL;
+    }
+    struct ParseOptions default_options;
+    const struct ParseOptions *options = options_resolve(options_capsule, &default_options);
+    if (!options){
+        return NULL;
+    }
+
+    const bool collect = stats_collecting();
+    struct FileMetrics file_metrics;
+    struct FileMetrics *metrics = options->metrics ? metrics_init(&file_metrics) : NULL;
+    const bool advise = options->cache_advice;
+    uint64_t mark = collect ? monotonic_ns() : 0;
+    FILE *file;
+    Py_BEGIN_ALLOW_THREADS
+    file = fopen(filename, "rb");
+    Py_END_ALLOW_THREADS
+    if (collect){
+        stats_add(&parsing_stats.open_calls, 1);
+    }
+    if (!file){
+        PyErr_SetFromErrnoWithFilename(PyExc_OSError, filename);
+        return NULL;
+    }
+
+    // Size of the opened file decides how it is read, without a separate lookup by path
+    struct stat st;
+    if (collect){
+        stats_add(&parsing_stats.stat_calls, 1);
+    }
+    if (fstat(fileno(file), &st) == -1){
+        fclose(file);
+        PyErr_SetFromErrnoWithFilename(PyExc_OSError, filename);
+        return NULL;
+    }
+    struct TokenCounts file_tokens;
+    struct TokenCounts *tokens = tokens_acquire(options->tokens, filename, &file_tokens);
+
+    if (st.st_size == 0){
+        fclose(file);
+        if (collect){
+            stats_lap(&parsing_stats.io_ns, &mark, SPAN_OPEN);
+            stats_add(&parsing_stats.files, 1);
+        }
+        progress_add(0);
+        return line_data_value(0, 0, 0, metrics, tokens);
+    }
+
+    int total_lines = 0, loc = 0, commented_lines = 0, valid_symbols = 0;
+    struct CommentData comment_data;
+    initialize_comment_data(
+        &comment_data,
+        singleline_character,
+        multiline_start_character,
+        multiline_end_character,
+        singleline_length,
+        multiline_start_length,
+        multiline_end_length
+    );
+    unsigned char last_byte = uchar_sentinel;
+
+    if (st.st_size >= options->mmap_threshold){
+#ifdef _WIN32
+        const HANDLE mapping_handle = CreateFileMapping((HANDLE) _get_osfhandle(fileno(file)),
+            NULL, PAGE_READONLY, 0, 0, NULL);
+        void *mapped_region = mapping_handle
+            ? MapViewOfFile(mapping_handle, FILE_MAP_READ, 0, 0, 0)
+            : NULL;
+        if (!mapped_region){
+            if (mapping_handle){
+                CloseHandle(mapping_handle);
+            }
+            fclose(file);
+            PyErr_SetFromWindowsErrWithFilename(0, filename);
+            return NULL;
+        }
+        if (collect){
+            stats_add(&parsing_stats.map_calls, 1);
+            stats_lap(&parsing_stats.io_ns, &mark, SPAN_MAP);
+        }
+
+        unsigned char *view = (unsigned char *) mapped_region;
+        Py_BEGIN_ALLOW_THREADS
+        _parse_chunk(view, st.st_size,
+                      minimum_characters, &valid_symbols,
+                      &total_lines, &loc, &commented_lines,
+                      &comment_data, metrics, tokens);
+        if (collect){
+            stats_lap(&parsing_stats.parse_ns, &mark, SPAN_PARSE);
+        }
+        last_byte = view[st.st_size-1];
+        UnmapViewOfFile(mapped_region);
+        CloseHandle(mapping_handle);
+        Py_END_ALLOW_THREADS
+#else
+        bool mapped, drop = false;
+        int mapping_errno = 0;
+        Py_BEGIN_ALLOW_THREADS
+        if (advise){
+            drop = cache_advise(fileno(file), collect);
+        }
+        mapped = _parse_mapped_windows(fileno(file), (size_t) st.st_size, collect, &mark,
+                                       minimum_characters, &valid_symbols,
+                                       &total_lines, &loc, &commented_lines,
+                                       &comment_data, metrics, tokens, &last_byte);
+        if (!mapped){
+            mapping_errno = errno;
+        }
+        if (drop){
+            cache_release(fileno(file), collect);
+        }
+        Py_END_ALLOW_THREADS
+        if (!mapped){
+            fclose(file);
+            errno = mapping_errno;
+            PyErr_SetFromErrnoWithFilename(PyExc_OSError, filename);
+            return NULL;
+        }
+#endif
+        if (collect){
+            stats_add(&parsing_stats.bytes_read, (uint64_t) st.st_size);
+        }
+    }
+    else {
+        // Files not fitting in the memory budget are read in chunks instead
+        const size_t buffer_size = st.st_size <= options->complete_threshold
+            && memory_buffer_size(options->memory, (size_t) st.st_size) == (size_t) st.st_size
+            ? (size_t) st.st_size
+            : memory_buffer_size(options->memory, (size_t) options->chunk_size);
+        unsigned char stack_buffer[auto_stack_buffer_size];
+        unsigned char *buffer = stack_buffer;
+        bool accounted = false;
+        if (buffer_size > auto_stack_buffer_size){
+            Py_BEGIN_ALLOW_THREADS
+            accounted = memory_acquire(options->memory, buffer_size, collect);
+            buffer = malloc(buffer_size);
+            Py_END_ALLOW_THREADS
+        }
+        if (!buffer){
+            if (accounted){
+                memory_release(options->memory, buffer_size);
+            }
+            fclose(file);
+            return PyErr_NoMemory();
+        }
+        // Reads are at least as large as stdio's own buffer would be, which is skipped
+        setvbuf(file, NULL, _IONBF, 0);
+
+        size_t chunk_size;
+        uint64_t bytes_read = 0;
+        bool drop = false;
+        Py_BEGIN_ALLOW_THREADS
+        if (advise){
+            drop = cache_advise(fileno(file), collect);
+        }
+        if (collect){
+            stats_lap(&parsing_stats.io_ns, &mark, SPAN_OPEN);
+        }
+        while ((chunk_size = fread(buffer, 1, buffer_size, file)) > 0){
+            if (collect){
+                stats_add(&parsing_stats.read_calls, 1);
+                stats_lap(&parsing_stats.io_ns, &mark, SPAN_READ);
+                bytes_read += chunk_size;
+            }
+            last_byte = buffer[chunk_size-1];
+            _parse_chunk(buffer, chunk_size,
+                          minimum_characters, &valid_symbols,
+                          &total_lines, &loc, &commented_lines,
+                          &comment_data, metrics, tokens);
+            if (collect){
+                stats_lap(&parsing_stats.parse_ns, &mark, SPAN_PARSE);
+            }
+            // Files read at once need no further read to detect their end
+            if (buffer_size == (size_t) st.st_size && chunk_size == buffer_size){
+                break;
+            }
+        }
+        if (drop){
+            cache_release(fileno(file), collect);
+        }
+        Py_END_ALLOW_THREADS
+
+        if (buffer != stack_buffer){
+            free(buffer);
+        }
+        if (accounted){
+            memory_release(options->memory, buffer_size);
+        }
+        if (collect){
+            stats_add(&parsing_stats.bytes_read, bytes_read);
+        }
+    }
+
+    // Files not terminating with newline
+    if (last_byte != '\n'
+        && last_byte != uchar_sentinel){
+        total_lines++;
+        loc += (valid_symbols >= minimum_characters);
+        commented_lines += (comment_data.had_multiline && valid_symbols < minimum_characters);
+    }
+
     fclose(file);
-    return Py_BuildValue("iiii", total_lines, loc, commented_lines, total_lines - loc - commented_lines);
+    if (collect){
+        stats_lap(&parsing_stats.io_ns, &mark, SPAN_CLOSE);
+        stats_add(&parsing_stats.files, 1);
+    }
+    progress_add((uint64_t) st.st_size);
+    return line_data_value(total_lines, loc, commented_lines, metrics, tokens);
 }
 
 PyDoc_STRVAR(_parse_file_vm_map_doc, "Parse a UTF-8 byte stream to count total lines and lines of code (LOC)");
 PyDoc_STRVAR(_parse_file_doc, "Parse a UTF-8 encoded file to count total lines and lines of code (LOC)");
 PyDoc_STRVAR(_parse_file_no_chunk_doc,
     "Parse a UTF-8 encoded file to count total lines and lines of code (LOC), reading the entire file at once");
+PyDoc_STRVAR(_parse_file_auto_doc,
+    "Parse a UTF-8 encoded file to count total lines and lines of code (LOC), reading it at once, in chunks or through a memory map depending on its size");
+PyDoc_STRVAR(_set_auto_thresholds_doc, "Set the process-wide file sizes up to which files are read at once, and from which files are memory mapped, optionally alongside the chunk size of files in between");
+PyDoc_STRVAR(_get_auto_thresholds_doc, "Get the file sizes up to which files are read at once, and from which files are memory mapped, alongside the chunk size of files in between");
+PyDoc_STRVAR(_set_stats_enabled_doc, "Enable or disable collection of parsing statistics");
+PyDoc_STRVAR(_get_stats_doc, "Get parsing statistics collected since the last reset");
+PyDoc_STRVAR(_reset_stats_doc, "Reset collected parsing statistics");
+PyDoc_STRVAR(_set_progress_enabled_doc, "Enable or disable counting files and bytes parsed for progress reports, restarting counts when enabled");
+PyDoc_STRVAR(_get_progress_doc, "Get the number of files and bytes parsed since progress counting was enabled");
+PyDoc_STRVAR(_set_memory_budget_doc, "Set the number of bytes file buffers of parsers called without options may hold at once across threads, 0 for no budget");
+PyDoc_STRVAR(_get_memory_budget_doc, "Get the number of bytes file buffers of parsers called without options may hold at once across threads, 0 for no budget");
+PyDoc_STRVAR(_set_cache_advice_doc, "Enable or disable, for parsers called without options, advising sequential reads of files, and dropping their pages from the page cache once parsed unless they were cached beforehand");
+PyDoc_STRVAR(_get_cache_advice_doc, "Get whether files are read with page cache advice");
+PyDoc_STRVAR(_parse_options_doc, "Build options of a scan, given to parsers through their options keyword in place of process-wide settings: extended metrics, tokens counted as a mapping of extensions to sequences of (token, region) pairs, page cache advice, a memory budget of its own, and AUTO thresholds, defaulting to those in place");
+PyDoc_STRVAR(_set_trace_enabled_doc, "Enable or disable tracing spans of parsing entry points, discarding previous events and buffering up to capacity events when enabled");
+PyDoc_STRVAR(_get_trace_doc, "Get and release events traced since tracing was enabled, packed as bytes, alongside the number of events dropped");
+PyDoc_STRVAR(_trace_clock_doc, "Get the monotonic time in nanoseconds traced events are timestamped with");
 
 static PyMethodDef methods[] = {
     {
         .ml_name = "_parse_file_vm_map",
         .ml_doc = _parse_file_vm_map_doc,
-        .ml_flags = METH_VARARGS,
-        .ml_meth = _parse_file_vm_map,
+        .ml_flags = METH_VARARGS | METH_KEYWORDS,
+        .ml_meth = (PyCFunction)(void (*)(void)) _parse_file_vm_map,
     },
     {
         .ml_name = "_parse_file",
         .ml_doc = _parse_file_doc,
-        .ml_flags = METH_VARARGS,
-        .ml_meth = _parse_file,
+        .ml_flags = METH_VARARGS | METH_KEYWORDS,
+        .ml_meth = (PyCFunction)(void (*)(void)) _parse_file,
     },
     {
         .ml_name = "_parse_file_no_chunk",
         .ml_doc = _parse_file_no_chunk_doc,
+        .ml_flags = METH_VARARGS | METH_KEYWORDS,
+        .ml_meth = (PyCFunction)(void (*)(void)) _parse_file_no_chunk,
+    },
+    {
+        .ml_name = "_parse_file_auto",
+        .ml_doc = _parse_file_auto_doc,
+        .ml_flags = METH_VARARGS | METH_KEYWORDS,
+        .ml_meth = (PyCFunction)(void (*)(void)) _parse_file_auto,
+    },
+    {
+        .ml_name = "_set_auto_thresholds",
+        .ml_doc = _set_auto_thresholds_doc,
+        .ml_flags = METH_VARARGS,
+        .ml_meth = _set_auto_thresholds,
+    },
+    {
+        .ml_name = "_get_auto_thresholds",
+        .ml_doc = _get_auto_thresholds_doc,
+        .ml_flags = METH_NOARGS,
+        .ml_meth = _get_auto_thresholds,
+    },
+    {
+        .ml_name = "_set_stats_enabled",
+        .ml_doc = _set_stats_enabled_doc,
+        .ml_flags = METH_O,
+        .ml_meth = _set_stats_enabled,
+    },
+    {
+        .ml_name = "_get_stats",
+        .ml_doc = _get_stats_doc,
+        .ml_flags = METH_NOARGS,
+        .ml_meth = _get_stats,
+    },
+    {
+        .ml_name = "_reset_stats",
+        .ml_doc = _reset_stats_doc,
+        .ml_flags = METH_NOARGS,
+        .ml_meth = _reset_stats,
+    },
+    {
+        .ml_name = "_set_progress_enabled",
+        .ml_doc = _set_progress_enabled_doc,
+        .ml_flags = METH_O,
+        .ml_meth = _set_progress_enabled,
+    },
+    {
+        .ml_name = "_get_progress",
+        .ml_doc = _get_progress_doc,
+        .ml_flags = METH_NOARGS,
+        .ml_meth = _get_progress,
+    },
+    {
+        .ml_name = "_set_memory_budget",
+        .ml_doc = _set_memory_budget_doc,
+        .ml_flags = METH_O,
+        .ml_meth = _set_memory_budget,
+    },
+    {
+        .ml_name = "_get_memory_budget",
+        .ml_doc = _get_memory_budget_doc,
+        .ml_flags = METH_NOARGS,
+        .ml_meth = _get_memory_budget,
+    },
+    {
+        .ml_name = "_set_cache_advice",
+        .ml_doc = _set_cache_advice_doc,
+        .ml_flags = METH_O,
+        .ml_meth = _set_cache_advice,
+    },
+    {
+        .ml_name = "_get_cache_advice",
+        .ml_doc = _get_cache_advice_doc,
+        .ml_flags = METH_NOARGS,
+        .ml_meth = _get_cache_advice,
+    },
+    {
+        .ml_name = "_parse_options",
+        .ml_doc = _parse_options_doc,
+        .ml_flags = METH_VARARGS | METH_KEYWORDS,
+        .ml_meth = (PyCFunction)(void (*)(void)) _parse_options,
+    },
+    {
+        .ml_name = "_set_trace_enabled",
+        .ml_doc = _set_trace_enabled_doc,
         .ml_flags = METH_VARARGS,
-        .ml_meth = _parse_file_no_chunk,
+        .ml_meth = _set_trace_enabled,
+    },
+    {
+        .ml_name = "_get_trace",
+        .ml_doc = _get_trace_doc,
+        .ml_flags = METH_NOARGS,
+        .ml_meth = _get_trace,
+    },
+    {
+        .ml_name = "_trace_clock",
+        .ml_doc = _trace_clock_doc,
+        .ml_flags = METH_NOARGS,
+        .ml_meth = _trace_clock,
     },
     {NULL, NULL, 0, NULL}
 };
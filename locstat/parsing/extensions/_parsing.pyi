@@ -1,8 +1,28 @@
-from typing import Optional
+from typing import Mapping, NewType, Optional, Sequence
 
 from locstat.data_structures.typing import FileLineData
 
-__all__ = ("_parse_file_vm_map", "_parse_file", "_parse_file_no_chunk")
+__all__ = (
+    "_parse_file_vm_map",
+    "_parse_file",
+    "_parse_file_no_chunk",
+    "_parse_file_auto",
+    "_set_auto_thresholds",
+    "_get_auto_thresholds",
+    "_set_stats_enabled",
+    "_get_stats",
+    "_reset_stats",
+    "_set_memory_budget",
+    "_get_memory_budget",
+    "_set_progress_enabled",
+    "_get_progress",
+    "_set_cache_advice",
+    "_get_cache_advice",
+    "_parse_options",
+)
+
+# Capsule of options of a scan, opaque to Python
+ParseOptions = NewType("ParseOptions", object)
 
 def _parse_file_vm_map(
     filename: str,
@@ -11,6 +31,8 @@ def _parse_file_vm_map(
     multiline_end_symbol: Optional[bytes] = None,
     minimum_characters: int = 0,
     /,
+    *,
+    options: Optional[ParseOptions] = None,
 ) -> FileLineData: ...
 def _parse_file(
     filename: str,
@@ -19,6 +41,8 @@ def _parse_file(
     multiline_end_symbol: Optional[bytes] = None,
     minimum_characters: int = 0,
     /,
+    *,
+    options: Optional[ParseOptions] = None,
 ) -> FileLineData: ...
 def _parse_file_no_chunk(
     filename: str,
@@ -27,4 +51,40 @@ def _parse_file_no_chunk(
     multiline_end_symbol: Optional[bytes] = None,
     minimum_characters: int = 0,
     /,
+    *,
+    options: Optional[ParseOptions] = None,
+) -> FileLineData: ...
+def _parse_file_auto(
+    filename: str,
+    singleline_symbol: Optional[bytes] = None,
+    multiline_start_symbol: Optional[bytes] = None,
+    multiline_end_symbol: Optional[bytes] = None,
+    minimum_characters: int = 0,
+    /,
+    *,
+    options: Optional[ParseOptions] = None,
 ) -> FileLineData: ...
+def _set_auto_thresholds(
+    complete_threshold: int, mmap_threshold: int, chunk_size: int = ..., /
+) -> None: ...
+def _get_auto_thresholds() -> tuple[int, int, int]: ...
+def _set_stats_enabled(enabled: bool, /) -> None: ...
+def _get_stats() -> dict[str, int]: ...
+def _reset_stats() -> None: ...
+def _set_memory_budget(budget: int, /) -> None: ...
+def _get_memory_budget() -> int: ...
+def _set_progress_enabled(enabled: bool, /) -> None: ...
+def _get_progress() -> tuple[int, int]: ...
+def _set_cache_advice(enabled: bool, /) -> None: ...
+def _get_cache_advice() -> bool: ...
+def _parse_options(
+    *,
+    extended_metrics: bool = False,
+    tokens: Optional[Mapping[str, Sequence[tuple[bytes, int]]]] = None,
+    cache_advice: bool = False,
+    max_memory: Optional[int] = None,
+    auto_thresholds: Optional[Sequence[int]] = None,
+) -> ParseOptions: ...
+def _set_trace_enabled(enabled: bool, capacity: int = ..., /) -> None: ...
+def _get_trace() -> tuple[bytes, int]: ...
+def _trace_clock() -> int: ...
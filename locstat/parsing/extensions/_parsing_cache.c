@@ -0,0 +1,102 @@
+#include "_parsing_cache.h"
+#include "_parsing_stats.h"
+
+#ifndef _WIN32
+#include <fcntl.h>
+#endif
+#ifdef __linux__
+#include <errno.h>
+#include <stdint.h>
+#include <sys/syscall.h>
+#include <unistd.h>
+#ifndef __NR_cachestat
+// Shared by every architecture, since Linux 6.5
+#define __NR_cachestat 451
+#endif
+
+struct cachestat_range {
+    uint64_t offset;
+    uint64_t length;
+};
+
+struct cachestat {
+    uint64_t nr_cache;
+    uint64_t nr_dirty;
+    uint64_t nr_writeback;
+    uint64_t nr_evicted;
+    uint64_t nr_recently_evicted;
+};
+
+// Cleared once cachestat turns out to be unavailable, after which every file is dropped
+static volatile bool cachestat_available = true;
+
+// Whether any page of a file is cached, such that a neighbouring workload may use it
+static bool cache_resident(int fd){
+    if (!cachestat_available){
+        return false;
+    }
+    // Zero length spans the whole file
+    struct cachestat_range range = {0, 0};
+    struct cachestat status;
+    if (syscall(__NR_cachestat, fd, &range, &status, 0) == -1){
+        if (errno == ENOSYS || errno == EPERM){
+            cachestat_available = false;
+        }
+        return false;
+    }
+    return status.nr_cache > 0;
+}
+#endif
+
+volatile bool cache_advice_enabled = false;
+
+bool cache_advise(int fd, bool collect){
+#if defined(POSIX_FADV_SEQUENTIAL) && defined(POSIX_FADV_DONTNEED)
+    if (collect){
+        stats_add(&parsing_stats.advise_calls, 1);
+    }
+    posix_fadvise(fd, 0, 0, POSIX_FADV_SEQUENTIAL);
+#ifdef __linux__
+    if (collect){
+        stats_add(&parsing_stats.advise_calls, 1);
+    }
+    // Pages cached beforehand belong to someone else's working set, and are kept
+    return !cache_resident(fd);
+#else
+    return true;
+#endif
+#elif defined(F_NOCACHE)
+    // Reads through this descriptor bypass the cache, nothing is left to drop
+    if (collect){
+        stats_add(&parsing_stats.advise_calls, 1);
+    }
+    fcntl(fd, F_NOCACHE, 1);
+    return false;
+#else
+    return false;
+#endif
+}
+
+void cache_release(int fd, bool collect){
+#ifdef POSIX_FADV_DONTNEED
+    if (collect){
+        stats_add(&parsing_stats.advise_calls, 1);
+    }
+    posix_fadvise(fd, 0, 0, POSIX_FADV_DONTNEED);
+#endif
+}
+
+PyObject *
+_set_cache_advice(PyObject *self, PyObject *arg){
+    const int enabled = PyObject_IsTrue(arg);
+    if (enabled == -1){
+        return NULL;
+    }
+    cache_advice_enabled = enabled;
+    Py_RETURN_NONE;
+}
+
+PyObject *
+_get_cache_advice(PyObject *self, PyObject *unused){
+    return PyBool_FromLong(cache_advice_enabled);
+}
@@ -0,0 +1,20 @@
+#ifndef _PARSING_CACHE_H
+#define _PARSING_CACHE_H
+#include "_locstat.h"
+#include <stdbool.h>
+
+/* Process-wide switch of page cache advice of parsers called without options, read once
+   per file. When enabled, files are read sequentially and their pages dropped once parsed,
+   unless they were cached before being opened, so that scans leave the page cache of
+   neighbouring workloads as it was */
+extern volatile bool cache_advice_enabled;
+
+/* Advise sequential reads of an opened file. Returns whether its pages may be dropped
+   once parsed, through cache_release. Blocks, so must be called with the GIL released */
+extern bool cache_advise(int fd, bool collect);
+extern void cache_release(int fd, bool collect);
+
+extern PyObject *_set_cache_advice(PyObject *self, PyObject *arg);
+extern PyObject *_get_cache_advice(PyObject *self, PyObject *unused);
+
+#endif
@@ -0,0 +1,88 @@
+#include "_parsing_memory.h"
+#include "_parsing_stats.h"
+
+#ifdef _WIN32
+struct MemoryBudget process_memory = {0, 0, SRWLOCK_INIT, CONDITION_VARIABLE_INIT};
+#define lock_memory(memory) AcquireSRWLockExclusive(&(memory)->lock)
+#define unlock_memory(memory) ReleaseSRWLockExclusive(&(memory)->lock)
+#define wait_memory(memory) SleepConditionVariableSRW(&(memory)->released, &(memory)->lock, INFINITE, 0)
+#define notify_memory(memory) WakeAllConditionVariable(&(memory)->released)
+#else
+struct MemoryBudget process_memory = {0, 0, PTHREAD_MUTEX_INITIALIZER, PTHREAD_COND_INITIALIZER};
+#define lock_memory(memory) pthread_mutex_lock(&(memory)->lock)
+#define unlock_memory(memory) pthread_mutex_unlock(&(memory)->lock)
+#define wait_memory(memory) pthread_cond_wait(&(memory)->released, &(memory)->lock)
+#define notify_memory(memory) pthread_cond_broadcast(&(memory)->released)
+#endif
+
+void memory_init(struct MemoryBudget *memory, size_t budget){
+    memory->budget = budget;
+    memory->outstanding = 0;
+#ifdef _WIN32
+    InitializeSRWLock(&memory->lock);
+    InitializeConditionVariable(&memory->released);
+#else
+    pthread_mutex_init(&memory->lock, NULL);
+    pthread_cond_init(&memory->released, NULL);
+#endif
+}
+
+void memory_destroy(struct MemoryBudget *memory){
+#ifndef _WIN32
+    pthread_mutex_destroy(&memory->lock);
+    pthread_cond_destroy(&memory->released);
+#endif
+}
+
+size_t memory_buffer_size(const struct MemoryBudget *memory, size_t requested){
+    const size_t budget = memory->budget;
+    return budget && requested > budget ? budget : requested;
+}
+
+bool memory_acquire(struct MemoryBudget *memory, size_t bytes, bool collect){
+    if (!memory->budget && !collect){
+        return false;
+    }
+    lock_memory(memory);
+    // A buffer always fits once no other is outstanding, so that waits end
+    while (memory->budget && memory->outstanding
+           && memory->outstanding + bytes > memory->budget){
+        wait_memory(memory);
+    }
+    memory->outstanding += bytes;
+    if (memory->outstanding > parsing_stats.peak_buffer_bytes){
+        parsing_stats.peak_buffer_bytes = memory->outstanding;
+    }
+    unlock_memory(memory);
+    return true;
+}
+
+void memory_release(struct MemoryBudget *memory, size_t bytes){
+    lock_memory(memory);
+    memory->outstanding -= bytes;
+    notify_memory(memory);
+    unlock_memory(memory);
+}
+
+PyObject *
+_set_memory_budget(PyObject *self, PyObject *arg){
+    const Py_ssize_t budget = PyLong_AsSsize_t(arg);
+    if (budget == -1 && PyErr_Occurred()){
+        return NULL;
+    }
+    if (budget < 0){
+        PyErr_SetString(PyExc_ValueError, "Memory budget cannot be negative");
+        return NULL;
+    }
+    lock_memory(&process_memory);
+    process_memory.budget = (size_t) budget;
+    // Waiting reservations may fit in a larger budget
+    notify_memory(&process_memory);
+    unlock_memory(&process_memory);
+    Py_RETURN_NONE;
+}
+
+PyObject *
+_get_memory_budget(PyObject *self, PyObject *unused){
+    return PyLong_FromSize_t(process_memory.budget);
+}
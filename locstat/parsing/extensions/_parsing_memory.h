@@ -0,0 +1,45 @@
+#ifndef _PARSING_MEMORY_H
+#define _PARSING_MEMORY_H
+#include "_locstat.h"
+#include <stdbool.h>
+#include <stddef.h>
+#ifdef _WIN32
+#include <windows.h>
+#else
+#include <pthread.h>
+#endif
+
+/* Budget of bytes held by file buffers, shared by every thread parsing files with the GIL
+   released under it. Zero leaves buffers unbounded */
+struct MemoryBudget {
+    volatile size_t budget;
+    // Bytes held by buffers of files being parsed, guarded by lock
+    size_t outstanding;
+#ifdef _WIN32
+    SRWLOCK lock;
+    CONDITION_VARIABLE released;
+#else
+    pthread_mutex_t lock;
+    pthread_cond_t released;
+#endif
+};
+
+// Budget of parsers called without options of their own, set through _set_memory_budget
+extern struct MemoryBudget process_memory;
+
+// Initialize a budget of options, to be destroyed once no file is parsed under it
+extern void memory_init(struct MemoryBudget *memory, size_t budget);
+extern void memory_destroy(struct MemoryBudget *memory);
+
+// Size of a buffer holding up to requested bytes, such that it fits in the budget
+extern size_t memory_buffer_size(const struct MemoryBudget *memory, size_t requested);
+/* Reserve bytes of the budget, waiting while outstanding buffers leave no room for them.
+   Blocks, so must be called with the GIL released. Returns whether the reservation was
+   accounted for, in which case it must be returned through memory_release */
+extern bool memory_acquire(struct MemoryBudget *memory, size_t bytes, bool collect);
+extern void memory_release(struct MemoryBudget *memory, size_t bytes);
+
+extern PyObject *_set_memory_budget(PyObject *self, PyObject *arg);
+extern PyObject *_get_memory_budget(PyObject *self, PyObject *unused);
+
+#endif
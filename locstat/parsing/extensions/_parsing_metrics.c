@@ -0,0 +1,51 @@
+#include "_parsing_metrics.h"
+#include "_parsing_tokens.h"
+#include <string.h>
+
+struct FileMetrics *
+metrics_init(struct FileMetrics *metrics){
+    memset(metrics, 0, sizeof(struct FileMetrics));
+    // Nothing read counts as terminated
+    metrics->last = '\n';
+    return metrics;
+}
+
+PyObject *
+line_data_value(int total, int loc, int commented, struct FileMetrics *metrics,
+                struct TokenCounts *tokens){
+    PyObject *value;
+    if (!metrics){
+        value = Py_BuildValue("iiii", total, loc, commented, total - loc - commented);
+    }
+    else{
+        // Files not terminating with newline
+        if (metrics->last != '\n'){
+            if (metrics->line_length > metrics->max_line_length){
+                metrics->max_line_length = metrics->line_length;
+            }
+            metrics->trailing_whitespace += (metrics->last == ' ' || metrics->last == '\t');
+        }
+        value = Py_BuildValue("iiiiKKKKKK", total, loc, commented, total - loc - commented,
+            (unsigned long long) metrics->bytes,
+            (unsigned long long) metrics->characters,
+            (unsigned long long) metrics->max_line_length,
+            (unsigned long long) metrics->trailing_whitespace,
+            (unsigned long long) metrics->tab_indented,
+            (unsigned long long) metrics->space_indented);
+    }
+    if (!tokens){
+        return value;
+    }
+
+    PyObject *counts = value ? tokens_value(tokens) : NULL;
+    if (!counts){
+        Py_XDECREF(value);
+        return NULL;
+    }
+    // Token counts follow the line data built above
+    PyObject *appended = Py_BuildValue("(N)", counts);
+    PyObject *extended = appended ? PySequence_Concat(value, appended) : NULL;
+    Py_XDECREF(appended);
+    Py_DECREF(value);
+    return extended;
+}
@@ -0,0 +1,36 @@
+#ifndef _PARSING_METRICS_H
+#define _PARSING_METRICS_H
+#include "_locstat.h"
+#include <stdbool.h>
+#include <stdint.h>
+
+/* Extended metrics of a file, gathered by _parse_buffer_extended in the same pass as its
+   line counts. Characters are counted as UTF-8 code points, excluding line terminators.
+   Lines are indented with tabs or spaces depending on the first whitespace character
+   they start with, and only counted if they have content past their indentation */
+struct FileMetrics {
+    uint64_t bytes;
+    uint64_t characters;
+    uint64_t max_line_length;
+    uint64_t trailing_whitespace;
+    uint64_t tab_indented;
+    uint64_t space_indented;
+
+    // State of the current line, carried across chunks
+    uint64_t line_length;
+    unsigned char last;
+    unsigned char indent;
+    bool content_seen;
+};
+
+extern struct FileMetrics *metrics_init(struct FileMetrics *metrics);
+
+struct TokenCounts;
+
+/* Line data returned by parsers: total, loc, commented and blank lines, followed by the
+   metrics of the file if gathered, and by a mapping of its token counts if counted.
+   Metrics of an unterminated last line are completed */
+extern PyObject *line_data_value(int total, int loc, int commented, struct FileMetrics *metrics,
+                                 struct TokenCounts *tokens);
+
+#endif
@@ -0,0 +1,153 @@
+#include "_parsing_options.h"
+#include "_parsing_cache.h"
+#include "_parsing_tokens.h"
+#include <stdlib.h>
+
+#define PARSE_OPTIONS_CAPSULE "locstat.parse_options"
+
+// Process-wide AUTO thresholds, set once per process from the package's configuration
+static Py_ssize_t auto_complete_threshold = 4 * 1024 * 1024;
+static Py_ssize_t auto_mmap_threshold = 64 * 1024 * 1024;
+static Py_ssize_t auto_chunk_size = chunk_buffer_size;
+
+// Options alongside the budget they own, freed as a whole by their capsule
+struct OwnedOptions {
+    struct ParseOptions options;
+    struct MemoryBudget memory;
+};
+
+static void
+options_destructor(PyObject *capsule){
+    struct OwnedOptions *owned = PyCapsule_GetPointer(capsule, PARSE_OPTIONS_CAPSULE);
+    Py_XDECREF(owned->options.tokens);
+    memory_destroy(&owned->memory);
+    free(owned);
+}
+
+const struct ParseOptions *
+options_resolve(PyObject *capsule, struct ParseOptions *storage){
+    if (capsule){
+        return PyCapsule_GetPointer(capsule, PARSE_OPTIONS_CAPSULE);
+    }
+    storage->metrics = false;
+    storage->tokens = NULL;
+    storage->cache_advice = cache_advice_enabled;
+    storage->memory = &process_memory;
+    storage->complete_threshold = auto_complete_threshold;
+    storage->mmap_threshold = auto_mmap_threshold;
+    storage->chunk_size = auto_chunk_size;
+    return storage;
+}
+
+// Thresholds of a (complete_threshold, mmap_threshold[, chunk_size]) tuple
+static bool
+thresholds_parse(PyObject *args, Py_ssize_t *complete_threshold, Py_ssize_t *mmap_threshold,
+                 Py_ssize_t *chunk_size){
+    if (!PyArg_ParseTuple(args, "nn|n", complete_threshold, mmap_threshold, chunk_size)){
+        return false;
+    }
+    if (*complete_threshold < 0 || *mmap_threshold < 0){
+        PyErr_SetString(PyExc_ValueError, "Parsing thresholds cannot be negative");
+        return false;
+    }
+    if (*chunk_size <= 0){
+        PyErr_SetString(PyExc_ValueError, "Chunk size must be positive");
+        return false;
+    }
+    return true;
+}
+
+PyObject *
+_parse_options(PyObject *self, PyObject *args, PyObject *kwargs){
+    static char *keywords[] = {
+        "extended_metrics", "tokens", "cache_advice", "max_memory", "auto_thresholds", NULL
+    };
+    int metrics = 0, cache_advice = 0;
+    PyObject *tokens = Py_None, *max_memory = Py_None, *auto_thresholds = Py_None;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|$pOpOO", keywords,
+                                     &metrics, &tokens, &cache_advice,
+                                     &max_memory, &auto_thresholds)){
+        return NULL;
+    }
+
+    Py_ssize_t budget = 0;
+    if (max_memory != Py_None){
+        budget = PyLong_AsSsize_t(max_memory);
+        if (budget == -1 && PyErr_Occurred()){
+            return NULL;
+        }
+        if (budget < 0){
+            PyErr_SetString(PyExc_ValueError, "Memory budget cannot be negative");
+            return NULL;
+        }
+    }
+    // Thresholds in place when the options are built, unless given
+    Py_ssize_t complete_threshold = auto_complete_threshold,
+    mmap_threshold = auto_mmap_threshold,
+    chunk_size = auto_chunk_size;
+    if (auto_thresholds != Py_None){
+        PyObject *thresholds = PySequence_Check(auto_thresholds)
+            ? PySequence_Tuple(auto_thresholds)
+            : NULL;
+        if (!thresholds){
+            if (!PyErr_Occurred()){
+                PyErr_SetString(PyExc_TypeError, "Thresholds must be a sequence of integers");
+            }
+            return NULL;
+        }
+        const bool parsed = thresholds_parse(thresholds, &complete_threshold,
+                                             &mmap_threshold, &chunk_size);
+        Py_DECREF(thresholds);
+        if (!parsed){
+            return NULL;
+        }
+    }
+
+    struct OwnedOptions *owned = calloc(1, sizeof(struct OwnedOptions));
+    if (!owned){
+        return PyErr_NoMemory();
+    }
+    struct ParseOptions *options = &owned->options;
+    options->metrics = metrics;
+    options->cache_advice = cache_advice;
+    // Each scan's budget is its own, leaving concurrent scans unbounded by it
+    memory_init(&owned->memory, (size_t) budget);
+    options->memory = &owned->memory;
+    options->complete_threshold = complete_threshold;
+    options->mmap_threshold = mmap_threshold;
+    options->chunk_size = chunk_size;
+    // Tokens are compiled into matchers once, shared by every file parsed with the options
+    if (tokens != Py_None){
+        options->tokens = tokens_table(tokens);
+        if (!options->tokens){
+            memory_destroy(&owned->memory);
+            free(owned);
+            return NULL;
+        }
+    }
+
+    PyObject *capsule = PyCapsule_New(owned, PARSE_OPTIONS_CAPSULE, options_destructor);
+    if (!capsule){
+        Py_XDECREF(options->tokens);
+        memory_destroy(&owned->memory);
+        free(owned);
+    }
+    return capsule;
+}
+
+PyObject *
+_set_auto_thresholds(PyObject *self, PyObject *args){
+    Py_ssize_t complete_threshold, mmap_threshold, chunk_size = auto_chunk_size;
+    if (!thresholds_parse(args, &complete_threshold, &mmap_threshold, &chunk_size)){
+        return NULL;
+    }
+    auto_complete_threshold = complete_threshold;
+    auto_mmap_threshold = mmap_threshold;
+    auto_chunk_size = chunk_size;
+    Py_RETURN_NONE;
+}
+
+PyObject *
+_get_auto_thresholds(PyObject *self, PyObject *unused){
+    return Py_BuildValue("nnn", auto_complete_threshold, auto_mmap_threshold, auto_chunk_size);
+}
@@ -0,0 +1,37 @@
+#ifndef _PARSING_OPTIONS_H
+#define _PARSING_OPTIONS_H
+#include "_locstat.h"
+#include "_parsing_memory.h"
+#include <stdbool.h>
+
+#define chunk_buffer_size (4 * 1024 * 1024)
+
+/* Options of a scan, handed to parsers as a capsule through their options keyword, such
+   that concurrent scans parse files with settings of their own. Parsers called without
+   options fall back to process-wide settings, meant for the command line */
+struct ParseOptions {
+    // Whether metrics of files are gathered, and returned past their line counts
+    bool metrics;
+    // Capsule of the token table counted in files, see tokens_table, NULL to count none
+    PyObject *tokens;
+    // Whether files are read with page cache advice, see cache_advise
+    bool cache_advice;
+    // Budget bounding buffers of every file parsed with the options at once
+    struct MemoryBudget *memory;
+    /* AUTO parsing: files up to complete_threshold bytes are read at once into a buffer
+       fitting them, files of at least mmap_threshold bytes are memory mapped, and files
+       in between are read in chunks of chunk_size bytes */
+    Py_ssize_t complete_threshold;
+    Py_ssize_t mmap_threshold;
+    Py_ssize_t chunk_size;
+};
+
+/* Options of a parser call, or process-wide settings stored in storage if none were given.
+   Returns NULL with an exception set if options are not a capsule built by _parse_options */
+extern const struct ParseOptions *options_resolve(PyObject *capsule, struct ParseOptions *storage);
+
+extern PyObject *_parse_options(PyObject *self, PyObject *args, PyObject *kwargs);
+extern PyObject *_set_auto_thresholds(PyObject *self, PyObject *args);
+extern PyObject *_get_auto_thresholds(PyObject *self, PyObject *unused);
+
+#endif
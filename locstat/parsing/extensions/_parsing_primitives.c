@@ -1,18 +1,102 @@
 #include "_parsing_prinitives.h"
 #include "_comment_data.h"
+#include "_parsing_metrics.h"
+#include "_parsing_tokens.h"
 #include <stdbool.h>
 
+#ifdef _MSC_VER
+#define kernel_inline static __forceinline
+#else
+#define kernel_inline static inline __attribute__((always_inline))
+#endif
+
 static bool _is_ignorable(unsigned char c) {
     return ((c == 0x20) || (c == 0x09) || (c == 0x0B) || (c == 0x0C) || (c == 0x0D));
 }
 
-void
-_parse_buffer(unsigned char *buffer, size_t buffer_size,
+// Measures a byte of the current line, before it is handed to the comment state machine
+kernel_inline void
+_measure_byte(unsigned char c, struct FileMetrics *metrics){
+    if (c == '\n'){
+        if (metrics->line_length > metrics->max_line_length){
+            metrics->max_line_length = metrics->line_length;
+        }
+        metrics->trailing_whitespace += (metrics->last == ' ' || metrics->last == '\t');
+        metrics->line_length = 0;
+        metrics->last = '\n';
+        metrics->indent = 0;
+        metrics->content_seen = false;
+        return;
+    }
+    // Carriage returns of CRLF line endings are part of neither lines nor their content
+    if (c == '\r'){
+        return;
+    }
+    if (!metrics->content_seen){
+        if (c == ' ' || c == '\t'){
+            if (!metrics->indent){
+                metrics->indent = c;
+            }
+        } else {
+            metrics->content_seen = true;
+            metrics->tab_indented += (metrics->indent == '\t');
+            metrics->space_indented += (metrics->indent == ' ');
+        }
+    }
+    const bool code_point = (c & 0b11000000) != 0b10000000;
+    metrics->line_length += code_point;
+    metrics->characters += code_point;
+    metrics->last = c;
+}
+
+/* Advances the token matcher by a byte, in the region it belongs to. Words are only
+   counted once bounded on both ends, the end being known at the next byte */
+kernel_inline void
+_match_byte(unsigned char c, struct TokenCounts *tokens, const bool comment){
+    const struct TokenMatcher *matcher = tokens->matcher;
+    const bool identifier = token_identifier(c);
+    if (tokens->pending >= 0){
+        tokens->counts[tokens->pending] += !identifier;
+        tokens->pending = -1;
+    }
+    tokens->run = identifier ? tokens->run + 1 : 0;
+    tokens->state = matcher->transitions[tokens->state][c];
+    uint64_t matched = matcher->outputs[tokens->state];
+    if (!matched){
+        return;
+    }
+    const unsigned char region = comment ? TOKEN_COMMENT : TOKEN_CODE;
+    for (int j = 0; matched; j++, matched >>= 1){
+        if (!(matched & 1) || !(matcher->regions[j] & region)){
+            continue;
+        }
+        if (!matcher->words[j]){
+            tokens->counts[j]++;
+        }
+        // Words span the whole run of identifier characters they end, if bounded at start
+        else if (tokens->run == matcher->lengths[j]){
+            tokens->pending = j;
+        }
+    }
+}
+
+/* Kernel shared by all entry points, inlined into each with extended and counting known
+   at compile time, such that _parse_buffer carries no trace of metrics or tokens */
+kernel_inline void
+_parse_buffer_kernel(unsigned char *buffer, size_t buffer_size,
     Py_ssize_t minimum_characters, int *valid_characters,
     int *total, int *loc, int *commented_lines,
-    struct CommentData *comment_data){
+    struct CommentData *comment_data,
+    struct FileMetrics *metrics, const bool extended,
+    struct TokenCounts *tokens, const bool counting){
 
     for (size_t i = 0; i < buffer_size; i++){
+        if (extended){
+            _measure_byte(buffer[i], metrics);
+        }
+        if (counting){
+            _match_byte(buffer[i], tokens, comment_data->in_multiline || comment_data->in_singleline);
+        }
         if (comment_data->in_multiline) {
             if (buffer[i] == '\n') {
                 (*total)++;
@@ -88,3 +172,34 @@ _parse_buffer(unsigned char *buffer, size_t buffer_size,
         }
     }
 }
+
+void
+_parse_buffer(unsigned char *buffer, size_t buffer_size,
+    Py_ssize_t minimum_characters, int *valid_characters,
+    int *total, int *loc, int *commented_lines,
+    struct CommentData *comment_data){
+    _parse_buffer_kernel(buffer, buffer_size, minimum_characters, valid_characters,
+                         total, loc, commented_lines, comment_data, NULL, false, NULL, false);
+}
+
+void
+_parse_buffer_extended(unsigned char *buffer, size_t buffer_size,
+    Py_ssize_t minimum_characters, int *valid_characters,
+    int *total, int *loc, int *commented_lines,
+    struct CommentData *comment_data, struct FileMetrics *metrics,
+    struct TokenCounts *tokens){
+    if (!tokens){
+        metrics->bytes += buffer_size;
+        _parse_buffer_kernel(buffer, buffer_size, minimum_characters, valid_characters,
+                             total, loc, commented_lines, comment_data, metrics, true, NULL, false);
+    }
+    else if (!metrics){
+        _parse_buffer_kernel(buffer, buffer_size, minimum_characters, valid_characters,
+                             total, loc, commented_lines, comment_data, NULL, false, tokens, true);
+    }
+    else{
+        metrics->bytes += buffer_size;
+        _parse_buffer_kernel(buffer, buffer_size, minimum_characters, valid_characters,
+                             total, loc, commented_lines, comment_data, metrics, true, tokens, true);
+    }
+}
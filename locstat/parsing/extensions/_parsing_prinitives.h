@@ -5,10 +5,21 @@
 #include <stdlib.h>
 
 struct CommentData;
+struct FileMetrics;
+struct TokenCounts;
 extern void
 _parse_buffer(unsigned char *buffer, size_t buffer_size,
     Py_ssize_t minimum_characters, int *valid_characters,
     int *total, int *loc, int *commented_lines,
     struct CommentData *comment_data);
 
+/* Specializations of _parse_buffer additionally gathering extended metrics, counting
+   tokens, or both, depending on which of metrics and tokens are given */
+extern void
+_parse_buffer_extended(unsigned char *buffer, size_t buffer_size,
+    Py_ssize_t minimum_characters, int *valid_characters,
+    int *total, int *loc, int *commented_lines,
+    struct CommentData *comment_data, struct FileMetrics *metrics,
+    struct TokenCounts *tokens);
+
 #endif
@@ -0,0 +1,107 @@
+#include "_parsing_stats.h"
+
+#ifdef _WIN32
+#include <windows.h>
+#else
+#include <time.h>
+#endif
+
+struct ParsingStats parsing_stats = {0};
+volatile bool parsing_stats_enabled = false;
+struct ParsingProgress parsing_progress = {0};
+volatile bool parsing_progress_enabled = false;
+
+uint64_t monotonic_ns(void){
+#ifdef _WIN32
+    static LARGE_INTEGER frequency = {0};
+    LARGE_INTEGER counter;
+    if (!frequency.QuadPart){
+        QueryPerformanceFrequency(&frequency);
+    }
+    QueryPerformanceCounter(&counter);
+    return (uint64_t) ((double) counter.QuadPart * 1e9 / (double) frequency.QuadPart);
+#else
+    struct timespec now;
+    clock_gettime(CLOCK_MONOTONIC, &now);
+    return (uint64_t) now.tv_sec * 1000000000u + (uint64_t) now.tv_nsec;
+#endif
+}
+
+void stats_add(uint64_t *counter, uint64_t value){
+#ifdef _MSC_VER
+    InterlockedExchangeAdd64((volatile LONG64 *) counter, (LONG64) value);
+#else
+    __atomic_fetch_add(counter, value, __ATOMIC_RELAXED);
+#endif
+}
+
+void stats_lap(uint64_t *counter, uint64_t *mark, enum TraceSpan span){
+    const uint64_t now = monotonic_ns();
+    stats_add(counter, now - *mark);
+    if (parsing_trace_enabled){
+        trace_record(span, *mark, now);
+    }
+    *mark = now;
+}
+
+PyObject *
+_set_stats_enabled(PyObject *self, PyObject *arg){
+    const int enabled = PyObject_IsTrue(arg);
+    if (enabled == -1){
+        return NULL;
+    }
+    parsing_stats_enabled = enabled;
+    Py_RETURN_NONE;
+}
+
+static uint64_t
+load_counter(uint64_t *counter){
+#ifdef _MSC_VER
+    return (uint64_t) InterlockedCompareExchange64((volatile LONG64 *) counter, 0, 0);
+#else
+    return __atomic_load_n(counter, __ATOMIC_RELAXED);
+#endif
+}
+
+PyObject *
+_get_stats(PyObject *self, PyObject *unused){
+    return Py_BuildValue("{sKsKsKsKsKsKsKsKsKsK}",
+        "files", (unsigned long long) load_counter(&parsing_stats.files),
+        "bytes_read", (unsigned long long) load_counter(&parsing_stats.bytes_read),
+        "open_calls", (unsigned long long) load_counter(&parsing_stats.open_calls),
+        "stat_calls", (unsigned long long) load_counter(&parsing_stats.stat_calls),
+        "read_calls", (unsigned long long) load_counter(&parsing_stats.read_calls),
+        "map_calls", (unsigned long long) load_counter(&parsing_stats.map_calls),
+        "advise_calls", (unsigned long long) load_counter(&parsing_stats.advise_calls),
+        "io_ns", (unsigned long long) load_counter(&parsing_stats.io_ns),
+        "parse_ns", (unsigned long long) load_counter(&parsing_stats.parse_ns),
+        "peak_buffer_bytes", (unsigned long long) load_counter(&parsing_stats.peak_buffer_bytes));
+}
+
+PyObject *
+_reset_stats(PyObject *self, PyObject *unused){
+    const struct ParsingStats empty = {0};
+    parsing_stats = empty;
+    Py_RETURN_NONE;
+}
+
+PyObject *
+_set_progress_enabled(PyObject *self, PyObject *arg){
+    const int enabled = PyObject_IsTrue(arg);
+    if (enabled == -1){
+        return NULL;
+    }
+    if (enabled && !parsing_progress_enabled){
+        const struct ParsingProgress empty = {0};
+        parsing_progress = empty;
+    }
+    parsing_progress_enabled = enabled;
+    Py_RETURN_NONE;
+}
+
+PyObject *
+_get_progress(PyObject *self, PyObject *unused){
+    return Py_BuildValue("KK",
+        (unsigned long long) load_counter(&parsing_progress.files),
+        (unsigned long long) load_counter(&parsing_progress.bytes));
+}
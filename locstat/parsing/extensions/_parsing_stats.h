@@ -0,0 +1,64 @@
+#ifndef _PARSING_STATS_H
+#define _PARSING_STATS_H
+#include "_locstat.h"
+#include "_parsing_trace.h"
+#include <stdbool.h>
+#include <stdint.h>
+
+/* Counters shared by every parsing entry point, updated atomically since
+   files may be parsed concurrently with the GIL released */
+struct ParsingStats {
+    uint64_t files;
+    uint64_t bytes_read;
+    uint64_t open_calls;
+    uint64_t stat_calls;
+    uint64_t read_calls;
+    uint64_t map_calls;
+    // Page cache advice, see _parsing_cache.h
+    uint64_t advise_calls;
+    uint64_t io_ns;
+    uint64_t parse_ns;
+    // Largest number of bytes held by file buffers at once, see _parsing_memory.h
+    uint64_t peak_buffer_bytes;
+};
+
+extern struct ParsingStats parsing_stats;
+// Read once per file, so that disabled collection costs a single branch
+extern volatile bool parsing_stats_enabled;
+
+extern uint64_t monotonic_ns(void);
+extern void stats_add(uint64_t *counter, uint64_t value);
+/* Add the time elapsed since *mark to a counter, and move *mark to now. The elapsed time
+   is recorded as the given span when tracing */
+extern void stats_lap(uint64_t *counter, uint64_t *mark, enum TraceSpan span);
+
+// Whether entry points time their phases, for statistics, traces or both
+static inline bool stats_collecting(void){
+    return parsing_stats_enabled || parsing_trace_enabled;
+}
+
+/* Files and bytes parsed, sampled by progress reports. Kept apart from ParsingStats so
+   that counting them takes no timestamps */
+struct ParsingProgress {
+    uint64_t files;
+    uint64_t bytes;
+};
+
+extern struct ParsingProgress parsing_progress;
+extern volatile bool parsing_progress_enabled;
+
+// Count a parsed file, called once per file by every parsing entry point
+static inline void progress_add(uint64_t bytes){
+    if (parsing_progress_enabled){
+        stats_add(&parsing_progress.files, 1);
+        stats_add(&parsing_progress.bytes, bytes);
+    }
+}
+
+extern PyObject *_set_stats_enabled(PyObject *self, PyObject *arg);
+extern PyObject *_get_stats(PyObject *self, PyObject *unused);
+extern PyObject *_reset_stats(PyObject *self, PyObject *unused);
+extern PyObject *_set_progress_enabled(PyObject *self, PyObject *arg);
+extern PyObject *_get_progress(PyObject *self, PyObject *unused);
+
+#endif
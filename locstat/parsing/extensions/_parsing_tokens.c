@@ -0,0 +1,269 @@
+#include "_parsing_tokens.h"
+#include <stdlib.h>
+#include <string.h>
+
+#define TOKEN_TABLE_CAPSULE "locstat.token_table"
+
+/* Matchers of every extension tokens are counted for. The fallback matcher, of the "*"
+   extension, counts tokens of extensions without a matcher of their own */
+struct TokenTable {
+    Py_ssize_t count;
+    char **extensions;
+    struct TokenMatcher *matchers;
+    struct TokenMatcher *fallback;
+};
+
+static void
+matcher_free(struct TokenMatcher *matcher){
+    free(matcher->transitions);
+    free(matcher->outputs);
+    Py_XDECREF(matcher->labels);
+}
+
+static bool
+matcher_build(struct TokenMatcher *matcher, PyObject *entries){
+    PyObject *sequence = PySequence_Check(entries) ? PySequence_Tuple(entries) : NULL;
+    if (!sequence){
+        if (!PyErr_Occurred()){
+            PyErr_SetString(PyExc_TypeError, "Tokens must be a sequence of (token, region) pairs");
+        }
+        return false;
+    }
+    const Py_ssize_t count = PyTuple_Size(sequence);
+    if (count > token_limit){
+        PyErr_Format(PyExc_ValueError, "At most %d tokens may be counted per extension", token_limit);
+        Py_DECREF(sequence);
+        return false;
+    }
+    matcher->count = count;
+    matcher->labels = PyTuple_New(count);
+    if (!matcher->labels){
+        Py_DECREF(sequence);
+        return false;
+    }
+
+    const char *tokens[token_limit];
+    Py_ssize_t total = 0;
+    for (Py_ssize_t i = 0; i < count; i++){
+        const char *token;
+        Py_ssize_t length;
+        int region;
+        if (!PyArg_ParseTuple(PyTuple_GetItem(sequence, i), "y#i", &token, &length, &region)){
+            Py_DECREF(sequence);
+            return false;
+        }
+        if (!length || region < TOKEN_CODE || region > (TOKEN_CODE | TOKEN_COMMENT)){
+            PyErr_SetString(PyExc_ValueError, "Tokens must be non-empty, and counted in code, comments or both");
+            Py_DECREF(sequence);
+            return false;
+        }
+        total += length;
+        if (total > token_bytes_limit){
+            PyErr_Format(PyExc_ValueError, "Tokens of an extension may span %d bytes at most", token_bytes_limit);
+            Py_DECREF(sequence);
+            return false;
+        }
+        PyObject *label = PyUnicode_DecodeUTF8(token, length, "surrogateescape");
+        if (!label){
+            Py_DECREF(sequence);
+            return false;
+        }
+        PyTuple_SetItem(matcher->labels, i, label);
+        tokens[i] = token;
+        matcher->lengths[i] = (uint16_t) length;
+        matcher->regions[i] = (unsigned char) region;
+        matcher->words[i] = true;
+        for (Py_ssize_t j = 0; j < length; j++){
+            matcher->words[i] = matcher->words[i] && token_identifier((unsigned char) token[j]);
+        }
+    }
+
+    // Trie of tokens, in which transitions to the root are missing ones
+    const Py_ssize_t limit = total + 1;
+    matcher->transitions = calloc(limit, sizeof(*matcher->transitions));
+    matcher->outputs = calloc(limit, sizeof(uint64_t));
+    uint16_t *failures = malloc(limit * sizeof(uint16_t));
+    uint16_t *queue = malloc(limit * sizeof(uint16_t));
+    if (!matcher->transitions || !matcher->outputs || !failures || !queue){
+        free(failures);
+        free(queue);
+        Py_DECREF(sequence);
+        PyErr_NoMemory();
+        return false;
+    }
+    uint16_t states = 1;
+    for (Py_ssize_t i = 0; i < count; i++){
+        uint16_t state = 0;
+        for (Py_ssize_t j = 0; j < matcher->lengths[i]; j++){
+            const unsigned char c = (unsigned char) tokens[i][j];
+            if (!matcher->transitions[state][c]){
+                matcher->transitions[state][c] = states++;
+            }
+            state = matcher->transitions[state][c];
+        }
+        matcher->outputs[state] |= (uint64_t) 1 << i;
+    }
+    // Tokens are borrowed from the sequence up to here
+    Py_DECREF(sequence);
+
+    /* Failure links in breadth-first order, completing transitions of each state with
+       those of its failure, which is shallower and thus already complete */
+    Py_ssize_t head = 0, tail = 0;
+    for (int c = 0; c < 256; c++){
+        const uint16_t state = matcher->transitions[0][c];
+        if (state){
+            failures[state] = 0;
+            queue[tail++] = state;
+        }
+    }
+    while (head < tail){
+        const uint16_t state = queue[head++];
+        matcher->outputs[state] |= matcher->outputs[failures[state]];
+        for (int c = 0; c < 256; c++){
+            const uint16_t next = matcher->transitions[state][c];
+            if (next){
+                failures[next] = matcher->transitions[failures[state]][c];
+                queue[tail++] = next;
+            }
+            else{
+                matcher->transitions[state][c] = matcher->transitions[failures[state]][c];
+            }
+        }
+    }
+    free(failures);
+    free(queue);
+    return true;
+}
+
+static void
+table_free(struct TokenTable *table){
+    for (Py_ssize_t i = 0; i < table->count; i++){
+        free(table->extensions[i]);
+        matcher_free(&table->matchers[i]);
+    }
+    free(table->extensions);
+    free(table->matchers);
+    free(table);
+}
+
+static void
+table_destructor(PyObject *capsule){
+    table_free(PyCapsule_GetPointer(capsule, TOKEN_TABLE_CAPSULE));
+}
+
+PyObject *
+tokens_table(PyObject *spec){
+    if (!PyDict_Check(spec)){
+        PyErr_SetString(PyExc_TypeError, "Tokens must map extensions to sequences of (token, region) pairs");
+        return NULL;
+    }
+    struct TokenTable *table = calloc(1, sizeof(struct TokenTable));
+    const Py_ssize_t size = PyDict_Size(spec);
+    if (table){
+        table->extensions = calloc(size ? size : 1, sizeof(char *));
+        table->matchers = calloc(size ? size : 1, sizeof(struct TokenMatcher));
+    }
+    if (!table || !table->extensions || !table->matchers){
+        if (table){
+            table_free(table);
+        }
+        return PyErr_NoMemory();
+    }
+
+    PyObject *extension, *entries;
+    Py_ssize_t position = 0;
+    while (PyDict_Next(spec, &position, &extension, &entries)){
+        const char *name = PyUnicode_Check(extension) ? PyUnicode_AsUTF8AndSize(extension, NULL) : NULL;
+        if (!name){
+            if (!PyErr_Occurred()){
+                PyErr_SetString(PyExc_TypeError, "Extensions must be strings");
+            }
+            table_free(table);
+            return NULL;
+        }
+        struct TokenMatcher *matcher = &table->matchers[table->count];
+        table->extensions[table->count] = malloc(strlen(name) + 1);
+        // Counted first, such that partially built matchers are freed alongside the table
+        table->count++;
+        if (!table->extensions[table->count - 1]){
+            table_free(table);
+            PyErr_NoMemory();
+            return NULL;
+        }
+        strcpy(table->extensions[table->count - 1], name);
+        if (!matcher_build(matcher, entries)){
+            table_free(table);
+            return NULL;
+        }
+        if (!strcmp(name, "*")){
+            table->fallback = matcher;
+        }
+    }
+
+    PyObject *capsule = PyCapsule_New(table, TOKEN_TABLE_CAPSULE, table_destructor);
+    if (!capsule){
+        table_free(table);
+    }
+    return capsule;
+}
+
+struct TokenCounts *
+tokens_acquire(PyObject *capsule, const char *filename, struct TokenCounts *tokens){
+    if (!capsule){
+        return NULL;
+    }
+    const struct TokenTable *table = PyCapsule_GetPointer(capsule, TOKEN_TABLE_CAPSULE);
+
+    // Extensions as determined by walkers: past the last dot of the name, else the name
+    const char *name = filename;
+    for (const char *c = filename; *c; c++){
+#ifdef _WIN32
+        if (*c == '/' || *c == '\\'){
+#else
+        if (*c == '/'){
+#endif
+            name = c + 1;
+        }
+    }
+    const char *extension = strrchr(name, '.');
+    extension = extension ? extension + 1 : name;
+
+    const struct TokenMatcher *matcher = table->fallback;
+    for (Py_ssize_t i = 0; i < table->count; i++){
+        if (!strcmp(table->extensions[i], extension)){
+            matcher = &table->matchers[i];
+            break;
+        }
+    }
+    if (!matcher || !matcher->count){
+        return NULL;
+    }
+
+    memset(tokens, 0, sizeof(struct TokenCounts));
+    tokens->matcher = matcher;
+    tokens->pending = -1;
+    return tokens;
+}
+
+PyObject *
+tokens_value(struct TokenCounts *tokens){
+    // The end of a file bounds words as well
+    if (tokens->pending >= 0){
+        tokens->counts[tokens->pending]++;
+        tokens->pending = -1;
+    }
+    PyObject *value = PyDict_New();
+    if (!value){
+        return NULL;
+    }
+    for (Py_ssize_t i = 0; i < tokens->matcher->count; i++){
+        PyObject *count = PyLong_FromUnsignedLongLong(tokens->counts[i]);
+        if (!count || PyDict_SetItem(value, PyTuple_GetItem(tokens->matcher->labels, i), count)){
+            Py_XDECREF(count);
+            Py_DECREF(value);
+            return NULL;
+        }
+        Py_DECREF(count);
+    }
+    return value;
+}
@@ -0,0 +1,58 @@
+#ifndef _PARSING_TOKENS_H
+#define _PARSING_TOKENS_H
+#include "_locstat.h"
+#include <stdbool.h>
+#include <stdint.h>
+
+// Tokens counted per extension at most, one bit of a matcher state's output mask each
+#define token_limit 64
+// Bytes of all tokens of an extension at most, bounding the states of their matcher
+#define token_bytes_limit 4096
+
+// Regions tokens are counted in, as a bit mask
+#define TOKEN_CODE 1
+#define TOKEN_COMMENT 2
+
+/* Aho-Corasick automaton over the tokens of an extension, compiled into a complete
+   transition table such that matching takes a single lookup per byte. Output masks of
+   states flag the tokens ending at them, including through failure links */
+struct TokenMatcher {
+    Py_ssize_t count;
+    uint16_t (*transitions)[256];
+    uint64_t *outputs;
+    uint16_t lengths[token_limit];
+    unsigned char regions[token_limit];
+    // Tokens made of identifier characters only, which are matched as whole words
+    bool words[token_limit];
+    PyObject *labels;
+};
+
+// Token counts of a file, alongside the state of matching, carried across chunks
+struct TokenCounts {
+    const struct TokenMatcher *matcher;
+    uint64_t counts[token_limit];
+    uint32_t run;
+    uint16_t state;
+    int pending;
+};
+
+// Identifier characters, including bytes of multi-byte UTF-8 characters
+static inline bool token_identifier(unsigned char c){
+    return (c >= 'a' && c <= 'z') || (c >= 'A' && c <= 'Z') || (c >= '0' && c <= '9')
+        || c == '_' || c >= 0x80;
+}
+
+/* Capsule of the matchers of every extension of a mapping of extensions to sequences of
+   (token, region) pairs, as compiled by compile_tokens. Tokens of the "*" extension are
+   counted for extensions without tokens of their own */
+extern PyObject *tokens_table(PyObject *spec);
+
+/* Counts of the tokens of a file's extension in a table, or of every extension, NULL if
+   no table is given or no tokens are counted for it. The table must outlive the counts */
+extern struct TokenCounts *tokens_acquire(PyObject *table, const char *filename,
+                                          struct TokenCounts *tokens);
+
+// Mapping of tokens to their counts, completing a token ending the file
+extern PyObject *tokens_value(struct TokenCounts *tokens);
+
+#endif
@@ -0,0 +1,111 @@
+#include "_parsing_trace.h"
+#include "_parsing_stats.h"
+#include <stdlib.h>
+
+#ifdef _WIN32
+#include <windows.h>
+#define thread_local_storage __declspec(thread)
+#else
+#include <pthread.h>
+#define thread_local_storage _Thread_local
+#ifdef __linux__
+#include <sys/syscall.h>
+#include <unistd.h>
+#endif
+#endif
+
+// 24MB of events, enough for a scan of a quarter million files
+#define default_trace_capacity (1024 * 1024)
+
+volatile bool parsing_trace_enabled = false;
+static struct TraceEvent *trace_events = NULL;
+static uint64_t trace_capacity = 0;
+// Slots claimed, exceeding the capacity once events are dropped
+static uint64_t trace_length = 0;
+
+// Identifiers matching threading.get_native_id, looked up once per thread
+static uint32_t
+current_thread_id(void){
+    static thread_local_storage uint32_t thread_id = 0;
+    if (!thread_id){
+#if defined(_WIN32)
+        thread_id = (uint32_t) GetCurrentThreadId();
+#elif defined(__APPLE__)
+        uint64_t id;
+        pthread_threadid_np(NULL, &id);
+        thread_id = (uint32_t) id;
+#elif defined(__linux__)
+        thread_id = (uint32_t) syscall(SYS_gettid);
+#else
+        thread_id = (uint32_t) (uintptr_t) pthread_self();
+#endif
+    }
+    return thread_id;
+}
+
+void trace_record(enum TraceSpan span, uint64_t start_ns, uint64_t end_ns){
+#ifdef _MSC_VER
+    const uint64_t slot = (uint64_t) InterlockedExchangeAdd64((volatile LONG64 *) &trace_length, 1);
+#else
+    const uint64_t slot = __atomic_fetch_add(&trace_length, 1, __ATOMIC_RELAXED);
+#endif
+    if (slot >= trace_capacity){
+        return;
+    }
+    struct TraceEvent *event = &trace_events[slot];
+    event->start_ns = start_ns;
+    event->duration_ns = end_ns - start_ns;
+    event->thread_id = current_thread_id();
+    event->span = (uint32_t) span;
+}
+
+PyObject *
+_set_trace_enabled(PyObject *self, PyObject *args){
+    int enabled;
+    Py_ssize_t capacity = default_trace_capacity;
+    if (!PyArg_ParseTuple(args, "p|n", &enabled, &capacity)){
+        return NULL;
+    }
+    if (capacity <= 0){
+        PyErr_SetString(PyExc_ValueError, "Trace capacity must be positive");
+        return NULL;
+    }
+    // Events of a previous trace are discarded when tracing anew
+    if (enabled && !parsing_trace_enabled){
+        struct TraceEvent *events = malloc((size_t) capacity * sizeof(struct TraceEvent));
+        if (!events){
+            return PyErr_NoMemory();
+        }
+        free(trace_events);
+        trace_events = events;
+        trace_capacity = (uint64_t) capacity;
+        trace_length = 0;
+    }
+    parsing_trace_enabled = enabled;
+    Py_RETURN_NONE;
+}
+
+PyObject *
+_get_trace(PyObject *self, PyObject *unused){
+    if (parsing_trace_enabled){
+        PyErr_SetString(PyExc_RuntimeError, "Tracing must be disabled before collecting its events");
+        return NULL;
+    }
+    const uint64_t length = trace_length < trace_capacity ? trace_length : trace_capacity;
+    PyObject *events = PyBytes_FromStringAndSize(
+        (const char *) trace_events, (Py_ssize_t) (length * sizeof(struct TraceEvent)));
+    if (!events){
+        return NULL;
+    }
+    const uint64_t dropped = trace_length - length;
+    free(trace_events);
+    trace_events = NULL;
+    trace_capacity = 0;
+    trace_length = 0;
+    return Py_BuildValue("NK", events, (unsigned long long) dropped);
+}
+
+PyObject *
+_trace_clock(PyObject *self, PyObject *unused){
+    return PyLong_FromUnsignedLongLong((unsigned long long) monotonic_ns());
+}
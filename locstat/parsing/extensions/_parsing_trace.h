@@ -0,0 +1,36 @@
+#ifndef _PARSING_TRACE_H
+#define _PARSING_TRACE_H
+#include "_locstat.h"
+#include <stdbool.h>
+#include <stdint.h>
+
+// Spans of parsing entry points, in the order of their names in locstat.utilities.tracing
+enum TraceSpan {
+    SPAN_OPEN,
+    SPAN_READ,
+    SPAN_MAP,
+    SPAN_PARSE,
+    SPAN_CLOSE,
+};
+
+/* Fixed size records, copied out as is once tracing is disabled. Kept free of padding,
+   so that they unpack as "=QQII" */
+struct TraceEvent {
+    uint64_t start_ns;
+    uint64_t duration_ns;
+    uint32_t thread_id;
+    uint32_t span;
+};
+
+// Read once per file alongside parsing_stats_enabled, see stats_collecting
+extern volatile bool parsing_trace_enabled;
+
+/* Record a span in a buffer allocated upfront, claiming slots atomically such that
+   concurrent parsers never wait on each other. Spans beyond its capacity are dropped */
+extern void trace_record(enum TraceSpan span, uint64_t start_ns, uint64_t end_ns);
+
+extern PyObject *_set_trace_enabled(PyObject *self, PyObject *args);
+extern PyObject *_get_trace(PyObject *self, PyObject *unused);
+extern PyObject *_trace_clock(PyObject *self, PyObject *unused);
+
+#endif
@@ -0,0 +1,325 @@
+"""
+Calibration of AUTO parsing thresholds against the machine it runs on.
+
+Files of every size of a sweep are generated in a temporary directory, and parsed using
+each strategy AUTO parsing dispatches to: reading files at once, reading them in chunks
+of each candidate size, and memory mapping them. Thresholds are derived from the file
+sizes at which each strategy stops, or starts, being the fastest.
+"""
+
+import os
+import sys
+import tempfile
+from dataclasses import dataclass
+from time import perf_counter_ns
+from typing import Callable, Final, Iterable, Optional, Sequence
+
+from locstat.parsing.extensions._parsing import (
+    _parse_file_auto,
+    _parse_options,
+)
+
+__all__ = (
+    "CalibrationResult",
+    "calibrate",
+    "derive_thresholds",
+    "evict_from_page_cache",
+    "format_calibration",
+    "SIZES",
+    "CHUNK_SIZES",
+)
+
+KB: Final[int] = 1024
+MB: Final[int] = 1024 * KB
+# 1KB to 64MB, in powers of 4
+SIZES: Final[tuple[int, ...]] = tuple(KB * 4**power for power in range(9))
+CHUNK_SIZES: Final[tuple[int, ...]] = (64 * KB, 256 * KB, MB, 4 * MB)
+# Bytes parsed per file size in a single timed run, spread across at most MAX_FILES files
+SAMPLE_BYTES: Final[int] = 16 * MB
+MAX_FILES: Final[int] = 4096
+# Threshold disabling a strategy altogether
+NEVER: Final[int] = sys.maxsize
+NANOSECONDS: Final[int] = 1_000_000_000
+
+_SAMPLE_LINES: Final[bytes] = b"".join(
+    (
+        b"/* Generated for calibration,\n",
+        b"   spanning multiple lines */\n",
+        b"static int counter = 0;  // trailing comment\n",
+        b"\n",
+        b"int increment(int value){\n",
+        b"    return value + counter++;\n",
+        b"}\n",
+    )
+)
+
+
+@dataclass(frozen=True, slots=True)
+class CalibrationResult:
+    """Throughput of every strategy in bytes per second, per file size of the sweep"""
+
+    sizes: tuple[int, ...]
+    complete: tuple[float, ...]
+    chunked: dict[int, tuple[float, ...]]
+    mmap: tuple[float, ...]
+    cold: bool
+    auto_complete_threshold: int
+    auto_mmap_threshold: int
+    auto_chunk_size: int
+
+    @property
+    def configurations(self) -> dict[str, int]:
+        return {
+            "auto_complete_threshold": self.auto_complete_threshold,
+            "auto_mmap_threshold": self.auto_mmap_threshold,
+            "auto_chunk_size": self.auto_chunk_size,
+        }
+
+    def strategy(self, size: int) -> str:
+        """Strategy AUTO parsing picks for files of the given size"""
+        if size >= self.auto_mmap_threshold:
+            return "mmap"
+        if size <= self.auto_complete_threshold:
+            return "complete"
+        return f"chunked {_format_size(self.auto_chunk_size)}"
+
+
+def _format_size(size: int) -> str:
+    if size == NEVER:
+        return "never"
+    for unit, factor in (("MB", MB), ("KB", KB)):
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{unit}"
+    return f"{size}B"
+
+
+def evict_from_page_cache(filepaths: Iterable[str]) -> None:
+    """Drop contents of the given files from the page cache"""
+    for filepath in filepaths:
+        descriptor: int = os.open(filepath, os.O_RDONLY)
+        try:
+            os.posix_fadvise(descriptor, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(descriptor)
+
+
+def _write_files(directory: str, size: int) -> list[str]:
+    content: bytes = (_SAMPLE_LINES * (size // len(_SAMPLE_LINES) + 1))[:size]
+    filepaths: list[str] = []
+    for index in range(min(MAX_FILES, max(1, SAMPLE_BYTES // size))):
+        filepath: str = os.path.join(directory, f"{size}_{index}.c")
+        with open(filepath, "wb") as file:
+            file.write(content)
+            # Dirty pages cannot be evicted, cold runs require them to be written back
+            os.fsync(file.fileno())
+        filepaths.append(filepath)
+    return filepaths
+
+
+def _time_strategy(
+    filepaths: Sequence[str], thresholds: tuple[int, int, int], repeat: int, cold: bool
+) -> int:
+    # Thresholds of each strategy are bound to its calls, leaving process-wide ones as is
+    options = _parse_options(auto_thresholds=thresholds)
+    if not cold:
+        for filepath in filepaths:
+            _parse_file_auto(filepath, b"//", b"/*", b"*/", 1, options=options)
+
+    fastest: int = 0
+    for _ in range(repeat):
+        if cold:
+            evict_from_page_cache(filepaths)
+        start: int = perf_counter_ns()
+        for filepath in filepaths:
+            _parse_file_auto(filepath, b"//", b"/*", b"*/", 1, options=options)
+        elapsed: int = max(perf_counter_ns() - start, 1)
+        fastest = min(fastest, elapsed) if fastest else elapsed
+    return fastest
+
+
+def derive_thresholds(
+    sizes: Sequence[int],
+    complete: Sequence[float],
+    chunked: dict[int, Sequence[float]],
+    mmap: Sequence[float],
+    tolerance: float = 0.05,
+) -> tuple[int, int, int]:
+    """
+    Derive AUTO parsing thresholds from the throughput of each strategy
+
+    :param sizes: Ascending file sizes of the sweep, in bytes
+    :type sizes: Sequence[int]
+
+    :param complete: Throughput of reading files at once, per file size
+    :type complete: Sequence[float]
+
+    :param chunked: Throughput of reading files in chunks, per chunk size and file size
+    :type chunked: dict[int, Sequence[float]]
+
+    :param mmap: Throughput of memory mapping files, per file size
+    :type mmap: Sequence[float]
+
+    :param tolerance: Relative slowdown of a strategy still considered on par, such that
+    allocations and mappings are only favoured when measurably faster
+    :type tolerance: float
+
+    :return: File size up to which files are read at once, file size from which files
+    are memory mapped, and chunk size of files in between
+    :rtype: tuple[int, int, int]
+    """
+    # Chunk sizes only matter for files spanning several chunks
+    spanning: list[int] = [
+        index for index, size in enumerate(sizes) if size > max(chunked)
+    ] or [len(sizes) - 1]
+    chunk_size: int = max(
+        chunked, key=lambda chunk: sum(chunked[chunk][index] for index in spanning)
+    )
+    chunked_throughput: Sequence[float] = chunked[chunk_size]
+
+    complete_threshold: int = 0
+    for index, size in enumerate(sizes):
+        if complete[index] < chunked_throughput[index] * (1 - tolerance):
+            break
+        complete_threshold = size
+
+    mmap_threshold: int = NEVER
+    for index in reversed(range(len(sizes))):
+        alternative: float = (
+            complete[index]
+            if sizes[index] <= complete_threshold
+            else chunked_throughput[index]
+        )
+        if mmap[index] <= alternative * (1 + tolerance):
+            break
+        mmap_threshold = sizes[index]
+
+    return complete_threshold, mmap_threshold, chunk_size
+
+
+def calibrate(
+    sizes: Sequence[int] = SIZES,
+    chunk_sizes: Sequence[int] = CHUNK_SIZES,
+    repeat: int = 3,
+    cold: Optional[bool] = None,
+    directory: Optional[str] = None,
+    progress: Optional[Callable[[int], None]] = None,
+) -> CalibrationResult:
+    """
+    Measure every AUTO parsing strategy across a sweep of file sizes, and derive
+    thresholds from the measurements. Process-wide thresholds are left untouched
+
+    :param sizes: File sizes to measure, in bytes
+    :type sizes: Sequence[int]
+
+    :param chunk_sizes: Chunk sizes to measure chunked reads with, in bytes
+    :type chunk_sizes: Sequence[int]
+
+    :param repeat: Timed runs per strategy and file size, the fastest of which is kept
+    :type repeat: int
+
+    :param cold: Whether to evict files from the page cache before every run,
+    defaults to doing so where `posix_fadvise` is available
+    :type cold: Optional[bool]
+
+    :param directory: Directory to generate files in, a temporary directory within the
+    system's default location if None. Should reside on the file system to be scanned
+    :type directory: Optional[str]
+
+    :param progress: Called with every file size before it is measured
+    :type progress: Optional[Callable[[int], None]]
+
+    :return: Measurements alongside the thresholds derived from them
+    :rtype: CalibrationResult
+    """
+    sizes = sorted(sizes)
+    if cold is None:
+        cold = hasattr(os, "posix_fadvise")
+
+    default_chunk: int = max(chunk_sizes)
+    complete: list[float] = []
+    chunked: dict[int, list[float]] = {chunk: [] for chunk in chunk_sizes}
+    mmap: list[float] = []
+
+    with tempfile.TemporaryDirectory(
+        prefix="locstat-calibration-", dir=directory
+    ) as calibration_directory:
+        for size in sizes:
+            if progress:
+                progress(size)
+            filepaths: list[str] = _write_files(calibration_directory, size)
+            total_bytes: int = size * len(filepaths) * NANOSECONDS
+
+            complete.append(
+                total_bytes
+                / _time_strategy(filepaths, (NEVER, NEVER, default_chunk), repeat, cold)
+            )
+            for chunk in chunk_sizes:
+                chunked[chunk].append(
+                    total_bytes
+                    / _time_strategy(filepaths, (0, NEVER, chunk), repeat, cold)
+                )
+            mmap.append(
+                total_bytes
+                / _time_strategy(filepaths, (0, 0, default_chunk), repeat, cold)
+            )
+
+            for filepath in filepaths:
+                os.remove(filepath)
+
+    complete_threshold, mmap_threshold, chunk_size = derive_thresholds(
+        sizes, complete, chunked, mmap
+    )
+    return CalibrationResult(
+        sizes=tuple(sizes),
+        complete=tuple(complete),
+        chunked={chunk: tuple(values) for chunk, values in chunked.items()},
+        mmap=tuple(mmap),
+        cold=cold,
+        auto_complete_threshold=complete_threshold,
+        auto_mmap_threshold=mmap_threshold,
+        auto_chunk_size=chunk_size,
+    )
+
+
+def format_calibration(result: CalibrationResult) -> str:
+    """
+    :return: Table of throughput in MB/s per file size and strategy, alongside the
+    strategy AUTO parsing picks with the derived thresholds
+    :rtype: str
+    """
+    headers: list[str] = [
+        "Size",
+        "Complete",
+        *(f"Chunked {_format_size(chunk)}" for chunk in result.chunked),
+        "Mmap",
+        "AUTO",
+    ]
+    rows: list[list[str]] = [
+        [
+            _format_size(size),
+            f"{result.complete[index] / 1e6:,.1f}",
+            *(f"{values[index] / 1e6:,.1f}" for values in result.chunked.values()),
+            f"{result.mmap[index] / 1e6:,.1f}",
+            result.strategy(size),
+        ]
+        for index, size in enumerate(result.sizes)
+    ]
+    widths: list[int] = [
+        max(len(row[column]) for row in (headers, *rows))
+        for column in range(len(headers))
+    ]
+
+    lines: list[str] = [
+        f"Throughput in MB/s, {'cold' if result.cold else 'hot'} page cache",
+        "  ".join(header.rjust(width) for header, width in zip(headers, widths)),
+        "  ".join("-" * width for width in widths),
+    ]
+    lines.extend(
+        "  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows
+    )
+    lines.append("")
+    lines.extend(
+        f"{key} : {value} ({_format_size(value)})"
+        for key, value in result.configurations.items()
+    )
+    return "\n".join(lines)
@@ -1,14 +1,28 @@
+from functools import partial
 from typing import Callable, Optional
 
 from locstat.data_structures.parse_modes import ParseMode
+from locstat.data_structures.tokens import TokenTable
 from locstat.data_structures.typing import SupportsMembershipChecks, FileParsingFunction
 from locstat.parsing.extensions._parsing import (
     _parse_file_vm_map,
     _parse_file,
+    _parse_file_auto,
     _parse_file_no_chunk,
+    _get_cache_advice,
+    _get_memory_budget,
+    _parse_options,
+    _set_cache_advice,
+    _set_memory_budget,
 )
 
-__all__ = ("construct_file_filter", "construct_directory_filter", "derive_file_parser")
+__all__ = (
+    "construct_file_filter",
+    "construct_directory_filter",
+    "derive_file_parser",
+    "set_memory_budget",
+    "set_cache_advice",
+)
 
 
 def construct_file_filter(
@@ -19,31 +33,49 @@ def construct_file_filter(
     include_type: bool = False,
     exclude_type: bool = False,
 ) -> Callable[[str, str], bool]:
+    """
+    Construct a file filter, specialized for the given flags such that
+    no flag is evaluated when filtering
+
+    :param extension_set: File extensions to include/exclude
+    :type extension_set: Optional[SupportsMembershipChecks[str]]
+
+    :param file_set: Files to include/exclude, either a set of paths or a PathMatcher
+    :type file_set: Optional[SupportsMembershipChecks[str]]
+
+    :return: Filter accepting a filepath and its extension
+    :rtype: Callable[[str, str], bool]
+    """
     if extension_set is None:
-        extension_set = {}
+        extension_set = frozenset()
     if file_set is None:
-        file_set = {}
-
-    def file_filter(file: str, extension: str) -> bool:
-        file_match = (
-            True
-            if not (include_file or exclude_file)
-            else file in file_set if include_file else file not in file_set
-        )
+        file_set = frozenset()
 
-        type_match = (
-            True
-            if not (include_type or exclude_type)
-            else (
-                extension in extension_set
-                if include_type
-                else extension not in extension_set
-            )
-        )
+    if not (include_type or exclude_type):
+        if include_file:
+            return lambda file, extension: file in file_set
+        if exclude_file:
+            return lambda file, extension: file not in file_set
+        return lambda file, extension: True
 
-        return file_match and type_match
+    if not (include_file or exclude_file):
+        if include_type:
+            return lambda file, extension: extension in extension_set
+        return lambda file, extension: extension not in extension_set
 
-    return file_filter
+    if include_file and include_type:
+        return lambda file, extension: extension in extension_set and file in file_set
+    if include_file:
+        return lambda file, extension: (
+            extension not in extension_set and file in file_set
+        )
+    if include_type:
+        return lambda file, extension: (
+            extension in extension_set and file not in file_set
+        )
+    return lambda file, extension: (
+        extension not in extension_set and file not in file_set
+    )
 
 
 def construct_directory_filter(
@@ -58,9 +90,115 @@ def construct_directory_filter(
     return lambda directory: True
 
 
-def derive_file_parser(option: ParseMode) -> FileParsingFunction:
+def derive_file_parser(
+    option: ParseMode,
+    auto_thresholds: Optional[tuple[int, int, int]] = None,
+    *,
+    max_memory: Optional[int] = None,
+    cache_advice: bool = False,
+    extended_metrics: bool = False,
+    tokens: Optional[TokenTable] = None,
+) -> FileParsingFunction:
+    """
+    Derive a parser for a parsing mode, bound to options of its own if any is given.
+    Such parsers leave process-wide settings aside, and are unaffected by concurrent
+    scans, whereas parsers derived without options follow `set_memory_budget`,
+    `set_cache_advice` and the process-wide AUTO thresholds
+
+    :param option: Parsing mode to derive a parser for
+    :type option: ParseMode
+
+    :param auto_thresholds: For AUTO parsing, the file size in bytes up to which files
+    are read at once, the file size from which files are memory mapped, and the chunk
+    size in bytes files in between are read in. Process-wide thresholds are used if None
+    :type auto_thresholds: Optional[tuple[int, int, int]]
+
+    :param max_memory: Bytes buffers of files parsed by the parser may hold at once,
+    across every thread calling it, see `set_memory_budget`. Unbounded if None
+    :type max_memory: Optional[int]
+
+    :param cache_advice: Whether to drop files from the page cache once parsed, unless
+    they were cached beforehand, see `set_cache_advice`
+    :type cache_advice: bool
+
+    :param extended_metrics: Whether the parser gathers byte and character counts, the
+    longest line, lines with trailing whitespace and lines indented with tabs or spaces
+    of files, in the same pass as their line counts, returning them past line counts,
+    see locstat.data_structures.metrics
+    :type extended_metrics: bool
+
+    :param tokens: Token table, as compiled by `compile_tokens`, of tokens the parser
+    counts in files in the same pass as their line counts, compiling the tokens of every
+    extension into a matcher of the parsing extension once. Counts of files with tokens
+    to count are returned last, see locstat.data_structures.tokens
+    :type tokens: Optional[TokenTable]
+    """
     if option == ParseMode.MMAP:
-        return _parse_file_vm_map
+        parser: FileParsingFunction = _parse_file_vm_map
     elif option == ParseMode.COMPLETE:
-        return _parse_file_no_chunk
-    return _parse_file
+        parser = _parse_file_no_chunk
+    elif option == ParseMode.AUTO:
+        # Dispatch by file size happens natively, within a single call per file
+        parser = _parse_file_auto
+    else:
+        parser = _parse_file
+        # Thresholds only apply to AUTO parsing
+        auto_thresholds = None
+    if (
+        auto_thresholds is None
+        and max_memory is None
+        and not cache_advice
+        and not extended_metrics
+        and tokens is None
+    ):
+        return parser
+    # Options are bound to this parser alone, leaving concurrent scans unaffected
+    return partial(
+        parser,
+        options=_parse_options(
+            extended_metrics=extended_metrics,
+            tokens=tokens,
+            cache_advice=cache_advice,
+            max_memory=max_memory,
+            auto_thresholds=auto_thresholds,
+        ),
+    )
+
+
+def set_memory_budget(budget: int) -> int:
+    """
+    Bound the bytes held by file buffers at once, across every thread parsing files with
+    parsers derived without options, such as the command line's.
+    Files not fitting in the budget are read in chunks of at most the budget instead,
+    and reads wait while outstanding buffers leave no room for theirs. Memory mapped
+    files are not buffered, and are left unbounded
+
+    :param budget: Budget in bytes, 0 to leave buffers unbounded
+    :type budget: int
+
+    :return: The budget previously in place
+    :rtype: int
+    """
+    previous: int = _get_memory_budget()
+    _set_memory_budget(budget)
+    return previous
+
+
+def set_cache_advice(enabled: bool) -> bool:
+    """
+    Advise the kernel that files parsed by parsers derived without options are read once,
+    sequentially, and drop their pages from the page cache once parsed, such that scans
+    do not evict the working sets of neighbouring workloads. Files with pages cached
+    before being opened are left cached, as someone else is using them. Where the page
+    cache cannot be inspected, every file is dropped, and where advice is unsupported it
+    is skipped
+
+    :param enabled: Whether to advise the page cache
+    :type enabled: bool
+
+    :return: Whether advice was previously enabled
+    :rtype: bool
+    """
+    previous: bool = _get_cache_advice()
+    _set_cache_advice(enabled)
+    return previous
@@ -0,0 +1,257 @@
+"""Output handler persisting results to a SQLite database"""
+
+import os
+from datetime import datetime
+from typing import Any, Final, Iterator, Mapping, Optional, Union
+
+from locstat.data_structures.metrics import METRIC_KEYS
+from locstat.data_structures.output_keys import OutputKeys
+
+__all__ = ("dump_sqlite_output",)
+
+SCANNED_AT_FORMAT: Final[str] = "%d/%m/%y, at %H:%M:%S"
+
+SCHEMA: Final[str] = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    root TEXT,
+    scanned_at TEXT NOT NULL,
+    platform TEXT,
+    duration REAL,
+    total INTEGER NOT NULL,
+    loc INTEGER NOT NULL,
+    comments INTEGER NOT NULL,
+    blank INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_root_scanned_at ON runs (root, scanned_at);
+
+CREATE TABLE IF NOT EXISTS languages (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    extension TEXT NOT NULL,
+    files INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    loc INTEGER NOT NULL,
+    comments INTEGER NOT NULL,
+    blank INTEGER NOT NULL,
+    PRIMARY KEY (run_id, extension)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS languages_extension ON languages (extension, run_id);
+
+CREATE TABLE IF NOT EXISTS files (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    path TEXT NOT NULL,
+    extension TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    loc INTEGER NOT NULL,
+    comments INTEGER NOT NULL,
+    blank INTEGER NOT NULL,
+    PRIMARY KEY (run_id, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS files_path ON files (path, run_id);
+CREATE INDEX IF NOT EXISTS files_extension ON files (extension, run_id);
+
+CREATE TABLE IF NOT EXISTS language_metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    extension TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    characters INTEGER NOT NULL,
+    max_line_length INTEGER NOT NULL,
+    trailing_whitespace INTEGER NOT NULL,
+    tab_indented INTEGER NOT NULL,
+    space_indented INTEGER NOT NULL,
+    PRIMARY KEY (run_id, extension)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS file_metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    path TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    characters INTEGER NOT NULL,
+    max_line_length INTEGER NOT NULL,
+    trailing_whitespace INTEGER NOT NULL,
+    tab_indented INTEGER NOT NULL,
+    space_indented INTEGER NOT NULL,
+    PRIMARY KEY (run_id, path)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS language_tokens (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    extension TEXT NOT NULL,
+    token TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (run_id, extension, token)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS language_tokens_token ON language_tokens (token, run_id);
+
+CREATE TABLE IF NOT EXISTS file_tokens (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    path TEXT NOT NULL,
+    token TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (run_id, path, token)
+) WITHOUT ROWID;
+"""
+
+
+def _iter_files(
+    output_mapping: Mapping[str, Any],
+) -> Iterator[tuple[str, Mapping[str, Any]]]:
+    pending: list[Mapping[str, Any]] = [output_mapping]
+    while pending:
+        node: Mapping[str, Any] = pending.pop()
+        yield from node.get(OutputKeys.FILES, {}).items()
+        pending.extend(node.get(OutputKeys.SUBDIRECTORIES, {}).values())
+
+
+def _iter_file_rows(
+    run_id: int, output_mapping: Mapping[str, Any]
+) -> Iterator[tuple[Any, ...]]:
+    for path, file_data in _iter_files(output_mapping):
+        yield (
+            run_id,
+            path,
+            os.path.basename(path).rsplit(".", 1)[-1],
+            file_data[OutputKeys.TOTAL],
+            file_data[OutputKeys.LOC],
+            file_data[OutputKeys.COMMENTED],
+            file_data[OutputKeys.BLANK],
+        )
+
+
+def _iter_file_metric_rows(
+    run_id: int, output_mapping: Mapping[str, Any]
+) -> Iterator[tuple[Any, ...]]:
+    for path, file_data in _iter_files(output_mapping):
+        if OutputKeys.BYTES in file_data:
+            yield (run_id, path, *(file_data[key] for key in METRIC_KEYS))
+
+
+def _iter_file_token_rows(
+    run_id: int, output_mapping: Mapping[str, Any]
+) -> Iterator[tuple[Any, ...]]:
+    for path, file_data in _iter_files(output_mapping):
+        for token, count in file_data.get(OutputKeys.TOKENS, {}).items():
+            if count:
+                yield run_id, path, token, count
+
+
+def _parse_scanned_at(scanned_at: Any) -> str:
+    try:
+        return datetime.strptime(scanned_at, SCANNED_AT_FORMAT).isoformat()
+    except (TypeError, ValueError):
+        return datetime.now().isoformat(timespec="seconds")
+
+
+def dump_sqlite_output(
+    output_mapping: dict[str, Any],
+    filepath: Union[str, os.PathLike[str], int],
+    sort_keys: bool = False,
+    root: Optional[str] = None,
+) -> None:
+    """
+    Append results to a SQLite database as a new run, alongside its per extension
+    and per file rows, their extended metrics if gathered, and their token counts if
+    counted. Files are only given rows for tokens they contain. Rows are bulk inserted
+    in a single transaction
+
+    :param output_mapping: resultant mapping
+    :type output_mapping: dict[str, Any]
+
+    :param filepath: Database file to write results to, created if it does not exist
+    :type filepath: Union[str, os.PathLike[str]]
+
+    :param sort_keys: Unused, rows are unordered
+    :type sort_keys: bool
+
+    :param root: Directory scanned, recorded alongside the run
+    :type root: Optional[str]
+    """
+    if isinstance(filepath, int):
+        raise ValueError("SQLite output requires a database filepath")
+
+    import sqlite3
+
+    general: Mapping[str, Any] = output_mapping[OutputKeys.GENERAL]
+    duration: Any = general.get(OutputKeys.TIME)
+    connection: "sqlite3.Connection" = sqlite3.connect(filepath)
+    try:
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+
+        with connection:
+            run_id: Any = connection.execute(
+                " ".join(
+                    (
+                        "INSERT INTO runs",
+                        "(root, scanned_at, platform, duration, total, loc, comments, blank)",
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    )
+                ),
+                (
+                    root,
+                    _parse_scanned_at(general.get(OutputKeys.SCANNED_AT)),
+                    general.get(OutputKeys.PLATFORM),
+                    float(duration.rstrip("s")) if duration else None,
+                    general[OutputKeys.TOTAL],
+                    general[OutputKeys.LOC],
+                    general[OutputKeys.COMMENTED],
+                    general[OutputKeys.BLANK],
+                ),
+            ).lastrowid
+
+            connection.executemany(
+                "INSERT INTO languages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        run_id,
+                        extension,
+                        language_data[OutputKeys.FILES],
+                        language_data[OutputKeys.TOTAL],
+                        language_data[OutputKeys.LOC],
+                        language_data[OutputKeys.COMMENTED],
+                        language_data[OutputKeys.BLANK],
+                    )
+                    for extension, language_data in output_mapping.get(
+                        OutputKeys.LANGUAGES, {}
+                    ).items()
+                ),
+            )
+
+            connection.executemany(
+                "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                _iter_file_rows(run_id, output_mapping),
+            )
+
+            # Extended metrics, if gathered, are kept apart from line counts
+            connection.executemany(
+                "INSERT INTO language_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (run_id, extension, *(language_data[key] for key in METRIC_KEYS))
+                    for extension, language_data in output_mapping.get(
+                        OutputKeys.LANGUAGES, {}
+                    ).items()
+                    if OutputKeys.BYTES in language_data
+                ),
+            )
+            connection.executemany(
+                "INSERT INTO file_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                _iter_file_metric_rows(run_id, output_mapping),
+            )
+
+            connection.executemany(
+                "INSERT INTO language_tokens VALUES (?, ?, ?, ?)",
+                (
+                    (run_id, extension, token, count)
+                    for extension, language_data in output_mapping.get(
+                        OutputKeys.LANGUAGES, {}
+                    ).items()
+                    for token, count in language_data.get(OutputKeys.TOKENS, {}).items()
+                ),
+            )
+            connection.executemany(
+                "INSERT INTO file_tokens VALUES (?, ?, ?, ?)",
+                _iter_file_token_rows(run_id, output_mapping),
+            )
+    finally:
+        connection.close()
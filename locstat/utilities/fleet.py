@@ -0,0 +1,74 @@
+"""
+Scans of many roots in a single process, e.g. every repository of an organization.
+
+Roots are scanned through one pool of threads by `scan_many`, so that threads idle at
+the end of a root pick up subtrees of others, and the interpreter, language table and
+parsing extension are loaded once rather than once per root. Results of every root are
+written as soon as it has been scanned, and summed into line counts across the fleet.
+"""
+
+from typing import IO, Any, Final, Mapping
+
+from locstat.data_structures.metrics import (
+    finalize_metrics,
+    merge_language_data,
+    merge_metrics,
+)
+from locstat.data_structures.output_keys import OutputKeys
+
+__all__ = ("FleetAggregate", "read_roots")
+
+LINE_KEYS: Final[tuple[str, ...]] = (
+    OutputKeys.TOTAL,
+    OutputKeys.LOC,
+    OutputKeys.COMMENTED,
+    OutputKeys.BLANK,
+)
+
+
+def read_roots(file: IO[str]) -> list[str]:
+    """
+    :return: Roots listed in a file, one per line, skipping blank lines and comments
+    starting with '#'. Roots listed more than once are scanned once
+    :rtype: list[str]
+    """
+    roots: dict[str, None] = {}
+    for line in file:
+        root: str = line.strip()
+        if root and not root.startswith("#"):
+            roots[root] = None
+    return list(roots)
+
+
+class FleetAggregate:
+    """Line counts summed across every root of a fleet, overall and per extension"""
+
+    __slots__ = ("roots", "general", "languages")
+
+    def __init__(self) -> None:
+        self.roots: int = 0
+        # Line counts, followed by extended metrics and token counts of roots reporting them
+        self.general: dict[str, int] = dict.fromkeys(LINE_KEYS, 0)
+        self.languages: dict[str, dict[str, int]] = {}
+
+    def add(self, output_mapping: Mapping[str, Any]) -> None:
+        """Add the results of a root, in the layout of regular output"""
+        self.roots += 1
+        general: Mapping[str, Any] = output_mapping[OutputKeys.GENERAL]
+        for key in LINE_KEYS:
+            self.general[key] += general[key]
+        merge_metrics(self.general, general)
+        for extension, language_data in output_mapping.get(
+            OutputKeys.LANGUAGES, {}
+        ).items():
+            merge_language_data(self.languages.setdefault(extension, {}), language_data)
+
+    def to_mapping(self) -> dict[str, Any]:
+        general: dict[str, Any] = dict(self.general)
+        finalize_metrics(general)
+        output_mapping: dict[str, Any] = {
+            OutputKeys.GENERAL: {**general, OutputKeys.ROOTS: self.roots}
+        }
+        if self.languages:
+            output_mapping[OutputKeys.LANGUAGES] = self.languages
+        return output_mapping
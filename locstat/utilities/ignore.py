@@ -0,0 +1,256 @@
+"""
+Filters honouring gitignore rules, compiled per directory and inherited down a directory walk.
+
+Rules are read from `.git/info/exclude` of the enclosing repository, and from every
+`.gitignore` file between the repository's root and the directories being walked.
+Ignored directories are rejected by the directory filter, and hence never scanned.
+"""
+
+import os
+import re
+from typing import Callable, Final, NamedTuple, Optional
+
+__all__ = ("IgnoreRule", "GitIgnoreFilter", "translate_pattern", "parse_ignore_file")
+
+IGNORE_FILENAME: Final[str] = ".gitignore"
+REPOSITORY_DIRECTORY: Final[str] = ".git"
+EXCLUDE_FILEPATH: Final[tuple[str, ...]] = (REPOSITORY_DIRECTORY, "info", "exclude")
+TRAILING_WHITESPACE: Final[re.Pattern[str]] = re.compile(r"(?<!\\)[ \t]+$")
+
+
+class IgnoreRule(NamedTuple):
+    pattern: re.Pattern[str]
+    negated: bool
+    directory_only: bool
+    # Directory the rule was defined for, paths are matched relative to it
+    base: str
+
+
+def _translate_class(pattern: str, index: int) -> tuple[str, int]:
+    """Translate a bracket expression starting at index, returning it and the index past it"""
+    end: int = index + 1
+    if end < len(pattern) and pattern[end] == "!":
+        end += 1
+    if end < len(pattern) and pattern[end] == "]":
+        end += 1
+    while end < len(pattern) and pattern[end] != "]":
+        end += 1
+    if end >= len(pattern):
+        # Unterminated, treated literally
+        return re.escape("["), index + 1
+
+    contents: str = pattern[index + 1 : end].replace("\\", "\\\\")
+    if contents.startswith("!"):
+        contents = "^" + contents[1:]
+    elif contents.startswith("^"):
+        contents = "\\" + contents
+    return f"[{contents}]", end + 1
+
+
+def translate_pattern(pattern: str) -> Optional[tuple[str, bool, bool]]:
+    """
+    Translate a single line of an ignore file into a regular expression,
+    matched against paths relative to the ignore file's directory
+
+    :param pattern: Line of an ignore file
+    :type pattern: str
+
+    :return: Regular expression, and whether the pattern is negated and only matches
+    directories. None for blank lines and comments
+    :rtype: Optional[tuple[str, bool, bool]]
+    """
+    # Trailing whitespace is insignificant, unless escaped
+    stripped: str = TRAILING_WHITESPACE.sub("", pattern.rstrip("\r\n"))
+    if not stripped or stripped.startswith("#"):
+        return None
+
+    negated: bool = stripped.startswith("!")
+    if negated:
+        stripped = stripped[1:]
+    elif stripped.startswith(("\\!", "\\#")):
+        stripped = stripped[1:]
+
+    directory_only: bool = stripped.endswith("/")
+    stripped = stripped.rstrip("/")
+    if not stripped:
+        return None
+
+    # Patterns with a separator at the start or in the middle are relative to the ignore
+    # file's directory, otherwise they match at any depth below it
+    anchored: bool = "/" in stripped
+    stripped = stripped.lstrip("/")
+
+    parts: list[str] = []
+    index: int = 0
+    while index < len(stripped):
+        character: str = stripped[index]
+        if stripped.startswith("**", index):
+            preceded: bool = index == 0 or stripped[index - 1] == "/"
+            followed: bool = index + 2 == len(stripped) or stripped[index + 2] == "/"
+            if preceded and followed:
+                if index + 2 == len(stripped):
+                    parts.append(".*")
+                    index += 2
+                else:
+                    # Zero or more directories
+                    parts.append("(?:.*/)?")
+                    index += 3
+                continue
+            parts.append("[^/]*")
+            index += 2
+        elif character == "*":
+            parts.append("[^/]*")
+            index += 1
+        elif character == "?":
+            parts.append("[^/]")
+            index += 1
+        elif character == "[":
+            translated, index = _translate_class(stripped, index)
+            parts.append(translated)
+        elif character == "\\" and index + 1 < len(stripped):
+            parts.append(re.escape(stripped[index + 1]))
+            index += 2
+        else:
+            parts.append(re.escape(character))
+            index += 1
+
+    body: str = "".join(parts)
+    return (f"^{body}$" if anchored else f"^(?:.*/)?{body}$"), negated, directory_only
+
+
+def parse_ignore_file(filepath: str, base: str) -> tuple[IgnoreRule, ...]:
+    """
+    Compile rules of an ignore file
+
+    :param filepath: Ignore file to read
+    :type filepath: str
+
+    :param base: Directory that the file's patterns are relative to
+    :type base: str
+
+    :return: Compiled rules in order of definition, empty if the file could not be read
+    :rtype: tuple[IgnoreRule, ...]
+    """
+    try:
+        with open(filepath, "r", encoding="utf-8", errors="surrogateescape") as source:
+            lines: list[str] = source.readlines()
+    except OSError:
+        return ()
+
+    rules: list[IgnoreRule] = []
+    for line in lines:
+        translated: Optional[tuple[str, bool, bool]] = translate_pattern(line)
+        if translated is None:
+            continue
+        expression, negated, directory_only = translated
+        try:
+            rules.append(
+                IgnoreRule(re.compile(expression), negated, directory_only, base)
+            )
+        except re.error:
+            # Malformed patterns are skipped, as done by git
+            continue
+    return tuple(rules)
+
+
+def _find_repository_root(directory: str) -> Optional[str]:
+    while True:
+        if os.path.exists(os.path.join(directory, REPOSITORY_DIRECTORY)):
+            return directory
+        parent: str = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+class GitIgnoreFilter:
+    """
+    Directory and file filters rejecting entries ignored by gitignore rules under a root.
+
+    Rules of each directory are compiled the first time one of its entries is filtered,
+    and are inherited by its subdirectories. Repository metadata directories are
+    always rejected
+    """
+
+    __slots__ = ("root", "_rules")
+
+    def __init__(self, root: str) -> None:
+        self.root: str = os.path.abspath(root)
+        self._rules: dict[str, tuple[IgnoreRule, ...]] = {}
+
+        repository_root: Optional[str] = _find_repository_root(self.root)
+        root_rules: tuple[IgnoreRule, ...] = ()
+        if repository_root is not None:
+            root_rules = parse_ignore_file(
+                os.path.join(repository_root, *EXCLUDE_FILEPATH), repository_root
+            )
+            # Ignore files of directories between the repository's root and the walk's root
+            ancestors: list[str] = []
+            directory: str = self.root
+            while directory != repository_root:
+                directory = os.path.dirname(directory)
+                ancestors.append(directory)
+            for ancestor in reversed(ancestors):
+                root_rules += parse_ignore_file(
+                    os.path.join(ancestor, IGNORE_FILENAME), ancestor
+                )
+
+        self._rules[self.root] = root_rules + parse_ignore_file(
+            os.path.join(self.root, IGNORE_FILENAME), self.root
+        )
+
+    def _directory_rules(self, directory: str) -> tuple[IgnoreRule, ...]:
+        rules: Optional[tuple[IgnoreRule, ...]] = self._rules.get(directory)
+        if rules is not None:
+            return rules
+
+        parent: str = os.path.dirname(directory)
+        inherited: tuple[IgnoreRule, ...] = (
+            self._directory_rules(parent) if parent != directory else ()
+        )
+        rules = inherited + parse_ignore_file(
+            os.path.join(directory, IGNORE_FILENAME), directory
+        )
+        self._rules[directory] = rules
+        return rules
+
+    def is_ignored(self, path: str, is_directory: bool) -> bool:
+        """Whether a path is ignored, given that its parent directory is not"""
+        # Last matching rule decides, allowing later negations to re-include paths
+        for rule in reversed(self._directory_rules(os.path.dirname(path))):
+            if rule.directory_only and not is_directory:
+                continue
+            # Rules are only ever inherited from ancestors, so paths always start with their base
+            relative_path: str = path[
+                len(rule.base) + (not rule.base.endswith(os.sep)) :
+            ]
+            if os.sep != "/":
+                relative_path = relative_path.replace(os.sep, "/")
+            if rule.pattern.match(relative_path):
+                return not rule.negated
+        return False
+
+    def directory_filter(self, path: str) -> bool:
+        if os.path.basename(path) == REPOSITORY_DIRECTORY:
+            return False
+        return not self.is_ignored(path, True)
+
+    def file_filter(self, path: str, extension: str) -> bool:
+        return not self.is_ignored(path, False)
+
+    def compose(
+        self,
+        file_filter: Callable[[str, str], bool],
+        directory_filter: Callable[[str], bool],
+    ) -> tuple[Callable[[str, str], bool], Callable[[str], bool]]:
+        """
+        :return: File and directory filters accepting entries accepted both by
+        the given filters and by ignore rules
+        :rtype: tuple[Callable[[str, str], bool], Callable[[str], bool]]
+        """
+        return (
+            lambda file, extension: self.file_filter(file, extension)
+            and file_filter(file, extension),
+            lambda directory: self.directory_filter(directory)
+            and directory_filter(directory),
+        )
@@ -0,0 +1,200 @@
+"""
+Opt-in instrumentation of scans, attributing their time to individual phases.
+
+Directory enumeration, filter callbacks and file parsing are timed by wrapping the
+functions handed to directory walkers, so that scans without instrumentation run
+unchanged. Within file parsing, time spent on I/O and in the parsing loop, bytes read and
+system calls are counted by the parsing extension itself.
+"""
+
+import os
+import sys
+from time import perf_counter_ns
+from typing import Any, Callable, Final, Optional
+
+from locstat.data_structures.sketches import TopN
+from locstat.data_structures.typing import (
+    DirectoryEntries,
+    FileLineData,
+    FileParsingFunction,
+    ScandirFunction,
+)
+from locstat.parsing.extensions._parsing import (
+    _get_stats,
+    _reset_stats,
+    _set_stats_enabled,
+)
+
+__all__ = ("ScanStatistics", "peak_rss_kb")
+
+NANOSECONDS: Final[int] = 1_000_000_000
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Peak resident set size of the current process in kilobytes, None if unsupported"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, and in kilobytes elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class _TimedEntries:
+    """Entries of a directory, timing their enumeration"""
+
+    __slots__ = ("_entries", "_statistics")
+
+    def __init__(self, path: str, statistics: "ScanStatistics") -> None:
+        start: int = perf_counter_ns()
+        self._entries: DirectoryEntries = statistics.scandir_function(path)
+        self._statistics: "ScanStatistics" = statistics
+        statistics.enumeration_ns += perf_counter_ns() - start
+        statistics.directories += 1
+
+    def __iter__(self) -> "_TimedEntries":
+        return self
+
+    def __next__(self) -> os.DirEntry[str]:
+        start: int = perf_counter_ns()
+        try:
+            return next(self._entries)
+        finally:
+            self._statistics.enumeration_ns += perf_counter_ns() - start
+
+    def __enter__(self) -> "_TimedEntries":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self._entries.__exit__(None, None, None)
+
+
+class ScanStatistics:
+    """
+    Per phase timers and counters of a single scan, alongside its slowest files.
+
+    Functions handed to walkers are wrapped through `time_parser`, `time_filters`
+    and `scandir`, and native counters are collected between `start` and `stop`
+    """
+
+    __slots__ = (
+        "scandir_function",
+        "directories",
+        "enumeration_ns",
+        "filter_ns",
+        "filter_calls",
+        "parse_ns",
+        "scan_ns",
+        "_slowest",
+        "_epoch",
+        "_native",
+    )
+
+    def __init__(
+        self, slowest: int = 10, scandir_function: Optional[ScandirFunction] = None
+    ) -> None:
+        # Lists directories timed through `scandir`
+        self.scandir_function: ScandirFunction = scandir_function or os.scandir
+        self.directories: int = 0
+        self.enumeration_ns: int = 0
+        self.filter_ns: int = 0
+        self.filter_calls: int = 0
+        self.parse_ns: int = 0
+        self.scan_ns: int = 0
+        self._slowest: TopN = TopN(slowest)
+        self._epoch: int = 0
+        self._native: dict[str, int] = {}
+
+    def start(self) -> None:
+        _reset_stats()
+        _set_stats_enabled(True)
+        self._epoch = perf_counter_ns()
+
+    def stop(self) -> None:
+        self.scan_ns = perf_counter_ns() - self._epoch
+        _set_stats_enabled(False)
+        self._native = _get_stats()
+
+    def scandir(self, path: str) -> DirectoryEntries:
+        return _TimedEntries(path, self)
+
+    def time_parser(self, file_parser: FileParsingFunction) -> FileParsingFunction:
+        push: Callable[[float, Any], None] = self._slowest.push
+
+        def timed_parser(filepath: str, *args: Any) -> FileLineData:
+            start: int = perf_counter_ns()
+            line_data: FileLineData = file_parser(filepath, *args)
+            elapsed: int = perf_counter_ns() - start
+            self.parse_ns += elapsed
+            push(elapsed, filepath)
+            return line_data
+
+        return timed_parser  # type: ignore[return-value]
+
+    def time_filters(
+        self,
+        file_filter: Callable[[str, str], bool],
+        directory_filter: Callable[[str], bool],
+    ) -> tuple[Callable[[str, str], bool], Callable[[str], bool]]:
+        def timed_file_filter(path: str, extension: str) -> bool:
+            start: int = perf_counter_ns()
+            accepted: bool = file_filter(path, extension)
+            self.filter_ns += perf_counter_ns() - start
+            self.filter_calls += 1
+            return accepted
+
+        def timed_directory_filter(path: str) -> bool:
+            start: int = perf_counter_ns()
+            accepted: bool = directory_filter(path)
+            self.filter_ns += perf_counter_ns() - start
+            self.filter_calls += 1
+            return accepted
+
+        return timed_file_filter, timed_directory_filter
+
+    def to_mapping(self) -> dict[str, Any]:
+        """
+        :return: Mapping of phases to their durations in seconds, and of counters
+        to their values. Native phases are nested within parsing
+        :rtype: dict[str, Any]
+        """
+        scan_seconds: float = self.scan_ns / NANOSECONDS
+        files: int = self._native.get("files", 0)
+        bytes_read: int = self._native.get("bytes_read", 0)
+        accounted_ns: int = self.enumeration_ns + self.filter_ns + self.parse_ns
+
+        return {
+            "phases": {
+                "scan": round(scan_seconds, 6),
+                "enumeration": round(self.enumeration_ns / NANOSECONDS, 6),
+                "filtering": round(self.filter_ns / NANOSECONDS, 6),
+                "parsing": round(self.parse_ns / NANOSECONDS, 6),
+                "io": round(self._native.get("io_ns", 0) / NANOSECONDS, 6),
+                "parse_loop": round(self._native.get("parse_ns", 0) / NANOSECONDS, 6),
+                # Walker bookkeeping, language records and record sinks
+                "walk": round(max(self.scan_ns - accounted_ns, 0) / NANOSECONDS, 6),
+            },
+            "directories": self.directories,
+            "files": files,
+            "filter_calls": self.filter_calls,
+            "bytes_read": bytes_read,
+            "files_per_second": round(files / scan_seconds, 1) if scan_seconds else 0,
+            "mb_per_second": (
+                round(bytes_read / scan_seconds / 1e6, 2) if scan_seconds else 0
+            ),
+            "syscalls": {
+                "open": self._native.get("open_calls", 0),
+                "stat": self._native.get("stat_calls", 0),
+                "read": self._native.get("read_calls", 0),
+                "map": self._native.get("map_calls", 0),
+                "advise": self._native.get("advise_calls", 0),
+            },
+            "peak_rss_kb": peak_rss_kb(),
+            # Bytes held by file buffers at once, bounded by --max-memory
+            "peak_buffer_kb": self._native.get("peak_buffer_bytes", 0) // 1024,
+            "slowest": [
+                {"path": path, "seconds": round(elapsed / NANOSECONDS, 6)}
+                for elapsed, path in self._slowest.ranked()
+            ],
+        }
@@ -0,0 +1,151 @@
+"""
+Scans of files listed in a manifest, such as the output of `git ls-files -z`, without
+reading directories.
+
+Listed paths are arranged into the directory tree they imply, and served to walkers by
+`FileManifest.scandir` in place of os.scandir, so that extension lookup, filters, depth
+and every verbosity apply exactly as they do when walking directories. Listed paths are
+trusted as files, and only checked for existence once every other filter accepts them,
+so that files listed but since removed are skipped rather than failing the scan.
+"""
+
+import os
+import sys
+from typing import IO, Any, Callable, Iterable, Optional
+
+from locstat.data_structures.typing import DirectoryEntries
+
+__all__ = ("FileManifest", "ManifestEntry", "read_manifest")
+
+
+def read_manifest(file: IO[bytes]) -> list[str]:
+    """
+    :return: Paths listed in a manifest, delimited by NUL characters if it contains
+    any, and by newlines otherwise. Empty entries are skipped, and paths are decoded
+    as file system paths, such that undecodable names are preserved
+    :rtype: list[str]
+    """
+    data: bytes = file.read()
+    listed: list[bytes] = data.split(b"\0") if b"\0" in data else data.splitlines()
+    return [os.fsdecode(path) for path in listed if path]
+
+
+class ManifestEntry:
+    """Listed file, or directory implied by listed files, in the interface of os.DirEntry"""
+
+    __slots__ = ("name", "path", "_directory")
+
+    def __init__(self, name: str, path: str, directory: bool) -> None:
+        self.name: str = name
+        self.path: str = path
+        self._directory: bool = directory
+
+    def __fspath__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f"<ManifestEntry {self.name!r}>"
+
+    def is_symlink(self) -> bool:
+        return False
+
+    def is_file(self, *, follow_symlinks: bool = True) -> bool:
+        return not self._directory
+
+    def is_dir(self, *, follow_symlinks: bool = True) -> bool:
+        return self._directory
+
+    def stat(self, *, follow_symlinks: bool = True) -> os.stat_result:
+        return os.stat(self.path, follow_symlinks=follow_symlinks)
+
+
+class _ManifestEntries:
+    """Entries of a directory of the manifest, closed like those of os.scandir"""
+
+    __slots__ = ("_iterator",)
+
+    def __init__(self, entries: list[ManifestEntry]) -> None:
+        self._iterator = iter(entries)
+
+    def __iter__(self) -> "_ManifestEntries":
+        return self
+
+    def __next__(self) -> ManifestEntry:
+        return next(self._iterator)
+
+    def __enter__(self) -> "_ManifestEntries":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class FileManifest:
+    """
+    Directory tree of listed files, rooted at the current directory if all of them
+    are within it, and at their deepest common directory otherwise. Entries of every
+    directory are listed in the order their first file was listed in
+    """
+
+    __slots__ = ("root", "files", "_directories")
+
+    def __init__(self, paths: Iterable[str], root: Optional[str] = None) -> None:
+        absolute_paths: list[str] = list(
+            dict.fromkeys(map(os.path.abspath, paths))  # Listed once, in order
+        )
+        if root is None:
+            root = os.getcwd()
+            if absolute_paths:
+                common: str = os.path.commonpath(
+                    [os.path.dirname(path) for path in absolute_paths]
+                )
+                if os.path.commonpath((root, common)) != root:
+                    root = common
+        self.root: str = os.path.abspath(root)
+        self.files: int = len(absolute_paths)
+        self._directories: dict[str, list[ManifestEntry]] = {self.root: []}
+
+        prefix: str = os.path.join(self.root, "")
+        for path in absolute_paths:
+            if not path.startswith(prefix):
+                raise ValueError(f"{path} is not within {self.root}")
+            *directories, filename = path[len(prefix) :].split(os.sep)
+            parent: str = self.root
+            for name in directories:
+                directory: str = os.path.join(parent, name)
+                if directory not in self._directories:
+                    self._directories[directory] = []
+                    self._directories[parent].append(
+                        ManifestEntry(name, directory, True)
+                    )
+                parent = directory
+            self._directories[parent].append(
+                ManifestEntry(filename, os.path.join(parent, filename), False)
+            )
+
+    def scandir(self, path: str) -> DirectoryEntries:
+        """
+        :return: Entries of a directory of the manifest, in place of os.scandir
+        :rtype: DirectoryEntries
+        """
+        return _ManifestEntries(self._directories[path])  # type: ignore[return-value]
+
+    def compose(
+        self, file_filter: Callable[[str, str], bool]
+    ) -> Callable[[str, str], bool]:
+        """
+        :return: File filter accepting files accepted by the given filter, and found
+        on disk. Missing files are reported on stderr
+        :rtype: Callable[[str, str], bool]
+        """
+        return lambda file, extension: file_filter(file, extension) and _exists(file)
+
+
+def _exists(path: str) -> bool:
+    if os.path.exists(path):
+        return True
+    sys.stderr.write(f"Listed file {path} could not be found, skipping it\n")
+    return False
@@ -0,0 +1,378 @@
+"""
+Path matching against large sets of literal, glob and regex patterns, compiled once.
+
+Patterns are matched against paths relative to a root directory, using forward slashes:
+    - Literal paths (`vendor/lib`) match the path itself and everything beneath it,
+      and are stored in a trie of path components
+    - Literal names without separators (`node_modules`) match entries of that name
+      at any depth, and are stored in a set
+    - Globs of the form `*suffix` or `prefix*` without separators (`*.min.js`, `test_*`)
+      are matched against names through character tries
+    - Remaining globs (`**/test_*.py`, `vendor/**`) follow gitignore syntax, and regular
+      expressions are given with an `re:` prefix. Each is bucketed under a literal paths
+      it matches must hold, i.e. a path component (`fixtures` of `**/fixtures/*.py`) or
+      a prefix or suffix of the name (`.py`), picking the literal fewest others share.
+      Buckets are combined into alternations, only tried against paths holding their
+      literal, so that lookups cost about as much for thousands of patterns as for a few
+    - Leading inline flags of regular expressions are scoped to them, and those with
+      groups, whose numbers and names would clash within an alternation, are matched on
+      their own
+"""
+
+import os
+import re
+from collections import Counter
+from re import _parser
+from typing import Any, Callable, Final, Iterable, Optional, Union
+
+from locstat.utilities.ignore import translate_pattern
+
+__all__ = ("PathMatcher", "REGEX_PREFIX", "compile_expression")
+
+REGEX_PREFIX: Final[str] = "re:"
+GLOB_CHARACTERS: Final[frozenset[str]] = frozenset("*?[\\")
+# Characters bounding literal prefixes and suffixes of glob names
+GLOB_BOUNDARY: Final[re.Pattern[str]] = re.compile(r"[*?[\]\\]")
+# Marks the end of an entry in a trie, never a valid path component nor character
+TERMINAL: Final[str] = ""
+# Global inline flags, only valid at the start of an expression
+LEADING_FLAGS: Final[re.Pattern[str]] = re.compile(r"(?:\(\?[aiLmsux]+\))+")
+
+Trie = dict[str, Any]
+
+# Kinds of literals expressions are bucketed under
+COMPONENT: Final[int] = 0
+PREFIX: Final[int] = 1
+SUFFIX: Final[int] = 2
+# Literal paths matched by an expression must hold, as a kind and its text
+Literal = tuple[int, str]
+# Alternation of expressions sharing a literal, compiled once first tried
+Bucket = Union[str, re.Pattern[str]]
+
+
+def _trie_insert(trie: Trie, keys: Iterable[str]) -> None:
+    node: Trie = trie
+    for key in keys:
+        node = node.setdefault(key, {})
+    node[TERMINAL] = True
+
+
+def _trie_has_prefix_of(trie: Trie, keys: Iterable[str]) -> bool:
+    """Whether any entry in the trie is a prefix of (or equal to) the given keys"""
+    node: Optional[Trie] = trie
+    for key in keys:
+        if TERMINAL in node:
+            return True
+        node = node.get(key)
+        if node is None:
+            return False
+    return TERMINAL in node
+
+
+def compile_expression(expression: str) -> re.Pattern[str]:
+    """
+    :param expression: Regular expression given with an `re:` prefix, without it
+    :type expression: str
+
+    :raises ValueError: If the expression is invalid
+    """
+    try:
+        return re.compile(expression)
+    except re.error as e:
+        raise ValueError(f"Invalid regular expression {expression!r}: {e}") from None
+
+
+def _scope_flags(expression: str) -> Optional[str]:
+    """Expression with its leading global flags scoped to it, e.g. `(?i)x` as `(?i:x)`"""
+    flags: Optional[re.Match[str]] = LEADING_FLAGS.match(expression)
+    if flags is None:
+        return None
+    letters: str = "".join(sorted(set(re.sub(r"[(?)]", "", flags.group()))))
+    # Verbose expressions may end in a comment, closed by a newline
+    closing: str = "\n)" if "x" in letters else ")"
+    return f"(?{letters}:{expression[flags.end():]}{closing}"
+
+
+def _glob_literals(pattern: str) -> list[Literal]:
+    """Literals held by paths matching a glob, i.e. its literal components, and the
+    literal prefix and suffix of its name"""
+    components: list[str] = [
+        component for component in pattern.split("/") if component not in ("", ".")
+    ]
+    literals: list[Literal] = [
+        (COMPONENT, component)
+        for component in components
+        if not GLOB_CHARACTERS.intersection(component)
+    ]
+    name: str = components[-1]
+    # Trailing ** matches any number of components, leaving the name unknown
+    if name != "**" and GLOB_CHARACTERS.intersection(name):
+        bounds: list[str] = GLOB_BOUNDARY.split(name)
+        literals.extend(
+            literal
+            for literal in ((PREFIX, bounds[0]), (SUFFIX, bounds[-1]))
+            if literal[1]
+        )
+    return literals
+
+
+def _expression_literals(compiled: re.Pattern[str]) -> list[Literal]:
+    """Literals held by paths matching a regular expression, found in runs of literal
+    characters at its top level: components between separators, its first component
+    if it starts the expression, and the suffix of the name if it ends it"""
+    if compiled.flags & (re.IGNORECASE | re.VERBOSE):
+        return []
+    parsed: _parser.SubPattern = _parser.parse(compiled.pattern, compiled.flags)
+    literals: list[Literal] = []
+    run: list[str] = []
+    for index, (opcode, argument) in enumerate((*parsed, (None, None))):
+        if opcode is _parser.LITERAL:
+            run.append(chr(argument))
+            continue
+        if run:
+            parts: list[str] = "".join(run).split("/")
+            inner: list[str] = parts[1:-1]
+            if index == len(run) and len(parts) > 1:
+                inner.insert(0, parts[0])
+            literals.extend((COMPONENT, part) for part in inner if part)
+            if opcode is None and parts[-1]:
+                literals.append((SUFFIX, parts[-1]))
+            run.clear()
+    return literals
+
+
+class _ExpressionIndex:
+    """
+    Expressions matched against relative paths, bucketed under a literal each requires.
+    Only buckets whose literal a path holds are tried against it, alongside expressions
+    requiring none
+    """
+
+    __slots__ = (
+        "_pending",
+        "_components",
+        "_prefixes",
+        "_suffixes",
+        "_prefix_lengths",
+        "_suffix_lengths",
+        "_unbucketed",
+    )
+
+    def __init__(self) -> None:
+        self._pending: list[tuple[str, list[Literal]]] = []
+        # Buckets are kept as source until a path holds their literal, as most never do
+        self._components: dict[str, Bucket] = {}
+        self._prefixes: dict[str, Bucket] = {}
+        self._suffixes: dict[str, Bucket] = {}
+        self._prefix_lengths: tuple[int, ...] = ()
+        self._suffix_lengths: tuple[int, ...] = ()
+        self._unbucketed: Optional[re.Pattern[str]] = None
+
+    def add(self, expression: str, literals: list[Literal]) -> None:
+        self._pending.append((expression, literals))
+
+    def compile(self) -> None:
+        """Bucket expressions under the literal fewest other expressions share"""
+        frequencies: Counter[Literal] = Counter(
+            literal for _, literals in self._pending for literal in set(literals)
+        )
+        buckets: dict[Optional[Literal], list[str]] = {}
+        for expression, literals in self._pending:
+            literal: Optional[Literal] = min(
+                literals,
+                key=lambda literal: (frequencies[literal], -len(literal[1])),
+                default=None,
+            )
+            buckets.setdefault(literal, []).append(expression)
+        self._pending.clear()
+
+        unbucketed: Optional[list[str]] = buckets.pop(None, None)
+        if unbucketed:
+            self._unbucketed = re.compile("|".join(f"(?:{e})" for e in unbucketed))
+        tables: tuple[dict[str, Bucket], ...] = (
+            self._components,
+            self._prefixes,
+            self._suffixes,
+        )
+        for (kind, text), expressions in buckets.items():
+            tables[kind][text] = "|".join(f"(?:{e})" for e in expressions)
+        self._prefix_lengths = tuple(sorted({len(text) for text in self._prefixes}))
+        self._suffix_lengths = tuple(sorted({len(text) for text in self._suffixes}))
+
+    @staticmethod
+    def _try(table: dict[str, Bucket], text: str, path: str) -> bool:
+        bucket: Optional[Bucket] = table.get(text)
+        if bucket is None:
+            return False
+        if isinstance(bucket, str):
+            bucket = table[text] = re.compile(bucket)
+        return bucket.fullmatch(path) is not None
+
+    def matches(self, path: str, components: list[str], name: str) -> bool:
+        if self._components:
+            for component in components:
+                if self._try(self._components, component, path):
+                    return True
+        for length in self._prefix_lengths:
+            if length > len(name):
+                break
+            if self._try(self._prefixes, name[:length], path):
+                return True
+        for length in self._suffix_lengths:
+            if length > len(name):
+                break
+            if self._try(self._suffixes, name[-length:], path):
+                return True
+        return self._unbucketed is not None and bool(self._unbucketed.fullmatch(path))
+
+
+class PathMatcher:
+    """
+    Compiled set of patterns, matching paths under a root directory.
+
+    Supports membership checks, so that it can be used in place of path sets by filters
+    """
+
+    __slots__ = (
+        "root",
+        "pattern_count",
+        "_prefix_length",
+        "_paths",
+        "_names",
+        "_name_suffixes",
+        "_name_prefixes",
+        "_expressions",
+        "_grouped_path_patterns",
+    )
+
+    def __init__(self, patterns: Iterable[str], root: str) -> None:
+        self.root: str = os.path.abspath(root)
+        root_prefix: str = (
+            self.root if self.root.endswith(os.sep) else self.root + os.sep
+        )
+        self._prefix_length: int = len(root_prefix)
+        self.pattern_count: int = 0
+
+        self._paths: Trie = {}
+        self._names: set[str] = set()
+        self._name_suffixes: Trie = {}
+        self._name_prefixes: Trie = {}
+        self._expressions: _ExpressionIndex = _ExpressionIndex()
+        self._grouped_path_patterns: list[re.Pattern[str]] = []
+
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern:
+                continue
+            self.pattern_count += 1
+
+            if pattern.startswith(REGEX_PREFIX):
+                expression: str = pattern.removeprefix(REGEX_PREFIX)
+                compiled: re.Pattern[str] = compile_expression(expression)
+                scoped: Optional[str] = (
+                    _scope_flags(expression)
+                    if compiled.flags & ~re.UNICODE
+                    else expression
+                )
+                if compiled.groups or scoped is None:
+                    self._grouped_path_patterns.append(compiled)
+                else:
+                    self._expressions.add(scoped, _expression_literals(compiled))
+                continue
+            if pattern.startswith("!"):
+                raise ValueError(f"Negated pattern {pattern} is not supported")
+
+            # Absolute paths are matched relative to the root, ignored if outside of it
+            if os.path.isabs(pattern):
+                absolute_path: str = os.path.normpath(pattern)
+                if not absolute_path.startswith(root_prefix):
+                    continue
+                pattern = "/" + absolute_path[len(root_prefix) :].replace(os.sep, "/")
+
+            stripped: str = pattern.strip("/")
+            if not GLOB_CHARACTERS.intersection(stripped):
+                if "/" in pattern.rstrip("/"):
+                    _trie_insert(
+                        self._paths,
+                        (
+                            component
+                            for component in stripped.split("/")
+                            if component not in ("", ".")
+                        ),
+                    )
+                else:
+                    self._names.add(stripped)
+                continue
+
+            if "/" not in stripped and not GLOB_CHARACTERS.intersection(stripped[1:]):
+                if stripped[0] == "*":
+                    _trie_insert(self._name_suffixes, reversed(stripped[1:]))
+                    continue
+            if "/" not in stripped and not GLOB_CHARACTERS.intersection(stripped[:-1]):
+                if stripped[-1] == "*":
+                    _trie_insert(self._name_prefixes, stripped[:-1])
+                    continue
+
+            translated: Optional[tuple[str, bool, bool]] = translate_pattern(pattern)
+            if translated is None:
+                continue
+            expression, _, _ = translated
+            # Expressions are anchored at both ends, and fully matched instead
+            self._expressions.add(expression[1:-1], _glob_literals(stripped))
+
+        self._expressions.compile()
+
+    @classmethod
+    def from_file(cls, filepath: str, root: str) -> "PathMatcher":
+        """Compile patterns listed in a file, one per line. Blank lines and comments are skipped"""
+        with open(filepath, "r", encoding="utf-8", errors="surrogateescape") as source:
+            return cls(
+                (line for line in source if not line.lstrip().startswith("#")), root
+            )
+
+    def matches(self, path: str) -> bool:
+        """
+        :param path: Absolute path, or path relative to the matcher's root
+        :type path: str
+        """
+        if os.path.isabs(path):
+            path = path[self._prefix_length :]
+        if os.sep != "/":
+            path = path.replace(os.sep, "/")
+        name: str = path.rsplit("/", 1)[-1]
+
+        if name in self._names:
+            return True
+        if self._name_suffixes and _trie_has_prefix_of(
+            self._name_suffixes, reversed(name)
+        ):
+            return True
+        if self._name_prefixes and _trie_has_prefix_of(self._name_prefixes, name):
+            return True
+        components: list[str] = path.split("/")
+        if self._paths and _trie_has_prefix_of(self._paths, components):
+            return True
+        if self._expressions.matches(path, components, name):
+            return True
+        return any(pattern.fullmatch(path) for pattern in self._grouped_path_patterns)
+
+    __contains__ = matches
+
+    def __len__(self) -> int:
+        return self.pattern_count
+
+    def compose_exclusion(
+        self,
+        file_filter: Callable[[str, str], bool],
+        directory_filter: Callable[[str], bool],
+    ) -> tuple[Callable[[str, str], bool], Callable[[str], bool]]:
+        """
+        :return: File and directory filters accepting entries accepted by the given
+        filters and not matched by this matcher
+        :rtype: tuple[Callable[[str, str], bool], Callable[[str], bool]]
+        """
+        matches: Callable[[str], bool] = self.matches
+        return (
+            lambda file, extension: not matches(file) and file_filter(file, extension),
+            lambda directory: not matches(directory) and directory_filter(directory),
+        )
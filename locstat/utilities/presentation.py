@@ -1,13 +1,75 @@
+import gzip
+import io
 import json
 import os
 from io import TextIOWrapper
+from json.encoder import encode_basestring_ascii
+from operator import itemgetter
 from types import MappingProxyType
-from typing import Any, Final, Optional, Sequence, Union
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Final,
+    Iterable,
+    Mapping,
+    Optional,
+    Sequence,
+    Union,
+)
 
-from locstat.data_structures.typing import OutputFunction
+from locstat.data_structures.metrics import METRIC_KEYS, metrics_mapping
+from locstat.data_structures.typing import FileLineData, OutputFunction
 from locstat.data_structures.output_keys import OutputKeys
 
-__all__ = ("dump_std_output", "dump_json_output", "OUTPUT_MAPPING")
+__all__ = (
+    "open_output",
+    "dump_std_output",
+    "dump_json_output",
+    "dump_ndjson_output",
+    "dump_std_diff_output",
+    "NDJSONRecordWriter",
+    "FleetOutputWriter",
+    "OUTPUT_MAPPING",
+    "STREAMING_OUTPUT_MAPPING",
+    "FLEET_OUTPUT_MAPPING",
+)
+
+COMPRESSED_SUFFIX: Final[str] = ".gz"
+OUTPUT_BUFFER_SIZE: Final[int] = 1024 * 1024
+JSON_INDENT: Final[str] = "  "
+
+
+def open_output(filepath: Union[str, os.PathLike[str], int]) -> IO[str]:
+    """
+    Open an output file for writing text through a large write buffer,
+    transparently compressing the stream if the filepath ends with a gzip suffix
+
+    :param filepath: Output file to write results to, can be stdout
+    :type filepath: Union[str, os.PathLike[str], int]
+
+    :return: Writable text stream
+    :rtype: IO[str]
+    """
+    if not isinstance(filepath, int) and os.fspath(filepath).endswith(
+        COMPRESSED_SUFFIX
+    ):
+        # Buffer ahead of the compressor, so that small writes are not compressed one by one
+        return io.TextIOWrapper(
+            io.BufferedWriter(
+                gzip.GzipFile(filepath, mode="wb"), buffer_size=OUTPUT_BUFFER_SIZE
+            ),
+            encoding="utf-8",
+        )
+    return open(filepath, "w", buffering=OUTPUT_BUFFER_SIZE)
+
+
+STATS_LABELS: Final[dict[str, str]] = {
+    "files_per_second": "Files/s",
+    "mb_per_second": "MB/s",
+    "peak_rss_kb": "Peak RSS (KB)",
+    "peak_buffer_kb": "Peak buffers (KB)",
+}
 
 
 def _format_row(row: Sequence[Union[str, int]], widths: Sequence[int]) -> str:
@@ -21,60 +83,360 @@ def _format_row(row: Sequence[Union[str, int]], widths: Sequence[int]) -> str:
     )
 
 
+def _format_tokens(tokens: Mapping[str, int], found: bool = False) -> str:
+    return ", ".join(
+        f"{token}={count}" for token, count in tokens.items() if count or not found
+    )
+
+
 def _dump_directory_tree(
-    file: TextIOWrapper,
-    name: str,
-    node: dict[str, Any],
-    prefix: str = "",
-    is_last: bool = True,
+    file: Union[TextIOWrapper, IO[str]],
+    tree: Mapping[str, Any],
+    sort_keys: bool = False,
 ) -> None:
-    connector: str = "└── " if is_last else "├── "
-    next_prefix: str = prefix + ("    " if is_last else "│   ")
-    total, loc, commented, blank = (
-        node.get(OutputKeys.TOTAL),
-        node.get(OutputKeys.LOC),
-        node.get(OutputKeys.COMMENTED),
-        node.get(OutputKeys.BLANK),
+    """
+    Write directories and their files as a tree, one line at a time.
+    Directories are walked with an explicit stack rather than recursively,
+    and entries are only sorted by name if requested
+    """
+    write = file.write
+    name_key = itemgetter(0)
+
+    # Pending directories, as (name, node, prefix, is_last)
+    stack: list[tuple[str, Mapping[str, Any], str, bool]] = []
+    subdirectories: list[tuple[str, Mapping[str, Any]]] = (
+        sorted(tree.items(), key=name_key) if sort_keys else list(tree.items())
     )
-    header = f"{name}/ ({OutputKeys.TOTAL}={total}, {OutputKeys.LOC}={loc}, {OutputKeys.COMMENTED}={commented}, {OutputKeys.BLANK}={blank})"
+    for idx in range(len(subdirectories) - 1, -1, -1):
+        name, node = subdirectories[idx]
+        stack.append((name, node, "", idx == len(subdirectories) - 1))
+
+    while stack:
+        name, node, prefix, is_last = stack.pop()
+        next_prefix: str = prefix + ("    " if is_last else "│   ")
+        write(
+            f"{prefix}{'└── ' if is_last else '├── '}{name}/ "
+            f"({OutputKeys.TOTAL}={node.get(OutputKeys.TOTAL)}, "
+            f"{OutputKeys.LOC}={node.get(OutputKeys.LOC)}, "
+            f"{OutputKeys.COMMENTED}={node.get(OutputKeys.COMMENTED)}, "
+            f"{OutputKeys.BLANK}={node.get(OutputKeys.BLANK)})\n"
+        )
+
+        subdirectory_mapping: Mapping[str, Any] = node.get(
+            OutputKeys.SUBDIRECTORIES, {}
+        )
+        files: Mapping[str, Any] = node.get(OutputKeys.FILES, {})
+        last_file_index: int = -1 if subdirectory_mapping else len(files) - 1
+        for idx, (path, meta) in enumerate(
+            sorted(files.items(), key=name_key) if sort_keys else files.items()
+        ):
+            write(
+                f"{next_prefix}{'└── ' if idx == last_file_index else '├── '}"
+                f"{os.path.basename(path)} "
+                f"total={meta.get(OutputKeys.TOTAL)}, "
+                f"loc={meta.get(OutputKeys.LOC)}), "
+                f"commented={meta.get(OutputKeys.COMMENTED)}, "
+                f"blank={meta.get(OutputKeys.BLANK)}"
+            )
+            if OutputKeys.BYTES in meta:
+                write(
+                    f", {OutputKeys.BYTES}={meta[OutputKeys.BYTES]}, "
+                    f"{OutputKeys.MAX_LINE_LENGTH}={meta[OutputKeys.MAX_LINE_LENGTH]}, "
+                    f"{OutputKeys.TRAILING_WHITESPACE}={meta[OutputKeys.TRAILING_WHITESPACE]}, "
+                    f"{OutputKeys.INDENTATION}={meta[OutputKeys.INDENTATION]}"
+                )
+            # Only tokens found are listed, so that files containing them stand out
+            found: str = _format_tokens(meta.get(OutputKeys.TOKENS, {}), found=True)
+            if found:
+                write(f", {found}")
+            write("\n")
 
-    file.write(f"{prefix}{connector}{header}\n")
+        subdirectories = (
+            sorted(subdirectory_mapping.items(), key=name_key)
+            if sort_keys
+            else list(subdirectory_mapping.items())
+        )
+        for idx in range(len(subdirectories) - 1, -1, -1):
+            subname, subnode = subdirectories[idx]
+            stack.append(
+                (subname, subnode, next_prefix, idx == len(subdirectories) - 1)
+            )
 
-    files: dict[str, Any] = node.get(OutputKeys.FILES, {})
-    file_items: list[tuple[str, dict[str, int]]] = sorted(files.items())
 
-    for idx, (path, meta) in enumerate(file_items):
-        is_last_file: bool = idx == len(file_items) - 1 and not node.get(
-            OutputKeys.SUBDIRECTORIES
+def _dump_json(
+    write: Callable[[str], Any],
+    value: Any,
+    indent_level: int = 0,
+    sort_keys: bool = False,
+) -> None:
+    """
+    Incrementally encode a value as indented JSON, formatted identically to json.dumps.
+    Mappings (including lazy views over result stores) are encoded item by item, and
+    are never materialized as a whole
+    """
+    if isinstance(value, Mapping):
+        items: Iterable[tuple[Any, Any]] = (
+            sorted(value.items(), key=itemgetter(0)) if sort_keys else value.items()
         )
-        file_connector: str = "└── " if is_last_file else "├── "
-        fname = os.path.basename(path)
+        separator: str = "{\n" + JSON_INDENT * (indent_level + 1)
+        for key, item in items:
+            write(separator)
+            write(encode_basestring_ascii(key))
+            write(": ")
+            _dump_json(write, item, indent_level + 1, sort_keys)
+            separator = ",\n" + JSON_INDENT * (indent_level + 1)
+        write("{}" if separator[0] == "{" else "\n" + JSON_INDENT * indent_level + "}")
+    elif isinstance(value, (list, tuple)):
+        separator = "[\n" + JSON_INDENT * (indent_level + 1)
+        for item in value:
+            write(separator)
+            _dump_json(write, item, indent_level + 1, sort_keys)
+            separator = ",\n" + JSON_INDENT * (indent_level + 1)
+        write("[]" if separator[0] == "[" else "\n" + JSON_INDENT * indent_level + "]")
+    elif isinstance(value, str):
+        write(encode_basestring_ascii(value))
+    else:
+        write(json.dumps(value))
 
-        write_data: str = ", ".join(
-            (
-                f"total={meta.get(OutputKeys.TOTAL)}",
-                f"loc={meta.get(OutputKeys.LOC)})",
-                f"commented={meta.get(OutputKeys.COMMENTED)}",
-                f"blank={meta.get(OutputKeys.BLANK)}",
+
+def _dump_stats(file: IO[str], stats: dict[str, Any]) -> None:
+    file.write(f"\n{OutputKeys.STATS.capitalize()}\n")
+    phases: dict[str, float] = stats["phases"]
+    width: int = max(len(phase) for phase in phases)
+    for phase, seconds in phases.items():
+        file.write(f"{phase.replace('_', ' '):<{width}}  {seconds:>12.6f}s\n")
+
+    file.write("\n")
+    for key, value in stats.items():
+        if key in ("phases", "syscalls", "slowest"):
+            continue
+        label: str = STATS_LABELS.get(key) or key.replace("_", " ").capitalize()
+        file.write(f"{label} : {value}\n")
+    file.write(
+        "Syscalls : "
+        + ", ".join(f"{call}={count}" for call, count in stats["syscalls"].items())
+        + "\n"
+    )
+
+    if stats["slowest"]:
+        file.write("\nSlowest files\n")
+        for rank, entry in enumerate(stats["slowest"], 1):
+            file.write(f"{rank:>4}. {entry['path']} {entry['seconds']:.6f}s\n")
+
+
+def _dump_sample(file: IO[str], sample: dict[str, Any]) -> None:
+    file.write(
+        f"\n{OutputKeys.SAMPLE.capitalize()} : {sample['files_parsed']} of "
+        f"{sample[OutputKeys.FILES]} files parsed, margins of error at "
+        f"{sample['confidence']:.0%} confidence\n"
+    )
+    headers: list[str] = [
+        "Extension",
+        "Parsed",
+        *(
+            f"±{key.upper() if key == OutputKeys.LOC else key.capitalize()}"
+            for key in (
+                OutputKeys.TOTAL,
+                OutputKeys.LOC,
+                OutputKeys.COMMENTED,
+                OutputKeys.BLANK,
             )
+        ),
+    ]
+    margins: dict[str, dict[str, int]] = {
+        **sample[OutputKeys.LANGUAGES],
+        "All": {"parsed": sample["files_parsed"], **sample["margins"]},
+    }
+    rows: list[tuple[Union[str, int], ...]] = [
+        (
+            extension,
+            data["parsed"],
+            data[OutputKeys.TOTAL],
+            data[OutputKeys.LOC],
+            data[OutputKeys.COMMENTED],
+            data[OutputKeys.BLANK],
         )
-        file.write(f"{next_prefix}{file_connector}" f"{fname} {write_data}\n")
-
-    subdirs = node.get(OutputKeys.SUBDIRECTORIES, {})
-    sub_items = sorted(subdirs.items())
-
-    for idx, (subname, subnode) in enumerate(sub_items):
-        _dump_directory_tree(
-            file,
-            subname,
-            subnode,
-            prefix=next_prefix,
-            is_last=idx == len(sub_items) - 1,
+        for extension, data in margins.items()
+    ]
+    widths: list[int] = [
+        max(len(str(col)) for col in column) for column in zip(headers, *rows)
+    ]
+    file.write(_format_row(headers, widths))
+    file.write("-" * (sum(widths) + 12))
+    file.write("\n")
+    for row in rows:
+        file.write(_format_row(row, widths))
+
+
+def _dump_metrics(file: IO[str], languages: dict[str, dict[str, Any]]) -> None:
+    headers: list[str] = [
+        "Extension",
+        OutputKeys.BYTES.capitalize(),
+        "Max line",
+        "Avg line",
+        "Trailing WS",
+        OutputKeys.INDENTATION.capitalize(),
+    ]
+    rows: list[tuple[Union[str, int], ...]] = [
+        (
+            extension,
+            data[OutputKeys.BYTES],
+            data[OutputKeys.MAX_LINE_LENGTH],
+            f"{data[OutputKeys.AVERAGE_LINE_LENGTH]:.2f}",
+            data[OutputKeys.TRAILING_WHITESPACE],
+            data[OutputKeys.INDENTATION],
         )
+        for extension, data in languages.items()
+        if OutputKeys.BYTES in data
+    ]
+    widths: list[int] = [
+        max(len(str(col)) for col in column) for column in zip(headers, *rows)
+    ]
+    file.write("\nMetrics\n")
+    file.write(_format_row(headers, widths))
+    file.write("-" * (sum(widths) + 12))
+    file.write("\n")
+    for row in rows:
+        file.write(_format_row(row, widths))
+
+
+def _dump_tokens(file: IO[str], languages: dict[str, dict[str, Any]]) -> None:
+    rows: list[tuple[str, str]] = [
+        (extension, _format_tokens(data[OutputKeys.TOKENS]))
+        for extension, data in languages.items()
+        if data.get(OutputKeys.TOKENS)
+    ]
+    width: int = max(len(column) for column in ("Extension", *(row[0] for row in rows)))
+    file.write(f"\n{OutputKeys.TOKENS.capitalize()}\n")
+    file.write(f"{'Extension':<{width}}  Counts\n")
+    file.write("-" * (width + 8))
+    file.write("\n")
+    for extension, counts in rows:
+        file.write(f"{extension:<{width}}  {counts}\n")
+
+
+def _write_std_output(
+    file: IO[str], output_mapping: dict[str, Any], sort_keys: bool = False
+) -> None:
+    assert isinstance(output_mapping[OutputKeys.GENERAL], dict)
+    file.write(f"{OutputKeys.GENERAL.capitalize()}:\n")
+    file.write(
+        "\n".join(
+            f"{field.capitalize()} : "
+            + (_format_tokens(value) if field == OutputKeys.TOKENS else str(value))
+            for field, value in output_mapping[OutputKeys.GENERAL].items()
+        )
+    )
+
+    file.write("\n\n")
+
+    languages: Optional[dict[str, dict[str, int]]] = output_mapping.pop(
+        OutputKeys.LANGUAGES, None
+    )
+    if languages:
+        headers: list[str] = [
+            "Extension",
+            OutputKeys.FILES.capitalize(),
+            OutputKeys.TOTAL.capitalize(),
+            OutputKeys.LOC.upper(),
+            OutputKeys.COMMENTED.capitalize(),
+            OutputKeys.BLANK.capitalize(),
+        ]
+
+        rows = [
+            (
+                lang,
+                data[OutputKeys.FILES],
+                data[OutputKeys.TOTAL],
+                data[OutputKeys.LOC],
+                data[OutputKeys.COMMENTED],
+                data[OutputKeys.BLANK],
+            )
+            for lang, data in languages.items()
+        ]
+
+        widths = [
+            max(len(str(col)) for col in column) for column in zip(headers, *rows)
+        ]
+
+        file.write(f"{OutputKeys.LANGUAGES.capitalize()}\n")
+        file.write(_format_row(headers, widths))
+        file.write("-" * (sum(widths) + 12))
+        file.write("\n")
+
+        for row in rows:
+            file.write(_format_row(row, widths))
+
+        if any(OutputKeys.BYTES in data for data in languages.values()):
+            _dump_metrics(file, languages)
+        if any(data.get(OutputKeys.TOKENS) for data in languages.values()):
+            _dump_tokens(file, languages)
+
+    sample: Optional[dict[str, Any]] = output_mapping.get(OutputKeys.SAMPLE)
+    if sample:
+        _dump_sample(file, sample)
+
+    distribution: Optional[dict[str, dict[str, int]]] = output_mapping.get(
+        OutputKeys.DISTRIBUTION
+    )
+    if distribution:
+        percentile_keys: list[str] = list(next(iter(distribution.values())))
+        headers = [
+            "Extension",
+            *(
+                key.capitalize() if key == OutputKeys.FILES else key
+                for key in percentile_keys
+            ),
+        ]
+        rows = [
+            (extension, *(data[key] for key in percentile_keys))
+            for extension, data in (
+                sorted(distribution.items()) if sort_keys else distribution.items()
+            )
+        ]
+        widths = [
+            max(len(str(col)) for col in column) for column in zip(headers, *rows)
+        ]
+
+        file.write(f"\n{OutputKeys.DISTRIBUTION.capitalize()} (total lines)\n")
+        file.write(_format_row(headers, widths))
+        file.write("-" * (sum(widths) + 12))
+        file.write("\n")
+        for row in rows:
+            file.write(_format_row(row, widths))
+
+    top: Optional[dict[str, list[dict[str, Any]]]] = output_mapping.get(OutputKeys.TOP)
+    if top:
+        for ranking, entries in top.items():
+            file.write(f"\n{OutputKeys.TOP.capitalize()} files by {ranking}\n")
+            for rank, entry in enumerate(entries, 1):
+                file.write(
+                    f"{rank:>4}. {entry['path']} "
+                    + ", ".join(
+                        f"{key}={value}"
+                        for key, value in entry.items()
+                        if key != "path"
+                    )
+                    + "\n"
+                )
+
+    stats: Optional[dict[str, Any]] = output_mapping.get(OutputKeys.STATS)
+    if stats:
+        _dump_stats(file, stats)
+
+    tree = output_mapping.get(OutputKeys.SUBDIRECTORIES)
+    if tree:
+        file.write(
+            f"\n{OutputKeys.FILES.capitalize()} & {OutputKeys.SUBDIRECTORIES.capitalize()}\n"
+        )
+        _dump_directory_tree(file, tree, sort_keys)
 
 
 def dump_std_output(
-    output_mapping: dict[str, Any], filepath: Union[str, os.PathLike[str], int]
+    output_mapping: dict[str, Any],
+    filepath: Union[str, os.PathLike[str], int],
+    sort_keys: bool = False,
+    root: Optional[str] = None,
 ) -> None:
     """
     Dump output to a standard text/log file
@@ -85,87 +447,426 @@ def dump_std_output(
     :param filepath: Output file to write results to, can be stdout
     :type filepath: Union[str, os.PathLike[str], int]
 
+    :param sort_keys: Whether to sort files and subdirectories by name
+    :type sort_keys: bool
+
     :param mode: Writing mode
     :type mode: Literal["w+", "a"]
+
+    :param root: Unused, the root scanned is not part of text output
+    :type root: Optional[str]
     """
-    assert isinstance(output_mapping[OutputKeys.GENERAL], dict)
-    with open(filepath, "w") as file:
-        file.write(f"{OutputKeys.GENERAL.capitalize()}:\n")
-        file.write(
-            "\n".join(
-                f"{field.capitalize()} : {value}"
-                for field, value in output_mapping[OutputKeys.GENERAL].items()
+    with open_output(filepath) as file:
+        _write_std_output(file, output_mapping, sort_keys)
+
+
+def dump_json_output(
+    output_mapping: dict[str, Any],
+    filepath: Union[str, os.PathLike[str], int],
+    sort_keys: bool = False,
+    root: Optional[str] = None,
+) -> None:
+    """Dump output to JSON file, with proper formatting"""
+    is_file_descriptor: bool = isinstance(filepath, int)
+    if not (is_file_descriptor or os.path.abspath(filepath)):
+        filepath = os.path.join(os.getcwd(), filepath)
+
+    with open_output(filepath) as output_file:
+        _dump_json(output_file.write, output_mapping, sort_keys=sort_keys)
+
+
+class NDJSONRecordWriter:
+    """Record sink writing a single JSON document per line"""
+
+    __slots__ = ("file",)
+
+    RECORD_TYPE: Final[str] = "type"
+
+    def __init__(self, file: IO[str]) -> None:
+        self.file = file
+
+    def _write_line_data(
+        self, record_type: str, path: str, line_data: FileLineData
+    ) -> None:
+        total, loc, commented, blank, *metrics = line_data
+        self.file.write(
+            f'{{"{self.RECORD_TYPE}": "{record_type}", "path": {encode_basestring_ascii(path)}, '
+            f'"{OutputKeys.TOTAL}": {total}, "{OutputKeys.LOC}": {loc}, '
+            f'"{OutputKeys.COMMENTED}": {commented}, "{OutputKeys.BLANK}": {blank}'
+        )
+        if metrics:
+            self.file.write(", ")
+            self.file.write(json.dumps(metrics_mapping(total, metrics))[1:-1])
+        self.file.write("}\n")
+
+    def enter_directory(self, path: str, /) -> None:
+        return None
+
+    def add_file(self, path: str, line_data: FileLineData, /) -> None:
+        self._write_line_data("file", path, line_data)
+
+    def exit_directory(self, path: str, line_data: FileLineData, /) -> None:
+        self._write_line_data("directory", path, line_data)
+
+    def write_record(self, record_type: str, record: dict[str, Any]) -> None:
+        self.file.write(json.dumps({self.RECORD_TYPE: record_type, **record}))
+        self.file.write("\n")
+
+    def write_tree(
+        self, path: str, node: Mapping[str, Any], sort_keys: bool = False
+    ) -> None:
+        """Write records for an already built directory tree, in the same order a stream would"""
+        self.enter_directory(path)
+        files: Iterable[tuple[str, Mapping[str, int]]] = node.get(
+            OutputKeys.FILES, {}
+        ).items()
+        subdirectories: Iterable[tuple[str, Mapping[str, Any]]] = node.get(
+            OutputKeys.SUBDIRECTORIES, {}
+        ).items()
+        if sort_keys:
+            files = sorted(files, key=itemgetter(0))
+            subdirectories = sorted(subdirectories, key=itemgetter(0))
+
+        for filepath, file_data in files:
+            self.add_file(
+                filepath,
+                (
+                    file_data[OutputKeys.TOTAL],
+                    file_data[OutputKeys.LOC],
+                    file_data[OutputKeys.COMMENTED],
+                    file_data[OutputKeys.BLANK],
+                    *(file_data[key] for key in METRIC_KEYS if key in file_data),
+                    *(
+                        (file_data[OutputKeys.TOKENS],)
+                        if OutputKeys.TOKENS in file_data
+                        else ()
+                    ),
+                ),
             )
+        for name, subdirectory in subdirectories:
+            self.write_tree(os.path.join(path, name), subdirectory, sort_keys)
+        self.exit_directory(
+            path,
+            (
+                node[OutputKeys.TOTAL],
+                node[OutputKeys.LOC],
+                node[OutputKeys.COMMENTED],
+                node[OutputKeys.BLANK],
+            ),
+        )
+
+    def write_summary(self, output_mapping: dict[str, Any]) -> None:
+        """
+        Write one record per parsed file extension, per ranked file and extension
+        distribution if reported, margins of error per extension and overall if
+        sampled, and scan statistics if collected, followed by the general record
+        """
+        languages: dict[str, dict[str, int]] = output_mapping.get(
+            OutputKeys.LANGUAGES, {}
         )
+        for extension, language_data in languages.items():
+            self.write_record("language", {"extension": extension, **language_data})
+        for extension, percentiles in output_mapping.get(
+            OutputKeys.DISTRIBUTION, {}
+        ).items():
+            self.write_record(
+                OutputKeys.DISTRIBUTION, {"extension": extension, **percentiles}
+            )
+        for ranking, entries in output_mapping.get(OutputKeys.TOP, {}).items():
+            for rank, entry in enumerate(entries, 1):
+                self.write_record(
+                    OutputKeys.TOP, {"ranking": ranking, "rank": rank, **entry}
+                )
+        if OutputKeys.SAMPLE in output_mapping:
+            sample: dict[str, Any] = dict(output_mapping[OutputKeys.SAMPLE])
+            for extension, margins in sample.pop(OutputKeys.LANGUAGES).items():
+                self.write_record(
+                    OutputKeys.SAMPLE, {"extension": extension, **margins}
+                )
+            self.write_record(OutputKeys.SAMPLE, sample)
+        if OutputKeys.STATS in output_mapping:
+            self.write_record(OutputKeys.STATS, output_mapping[OutputKeys.STATS])
+        self.write_record(OutputKeys.GENERAL, output_mapping[OutputKeys.GENERAL])
 
-        file.write("\n\n")
 
-        languages: Optional[dict[str, dict[str, int]]] = output_mapping.pop(
-            OutputKeys.LANGUAGES, None
+def _write_ndjson_output(
+    writer: NDJSONRecordWriter, output_mapping: dict[str, Any], sort_keys: bool = False
+) -> None:
+    if OutputKeys.SUBDIRECTORIES in output_mapping:
+        # Top level line counts are moved under the general section after parsing
+        writer.write_tree(
+            "",
+            {**output_mapping, **output_mapping[OutputKeys.GENERAL]},
+            sort_keys,
         )
+    writer.write_summary(output_mapping)
+
+
+def dump_ndjson_output(
+    output_mapping: dict[str, Any],
+    filepath: Union[str, os.PathLike[str], int],
+    sort_keys: bool = False,
+    root: Optional[str] = None,
+) -> None:
+    """
+    Dump output as newline delimited JSON, with one record per file, directory and extension,
+    followed by a record for general metadata
+
+    :param output_mapping: resultant mapping
+    :type output_mapping: dict[str, Any]
+
+    :param filepath: Output file to write results to, can be stdout
+    :type filepath: Union[str, os.PathLike[str], int]
+
+    :param sort_keys: Whether to sort files and subdirectories by name
+    :type sort_keys: bool
+
+    :param root: Unused, the root scanned is not part of records
+    :type root: Optional[str]
+    """
+    with open_output(filepath) as output_file:
+        _write_ndjson_output(NDJSONRecordWriter(output_file), output_mapping, sort_keys)
+
+
+def _signed(value: int) -> str:
+    return f"{value:+d}"
+
+
+def dump_std_diff_output(
+    output_mapping: dict[str, Any],
+    filepath: Union[str, os.PathLike[str], int],
+    sort_keys: bool = False,
+    root: Optional[str] = None,
+) -> None:
+    """
+    Dump snapshot deltas to a standard text/log file
+
+    :param output_mapping: Mapping returned by diff_snapshots
+    :type output_mapping: dict[str, Any]
+
+    :param filepath: Output file to write deltas to, can be stdout
+    :type filepath: Union[str, os.PathLike[str], int]
+
+    :param sort_keys: Whether to sort extensions by name
+    :type sort_keys: bool
+
+    :param root: Unused, deltas are between snapshots rather than of a root
+    :type root: Optional[str]
+    """
+    columns: tuple[str, ...] = (
+        OutputKeys.TOTAL,
+        OutputKeys.LOC,
+        OutputKeys.COMMENTED,
+        OutputKeys.BLANK,
+    )
+    with open_output(filepath) as file:
+        file.write(f"{OutputKeys.GENERAL.capitalize()}:\n")
+        for field, value in output_mapping[OutputKeys.GENERAL].items():
+            file.write(f"{field.capitalize()} : {_signed(value)}\n")
+
+        languages: dict[str, dict[str, int]] = output_mapping[OutputKeys.LANGUAGES]
         if languages:
-            headers: list[str] = [
-                "Extension",
-                OutputKeys.FILES.capitalize(),
-                OutputKeys.TOTAL.capitalize(),
-                OutputKeys.LOC.upper(),
-                OutputKeys.COMMENTED.capitalize(),
-                OutputKeys.BLANK.capitalize(),
-            ]
-
-            rows = [
-                (
-                    lang,
-                    data[OutputKeys.FILES],
-                    data[OutputKeys.TOTAL],
-                    data[OutputKeys.LOC],
-                    data[OutputKeys.COMMENTED],
-                    data[OutputKeys.BLANK],
+            file.write(f"\n{OutputKeys.LANGUAGES.capitalize()}\n")
+            for extension in sorted(languages) if sort_keys else languages:
+                file.write(
+                    f"{extension} "
+                    + ", ".join(
+                        f"{key}={_signed(value)}"
+                        for key, value in languages[extension].items()
+                    )
+                    + "\n"
                 )
-                for lang, data in languages.items()
-            ]
 
-            widths = [
-                max(len(str(col)) for col in column) for column in zip(headers, *rows)
-            ]
+        for section in (OutputKeys.DIRECTORIES, OutputKeys.FILES):
+            entries: dict[str, dict[str, Any]] = output_mapping[section]
+            if not entries:
+                continue
+            file.write(f"\n{section.capitalize()}\n")
+            for path, delta in entries.items():
+                status: Optional[str] = delta.get(OutputKeys.STATUS)
+                file.write(
+                    (f"[{status}] " if status else "")
+                    + f"{path} "
+                    + ", ".join(f"{key}={_signed(delta[key])}" for key in columns)
+                    + "\n"
+                )
 
-            file.write(f"{OutputKeys.LANGUAGES.capitalize()}\n")
-            file.write(_format_row(headers, widths))
-            file.write("-" * (sum(widths) + 12))
-            file.write("\n")
 
-            for row in rows:
-                file.write(_format_row(row, widths))
+def dump_sqlite_output(
+    output_mapping: dict[str, Any],
+    filepath: Union[str, os.PathLike[str], int],
+    sort_keys: bool = False,
+    root: Optional[str] = None,
+) -> None:
+    """See locstat.utilities.database.dump_sqlite_output"""
+    from locstat.utilities.database import dump_sqlite_output
 
-        tree = output_mapping.get(OutputKeys.SUBDIRECTORIES)
-        if tree:
-            file.write(
-                f"\n{OutputKeys.FILES.capitalize()} & {OutputKeys.SUBDIRECTORIES.capitalize()}\n"
-            )
-            for idx, (name, node) in enumerate(sorted(tree.items())):
-                _dump_directory_tree(
-                    file,
-                    name,
-                    node,
-                    prefix="",
-                    is_last=idx == len(tree) - 1,
-                )
+    dump_sqlite_output(output_mapping, filepath, sort_keys, root)
 
 
-def dump_json_output(
-    output_mapping: dict[str, Any], filepath: Union[str, os.PathLike[str], int]
+def dump_snapshot_output(
+    output_mapping: dict[str, Any],
+    filepath: Union[str, os.PathLike[str], int],
+    sort_keys: bool = False,
+    root: Optional[str] = None,
 ) -> None:
-    """Dump output to JSON file, with proper formatting"""
-    is_file_descriptor: bool = isinstance(filepath, int)
-    if not (is_file_descriptor or os.path.abspath(filepath)):
-        filepath = os.path.join(os.getcwd(), filepath)
+    """See locstat.utilities.snapshot.dump_snapshot_output"""
+    from locstat.utilities.snapshot import dump_snapshot_output
 
-    with open(filepath, mode="w") as output_file:
-        output_file.write(json.dumps(output_mapping, indent=2))
+    dump_snapshot_output(output_mapping, filepath, sort_keys, root)
 
 
 OUTPUT_MAPPING: Final[MappingProxyType[str, OutputFunction]] = MappingProxyType(
     {
         "json": dump_json_output,
+        "ndjson": dump_ndjson_output,
+        "jsonl": dump_ndjson_output,
+        "sqlite": dump_sqlite_output,
+        "sqlite3": dump_sqlite_output,
+        "db": dump_sqlite_output,
+        "lsnap": dump_snapshot_output,
     }
 )
+
+# Output formats capable of consuming records while the directory tree is being walked
+STREAMING_OUTPUT_MAPPING: Final[MappingProxyType[str, type[NDJSONRecordWriter]]] = (
+    MappingProxyType(
+        {
+            "ndjson": NDJSONRecordWriter,
+            "jsonl": NDJSONRecordWriter,
+        }
+    )
+)
+
+
+class FleetOutputWriter:
+    """
+    Write the results of every root of a fleet scan as soon as it has been scanned,
+    formatted as by `dump_std_output`, followed by results across the whole fleet
+    """
+
+    __slots__ = ("file", "sort_keys")
+
+    def __init__(
+        self, filepath: Union[str, os.PathLike[str], int], sort_keys: bool = False
+    ) -> None:
+        self.file: IO[str] = open_output(filepath)
+        self.sort_keys: bool = sort_keys
+
+    def __enter__(self) -> "FleetOutputWriter":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.file.close()
+
+    def write_root(self, output_mapping: dict[str, Any]) -> None:
+        _write_std_output(self.file, output_mapping, self.sort_keys)
+        self.file.write("\n")
+        # Results of a root are complete, and flushed for consumers to pick up
+        self.file.flush()
+
+    def write_fleet(self, output_mapping: dict[str, Any]) -> None:
+        self.file.write(f"{OutputKeys.FLEET.capitalize()}\n")
+        _write_std_output(self.file, output_mapping, self.sort_keys)
+
+
+class JSONFleetOutputWriter(FleetOutputWriter):
+    """
+    Write a single JSON object, listing results of every root under "roots" in the
+    order they were scanned in, and results across the fleet under "fleet"
+    """
+
+    __slots__ = ("_separator",)
+
+    def __init__(
+        self, filepath: Union[str, os.PathLike[str], int], sort_keys: bool = False
+    ) -> None:
+        super().__init__(filepath, sort_keys)
+        self._separator: str = "[\n" + JSON_INDENT * 2
+        self.file.write(f'{{\n{JSON_INDENT}"{OutputKeys.ROOTS}": ')
+
+    def write_root(self, output_mapping: dict[str, Any]) -> None:
+        self.file.write(self._separator)
+        _dump_json(self.file.write, output_mapping, 2, self.sort_keys)
+        self._separator = ",\n" + JSON_INDENT * 2
+        self.file.flush()
+
+    def write_fleet(self, output_mapping: dict[str, Any]) -> None:
+        self.file.write("[]" if self._separator[0] == "[" else "\n" + JSON_INDENT + "]")
+        self.file.write(f',\n{JSON_INDENT}"{OutputKeys.FLEET}": ')
+        _dump_json(self.file.write, output_mapping, 1, self.sort_keys)
+        self.file.write("\n}")
+
+
+class NDJSONFleetOutputWriter(FleetOutputWriter):
+    """
+    Write records of every root as `dump_ndjson_output` would, each root's ending with
+    its general record, followed by a single fleet record
+    """
+
+    __slots__ = ("_writer",)
+
+    def __init__(
+        self, filepath: Union[str, os.PathLike[str], int], sort_keys: bool = False
+    ) -> None:
+        super().__init__(filepath, sort_keys)
+        self._writer: NDJSONRecordWriter = NDJSONRecordWriter(self.file)
+
+    def write_root(self, output_mapping: dict[str, Any]) -> None:
+        _write_ndjson_output(self._writer, output_mapping, self.sort_keys)
+        self.file.flush()
+
+    def write_fleet(self, output_mapping: dict[str, Any]) -> None:
+        self._writer.write_record(
+            OutputKeys.FLEET,
+            {
+                **output_mapping[OutputKeys.GENERAL],
+                OutputKeys.LANGUAGES: output_mapping.get(OutputKeys.LANGUAGES, {}),
+            },
+        )
+
+
+class SQLiteFleetOutputWriter(FleetOutputWriter):
+    """
+    Append every root to a SQLite database as a run of its own, committed as soon as
+    the root has been scanned. Results across the fleet are left to queries over runs
+    """
+
+    __slots__ = ("_filepath",)
+
+    def __init__(
+        self, filepath: Union[str, os.PathLike[str], int], sort_keys: bool = False
+    ) -> None:
+        if isinstance(filepath, int):
+            raise ValueError("SQLite output requires a database filepath")
+        self._filepath: Union[str, os.PathLike[str]] = filepath
+        self.sort_keys = sort_keys
+
+    def __exit__(self, *_: Any) -> None:
+        return None
+
+    def write_root(self, output_mapping: dict[str, Any]) -> None:
+        dump_sqlite_output(
+            output_mapping,
+            self._filepath,
+            self.sort_keys,
+            output_mapping[OutputKeys.GENERAL].get(OutputKeys.ROOT),
+        )
+
+    def write_fleet(self, output_mapping: dict[str, Any]) -> None:
+        return None
+
+
+# Output formats of fleet scans by file extension, others being written as text
+FLEET_OUTPUT_MAPPING: Final[MappingProxyType[str, type[FleetOutputWriter]]] = (
+    MappingProxyType(
+        {
+            "json": JSONFleetOutputWriter,
+            "ndjson": NDJSONFleetOutputWriter,
+            "jsonl": NDJSONFleetOutputWriter,
+            "sqlite": SQLiteFleetOutputWriter,
+            "sqlite3": SQLiteFleetOutputWriter,
+            "db": SQLiteFleetOutputWriter,
+        }
+    )
+)
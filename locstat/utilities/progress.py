@@ -0,0 +1,170 @@
+"""
+Live progress of directory scans, redrawn on a single terminal line.
+
+A timer thread samples files and bytes counted by the parsing extension, alongside
+directory counters maintained once per directory through `ProgressReporter.scandir`, so
+that walkers do no additional work per file.
+"""
+
+import os
+import sys
+import threading
+from array import array
+from operator import methodcaller
+from time import perf_counter
+from typing import IO, Any, Callable, Final, Iterator, Optional
+
+from locstat.data_structures.typing import DirectoryEntries, ScandirFunction
+from locstat.parsing.extensions._parsing import _get_progress, _set_progress_enabled
+
+__all__ = ("ProgressReporter",)
+
+_is_directory: Final[Callable[[os.DirEntry[str]], bool]] = methodcaller(
+    "is_dir", follow_symlinks=False
+)
+
+
+class _CountedEntries:
+    """Entries of a directory, listed upfront so that its subdirectories are counted"""
+
+    __slots__ = ("_iterator",)
+
+    def __init__(self, entries: list[os.DirEntry[str]]) -> None:
+        self._iterator = iter(entries)
+
+    def __iter__(self) -> Iterator[os.DirEntry[str]]:
+        # Walkers iterate over the list itself, without a call per entry
+        return self._iterator
+
+    def __next__(self) -> os.DirEntry[str]:
+        return next(self._iterator)
+
+    def __enter__(self) -> "_CountedEntries":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        pass
+
+
+class ProgressReporter:
+    """
+    Periodically write files parsed, throughput, directories scanned and pending,
+    and running line totals to a terminal, between `start` and `stop`.
+
+    Directories are counted by walking them through `scandir`, and directories skipped
+    by filters through `filter_directories`. Pending directories are those found but
+    neither entered nor skipped, and are only reported when `count_pending` is set,
+    since directories beyond a maximum depth are neither
+    """
+
+    __slots__ = (
+        "line_data",
+        "directories",
+        "discovered",
+        "skipped",
+        "_stream",
+        "_interval",
+        "_count_pending",
+        "_scandir",
+        "_stop",
+        "_thread",
+        "_epoch",
+    )
+
+    def __init__(
+        self,
+        stream: IO[str] = sys.stderr,
+        interval: float = 0.5,
+        count_pending: bool = True,
+        scandir_function: Optional[ScandirFunction] = None,
+    ) -> None:
+        # Line totals updated in place by walkers, reported when set
+        self.line_data: Optional[array] = None
+        self.directories: int = 0
+        self.discovered: int = 0
+        self.skipped: int = 0
+        self._stream: IO[str] = stream
+        self._interval: float = interval
+        self._count_pending: bool = count_pending
+        self._scandir: ScandirFunction = scandir_function or os.scandir
+        self._stop: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._epoch: float = 0.0
+
+    @staticmethod
+    def supported(stream: IO[str] = sys.stderr) -> bool:
+        """Whether progress can be redrawn on the given stream, i.e. it is a terminal"""
+        try:
+            return stream.isatty()
+        except (AttributeError, ValueError):
+            return False
+
+    def scandir(self, path: str) -> DirectoryEntries:
+        with self._scandir(path) as directory_data:
+            entries: list[os.DirEntry[str]] = list(directory_data)
+        self.directories += 1
+        if self._count_pending:
+            self.discovered += sum(map(_is_directory, entries))
+        return _CountedEntries(entries)
+
+    def filter_directories(
+        self, directory_filter: Callable[[str], bool]
+    ) -> Callable[[str], bool]:
+        def counted_directory_filter(path: str) -> bool:
+            if directory_filter(path):
+                return True
+            self.skipped += 1
+            return False
+
+        return counted_directory_filter
+
+    def start(self) -> None:
+        _set_progress_enabled(True)
+        self._epoch = perf_counter()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._report, name="locstat-progress", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        _set_progress_enabled(False)
+
+    def format_line(self, files: int, bytes_read: int, elapsed: float) -> str:
+        """
+        :return: Progress line for the given native counters and elapsed seconds,
+        with rates averaged over the whole scan
+        :rtype: str
+        """
+        elapsed = max(elapsed, 1e-9)
+        parts: list[str] = [
+            f"{files:,} files",
+            f"{bytes_read / 1e6:,.1f} MB",
+            f"{files / elapsed:,.0f} files/s",
+            f"{bytes_read / elapsed / 1e6:,.1f} MB/s",
+            f"{self.directories:,} dirs",
+        ]
+        if self._count_pending:
+            # The root is entered without being found
+            pending: int = self.discovered - self.skipped - self.directories + 1
+            parts.append(f"{max(pending, 0):,} pending")
+        if self.line_data is not None:
+            parts.append(f"{self.line_data[0]:,} lines ({self.line_data[1]:,} LOC)")
+        parts.append(f"{elapsed:,.1f}s")
+        return " | ".join(parts)
+
+    def _write(self, final: bool = False) -> None:
+        files, bytes_read = _get_progress()
+        line: str = self.format_line(files, bytes_read, perf_counter() - self._epoch)
+        # Redraw over the previous line, clearing whatever it left behind
+        self._stream.write(f"\r{line}\x1b[K" + ("\n" if final else ""))
+        self._stream.flush()
+
+    def _report(self) -> None:
+        while not self._stop.wait(self._interval):
+            self._write()
+        self._write(final=True)
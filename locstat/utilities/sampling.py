@@ -0,0 +1,289 @@
+"""
+Estimation of line counts from a stratified random sample of files.
+
+Files are enumerated without being parsed, and stratified by extension and size bucket,
+since line counts vary far less within such strata than across them. A fraction of every
+stratum is parsed, and its totals extrapolated to the stratum's number of files. Margins
+of error follow from the sample variance within strata, with a finite population
+correction such that fully parsed strata are exact, and Student's t quantiles since
+small strata leave few degrees of freedom.
+"""
+
+import math
+import os
+import random
+from dataclasses import dataclass
+from typing import Any, Callable, Final, Iterator, NamedTuple, Optional
+
+from locstat.data_structures.config import ClocConfig
+from locstat.data_structures.output_keys import OutputKeys
+from locstat.data_structures.typing import FileParsingFunction, ScandirFunction
+
+__all__ = ("SampleEstimate", "enumerate_files", "sample_directory", "size_bucket")
+
+# Two sided z-score of a 95% confidence interval
+CONFIDENCE: Final[float] = 0.95
+Z_SCORE: Final[float] = 1.959963984540054
+METRICS: Final[tuple[str, ...]] = (
+    OutputKeys.TOTAL,
+    OutputKeys.LOC,
+    OutputKeys.COMMENTED,
+    OutputKeys.BLANK,
+)
+
+
+class EnumeratedFile(NamedTuple):
+    path: str
+    extension: str
+    size: int
+
+
+def _t_quantile(degrees_of_freedom: float) -> float:
+    """
+    Two sided 95% quantile of Student's t distribution, for the given degrees of
+    freedom rounded down, such that margins err on the wide side
+    """
+    degrees: int = max(1, math.floor(degrees_of_freedom))
+    if degrees == 1:
+        return math.tan(math.pi * CONFIDENCE / 2)
+    # Cornish-Fisher expansion around the normal quantile, within 1% from 2 degrees on
+    z: float = Z_SCORE
+    return (
+        z
+        + (z**3 + z) / (4 * degrees)
+        + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * degrees**2)
+        + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * degrees**3)
+        + (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z)
+        / (92160 * degrees**4)
+    )
+
+
+def _margin(variance: float, degrees_term: float) -> int:
+    """
+    Margin of error of an estimate summed over strata, from the sum of its strata's
+    variances and of their squares over their degrees of freedom. Strata sampled with
+    few files estimate variances poorly, hence Student's t quantile with the
+    Welch-Satterthwaite degrees of freedom in place of the normal one
+    """
+    if not variance:
+        return 0
+    return round(_t_quantile(variance**2 / degrees_term) * math.sqrt(variance))
+
+
+def size_bucket(size: int) -> int:
+    """Stratum of a file by its size in bytes, in powers of 4"""
+    return (size.bit_length() + 1) // 2
+
+
+def enumerate_files(
+    directory_data: Iterator[os.DirEntry[str]],
+    config: ClocConfig,
+    depth: int = -1,
+    file_filter_function: Callable[[str, str], bool] = lambda file, extension: True,
+    directory_filter_function: Callable[[str], bool] = lambda directory: True,
+    scandir_function: Optional[ScandirFunction] = None,
+) -> list[EnumeratedFile]:
+    """
+    List files walkers would parse, alongside their extensions and sizes, without
+    parsing them
+
+    :param directory_data: Iterator over top directory
+    :type directory_data: Iterator[os.DirEntry[str]]
+
+    :param config: Config object, files of extensions without comment symbols are
+    skipped
+    :type config: ClocConfig
+
+    :param depth: Sub-directory traversal depth, negative values are treated as infinite
+    :type depth: int
+
+    :return: Enumerated files
+    :rtype: list[EnumeratedFile]
+    """
+    scandir: ScandirFunction = scandir_function or os.scandir
+    files: list[EnumeratedFile] = []
+    pending: list[tuple[Iterator[os.DirEntry[str]], int]] = [(directory_data, depth)]
+    while pending:
+        entries, remaining_depth = pending.pop()
+        for dir_entry in entries:
+            if dir_entry.is_symlink():
+                continue
+            if dir_entry.is_file(follow_symlinks=False):
+                extension: str = dir_entry.name.rsplit(".", 1)[-1]
+                if not file_filter_function(dir_entry.path, extension):
+                    continue
+                singleline, multiline_start, _ = config.symbol_mapping.get(
+                    extension, (None, None, None)
+                )
+                if not (singleline or multiline_start):
+                    continue
+                files.append(
+                    EnumeratedFile(
+                        dir_entry.path,
+                        extension,
+                        dir_entry.stat(follow_symlinks=False).st_size,
+                    )
+                )
+            elif remaining_depth and directory_filter_function(dir_entry.path):
+                pending.append((scandir(dir_entry.path), remaining_depth - 1))
+    return files
+
+
+@dataclass(frozen=True, slots=True)
+class SampleEstimate:
+    """
+    Estimated line counts overall and per extension, in the layout of REPORT
+    verbosity, alongside margins of error at the given confidence
+    """
+
+    fraction: float
+    files_total: int
+    files_parsed: int
+    general: dict[str, int]
+    margins: dict[str, int]
+    languages: dict[str, dict[str, int]]
+    language_margins: dict[str, dict[str, int]]
+    confidence: float = CONFIDENCE
+
+    def to_mapping(self) -> dict[str, Any]:
+        return {
+            OutputKeys.GENERAL: dict(self.general),
+            OutputKeys.LANGUAGES: self.languages,
+            OutputKeys.SAMPLE: {
+                "fraction": self.fraction,
+                "confidence": self.confidence,
+                "files_parsed": self.files_parsed,
+                OutputKeys.FILES: self.files_total,
+                "margins": self.margins,
+                OutputKeys.LANGUAGES: self.language_margins,
+            },
+        }
+
+
+def sample_directory(
+    directory_data: Iterator[os.DirEntry[str]],
+    config: ClocConfig,
+    file_parsing_function: FileParsingFunction,
+    fraction: float,
+    depth: int = -1,
+    file_filter_function: Callable[[str, str], bool] = lambda file, extension: True,
+    directory_filter_function: Callable[[str], bool] = lambda directory: True,
+    minimum_characters: int = 0,
+    scandir_function: Optional[ScandirFunction] = None,
+    seed: Optional[int] = None,
+    minimum_per_stratum: int = 2,
+) -> SampleEstimate:
+    """
+    Estimate line counts of a directory by parsing a stratified random sample of its files
+
+    :param fraction: Fraction of every stratum's files to parse, within (0, 1]
+    :type fraction: float
+
+    :param seed: Seed of the random sample, for reproducible estimates
+    :type seed: Optional[int]
+
+    :param minimum_per_stratum: Files parsed in every stratum at least, so that its
+    variance can be estimated. Strata with fewer files are parsed entirely
+    :type minimum_per_stratum: int
+
+    :return: Estimated line counts, with margins of error
+    :rtype: SampleEstimate
+    """
+    if not 0 < fraction <= 1:
+        raise ValueError("Sample fraction must be within (0, 1]")
+
+    strata: dict[tuple[str, int], list[EnumeratedFile]] = {}
+    for file in enumerate_files(
+        directory_data,
+        config,
+        depth,
+        file_filter_function,
+        directory_filter_function,
+        scandir_function,
+    ):
+        strata.setdefault((file.extension, size_bucket(file.size)), []).append(file)
+
+    generator: random.Random = random.Random(seed)
+    # Per extension and metric: estimated totals, variances of the estimates, and
+    # variances squared over their degrees of freedom
+    estimates: dict[str, list[float]] = {}
+    variances: dict[str, list[float]] = {}
+    degrees_terms: dict[str, list[float]] = {}
+    files: dict[str, int] = {}
+    parsed: dict[str, int] = {}
+    # Sorted, so that seeded samples do not depend on enumeration order
+    for (extension, _), stratum in sorted(strata.items()):
+        population: int = len(stratum)
+        sample_size: int = min(
+            population, max(minimum_per_stratum, math.ceil(fraction * population))
+        )
+        sample: list[EnumeratedFile] = generator.sample(sorted(stratum), sample_size)
+        singleline, multiline_start, multiline_end = config.symbol_mapping[extension]
+        observations: list[tuple[int, int, int, int]] = [
+            file_parsing_function(
+                file.path,
+                singleline,
+                multiline_start,
+                multiline_end,
+                minimum_characters,
+            )
+            for file in sample
+        ]
+
+        extension_estimates: list[float] = estimates.setdefault(extension, [0.0] * 4)
+        extension_variances: list[float] = variances.setdefault(extension, [0.0] * 4)
+        extension_degrees: list[float] = degrees_terms.setdefault(extension, [0.0] * 4)
+        files[extension] = files.get(extension, 0) + population
+        parsed[extension] = parsed.get(extension, 0) + sample_size
+        # Sampling without replacement, hence the finite population correction
+        correction: float = 1 - sample_size / population
+        for metric, values in enumerate(zip(*observations)):
+            mean: float = sum(values) / sample_size
+            extension_estimates[metric] += population * mean
+            if sample_size > 1 and correction:
+                variance: float = (
+                    population**2
+                    * correction
+                    * sum((value - mean) ** 2 for value in values)
+                    / ((sample_size - 1) * sample_size)
+                )
+                extension_variances[metric] += variance
+                extension_degrees[metric] += variance**2 / (sample_size - 1)
+
+    languages: dict[str, dict[str, int]] = {
+        extension: {
+            OutputKeys.FILES: files[extension],
+            **{key: round(value) for key, value in zip(METRICS, estimates[extension])},
+        }
+        for extension in estimates
+    }
+    language_margins: dict[str, dict[str, int]] = {
+        extension: {
+            "parsed": parsed[extension],
+            **{
+                key: _margin(variance, degrees_term)
+                for key, variance, degrees_term in zip(
+                    METRICS, variances[extension], degrees_terms[extension]
+                )
+            },
+        }
+        for extension in variances
+    }
+    return SampleEstimate(
+        fraction=fraction,
+        files_total=sum(files.values()),
+        files_parsed=sum(parsed.values()),
+        general={
+            key: round(sum(values[metric] for values in estimates.values()))
+            for metric, key in enumerate(METRICS)
+        },
+        margins={
+            key: _margin(
+                sum(values[metric] for values in variances.values()),
+                sum(values[metric] for values in degrees_terms.values()),
+            )
+            for metric, key in enumerate(METRICS)
+        },
+        languages=languages,
+        language_margins=language_margins,
+    )
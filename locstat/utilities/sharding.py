@@ -0,0 +1,154 @@
+"""
+Deterministic sharding of scans across machines, and merging of their partial results.
+
+Entries directly within the scanned directory, files and subtrees alike, are assigned to
+shards by a stable hash of their names, such that shards scan disjoint parts of the tree
+without coordinating, and walkers are left unchanged below the top level. Partial results
+are JSON output alongside shard metadata, and merge into the results of a single scan.
+"""
+
+import gzip
+import json
+import os
+import zlib
+from typing import Any, Final, Iterable, Iterator, Sequence, Union
+
+from locstat.data_structures.metrics import (
+    finalize_metrics,
+    merge_language_data,
+    merge_metrics,
+)
+from locstat.data_structures.output_keys import OutputKeys
+from locstat.utilities.presentation import COMPRESSED_SUFFIX
+
+__all__ = ("shard_of", "shard_entries", "load_partial", "merge_partials")
+
+LINE_KEYS: Final[tuple[str, ...]] = (
+    OutputKeys.TOTAL,
+    OutputKeys.LOC,
+    OutputKeys.COMMENTED,
+    OutputKeys.BLANK,
+)
+
+
+def shard_of(name: str, count: int) -> int:
+    """
+    :return: Shard, within [1, count], of a top level entry by its name. Stable across
+    processes, machines and platforms, unlike hash()
+    :rtype: int
+    """
+    return zlib.crc32(os.fsencode(name)) % count + 1
+
+
+def shard_entries(
+    directory_data: Iterable[os.DirEntry[str]], index: int, count: int
+) -> Iterator[os.DirEntry[str]]:
+    """Entries of the scanned directory assigned to shard index of count"""
+    for dir_entry in directory_data:
+        if shard_of(dir_entry.name, count) == index:
+            yield dir_entry
+
+
+def load_partial(filepath: Union[str, os.PathLike[str]]) -> dict[str, Any]:
+    """
+    Load the partial result of a shard, written as JSON, optionally compressed
+
+    :raises ValueError: If the file is not a partial result
+    """
+    with (
+        gzip.open(filepath, "rt", encoding="utf-8")
+        if os.fspath(filepath).endswith(COMPRESSED_SUFFIX)
+        else open(filepath, encoding="utf-8")
+    ) as file:
+        try:
+            partial: Any = json.load(file)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{filepath} is not a JSON file: {e}") from None
+    if not (isinstance(partial, dict) and OutputKeys.SHARD in partial):
+        raise ValueError(f"{filepath} is not the partial result of a shard")
+    return partial
+
+
+def _merge_tree(merged: dict[str, Any], partial: dict[str, Any], index: int) -> None:
+    # Shards scan disjoint top level entries, so that their trees only meet at the root
+    for key in (OutputKeys.FILES, OutputKeys.SUBDIRECTORIES):
+        entries: dict[str, Any] = merged[key]
+        for name, entry in partial[key].items():
+            if name in entries:
+                raise ValueError(f"{name} was scanned by shard {index} and another")
+            entries[name] = entry
+
+
+def merge_partials(partials: Sequence[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Merge the partial results of every shard of a scan into its results, with line
+    counts per extension and directory trees exactly as scanned by a single process
+
+    :param partials: Partial results of every shard, in any order
+    :type partials: Sequence[dict[str, Any]]
+
+    :raises ValueError: If shards are missing or duplicated, or partial results are
+    of different scans
+
+    :return: Merged results, in the layout of regular output
+    :rtype: dict[str, Any]
+    """
+    if not partials:
+        raise ValueError("No partial results to merge")
+    partials = sorted(partials, key=lambda partial: partial[OutputKeys.SHARD]["index"])
+    first: dict[str, Any] = partials[0]
+    count: int = first[OutputKeys.SHARD]["count"]
+    for partial in partials:
+        shard: dict[str, Any] = partial[OutputKeys.SHARD]
+        for key, expected in (
+            ("count", count),
+            ("verbosity", first[OutputKeys.SHARD]["verbosity"]),
+        ):
+            if shard[key] != expected:
+                raise ValueError(
+                    f"Shard {shard['index']} has {key} {shard[key]}, expected {expected}"
+                )
+        if shard["root"] != first[OutputKeys.SHARD]["root"]:
+            raise ValueError(
+                f"Shard {shard['index']} scanned a different root, {shard['root']}"
+            )
+
+    indices: list[int] = [partial[OutputKeys.SHARD]["index"] for partial in partials]
+    if indices != list(range(1, count + 1)):
+        missing: set[int] = set(range(1, count + 1)) - set(indices)
+        raise ValueError(
+            f"Missing shards {sorted(missing)} of {count}"
+            if missing
+            else f"Duplicated shards in {indices}"
+        )
+
+    general: dict[str, Any] = {key: 0 for key in LINE_KEYS}
+    languages: dict[str, dict[str, int]] = {}
+    detailed: bool = OutputKeys.SUBDIRECTORIES in first
+    tree: dict[str, Any] = {OutputKeys.FILES: {}, OutputKeys.SUBDIRECTORIES: {}}
+    for index, partial in enumerate(partials, 1):
+        partial_general: dict[str, Any] = partial[OutputKeys.GENERAL]
+        for key in LINE_KEYS:
+            general[key] += partial_general[key]
+        merge_metrics(general, partial_general)
+        for extension, language_data in partial.get(OutputKeys.LANGUAGES, {}).items():
+            merge_language_data(languages.setdefault(extension, {}), language_data)
+        if detailed:
+            _merge_tree(tree, partial, index)
+
+    # Shards run in parallel, the slowest of them bounds the scan
+    slowest: float = max(
+        float(partial[OutputKeys.GENERAL][OutputKeys.TIME].removesuffix("s"))
+        for partial in partials
+    )
+    finalize_metrics(general)
+    general[OutputKeys.TIME] = f"{slowest:.3f}s"
+    for key in (OutputKeys.SCANNED_AT, OutputKeys.PLATFORM):
+        general[key] = first[OutputKeys.GENERAL][key]
+
+    merged: dict[str, Any] = {OutputKeys.GENERAL: general}
+    if detailed:
+        merged.update(tree)
+    if OutputKeys.LANGUAGES in first:
+        merged[OutputKeys.LANGUAGES] = languages
+    return merged
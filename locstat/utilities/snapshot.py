@@ -0,0 +1,308 @@
+"""
+Binary snapshots of scan results, and linear time diffing between them.
+
+A snapshot is laid out as:
+    header | metadata | records | path table
+
+The header is fixed-width, followed by general and per extension metadata encoded as JSON.
+Each file is described by a fixed-width record holding the offset and length of its path
+in the path table, followed by its line counts. Records are sorted by path, with paths stored
+relative to the scanned root using forward slashes. Snapshots are read through `mmap`,
+without loading records into memory.
+"""
+
+import json
+import mmap
+import os
+import struct
+from enum import StrEnum
+from typing import IO, Any, Final, Iterator, Mapping, Optional, Union
+
+from locstat.data_structures.output_keys import OutputKeys
+from locstat.data_structures.typing import FileLineData
+
+__all__ = ("DeltaStatus", "Snapshot", "dump_snapshot_output", "diff_snapshots")
+
+MAGIC: Final[bytes] = b"LOCSNAP\x00"
+VERSION: Final[int] = 1
+
+# magic, version, reserved, metadata length, file count, records offset, paths offset
+HEADER: Final[struct.Struct] = struct.Struct("<8sHHIQQQ")
+# path offset, path length, reserved, total, LOC, commented
+RECORD: Final[struct.Struct] = struct.Struct("<QIIQQQ")
+
+SnapshotRecord = tuple[bytes, int, int, int]
+
+
+class DeltaStatus(StrEnum):
+    ADDED = "added"
+    REMOVED = "removed"
+    MODIFIED = "modified"
+
+
+def _iter_relative_files(
+    output_mapping: Mapping[str, Any], root: str
+) -> Iterator[SnapshotRecord]:
+    pending: list[Mapping[str, Any]] = [output_mapping]
+    while pending:
+        node: Mapping[str, Any] = pending.pop()
+        for path, file_data in node.get(OutputKeys.FILES, {}).items():
+            relative_path: str = os.path.relpath(path, root)
+            if os.sep != "/":
+                relative_path = relative_path.replace(os.sep, "/")
+            yield (
+                relative_path.encode("utf-8", "surrogateescape"),
+                file_data[OutputKeys.TOTAL],
+                file_data[OutputKeys.LOC],
+                file_data[OutputKeys.COMMENTED],
+            )
+        pending.extend(node.get(OutputKeys.SUBDIRECTORIES, {}).values())
+
+
+def dump_snapshot_output(
+    output_mapping: dict[str, Any],
+    filepath: Union[str, os.PathLike[str], int],
+    sort_keys: bool = False,
+    root: Optional[str] = None,
+) -> None:
+    """
+    Dump output as a binary snapshot, readable without a full load through Snapshot
+
+    :param output_mapping: resultant mapping
+    :type output_mapping: dict[str, Any]
+
+    :param filepath: Snapshot file to write results to
+    :type filepath: Union[str, os.PathLike[str]]
+
+    :param sort_keys: Unused, records are always sorted by path
+    :type sort_keys: bool
+
+    :param root: Directory scanned, which file paths are stored relative to.
+    Defaults to the current working directory
+    :type root: Optional[str]
+    """
+    if isinstance(filepath, int):
+        raise ValueError("Snapshot output requires a filepath")
+
+    root = root or os.getcwd()
+    metadata: bytes = json.dumps(
+        {
+            OutputKeys.GENERAL: {
+                **output_mapping[OutputKeys.GENERAL],
+                OutputKeys.ROOT: root,
+            },
+            OutputKeys.LANGUAGES: output_mapping.get(OutputKeys.LANGUAGES, {}),
+        }
+    ).encode("utf-8")
+
+    records: list[SnapshotRecord] = sorted(_iter_relative_files(output_mapping, root))
+    records_offset: int = HEADER.size + len(metadata)
+    paths_offset: int = records_offset + RECORD.size * len(records)
+
+    with open(filepath, "wb", buffering=1024 * 1024) as snapshot_file:
+        snapshot_file.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                0,
+                len(metadata),
+                len(records),
+                records_offset,
+                paths_offset,
+            )
+        )
+        snapshot_file.write(metadata)
+
+        path_offset: int = 0
+        for path, total, loc, commented in records:
+            snapshot_file.write(
+                RECORD.pack(path_offset, len(path), 0, total, loc, commented)
+            )
+            path_offset += len(path)
+        for path, *_ in records:
+            snapshot_file.write(path)
+
+
+class Snapshot:
+    """Read-only, memory mapped view over a snapshot file"""
+
+    __slots__ = (
+        "_file",
+        "_map",
+        "metadata",
+        "file_count",
+        "_records_offset",
+        "_paths_offset",
+    )
+
+    def __init__(self, filepath: Union[str, os.PathLike[str]]) -> None:
+        self._file: IO[bytes] = open(filepath, "rb")
+        try:
+            self._map: mmap.mmap = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Snapshot {filepath} is empty")
+
+        try:
+            (
+                magic,
+                version,
+                _,
+                metadata_length,
+                self.file_count,
+                self._records_offset,
+                self._paths_offset,
+            ) = HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            self.close()
+            raise ValueError(f"{filepath} is not a {MAGIC[:-1].decode()} snapshot")
+
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(
+                f"{filepath} is not a version {VERSION} {MAGIC[:-1].decode()} snapshot"
+            )
+
+        self.metadata: dict[str, Any] = json.loads(
+            self._map[HEADER.size : HEADER.size + metadata_length]
+        )
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self.file_count
+
+    def record(self, index: int) -> SnapshotRecord:
+        path_offset, path_length, _, total, loc, commented = RECORD.unpack_from(
+            self._map, self._records_offset + index * RECORD.size
+        )
+        path_start: int = self._paths_offset + path_offset
+        return self._map[path_start : path_start + path_length], total, loc, commented
+
+    def __iter__(self) -> Iterator[SnapshotRecord]:
+        for index in range(self.file_count):
+            yield self.record(index)
+
+
+def _line_data_delta(
+    before: Optional[SnapshotRecord], after: Optional[SnapshotRecord]
+) -> FileLineData:
+    _, total_before, loc_before, commented_before = before or (b"", 0, 0, 0)
+    _, total_after, loc_after, commented_after = after or (b"", 0, 0, 0)
+    total, loc, commented = (
+        total_after - total_before,
+        loc_after - loc_before,
+        commented_after - commented_before,
+    )
+    return total, loc, commented, total - loc - commented
+
+
+def _delta_mapping(line_data: FileLineData) -> dict[str, int]:
+    total, loc, commented, blank = line_data
+    return {
+        OutputKeys.TOTAL: total,
+        OutputKeys.LOC: loc,
+        OutputKeys.COMMENTED: commented,
+        OutputKeys.BLANK: blank,
+    }
+
+
+def diff_snapshots(before: Snapshot, after: Snapshot) -> dict[str, Any]:
+    """
+    Compute per file, per directory and per extension line deltas between two snapshots,
+    by walking both sorted record tables in lockstep.
+
+    :return: Mapping of general, per extension, per directory, and per file deltas.
+    Unchanged files and directories are omitted
+    :rtype: dict[str, Any]
+    """
+    files: dict[str, dict[str, Any]] = {}
+    directories: dict[str, list[int]] = {}
+
+    before_records: Iterator[SnapshotRecord] = iter(before)
+    after_records: Iterator[SnapshotRecord] = iter(after)
+    before_record: Optional[SnapshotRecord] = next(before_records, None)
+    after_record: Optional[SnapshotRecord] = next(after_records, None)
+
+    while before_record is not None or after_record is not None:
+        status: DeltaStatus
+        if after_record is None or (
+            before_record is not None and before_record[0] < after_record[0]
+        ):
+            status, path = DeltaStatus.REMOVED, before_record[0]  # type: ignore
+            delta: FileLineData = _line_data_delta(before_record, None)
+            before_record = next(before_records, None)
+        elif before_record is None or after_record[0] < before_record[0]:
+            status, path = DeltaStatus.ADDED, after_record[0]
+            delta = _line_data_delta(None, after_record)
+            after_record = next(after_records, None)
+        else:
+            status, path = DeltaStatus.MODIFIED, after_record[0]
+            delta = _line_data_delta(before_record, after_record)
+            before_record = next(before_records, None)
+            after_record = next(after_records, None)
+            if not any(delta):
+                continue
+
+        decoded_path: str = path.decode("utf-8", "surrogateescape")
+        files[decoded_path] = {OutputKeys.STATUS: status, **_delta_mapping(delta)}
+
+        # Attribute file deltas to every ancestor directory
+        directory: str = decoded_path
+        while "/" in directory:
+            directory = directory.rsplit("/", 1)[0]
+            directory_delta: list[int] = directories.setdefault(directory, [0, 0, 0])
+            directory_delta[0] += delta[0]
+            directory_delta[1] += delta[1]
+            directory_delta[2] += delta[2]
+
+    general_before: dict[str, Any] = before.metadata[OutputKeys.GENERAL]
+    general_after: dict[str, Any] = after.metadata[OutputKeys.GENERAL]
+    languages_before: dict[str, dict[str, int]] = before.metadata[OutputKeys.LANGUAGES]
+    languages_after: dict[str, dict[str, int]] = after.metadata[OutputKeys.LANGUAGES]
+
+    language_keys: tuple[str, ...] = (
+        OutputKeys.FILES,
+        OutputKeys.TOTAL,
+        OutputKeys.LOC,
+        OutputKeys.COMMENTED,
+        OutputKeys.BLANK,
+    )
+    languages: dict[str, dict[str, int]] = {}
+    for extension in languages_before.keys() | languages_after.keys():
+        language_delta: dict[str, int] = {
+            key: languages_after.get(extension, {}).get(key, 0)
+            - languages_before.get(extension, {}).get(key, 0)
+            for key in language_keys
+        }
+        if any(language_delta.values()):
+            languages[extension] = language_delta
+
+    return {
+        OutputKeys.GENERAL: {
+            key: general_after[key] - general_before[key]
+            for key in (
+                OutputKeys.TOTAL,
+                OutputKeys.LOC,
+                OutputKeys.COMMENTED,
+                OutputKeys.BLANK,
+            )
+        },
+        OutputKeys.LANGUAGES: languages,
+        OutputKeys.DIRECTORIES: {
+            directory: _delta_mapping((total, loc, commented, total - loc - commented))
+            for directory, (total, loc, commented) in sorted(directories.items())
+            if total or loc or commented
+        },
+        OutputKeys.FILES: files,
+    }
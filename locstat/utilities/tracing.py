@@ -0,0 +1,229 @@
+"""
+Chrome trace event export of scans, for inspecting them on a timeline.
+
+Walkers are traced by wrapping the functions handed to them, like scan statistics: every
+directory is a span nesting those of its subdirectories, filter callbacks and files.
+Within files, the parsing extension records spans of opening, reading, mapping, parsing
+and closing them. Events are buffered in memory and only serialized once the scan has
+completed, so that tracing costs little more than two timestamps per span.
+"""
+
+import json
+import os
+import struct
+import threading
+from typing import IO, Any, Callable, Final, Iterator
+
+from locstat.data_structures.typing import (
+    DirectoryEntries,
+    FileLineData,
+    FileParsingFunction,
+    ScandirFunction,
+)
+from locstat.parsing.extensions._parsing import (
+    _get_trace,
+    _set_trace_enabled,
+    _trace_clock,
+)
+
+__all__ = ("ScanTrace",)
+
+# Names of native spans, indexed by enum TraceSpan of _parsing_trace.h
+NATIVE_SPANS: Final[tuple[str, ...]] = ("open", "read", "map", "parse", "close")
+# struct TraceEvent of _parsing_trace.h
+_NATIVE_EVENT: Final[struct.Struct] = struct.Struct("=QQII")
+DEFAULT_CAPACITY: Final[int] = 1024 * 1024
+
+_get_thread_id: Final[Callable[[], int]] = threading.get_native_id
+
+
+class _TracedEntries:
+    """
+    Entries of a directory, recording a span from listing them to their exhaustion,
+    alongside the time spent fetching entries
+    """
+
+    __slots__ = ("_entries", "_events", "_path", "_start", "_enumeration_ns", "_open")
+
+    def __init__(
+        self, path: str, events: list[tuple[Any, ...]], scandir: ScandirFunction
+    ) -> None:
+        self._start: int = _trace_clock()
+        self._entries: DirectoryEntries = scandir(path)
+        end: int = _trace_clock()
+        events.append(("scandir", self._start, end, _get_thread_id(), path))
+        self._events: list[tuple[Any, ...]] = events
+        self._path: str = path
+        self._enumeration_ns: int = end - self._start
+        self._open: bool = True
+
+    def __iter__(self) -> "_TracedEntries":
+        return self
+
+    def __next__(self) -> os.DirEntry[str]:
+        start: int = _trace_clock()
+        try:
+            return next(self._entries)
+        except StopIteration:
+            self._finish()
+            raise
+        finally:
+            self._enumeration_ns += _trace_clock() - start
+
+    def _finish(self) -> None:
+        if self._open:
+            self._open = False
+            self._events.append(
+                (
+                    "directory",
+                    self._start,
+                    _trace_clock(),
+                    _get_thread_id(),
+                    (self._path, self._enumeration_ns),
+                )
+            )
+
+    def __enter__(self) -> "_TracedEntries":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self._entries.__exit__(None, None, None)
+        self._finish()
+
+
+class ScanTrace:
+    """
+    Spans of a single scan, exported in the Chrome trace event format, as read by
+    chrome://tracing and Perfetto.
+
+    Functions handed to walkers are wrapped through `trace_parser`, `trace_filters`
+    and `trace_scandir`, and native spans are recorded between `start` and `stop`,
+    up to `capacity` of them
+    """
+
+    __slots__ = ("capacity", "dropped", "_events", "_native", "_epoch", "_end")
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        self.capacity: int = capacity
+        # Native spans beyond capacity, missing from the trace
+        self.dropped: int = 0
+        # Name, start and end timestamps, thread and details of every Python span
+        self._events: list[tuple[Any, ...]] = []
+        self._native: bytes = b""
+        self._epoch: int = 0
+        self._end: int = 0
+
+    def start(self) -> None:
+        _set_trace_enabled(True, self.capacity)
+        self._epoch = _trace_clock()
+
+    def stop(self) -> None:
+        self._end = _trace_clock()
+        _set_trace_enabled(False)
+        self._native, self.dropped = _get_trace()
+
+    def trace_scandir(self, scandir_function: ScandirFunction) -> ScandirFunction:
+        events: list[tuple[Any, ...]] = self._events
+
+        def traced_scandir(path: str) -> DirectoryEntries:
+            return _TracedEntries(path, events, scandir_function)
+
+        return traced_scandir
+
+    def trace_parser(self, file_parser: FileParsingFunction) -> FileParsingFunction:
+        append: Callable[[tuple[Any, ...]], None] = self._events.append
+
+        def traced_parser(filepath: str, *args: Any) -> FileLineData:
+            start: int = _trace_clock()
+            line_data: FileLineData = file_parser(filepath, *args)
+            append(("file", start, _trace_clock(), _get_thread_id(), filepath))
+            return line_data
+
+        return traced_parser  # type: ignore[return-value]
+
+    def trace_filters(
+        self,
+        file_filter: Callable[[str, str], bool],
+        directory_filter: Callable[[str], bool],
+    ) -> tuple[Callable[[str, str], bool], Callable[[str], bool]]:
+        append: Callable[[tuple[Any, ...]], None] = self._events.append
+
+        def traced_file_filter(path: str, extension: str) -> bool:
+            start: int = _trace_clock()
+            accepted: bool = file_filter(path, extension)
+            append(("file_filter", start, _trace_clock(), _get_thread_id(), path))
+            return accepted
+
+        def traced_directory_filter(path: str) -> bool:
+            start: int = _trace_clock()
+            accepted: bool = directory_filter(path)
+            append(("directory_filter", start, _trace_clock(), _get_thread_id(), path))
+            return accepted
+
+        return traced_file_filter, traced_directory_filter
+
+    def _microseconds(self, timestamp: int) -> float:
+        return (timestamp - self._epoch) / 1000
+
+    def iter_events(self) -> Iterator[dict[str, Any]]:
+        """
+        :return: Trace events of the scan, metadata first and spans in the order they
+        were recorded, Python spans before native ones
+        :rtype: Iterator[dict[str, Any]]
+        """
+        pid: int = os.getpid()
+        yield {
+            "name": "process_name",
+            "ph": "M",
+            "pid": pid,
+            "args": {"name": "locstat"},
+        }
+        yield {
+            "name": "scan",
+            "cat": "scan",
+            "ph": "X",
+            "ts": 0.0,
+            "dur": self._microseconds(self._end),
+            "pid": pid,
+            "tid": _get_thread_id(),
+            "args": {"dropped_native_spans": self.dropped},
+        }
+
+        for name, start, end, thread_id, details in self._events:
+            args: dict[str, Any]
+            if name == "directory":
+                path, enumeration_ns = details
+                args = {"path": path, "enumeration_us": enumeration_ns / 1000}
+            else:
+                args = {"path": details}
+            yield {
+                "name": name,
+                "cat": "filter" if name.endswith("filter") else "walker",
+                "ph": "X",
+                "ts": self._microseconds(start),
+                "dur": (end - start) / 1000,
+                "pid": pid,
+                "tid": thread_id,
+                "args": args,
+            }
+
+        for start, duration, thread_id, span in _NATIVE_EVENT.iter_unpack(self._native):
+            yield {
+                "name": NATIVE_SPANS[span],
+                "cat": "native",
+                "ph": "X",
+                "ts": self._microseconds(start),
+                "dur": duration / 1000,
+                "pid": pid,
+                "tid": thread_id,
+            }
+
+    def dump(self, file: IO[str]) -> None:
+        """Write the trace as a JSON object, one event per line"""
+        file.write('{"displayTimeUnit": "ms", "traceEvents": [\n')
+        separator: str = ""
+        for event in self.iter_events():
+            file.write(separator)
+            file.write(json.dumps(event))
+            separator = ",\n"
+        file.write("\n]}\n")
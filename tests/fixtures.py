@@ -1,4 +1,8 @@
+import subprocess
+import sys
 from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Mapping
 
 import pytest
 
@@ -29,3 +33,40 @@ def mock_config() -> MockConfig:
 def mock_dir(tmp_path_factory):
     path = tmp_path_factory.mktemp("_temp_dir")
     return path
+
+
+# Small tree of sources, mapping filepaths relative to its root to their contents
+SOURCE_TREE: dict[str, str] = {
+    "top.py": "# comment\nx = 1\n\n",
+    "pkg/mod.py": "def f():\n    return 1\n",
+    "pkg/sub/deep.c": "/* doc */\n// c\nint y;",
+    "docs/conf.py": "# conf\n" * 4,
+    "vendor/lib.py": "z = 3\n" * 10,
+}
+
+
+def populate_tree(directory: Path, tree: Mapping[str, str] = SOURCE_TREE) -> Path:
+    for filepath, content in tree.items():
+        (directory / filepath).parent.mkdir(parents=True, exist_ok=True)
+        (directory / filepath).write_text(content)
+    return directory
+
+
+@pytest.fixture
+def mock_tree(mock_dir, request):
+    """mock_dir populated with SOURCE_TREE, or the tree given by indirect parametrisation"""
+    return populate_tree(mock_dir, getattr(request, "param", SOURCE_TREE))
+
+
+def run_cli(
+    *args: str, stdin: str = "", check: bool = False
+) -> subprocess.CompletedProcess[str]:
+    """Run the command line entry point in a process of its own"""
+    return subprocess.run(
+        (sys.executable, "-m", "locstat", *args),
+        input=stdin,
+        capture_output=True,
+        text=True,
+        check=check,
+        cwd=Path(__file__).parents[1],
+    )
@@ -0,0 +1,284 @@
+"""Unit tests for the programmatic scanning API"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterator, Mapping
+
+import pytest
+
+import locstat
+from locstat.api import LanguageTable, ScanFilters, ScanResult, load_language_table
+from locstat.data_structures.output_keys import OutputKeys
+from locstat.data_structures.parse_modes import ParseMode
+from locstat.data_structures.verbosity import Verbosity
+from locstat.parsing.extensions._parsing import (
+    _get_cache_advice,
+    _get_memory_budget,
+)
+
+from tests.fixtures import mock_dir, mock_tree, populate_tree
+
+
+def _materialize(node: Any) -> Any:
+    if isinstance(node, Mapping):
+        return {key: _materialize(value) for key, value in node.items()}
+    return node
+
+
+@pytest.mark.parametrize("verbosity", tuple(Verbosity))
+def test_parallel_scan_matches_serial(mock_tree, verbosity: Verbosity) -> None:
+    serial: ScanResult = locstat.scan(mock_tree, verbosity=verbosity)
+    parallel: ScanResult = locstat.scan(mock_tree, verbosity=verbosity, jobs=4)
+
+    assert serial.path == str(mock_tree)
+    assert (serial.total, serial.loc, serial.commented, serial.blank) == (
+        parallel.total,
+        parallel.loc,
+        parallel.commented,
+        parallel.blank,
+    )
+    assert serial.total == 3 + 2 + 3 + 4 + 10
+    assert serial.languages == parallel.languages
+    assert bool(serial.languages) == (verbosity != Verbosity.BARE)
+    assert _materialize(serial.files) == _materialize(parallel.files)
+    assert _materialize(serial.subdirectories) == _materialize(parallel.subdirectories)
+
+    if verbosity == Verbosity.DETAILED:
+        sub: Mapping[str, Any] = serial.subdirectories["pkg"][
+            OutputKeys.SUBDIRECTORIES
+        ]["sub"]
+        assert sub[OutputKeys.FILES][str(mock_tree / "pkg" / "sub" / "deep.c")] == {
+            OutputKeys.LOC: 1,
+            OutputKeys.TOTAL: 3,
+            OutputKeys.COMMENTED: 2,
+            OutputKeys.BLANK: 0,
+        }
+        assert serial.to_mapping()[OutputKeys.GENERAL][OutputKeys.ROOT] == str(
+            mock_tree
+        )
+
+
+def test_scan_filters_and_languages(mock_tree) -> None:
+    filters: ScanFilters = ScanFilters(
+        exclude_directories={str(mock_tree / "vendor")}, include_types={"py"}
+    )
+    for jobs in (1, 2):
+        result: ScanResult = locstat.scan(mock_tree, filters=filters, jobs=jobs)
+        assert result.languages.keys() == {"py"}
+        assert result.total == 3 + 2 + 4
+
+    # Custom language tables replace the packaged one
+    python_only: LanguageTable = LanguageTable({"py": (b"#", None, None)})
+    result = locstat.scan(mock_tree, languages=python_only, max_depth=0)
+    assert result.languages.keys() == {"py"}
+    assert result.total == 3
+
+    assert load_language_table() is load_language_table()
+    with pytest.raises(ValueError):
+        ScanFilters(include_types={"py"}, exclude_types={"c"})
+
+
+def test_scan_file(mock_dir) -> None:
+    filepath: Path = mock_dir / "single.py"
+    filepath.write_text("# comment\nx = 1\n\n")
+    result: ScanResult = locstat.scan(os.fspath(filepath))
+    assert (result.total, result.loc, result.commented, result.blank) == (3, 1, 1, 1)
+    assert not result.languages
+
+
+def test_scan_memory_budget(mock_tree) -> None:
+    unbounded: ScanResult = locstat.scan(mock_tree, parse_mode=ParseMode.COMPLETE)
+    for jobs in (1, 4):
+        bounded: ScanResult = locstat.scan(
+            mock_tree, parse_mode=ParseMode.COMPLETE, jobs=jobs, max_memory=16
+        )
+        assert (bounded.total, bounded.loc, bounded.commented) == (
+            unbounded.total,
+            unbounded.loc,
+            unbounded.commented,
+        )
+    # Budgets are bound to their scan, leaving the process-wide one unset
+    assert _get_memory_budget() == 0
+    with pytest.raises(ValueError):
+        locstat.scan(mock_tree, max_memory=0)
+
+
+@pytest.mark.parametrize("verbosity", tuple(Verbosity))
+def test_scan_extended_metrics(mock_tree, verbosity: Verbosity) -> None:
+    (mock_tree / "top.py").write_text("# comment\nx = 1 \n\tif x:\n\t\tpass\n")
+
+    plain: ScanResult = locstat.scan(mock_tree, verbosity=verbosity)
+    assert not plain.metrics
+    results: list[ScanResult] = [
+        locstat.scan(mock_tree, verbosity=verbosity, jobs=jobs, extended_metrics=True)
+        for jobs in (1, 4)
+    ]
+    # Metrics are only gathered by the scans requesting them
+    assert not locstat.scan(mock_tree, verbosity=verbosity).metrics
+
+    for result in results:
+        assert result.total == plain.total
+        assert result.metrics == results[0].metrics
+        assert result.languages == results[0].languages
+        assert bool(result.languages) == (verbosity != Verbosity.BARE)
+        assert _materialize(result.files) == _materialize(results[0].files)
+    metrics: Mapping[str, Any] = results[0].metrics
+    assert metrics[OutputKeys.BYTES] == sum(
+        path.stat().st_size for path in mock_tree.rglob("*.[pc]*")
+    )
+    assert metrics[OutputKeys.TRAILING_WHITESPACE] == 1
+    assert metrics[OutputKeys.INDENTATION] == "mixed"
+    assert results[0].to_mapping()[OutputKeys.GENERAL][OutputKeys.MAX_LINE_LENGTH] == 12
+
+    if verbosity != Verbosity.BARE:
+        python: Mapping[str, Any] = results[0].languages["py"]
+        assert python[OutputKeys.TAB_INDENTED] == 2
+        assert python[OutputKeys.SPACE_INDENTED] == 1
+        assert results[0].languages["c"][OutputKeys.INDENTATION] == "none"
+    if verbosity == Verbosity.DETAILED:
+        top: Mapping[str, Any] = results[0].files[str(mock_tree / "top.py")]
+        assert top[OutputKeys.INDENTATION] == "tabs"
+        assert top[OutputKeys.AVERAGE_LINE_LENGTH] == 6.75
+
+
+@pytest.mark.parametrize("verbosity", tuple(Verbosity))
+def test_scan_many_matches_scan(mock_dir, verbosity: Verbosity) -> None:
+    roots: list[Path] = [mock_dir / "first", mock_dir / "second", mock_dir / "empty"]
+    for root in roots[:2]:
+        root.mkdir()
+        populate_tree(root)
+    roots[2].mkdir()
+    (mock_dir / "second" / "extra.py").write_text("# extra\n")
+    roots.append(mock_dir / "second" / "top.py")
+
+    results: dict[str, ScanResult] = {
+        result.path: result
+        for result in locstat.scan_many(roots, verbosity=verbosity, jobs=3)
+    }
+    assert results.keys() == set(map(str, roots))
+    for root in roots:
+        single: ScanResult = locstat.scan(root, verbosity=verbosity)
+        result: ScanResult = results[str(root)]
+        assert (result.total, result.loc, result.commented, result.blank) == (
+            single.total,
+            single.loc,
+            single.commented,
+            single.blank,
+        )
+        assert result.languages == single.languages
+        assert _materialize(result.files) == _materialize(single.files)
+        assert _materialize(result.subdirectories) == _materialize(
+            single.subdirectories
+        )
+    assert results[str(mock_dir / "second")].total == 3 + 2 + 3 + 4 + 10 + 1
+
+
+def test_scan_many_early_exit(mock_dir) -> None:
+    roots: list[Path] = []
+    for index in range(8):
+        roots.append(mock_dir / f"root_{index}")
+        roots[-1].mkdir()
+        populate_tree(roots[-1])
+
+    # Pending roots are abandoned once the consumer stops
+    scans = locstat.scan_many(roots, jobs=2, max_memory=64)
+    first: ScanResult = next(scans)
+    scans.close()
+    assert first.total == 3 + 2 + 3 + 4 + 10
+    assert _get_memory_budget() == 0
+
+    with pytest.raises(ValueError):
+        list(locstat.scan_many(roots, jobs=0))
+
+
+def test_scan_many_yields_while_listing(mock_dir) -> None:
+    roots: list[Path] = [
+        populate_tree(mock_dir / f"root_{index}") for index in range(8)
+    ]
+    listed: list[Path] = []
+
+    def slowly_listed() -> Iterator[Path]:
+        # Stands for roots on slow mounts, or produced lazily
+        for root in roots:
+            time.sleep(0.05)
+            listed.append(root)
+            yield root
+
+    # Roots are yielded once scanned, rather than once every root has been listed
+    scans = locstat.scan_many(slowly_listed(), jobs=2)
+    first: ScanResult = next(scans)
+    assert first.path == str(roots[0])
+    assert len(listed) < len(roots)
+    assert len(list(scans)) == len(roots) - 1
+
+
+@pytest.mark.parametrize("verbosity", tuple(Verbosity))
+def test_scan_tokens(mock_tree, verbosity: Verbosity) -> None:
+    (mock_tree / "pkg" / "todo.py").write_text("# TODO: x\nimport os  # TODO\n")
+    tokens: Mapping[str, Any] = {
+        "*": {"comment": ["TODO"]},
+        "py": {"code": ["import"]},
+    }
+
+    plain: ScanResult = locstat.scan(mock_tree, verbosity=verbosity)
+    results: list[ScanResult] = [
+        locstat.scan(mock_tree, verbosity=verbosity, jobs=jobs, tokens=tokens)
+        for jobs in (1, 4)
+    ]
+    # Tokens are only counted by the scans requesting them
+    assert not plain.metrics
+    assert not locstat.scan(mock_tree, verbosity=verbosity).metrics
+
+    for result in results:
+        assert result.total == plain.total
+        assert result.metrics == {OutputKeys.TOKENS: {"TODO": 2, "import": 1}}
+        assert result.languages == results[0].languages
+        assert bool(result.languages) == (verbosity != Verbosity.BARE)
+        assert _materialize(result.files) == _materialize(results[0].files)
+
+    if verbosity != Verbosity.BARE:
+        assert results[0].languages["c"][OutputKeys.TOKENS] == {"TODO": 0}
+    if verbosity == Verbosity.DETAILED:
+        pkg: Mapping[str, Any] = results[0].subdirectories["pkg"]
+        assert pkg[OutputKeys.FILES][str(mock_tree / "pkg" / "todo.py")][
+            OutputKeys.TOKENS
+        ] == {"TODO": 2, "import": 1}
+
+    with pytest.raises(ValueError):
+        locstat.scan(mock_tree, tokens={"py": {"strings": ["TODO"]}})
+
+
+def test_concurrent_scans_keep_their_settings(mock_tree) -> None:
+    (mock_tree / "pkg" / "todo.py").write_text("# TODO: x\n")
+    plain: ScanResult = locstat.scan(mock_tree, verbosity=Verbosity.DETAILED)
+
+    def scan(index: int) -> tuple[int, ScanResult]:
+        settings: dict[str, Any] = (
+            {},
+            {"extended_metrics": True},
+            {"tokens": {"*": {"comment": ["TODO"]}}},
+            {"max_memory": 16, "cache_advice": True},
+        )[index % 4]
+        return index % 4, locstat.scan(
+            mock_tree, verbosity=Verbosity.DETAILED, jobs=2, **settings
+        )
+
+    with ThreadPoolExecutor(8) as executor:
+        results: list[tuple[int, ScanResult]] = list(executor.map(scan, range(32)))
+
+    # Settings of a scan never leak into scans running alongside it
+    for kind, result in results:
+        assert result.total == plain.total
+        assert bool(result.metrics) == (kind in (1, 2))
+        if kind in (0, 3):
+            assert result.languages == plain.languages
+            assert _materialize(result.files) == _materialize(plain.files)
+            assert _materialize(result.subdirectories) == _materialize(
+                plain.subdirectories
+            )
+        elif kind == 2:
+            assert result.metrics == {OutputKeys.TOKENS: {"TODO": 1}}
+    assert _get_memory_budget() == 0
+    assert not _get_cache_advice()
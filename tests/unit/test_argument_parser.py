@@ -2,6 +2,8 @@
 
 import argparse
 
+import pytest
+
 from locstat.argparser import initialize_parser, parse_arguments
 
 from tests.fixtures import mock_config, mock_dir
@@ -14,6 +16,18 @@ def test_exclusive_groups(mock_config, mock_dir) -> None:
         "-it py -xt js",
         "-if foo.py -xf bar.py",
         "-id foo -xd bar",
+        "-t 5 -sm 0.1",
+        "-sh 1/2",
+        "-sh 3/2 -o part.json",
+        "-sh 1/2 -o part.ndjson",
+        "-rf -",
+        "-ff -",
+        "-j 0",
+        "-em -sm 0.1",
+        "-o scan.lsnap",
+        "-vb REPORT -o scan.lsnap",
+        "-vb DETAILED -sm 0.1 -o scan.lsnap",
+        "-vb DETAILED -o scan.lsnap.gz",
     )
 
     base_args: str = f"-d {mock_dir}"
@@ -40,6 +54,17 @@ def test_allowed_combinations(mock_config, mock_dir):
         "-xf foo.py bar.py",
         "-id foo bar",
         "-xd foo bar",
+        "-mm 512M",
+        "--max-memory 2GiB",
+        "-mm 65536",
+        "-sm 0.05",
+        "--sample 1",
+        "-tr trace.json",
+        "-sh 2/2 -o part.json.gz",
+        "-j 4",
+        "-nc -pm MMAP",
+        "-em -pm AUTO",
+        "-vb DETAILED -o scan.lsnap",
     )
 
     base_args: str = f"-d {mock_dir}"
@@ -61,6 +86,8 @@ def test_target_existence(mock_config, mock_dir):
     arg_mapping: dict[str, type[BaseException]] = {
         f"-f {mock_file}": SystemExit,
         f"-d {mock_subdir}": SystemExit,
+        f"-rf {mock_file}": SystemExit,
+        f"-ff {mock_file}": SystemExit,
     }
 
     for arg, expected_exception in arg_mapping.items():
@@ -84,3 +111,48 @@ def test_target_existence(mock_config, mock_dir):
 
     for arg in arg_mapping:
         parse_arguments(arg.split(), parser)
+
+
+def test_token_files(mock_config, mock_dir):
+    parser: argparse.ArgumentParser = initialize_parser(mock_config)
+    tokens_file = mock_dir / "tokens.json"
+
+    tokens_file.write_text('{"*": {"comment": ["TODO"]}, "rs": {"code": ["unsafe"]}}')
+    arguments: argparse.Namespace = parse_arguments(
+        f"-d {mock_dir} -ct {tokens_file}".split(), parser
+    )
+    assert arguments.count_tokens == {
+        "*": {"comment": ["TODO"]},
+        "rs": {"code": ["unsafe"]},
+    }
+    with pytest.raises(SystemExit):
+        parse_arguments(f"-d {mock_dir} -ct {tokens_file} -sm 0.1".split(), parser)
+
+    for invalid in (
+        "{",
+        '["TODO"]',
+        '{"rs": ["unsafe"]}',
+        '{"rs": {"unsafe": ["code"]}}',
+        '{"rs": {"code": [1]}}',
+    ):
+        tokens_file.write_text(invalid)
+        with pytest.raises(SystemExit):
+            parse_arguments(f"-d {mock_dir} -ct {tokens_file}".split(), parser)
+
+
+def test_regex_patterns(mock_config, mock_dir):
+    parser: argparse.ArgumentParser = initialize_parser(mock_config)
+    patterns_file = mock_dir / "patterns"
+
+    arguments: argparse.Namespace = parse_arguments(
+        ["-d", str(mock_dir), "-xf", "re:foo", "re:(?i)SRC"], parser
+    )
+    assert arguments.exclude_file == ["re:foo", "re:(?i)SRC"]
+
+    for flag in ("-xf", "-if", "-xd"):
+        with pytest.raises(SystemExit):
+            parse_arguments(["-d", str(mock_dir), flag, "re:foo", "re:(bar"], parser)
+
+    patterns_file.write_text("# generated\n*_pb2.py\nre:[a-\n")
+    with pytest.raises(SystemExit):
+        parse_arguments(["-d", str(mock_dir), "-xfr", str(patterns_file)], parser)
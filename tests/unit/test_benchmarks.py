@@ -0,0 +1,136 @@
+"""Unit tests for the benchmark corpus generator and result comparison"""
+
+import hashlib
+import os
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from benchmarks.compare import compare_results
+from benchmarks.run import cached_bytes
+from benchmarks.corpus import (
+    PROFILES,
+    CorpusManifest,
+    CorpusProfile,
+    ensure_corpus,
+    generate_corpus,
+)
+
+
+def _tree_digest(root: Path) -> str:
+    digest = hashlib.sha256()
+    for directory, _, filenames in sorted(os.walk(root)):
+        for filename in sorted(filenames):
+            filepath: str = os.path.join(directory, filename)
+            digest.update(os.path.relpath(filepath, root).encode())
+            digest.update(Path(filepath).read_bytes())
+    return digest.hexdigest()
+
+
+def test_corpus_is_deterministic(tmp_path: Path) -> None:
+    profile: CorpusProfile = PROFILES["mixed"].scaled(0.02)
+    first: CorpusManifest = generate_corpus(profile, str(tmp_path / "first"))
+    second: CorpusManifest = generate_corpus(profile, str(tmp_path / "second"))
+
+    assert first.files == profile.files == 40
+    assert (first.bytes, first.lines) == (second.bytes, second.lines)
+    assert _tree_digest(tmp_path / "first") == _tree_digest(tmp_path / "second")
+
+    with pytest.raises(ValueError):
+        generate_corpus(profile, str(tmp_path / "first"))
+
+
+def test_corpus_reuse(tmp_path: Path) -> None:
+    root: str = str(tmp_path / "corpus")
+    profile: CorpusProfile = PROFILES["tiny"].scaled(0.01)
+    generated: CorpusManifest = ensure_corpus(profile, root)
+    marker: Path = tmp_path / "corpus" / "marker"
+    marker.touch()
+
+    assert ensure_corpus(profile, root) == generated
+    assert marker.exists()
+
+    # Corpora of other profiles are replaced
+    assert ensure_corpus(profile.scaled(2), root).files == 2 * generated.files
+    assert not marker.exists()
+
+
+def _results(fingerprint: str, files_per_second: float, rss: int) -> dict[str, Any]:
+    return {
+        "corpora": {"mixed": {"fingerprint": fingerprint}},
+        "results": [
+            {
+                "profile": "mixed",
+                "target": "parser:BUF",
+                "cache": "hot",
+                "files_per_second": files_per_second,
+                "peak_rss_kb": rss,
+            }
+        ],
+    }
+
+
+def test_compare_results() -> None:
+    baseline: dict[str, Any] = _results("abc", 1000.0, 20000)
+
+    assert not compare_results(baseline, _results("abc", 900.0, 22000), 0.15)
+    regressions = compare_results(baseline, _results("abc", 800.0, 30000), 0.15)
+    assert [regression.metric for regression in regressions] == [
+        "files_per_second",
+        "peak_rss_kb",
+    ]
+    assert regressions[0].change == pytest.approx(-0.2)
+
+    with pytest.raises(ValueError):
+        compare_results(baseline, _results("def", 1000.0, 20000))
+
+
+def test_compare_cached_pages() -> None:
+    baseline: dict[str, Any] = _results("abc", 1000.0, 20000)
+    current: dict[str, Any] = _results("abc", 1000.0, 20000)
+    baseline["results"][0].update(bytes=1024 * 1024, cached_kb=0)
+    current["results"][0].update(bytes=1024 * 1024, cached_kb=100)
+    assert not compare_results(baseline, current, 0.15)
+
+    current["results"][0]["cached_kb"] = 1024
+    (regression,) = compare_results(baseline, current, 0.15)
+    assert regression.metric == "cached_kb"
+
+
+@pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="Cache advice drops pages on Linux"
+)
+def test_cached_bytes_with_advice(tmp_path: Path) -> None:
+    from locstat.utilities.core import derive_file_parser, set_cache_advice
+    from locstat.data_structures.parse_modes import ParseMode
+
+    filepaths: list[str] = []
+    for mode in ParseMode:
+        file: Path = tmp_path / f"{mode.value}.py"
+        file.write_bytes(b"x = 1  # comment\n" * 16384)
+        filepaths.append(str(file))
+    os.sync()
+    for filepath in filepaths:
+        descriptor: int = os.open(filepath, os.O_RDONLY)
+        os.posix_fadvise(descriptor, 0, 0, os.POSIX_FADV_DONTNEED)
+        os.close(descriptor)
+    if cached_bytes(filepaths) != 0:
+        pytest.skip("Page cache cannot be inspected or evicted")
+
+    previous: bool = set_cache_advice(True)
+    try:
+        for mode, filepath in zip(ParseMode, filepaths):
+            derive_file_parser(mode)(filepath, b"#", None, None, 1)
+        # Files not cached beforehand are dropped once parsed
+        assert cached_bytes(filepaths) == 0
+
+        # Files cached beforehand are left cached
+        for filepath in filepaths:
+            Path(filepath).read_bytes()
+        for mode, filepath in zip(ParseMode, filepaths):
+            derive_file_parser(mode)(filepath, b"#", None, None, 1)
+        assert cached_bytes(filepaths) == sum(map(os.path.getsize, filepaths))
+    finally:
+        set_cache_advice(previous)
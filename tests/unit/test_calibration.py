@@ -0,0 +1,85 @@
+"""Unit tests for calibration of AUTO parsing thresholds"""
+
+from pathlib import Path
+
+import pytest
+
+from locstat.parsing.extensions._parsing import _get_auto_thresholds
+from locstat.utilities.calibration import (
+    NEVER,
+    CalibrationResult,
+    calibrate,
+    derive_thresholds,
+    format_calibration,
+)
+
+from tests.fixtures import mock_dir
+
+SIZES: tuple[int, ...] = (1024, 16 * 1024, 256 * 1024, 4 * 1024 * 1024)
+
+
+@pytest.mark.parametrize(
+    "complete, chunked, mmap, expected",
+    (
+        # Reading at once wins until chunks pay off, mapping wins for the largest files
+        (
+            (100, 100, 50, 50),
+            {4096: (50, 90, 80, 80), 65536: (40, 80, 90, 90)},
+            (10, 10, 80, 200),
+            (16 * 1024, 4 * 1024 * 1024, 65536),
+        ),
+        # Strategies on par within tolerance favour reading at once, and never mapping
+        (
+            (100, 100, 100, 100),
+            {65536: (98, 102, 103, 104)},
+            (100, 100, 100, 104),
+            (4 * 1024 * 1024, NEVER, 65536),
+        ),
+        # Chunked reads win throughout
+        (
+            (10, 10, 10, 10),
+            {65536: (50, 50, 50, 50)},
+            (10, 10, 10, 10),
+            (0, NEVER, 65536),
+        ),
+    ),
+)
+def test_derive_thresholds(
+    complete: tuple[float, ...],
+    chunked: dict[int, tuple[float, ...]],
+    mmap: tuple[float, ...],
+    expected: tuple[int, int, int],
+) -> None:
+    assert derive_thresholds(SIZES, complete, chunked, mmap) == expected
+
+
+def test_calibrate(mock_dir: Path) -> None:
+    original_thresholds: tuple[int, int, int] = _get_auto_thresholds()
+    measured: list[int] = []
+
+    result: CalibrationResult = calibrate(
+        sizes=(64 * 1024, 1024),
+        chunk_sizes=(4096, 16 * 1024),
+        repeat=1,
+        cold=False,
+        directory=str(mock_dir),
+        progress=measured.append,
+    )
+
+    assert measured == [1024, 64 * 1024]
+    assert result.sizes == (1024, 64 * 1024)
+    assert all(
+        len(values) == 2 and all(value > 0 for value in values)
+        for values in (result.complete, result.mmap, *result.chunked.values())
+    )
+    assert result.auto_complete_threshold in (0, *result.sizes)
+    assert result.auto_mmap_threshold in (NEVER, *result.sizes)
+    assert result.auto_chunk_size in (4096, 16 * 1024)
+
+    # Process-wide thresholds are left as is, and generated files removed
+    assert _get_auto_thresholds() == original_thresholds
+    assert not any(mock_dir.iterdir())
+
+    table: str = format_calibration(result)
+    assert "Chunked 16KB" in table
+    assert all(key in table for key in result.configurations)
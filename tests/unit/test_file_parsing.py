@@ -1,11 +1,26 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Iterable
 
+import pytest
+
 from locstat.parsing.extensions._parsing import (
     _parse_file_vm_map,
     _parse_file_no_chunk,
     _parse_file,
+    _parse_file_auto,
+    _get_auto_thresholds,
+    _set_auto_thresholds,
+    _get_stats,
+    _reset_stats,
+    _get_cache_advice,
+    _set_cache_advice,
+    _set_memory_budget,
+    _set_stats_enabled,
+    _parse_options,
 )
+from locstat.data_structures.tokens import compile_tokens
 from locstat.data_structures.typing import (
     FileLineData,
     FileParsingFunction,
@@ -25,6 +40,7 @@ def _test_helper_run_all_parsers(
         _parse_file,
         _parse_file_no_chunk,
         _parse_file_vm_map,
+        _parse_file_auto,
     ),
 ):
     results: dict[FileParsingFunction, FileLineData] = {
@@ -388,3 +404,226 @@ def test_missing_newline(mock_dir) -> None:
         (b"#", None, None),
         (expected_total, expected_loc, expected_commented, expected_blank),
     )
+
+
+@pytest.mark.parametrize(
+    "thresholds, size",
+    (
+        # Stack buffer, heap buffer, chunked reads and memory mapping respectively
+        ((4 * 1024 * 1024, 64 * 1024 * 1024), 1024),
+        ((4 * 1024 * 1024, 64 * 1024 * 1024), 512 * 1024),
+        ((1024, 64 * 1024 * 1024), 9 * 1024 * 1024 + 17),
+        ((1024, 4096), 512 * 1024),
+        # Chunks not aligned to lines, and small enough to live on the stack
+        ((1024, 64 * 1024 * 1024, 4099), 512 * 1024 + 5),
+    ),
+)
+def test_auto_parsing_strategies(
+    mock_dir, thresholds: tuple[int, ...], size: int
+) -> None:
+    line: bytes = b"x = 1  # trailing\n\n/* block\ncomment */ y\n"
+    file: Path = mock_dir / "auto.c"
+    # Not newline terminated, and with multiline comments spanning chunk boundaries
+    file.write_bytes((line * (size // len(line) + 1))[:size])
+
+    default_thresholds: tuple[int, int, int] = _get_auto_thresholds()
+    _set_auto_thresholds(*thresholds)
+    try:
+        assert _parse_file_auto(str(file), b"//", b"/*", b"*/", 1) == _parse_file(
+            str(file), b"//", b"/*", b"*/", 1
+        )
+    finally:
+        _set_auto_thresholds(*default_thresholds)
+
+    with pytest.raises(ValueError):
+        _set_auto_thresholds(-1, 0)
+    with pytest.raises(ValueError):
+        _set_auto_thresholds(1024, 4096, 0)
+    assert _get_auto_thresholds() == default_thresholds
+
+
+@pytest.mark.parametrize(
+    "parser", (_parse_file, _parse_file_no_chunk, _parse_file_auto)
+)
+def test_memory_budget(mock_dir, parser: FileParsingFunction) -> None:
+    budget: int = 1024 * 1024
+    line: bytes = b"x = 1  /* block\ncomment */\n\n"
+    files: list[str] = []
+    # Files fitting in the budget alongside files read in chunks of it
+    for index, size in enumerate((700 * 1024,) * 6 + (3 * budget + 7,)):
+        file: Path = mock_dir / f"budget_{index}.c"
+        file.write_bytes((line * (size // len(line) + 1))[:size])
+        files.append(str(file))
+
+    def parse(filepath: str) -> FileLineData:
+        return parser(filepath, b"//", b"/*", b"*/", 1)
+
+    expected: list[FileLineData] = [parse(filepath) for filepath in files]
+    _reset_stats()
+    _set_stats_enabled(True)
+    _set_memory_budget(budget)
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            assert list(executor.map(parse, files)) == expected
+    finally:
+        _set_memory_budget(0)
+        _set_stats_enabled(False)
+
+    assert 0 < _get_stats()["peak_buffer_bytes"] <= budget
+    with pytest.raises(ValueError):
+        _set_memory_budget(-1)
+
+
+@pytest.mark.parametrize(
+    "parser", (_parse_file, _parse_file_no_chunk, _parse_file_vm_map, _parse_file_auto)
+)
+def test_cache_advice(mock_dir, parser: FileParsingFunction) -> None:
+    file: Path = mock_dir / "advised.c"
+    line: bytes = b"x = 1  /* block\ncomment */\n\n// line\n"
+    file.write_bytes(line * 10000 + b"y = 2")
+    empty: Path = mock_dir / "advised_empty.c"
+    empty.write_bytes(b"")
+
+    expected: FileLineData = parser(str(file), b"//", b"/*", b"*/", 1)
+    _reset_stats()
+    _set_stats_enabled(True)
+    _set_cache_advice(True)
+    try:
+        assert _get_cache_advice()
+        assert parser(str(file), b"//", b"/*", b"*/", 1) == expected
+        assert parser(str(empty), b"//", b"/*", b"*/", 1) == (0, 0, 0, 0)
+    finally:
+        _set_cache_advice(False)
+        _set_stats_enabled(False)
+
+    assert not _get_cache_advice()
+    if sys.platform.startswith("linux"):
+        assert _get_stats()["advise_calls"] >= 2
+
+
+@pytest.mark.parametrize(
+    "parser", (_parse_file, _parse_file_no_chunk, _parse_file_vm_map, _parse_file_auto)
+)
+def test_extended_metrics(mock_dir, parser: FileParsingFunction) -> None:
+    file: Path = mock_dir / "measured.py"
+    # Tab and space indented lines, a trailing space, a CRLF line ending, a two byte
+    # character and an unterminated last line ending with a tab
+    file.write_bytes(b"def f():\n\tx = 1 \n    # y\n\n  z = '\xc3\xa9'\r\nw\t")
+    empty: Path = mock_dir / "measured_empty.py"
+    empty.write_bytes(b"")
+
+    line_data: FileLineData = parser(str(file), b"#", None, None, 1)
+    assert len(line_data) == 4
+    options = _parse_options(extended_metrics=True)
+    extended: FileLineData = parser(str(file), b"#", None, None, 1, options=options)
+    assert parser(str(empty), b"#", None, None, 1, options=options) == (0,) * 10
+    # Options only apply to the calls given them
+    assert parser(str(file), b"#", None, None, 1) == line_data
+    assert parser(str(file), b"#", None, None, 1, options=_parse_options()) == line_data
+    with pytest.raises(ValueError):
+        parser(str(file), b"#", None, None, 1, options=object())
+
+    # Line counts are unaffected by gathering metrics
+    assert extended[:4] == line_data
+    # bytes, characters, longest line, trailing whitespace, tab and space indented
+    assert extended[4:] == (40, 33, 9, 2, 1, 2)
+
+
+def test_mmap_windows(mock_dir) -> None:
+    # mmap_window_size of _parsing.c
+    window_size: int = 16 * 1024 * 1024
+    file: Path = mock_dir / "windows.c"
+    # Comment symbols straddling the boundary of the first window
+    file.write_bytes(
+        b"x\n" + b"a" * (window_size - 3) + b"/* x\n y */ z\n// q\n" * 3 + b"w"
+    )
+
+    expected: FileLineData = _parse_file(str(file), b"//", b"/*", b"*/", 1)
+    _reset_stats()
+    _set_stats_enabled(True)
+    try:
+        assert _parse_file_vm_map(str(file), b"//", b"/*", b"*/", 1) == expected
+    finally:
+        _set_stats_enabled(False)
+    if sys.platform != "win32":
+        assert _get_stats()["map_calls"] == 2
+
+
+@pytest.mark.parametrize(
+    "parser", (_parse_file, _parse_file_no_chunk, _parse_file_vm_map, _parse_file_auto)
+)
+def test_token_counts(mock_dir, parser: FileParsingFunction) -> None:
+    file: Path = mock_dir / "counted.c"
+    # Tokens within longer words, in both regions, and ending the file
+    file.write_bytes(
+        b"// TODO fix goto\nint f(){ goto end; /* TODO: FIXME TODOS */ eval(x);\n"
+        b"evaluate(y); end: return 0; } // xTODO\n// FIXME"
+    )
+    other: Path = mock_dir / "counted.py"
+    other.write_bytes(b"# TODO\nx = 1\n")
+    empty: Path = mock_dir / "counted_empty.c"
+    empty.write_bytes(b"")
+    unlisted: Path = mock_dir / "counted.h"
+    unlisted.write_bytes(b"// TODO\n")
+
+    line_data: FileLineData = parser(str(file), b"//", b"/*", b"*/", 1)
+    tokens = compile_tokens(
+        {
+            "c": {"code": ["goto", "eval("], "comment": ["TODO"], "any": ["FIXME"]},
+            "py": {"comment": ["TODO"]},
+        }
+    )
+    options = _parse_options(tokens=tokens)
+    counted: FileLineData = parser(str(file), b"//", b"/*", b"*/", 1, options=options)
+    assert parser(str(other), b"#", None, None, 1, options=options)[4:] == (
+        {"TODO": 1},
+    )
+    assert parser(str(empty), b"//", b"/*", b"*/", 1, options=options)[4:] == (
+        {"goto": 0, "eval(": 0, "TODO": 0, "FIXME": 0},
+    )
+    # Extensions without tokens are parsed as usual
+    assert len(parser(str(unlisted), b"//", b"/*", b"*/", 1, options=options)) == 4
+    # As are files parsed without the options
+    assert parser(str(file), b"//", b"/*", b"*/", 1) == line_data
+    extended: FileLineData = parser(
+        str(file),
+        b"//",
+        b"/*",
+        b"*/",
+        1,
+        options=_parse_options(extended_metrics=True, tokens=tokens),
+    )
+
+    # Line counts are unaffected by counting tokens
+    assert counted[:4] == line_data
+    assert counted[4] == {"goto": 1, "eval(": 1, "TODO": 2, "FIXME": 2}
+    assert len(extended) == 11 and extended[-1] == counted[4]
+
+
+def test_token_counts_across_chunks(mock_dir) -> None:
+    file: Path = mock_dir / "chunked.py"
+    file.write_bytes(b"# TODO\nimport os  # TODO\nx = TODO_LIST\n# TODO")
+    default_thresholds: tuple[int, int, int] = _get_auto_thresholds()
+    options = _parse_options(
+        tokens=compile_tokens({"*": {"comment": ["TODO"], "code": ["import"]}})
+    )
+    # Chunks of 3 bytes split every token
+    _set_auto_thresholds(0, 1 << 30, 3)
+    try:
+        assert _parse_file_auto(str(file), b"#", None, None, 1, options=options)[4] == {
+            "TODO": 3,
+            "import": 1,
+        }
+    finally:
+        _set_auto_thresholds(*default_thresholds)
+
+    for tokens in (
+        {"c": {"strings": ["TODO"]}},
+        {"c": {"code": [""]}},
+        {"c": {"code": "TODO"}},
+        {"c": {"code": ["TODO"], "comment": ["TODO"]}},
+    ):
+        with pytest.raises(ValueError):
+            compile_tokens(tokens)
+    with pytest.raises(ValueError):
+        _parse_options(tokens={"c": tuple((f"t{i}".encode(), 1) for i in range(65))})
@@ -0,0 +1,108 @@
+"""Unit tests for scanning fleets of roots"""
+
+import io
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from locstat.data_structures.output_keys import OutputKeys
+from locstat.utilities.fleet import FleetAggregate, read_roots
+
+from tests.fixtures import mock_dir, populate_tree, run_cli
+
+# Trees of roots in a fleet, growing with their index
+FLEET_TREES: tuple[dict[str, str], ...] = tuple(
+    {
+        "main.py": "# entry\nx = 1\n\n" * (index + 1),
+        "src/lib.c": "/* lib */\nint y;\n" * (index + 1),
+    }
+    for index in range(3)
+)
+
+
+def test_read_roots() -> None:
+    listing: io.StringIO = io.StringIO(
+        "/srv/a\n\n  /srv/b  \n# retired\n/srv/a\n/srv/c with spaces\n"
+    )
+    assert read_roots(listing) == ["/srv/a", "/srv/b", "/srv/c with spaces"]
+
+    aggregate: FleetAggregate = FleetAggregate()
+    for total in (3, 5):
+        aggregate.add(
+            {
+                OutputKeys.GENERAL: {
+                    OutputKeys.TOTAL: total,
+                    OutputKeys.LOC: 1,
+                    OutputKeys.COMMENTED: 1,
+                    OutputKeys.BLANK: total - 2,
+                },
+                OutputKeys.LANGUAGES: {
+                    "py": {OutputKeys.FILES: 1, OutputKeys.TOTAL: total}
+                },
+            }
+        )
+    assert aggregate.to_mapping() == {
+        OutputKeys.GENERAL: {
+            OutputKeys.TOTAL: 8,
+            OutputKeys.LOC: 2,
+            OutputKeys.COMMENTED: 2,
+            OutputKeys.BLANK: 4,
+            OutputKeys.ROOTS: 2,
+        },
+        OutputKeys.LANGUAGES: {"py": {OutputKeys.FILES: 2, OutputKeys.TOTAL: 8}},
+    }
+
+
+@pytest.mark.parametrize("verbosity", ("BARE", "REPORT", "DETAILED"))
+def test_fleet_matches_single_scans(mock_dir: Path, verbosity: str) -> None:
+    roots: list[Path] = [
+        populate_tree(mock_dir / f"repository_{index}", tree)
+        for index, tree in enumerate(FLEET_TREES)
+    ]
+    listing: str = "\n".join(map(str, roots))
+    output: Path = mock_dir / "fleet.json"
+    process = run_cli(
+        "-rf", "-", "-j", "2", "-vb", verbosity, "-so", "-o", str(output), stdin=listing
+    )
+    assert process.returncode == 0, process.stderr
+    fleet: dict[str, Any] = json.loads(output.read_text())
+
+    scanned: dict[str, dict[str, Any]] = {
+        result[OutputKeys.GENERAL][OutputKeys.ROOT]: result
+        for result in fleet[OutputKeys.ROOTS]
+    }
+    assert scanned.keys() == set(map(str, roots))
+    for root in roots:
+        single_output: Path = mock_dir / f"{root.name}.json"
+        run_cli("-d", str(root), "-vb", verbosity, "-so", "-o", str(single_output))
+        single: dict[str, Any] = json.loads(single_output.read_text())
+        result: dict[str, Any] = scanned[str(root)]
+        for mapping in (single, result):
+            for key in (OutputKeys.TIME, OutputKeys.SCANNED_AT):
+                mapping[OutputKeys.GENERAL].pop(key)
+        # Only results of a fleet are labelled by the root they are of
+        result[OutputKeys.GENERAL].pop(OutputKeys.ROOT)
+        assert result == single
+
+    general: dict[str, Any] = fleet[OutputKeys.FLEET][OutputKeys.GENERAL]
+    assert general[OutputKeys.ROOTS] == 3
+    # 3 lines per repetition of main.py, 2 per repetition of lib.c
+    assert general[OutputKeys.TOTAL] == (3 + 2) * (1 + 2 + 3)
+    if verbosity != "BARE":
+        assert fleet[OutputKeys.FLEET][OutputKeys.LANGUAGES]["c"][OutputKeys.FILES] == 3
+
+
+def test_fleet_rejects_missing_roots(mock_dir: Path) -> None:
+    roots: list[Path] = [
+        populate_tree(mock_dir / f"repository_{index}", tree)
+        for index, tree in enumerate(FLEET_TREES)
+    ]
+    listing: Path = mock_dir / "roots.txt"
+    listing.write_text(f"{roots[0]}\n{mock_dir / 'missing'}\n")
+
+    process = run_cli("-rf", str(listing))
+    assert process.returncode == 1
+    assert f"Root {mock_dir / 'missing'} could not be found" in process.stderr
+    assert not process.stdout
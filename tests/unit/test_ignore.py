@@ -0,0 +1,101 @@
+"""Unit tests for gitignore aware filtering"""
+
+import os
+import re
+from typing import Any, Optional
+
+import pytest
+
+import locstat
+from locstat.api import ScanResult
+from locstat.utilities.ignore import GitIgnoreFilter, translate_pattern
+
+from tests.fixtures import mock_dir
+
+
+@pytest.mark.parametrize(
+    "pattern, path, expected",
+    (
+        ("*.log", "a/b/debug.log", True),
+        ("/build", "build", True),
+        ("/build", "src/build", False),
+        ("doc/*.txt", "doc/notes.txt", True),
+        ("doc/*.txt", "doc/server/notes.txt", False),
+        ("**/logs", "logs", True),
+        ("**/logs", "a/b/logs", True),
+        ("a/**/b", "a/b", True),
+        ("a/**/b", "a/x/y/b", True),
+        ("vendor/**", "vendor/lib/x.py", True),
+        ("[!a]bc", "xbc", True),
+        ("[!a]bc", "abc", False),
+        ("file?.py", "file1.py", True),
+        ("file?.py", "file/.py", False),
+        ("trailing\\ ", "trailing ", True),
+        ("\\#hash", "#hash", True),
+    ),
+)
+def test_translate_pattern(pattern: str, path: str, expected: bool) -> None:
+    translated: Optional[tuple[str, bool, bool]] = translate_pattern(pattern)
+    assert translated is not None
+    assert bool(re.match(translated[0], path)) == expected
+
+
+def test_translate_pattern_flags() -> None:
+    assert translate_pattern("# comment") is None
+    assert translate_pattern("   \n") is None
+    assert translate_pattern("!keep.log")[1:] == (True, False)  # type: ignore[index]
+    assert translate_pattern("node_modules/")[1:] == (False, True)  # type: ignore[index]
+
+
+def test_gitignore_prunes_directories(mock_dir, monkeypatch) -> None:
+    (mock_dir / ".git" / "info").mkdir(parents=True)
+    (mock_dir / ".git" / "info" / "exclude").write_text("secret.py\n")
+    (mock_dir / ".git" / "hooks.py").write_text("x = 1\n")
+    (mock_dir / ".gitignore").write_text("node_modules/\n*.gen.py\n/build\n")
+    for directory in ("node_modules/pkg", "build", "src/build", "src/nested"):
+        (mock_dir / directory).mkdir(parents=True)
+    (mock_dir / "src" / "nested" / ".gitignore").write_text("*.py\n!keep.py\n")
+
+    files: dict[str, int] = {
+        "main.py": 1,
+        "secret.py": 2,
+        "node_modules/pkg/index.py": 4,
+        "build/out.py": 8,
+        "src/build/kept.py": 16,
+        "src/model.gen.py": 32,
+        "src/nested/dropped.py": 64,
+        "src/nested/keep.py": 128,
+    }
+    for filepath, lines in files.items():
+        (mock_dir / filepath).write_text("x = 1\n" * lines)
+
+    scanned: list[str] = []
+    scandir = os.scandir
+
+    def recording_scandir(path: Any) -> Any:
+        scanned.append(os.fspath(path))
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", recording_scandir)
+    for jobs in (1, 2):
+        result: ScanResult = locstat.scan(mock_dir, gitignore=True, jobs=jobs)
+        assert result.total == 1 + 16 + 128
+
+    # Ignored subtrees are never scanned
+    for directory in (".git", "node_modules", "build"):
+        assert str(mock_dir / directory) not in scanned
+    assert str(mock_dir / "src" / "build") in scanned
+
+    assert locstat.scan(mock_dir).total == sum(files.values()) + 1
+
+
+def test_gitignore_inherits_rules_above_root(mock_dir) -> None:
+    (mock_dir / ".git").mkdir()
+    (mock_dir / ".gitignore").write_text("*.tmp.py\n")
+    (mock_dir / "sub" / "inner").mkdir(parents=True)
+    (mock_dir / "sub" / ".gitignore").write_text("inner/\n")
+
+    ignore_filter: GitIgnoreFilter = GitIgnoreFilter(str(mock_dir / "sub"))
+    assert not ignore_filter.file_filter(str(mock_dir / "sub" / "a.tmp.py"), "py")
+    assert ignore_filter.file_filter(str(mock_dir / "sub" / "a.py"), "py")
+    assert not ignore_filter.directory_filter(str(mock_dir / "sub" / "inner"))
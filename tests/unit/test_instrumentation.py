@@ -0,0 +1,101 @@
+"""Unit tests for opt-in scan instrumentation"""
+
+import os
+from array import array
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from locstat.api import load_language_table
+from locstat.data_structures.parse_modes import ParseMode
+from locstat.parsing.directory import parse_directory
+from locstat.parsing.extensions._parsing import (
+    _get_stats,
+    _reset_stats,
+    _set_stats_enabled,
+)
+from locstat.utilities.core import derive_file_parser
+from locstat.utilities.instrumentation import ScanStatistics
+
+from tests.fixtures import mock_dir
+
+
+@pytest.mark.parametrize("parse_mode", tuple(ParseMode))
+def test_native_counters(mock_dir: Path, parse_mode: ParseMode) -> None:
+    filepath: Path = mock_dir / "main.py"
+    filepath.write_text("x = 1\n# comment\n" * 100)
+    parser = derive_file_parser(parse_mode)
+
+    _reset_stats()
+    parser(str(filepath), b"#", None, None, 1)
+    assert _get_stats()["files"] == 0, "Counters updated while disabled"
+
+    _set_stats_enabled(True)
+    try:
+        assert parser(str(filepath), b"#", None, None, 1) == (200, 100, 100, 0)
+        (mock_dir / "empty.py").touch()
+        parser(str(mock_dir / "empty.py"), b"#", None, None, 1)
+    finally:
+        _set_stats_enabled(False)
+
+    stats: dict[str, int] = _get_stats()
+    assert stats["files"] == 2
+    assert stats["open_calls"] == 2
+    assert stats["bytes_read"] == filepath.stat().st_size
+    assert stats["parse_ns"] > 0
+    if parse_mode == ParseMode.MMAP:
+        assert stats["map_calls"] == 1
+    else:
+        assert stats["read_calls"] >= 1
+
+
+def test_scan_statistics(mock_dir: Path) -> None:
+    for directory in ("src", "src/nested", "skipped"):
+        (mock_dir / directory).mkdir()
+    for index, filepath in enumerate(
+        ("main.py", "src/lib.py", "src/nested/deep.py", "skipped/x.py")
+    ):
+        (mock_dir / filepath).write_text("x = 1\n" * (index + 1) * 100)
+
+    statistics: ScanStatistics = ScanStatistics(slowest=2)
+    file_filter, directory_filter = statistics.time_filters(
+        lambda file, extension: True,
+        lambda directory: not directory.endswith("skipped"),
+    )
+    line_data: array = array("Q", (0, 0, 0))
+    statistics.start()
+    parse_directory(
+        statistics.scandir(str(mock_dir)),
+        load_language_table(),
+        line_data,
+        -1,
+        statistics.time_parser(derive_file_parser(ParseMode.BUFFERED)),
+        file_filter,
+        directory_filter,
+        1,
+        statistics.scandir,
+    )
+    statistics.stop()
+    report: dict[str, Any] = statistics.to_mapping()
+
+    assert line_data[0] == 600
+    assert report["files"] == 3
+    assert report["directories"] == 3
+    assert report["bytes_read"] == 600 * len("x = 1\n")
+    assert report["syscalls"]["open"] == 3
+    assert len(report["slowest"]) == 2
+    assert all(
+        os.path.join(str(mock_dir), "skipped") not in entry["path"]
+        for entry in report["slowest"]
+    )
+
+    phases: dict[str, float] = report["phases"]
+    assert phases["scan"] >= phases["enumeration"] + phases["parsing"]
+    assert phases["parsing"] >= phases["io"] + phases["parse_loop"]
+
+    # Collection stops alongside the scan
+    derive_file_parser(ParseMode.BUFFERED)(
+        str(mock_dir / "main.py"), b"#", None, None, 1
+    )
+    assert _get_stats()["files"] == 3
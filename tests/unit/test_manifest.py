@@ -0,0 +1,124 @@
+"""Unit tests for scans of files listed in a manifest"""
+
+import io
+import json
+import os
+from array import array
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from locstat.api import load_language_table
+from locstat.data_structures.output_keys import OutputKeys
+from locstat.data_structures.parse_modes import ParseMode
+from locstat.parsing.directory import parse_directory_record, parse_directory_verbose
+from locstat.utilities.core import construct_directory_filter, derive_file_parser
+from locstat.utilities.manifest import FileManifest, read_manifest
+
+from tests.fixtures import mock_dir, mock_tree, run_cli
+
+# Listed files of a manifest, each with contents as long as its path
+LISTED_TREE: dict[str, str] = {
+    filepath: "# comment\nx = 1\n\n" * len(filepath)
+    for filepath in (
+        "main.py",
+        "src/lib.py",
+        "src/native/ext.c",
+        "src/native/ext.h",
+        "vendor/dep.py",
+        "docs/notes.txt",
+    )
+}
+
+
+def test_read_manifest() -> None:
+    assert read_manifest(io.BytesIO(b"a.py\0dir/b c.py\0\0")) == ["a.py", "dir/b c.py"]
+    assert read_manifest(io.BytesIO(b"a.py\r\ndir/b.py\n\n")) == ["a.py", "dir/b.py"]
+    assert read_manifest(io.BytesIO(b"")) == []
+    # Undecodable names round trip to their bytes
+    assert os.fsencode(read_manifest(io.BytesIO(b"\xff.py\0"))[0]) == b"\xff.py"
+
+
+def test_manifest_tree(mock_dir: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(mock_dir)
+    manifest: FileManifest = FileManifest(["src/lib.py", "main.py", "src/lib.py"])
+    assert manifest.root == str(mock_dir)
+    assert manifest.files == 2
+    entries = list(manifest.scandir(str(mock_dir)))
+    assert [(entry.name, entry.is_dir()) for entry in entries] == [
+        ("src", True),
+        ("main.py", False),
+    ]
+    assert [entry.path for entry in manifest.scandir(entries[0].path)] == [
+        str(mock_dir / "src" / "lib.py")
+    ]
+
+    # Files outside of the current directory are rooted at their common directory
+    outside: FileManifest = FileManifest(["/srv/a/x/one.py", "/srv/a/y/two.py"])
+    assert outside.root == os.path.abspath("/srv/a")
+    with pytest.raises(ValueError):
+        FileManifest(["/srv/b/three.py"], root="/srv/a")
+
+
+@pytest.mark.parametrize("mock_tree", (LISTED_TREE,), indirect=True)
+def test_manifest_matches_directory_scan(mock_tree: Path) -> None:
+    manifest: FileManifest = FileManifest(
+        [str(mock_tree / filepath) for filepath in LISTED_TREE], root=str(mock_tree)
+    )
+    kwargs: dict[str, Any] = {
+        "config": load_language_table(),
+        "depth": -1,
+        "file_parsing_function": derive_file_parser(ParseMode.BUFFERED),
+        "directory_filter_function": construct_directory_filter(
+            frozenset({str(mock_tree / "vendor")}), exclude=True
+        ),
+        "minimum_characters": 1,
+    }
+
+    results: list[tuple[Any, ...]] = []
+    for scandir in (os.scandir, manifest.scandir):
+        line_data: array = array("Q", (0, 0, 0))
+        language_record: dict[str, dict[str, int]] = {}
+        parse_directory_record(
+            scandir(str(mock_tree)),
+            line_data=line_data,
+            language_record=language_record,
+            scandir_function=scandir,
+            **kwargs,
+        )
+        verbose_languages: dict[str, dict[str, int]] = {}
+        tree: dict[str, Any] = parse_directory_verbose(
+            scandir(str(mock_tree)),
+            language_record=verbose_languages,
+            scandir_function=scandir,
+            **kwargs,
+        )
+        results.append((tuple(line_data), language_record, tree))
+
+    assert results[0] == results[1]
+    line_data, language_record, tree = results[1]
+    assert language_record.keys() == {"py", "c", "h"}
+    assert "vendor" not in tree["subdirectories"]
+    assert tree["subdirectories"]["src"]["subdirectories"]["native"][
+        "files"
+    ].keys() == {
+        str(mock_tree / "src" / "native" / "ext.c"),
+        str(mock_tree / "src" / "native" / "ext.h"),
+    }
+
+
+@pytest.mark.parametrize("mock_tree", (LISTED_TREE,), indirect=True)
+def test_manifest_skips_missing_files(mock_tree: Path) -> None:
+    missing: Path = mock_tree / "src" / "removed.py"
+    listing: str = "\n".join(
+        str(mock_tree / filepath) for filepath in ("main.py", missing, "src/lib.py")
+    )
+
+    process = run_cli("-ff", "-", "-o", str(mock_tree / "out.json"), stdin=listing)
+    assert process.returncode == 0, process.stderr
+    assert f"Listed file {missing} could not be found" in process.stderr
+    general: dict[str, Any] = json.loads((mock_tree / "out.json").read_text())[
+        OutputKeys.GENERAL
+    ]
+    assert general[OutputKeys.TOTAL] == 3 * (len("main.py") + len("src/lib.py"))
@@ -0,0 +1,166 @@
+"""Unit tests for compiled path matching"""
+
+import os
+import time
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+import locstat
+from locstat.api import ScanFilters, ScanResult
+from locstat.utilities.core import construct_file_filter
+from locstat.utilities.matching import PathMatcher
+
+from tests.fixtures import mock_dir
+
+ROOT: str = os.path.abspath(os.sep + "project")
+
+
+@pytest.mark.parametrize(
+    "pattern, path, expected",
+    (
+        ("vendor/lib", "vendor/lib", True),
+        ("vendor/lib", "vendor/lib/x.py", True),
+        ("vendor/lib", "vendor/library", False),
+        ("vendor/lib", "src/vendor/lib", False),
+        ("./vendor", "vendor/x.py", True),
+        ("node_modules", "a/b/node_modules", True),
+        ("node_modules", "a/node_modules_old", False),
+        ("*.min.js", "static/app.min.js", True),
+        ("*.min.js", "static/app.js", False),
+        ("test_*", "tests/test_api.py", True),
+        ("test_*", "tests/api_test.py", False),
+        ("**/test_*.py", "tests/unit/test_api.py", True),
+        ("**/test_*.py", "tests/unit/test_api.pyi", False),
+        ("src/**/gen", "src/a/b/gen", True),
+        ("src/**/gen", "lib/a/gen", False),
+        ("*_pb?.py", "proto/x_pb2.py", True),
+        ("re:.*/migrations/\\d+_.*", "app/migrations/0001_initial.py", True),
+        ("re:.*/migrations/\\d+_.*", "app/migrations/initial.py", False),
+        (os.path.join(ROOT, "docs"), "docs/index.md", True),
+        (os.path.abspath(os.sep + "elsewhere"), "elsewhere", False),
+    ),
+)
+def test_pattern_kinds(pattern: str, path: str, expected: bool) -> None:
+    matcher: PathMatcher = PathMatcher((pattern,), ROOT)
+    assert matcher.matches(path) == expected
+    assert (os.path.join(ROOT, *path.split("/")) in matcher) == expected
+
+
+def test_regex_flags_and_groups() -> None:
+    # Global flags of one expression neither fail nor leak into the others
+    matcher: PathMatcher = PathMatcher(
+        ("re:foo", "re:(?i)SRC/.*", "re:(?x) bar # b"), ROOT
+    )
+    assert matcher.matches("src/main.py")
+    assert matcher.matches("foo")
+    assert matcher.matches("bar")
+    assert not matcher.matches("FOO")
+    assert not matcher.matches("b a r")
+
+    # Group numbers are those of each expression, regardless of preceding ones
+    matcher = PathMatcher(("re:(a)x", "re:(b)\\1.*"), ROOT)
+    assert matcher.matches("bb.py")
+    assert matcher.matches("ax")
+    assert not matcher.matches("ba.py")
+
+    with pytest.raises(ValueError):
+        PathMatcher(("re:foo", "re:(bar"), ROOT)
+
+
+def test_negated_patterns_rejected() -> None:
+    with pytest.raises(ValueError):
+        PathMatcher(("*.py", "!keep.py"), ROOT)
+
+
+def test_from_file(tmp_path: Path) -> None:
+    patterns: Path = tmp_path / "patterns"
+    patterns.write_text("# generated code\n*_pb2.py\n\nbuild/out\n")
+    matcher: PathMatcher = PathMatcher.from_file(str(patterns), ROOT)
+
+    assert len(matcher) == 2
+    assert matcher.matches("api/v1_pb2.py")
+    assert matcher.matches("build/out/x.c")
+    assert not matcher.matches("build/x.c")
+    assert not matcher.matches("# generated code")
+
+
+def test_file_filter_with_matcher() -> None:
+    file_filter: Callable[[str, str], bool] = construct_file_filter(
+        frozenset(("py",)),
+        PathMatcher(("**/test_*",), ROOT),
+        exclude_file=True,
+        include_type=True,
+    )
+    assert file_filter(os.path.join(ROOT, "src", "api.py"), "py")
+    assert not file_filter(os.path.join(ROOT, "tests", "test_api.py"), "py")
+    assert not file_filter(os.path.join(ROOT, "src", "api.c"), "c")
+
+
+def test_many_patterns_match_quickly() -> None:
+    patterns: list[str] = [f"generated/module_{index}/*.py" for index in range(5000)]
+    patterns += [f"*.ext{index}" for index in range(5000)]
+    patterns += [f"vendor/package_{index}" for index in range(5000)]
+    matcher: PathMatcher = PathMatcher(patterns, ROOT)
+    assert len(matcher) == 15000
+
+    paths: list[str] = [
+        os.path.join(ROOT, "src", f"file_{index}.py") for index in range(10000)
+    ]
+    start: float = time.perf_counter()
+    assert not any(matcher.matches(path) for path in paths)
+    # Matching cost is independent of the number of patterns, with plenty of leeway
+    assert time.perf_counter() - start < 1
+
+    assert matcher.matches("generated/module_4999/x.py")
+    assert matcher.matches("a/b.ext1234")
+    assert matcher.matches("vendor/package_42/setup.py")
+
+
+def test_many_path_globs_match_quickly() -> None:
+    patterns: list[str] = [f"src/**/test_{index}_*.py" for index in range(5000)]
+    patterns += [f"**/x{index}/*.js" for index in range(5000)]
+    patterns += [f"**/fixtures/*_{index}.py" for index in range(5000)]
+    patterns += [f"re:.*/gen{index}/.*" for index in range(5000)]
+    matcher: PathMatcher = PathMatcher(patterns, ROOT)
+
+    paths: list[str] = [
+        os.path.join(ROOT, "src", "x", "fixtures", f"file_{index}.js")
+        for index in range(10000)
+    ]
+    start: float = time.perf_counter()
+    assert not any(matcher.matches(path) for path in paths)
+    # Globs are bucketed under literals they require, rather than tried one by one
+    assert time.perf_counter() - start < 1
+
+    assert matcher.matches("src/a/b/test_4999_case.py")
+    assert not matcher.matches("lib/a/test_4999_case.py")
+    assert matcher.matches("web/x42/app.js")
+    assert not matcher.matches("web/x42/sub/app.js")
+    assert matcher.matches("tests/fixtures/data_7.py")
+    assert matcher.matches("build/gen123/out.c")
+    assert not matcher.matches("build/gen123")
+
+
+def test_scan_with_patterns(mock_dir: Path) -> None:
+    for directory in ("src/gen", "tests"):
+        (mock_dir / directory).mkdir(parents=True)
+    (mock_dir / "src" / "main.py").write_text("x = 1\n")
+    (mock_dir / "src" / "gen" / "out.py").write_text("x = 1\ny = 2\n")
+    (mock_dir / "tests" / "test_main.py").write_text("x = 1\ny = 2\nz = 3\n")
+    (mock_dir / "exclusions").write_text("gen\n")
+
+    excluded: ScanResult = locstat.scan(
+        mock_dir,
+        filters=ScanFilters(
+            exclude_files=frozenset(("**/test_*.py", "exclusions")),
+            exclude_from=str(mock_dir / "exclusions"),
+        ),
+    )
+    assert excluded.total == 1
+
+    included: ScanResult = locstat.scan(
+        mock_dir, filters=ScanFilters(include_files=frozenset(("re:tests/.*",)))
+    )
+    assert included.total == 3
@@ -0,0 +1,208 @@
+"""Unit tests for output handlers"""
+
+import gzip
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from locstat.data_structures.output_keys import OutputKeys
+from locstat.parsing.directory import parse_directory_stream, parse_directory_verbose
+from locstat.utilities.core import derive_file_parser
+from locstat.utilities.presentation import (
+    NDJSONRecordWriter,
+    dump_json_output,
+    dump_ndjson_output,
+    open_output,
+)
+from locstat.data_structures.parse_modes import ParseMode
+from locstat.utilities.database import dump_sqlite_output
+
+from tests.fixtures import mock_config, mock_dir, mock_tree
+
+# Python sources alongside a file of an extension without comment symbols
+PYTHON_TREE: dict[str, str] = {
+    "top.py": "# comment\nx = 1\n\n",
+    "pkg/mod.py": "def f():\n    return 1\n",
+    "pkg/sub/deep.py": "'''doc'''\n# c\ny = 2",
+    "pkg/notes.txt": "not parsed\n",
+}
+
+
+@pytest.mark.parametrize("mock_tree", (PYTHON_TREE,), indirect=True)
+def test_stream_matches_verbose(mock_tree, mock_config) -> None:
+    object.__setattr__(mock_config, "symbol_mapping", {"py": (b"#", None, None)})
+    parser = derive_file_parser(ParseMode.BUFFERED)
+
+    verbose_languages: dict[str, dict[str, int]] = {}
+    with os.scandir(mock_tree) as iterator:
+        verbose: dict[str, Any] = parse_directory_verbose(
+            iterator,
+            mock_config,
+            verbose_languages,
+            -1,
+            parser,
+            directory_filter_function=lambda _: True,
+        )
+
+    stream_languages: dict[str, dict[str, int]] = {}
+    output_filepath: Path = mock_tree / "out.ndjson.gz"
+    with open_output(str(output_filepath)) as output_file:
+        writer: NDJSONRecordWriter = NDJSONRecordWriter(output_file)
+        with os.scandir(mock_tree) as iterator:
+            line_data = parse_directory_stream(
+                iterator,
+                str(mock_tree),
+                mock_config,
+                stream_languages,
+                writer,
+                -1,
+                parser,
+                directory_filter_function=lambda _: True,
+            )
+
+    assert stream_languages == verbose_languages
+    assert line_data == (
+        verbose[OutputKeys.TOTAL],
+        verbose[OutputKeys.LOC],
+        verbose[OutputKeys.COMMENTED],
+        verbose[OutputKeys.BLANK],
+    )
+
+    with gzip.open(output_filepath, "rt") as output_file:
+        records: list[dict[str, Any]] = [json.loads(line) for line in output_file]
+
+    files: dict[str, dict[str, Any]] = {
+        record["path"]: record for record in records if record["type"] == "file"
+    }
+    assert len(files) == 3
+    for filepath, file_data in verbose[OutputKeys.FILES].items():
+        assert files[filepath][OutputKeys.TOTAL] == file_data[OutputKeys.TOTAL]
+    deep_filepath: str = str(mock_tree / "pkg" / "sub" / "deep.py")
+    assert (
+        files[deep_filepath][OutputKeys.COMMENTED]
+        == verbose[OutputKeys.SUBDIRECTORIES]["pkg"][OutputKeys.SUBDIRECTORIES]["sub"][
+            OutputKeys.FILES
+        ][deep_filepath][OutputKeys.COMMENTED]
+    )
+
+    # Directories are only emitted once all of their children are
+    assert records[-1]["type"] == "directory" and records[-1]["path"] == str(mock_tree)
+    assert records[-1][OutputKeys.LOC] == verbose[OutputKeys.LOC]
+
+
+def test_ndjson_summary_records(mock_dir) -> None:
+    output_mapping: dict[str, Any] = {
+        OutputKeys.GENERAL: {OutputKeys.TOTAL: 3, OutputKeys.LOC: 2},
+        OutputKeys.LANGUAGES: {"py": {OutputKeys.FILES: 1, OutputKeys.TOTAL: 3}},
+    }
+    output_filepath: Path = mock_dir / "summary.jsonl"
+    dump_ndjson_output(output_mapping, str(output_filepath))
+
+    records: list[dict[str, Any]] = [
+        json.loads(line) for line in output_filepath.read_text().splitlines()
+    ]
+    assert [record["type"] for record in records] == ["language", "general"]
+    assert records[0]["extension"] == "py"
+    assert records[1][OutputKeys.TOTAL] == 3
+
+
+def test_json_output_matches_json_module(mock_dir) -> None:
+    output_mapping: dict[str, Any] = {
+        OutputKeys.FILES: {"/ü/b.py": {OutputKeys.TOTAL: 1}, "/ü/a.py": {}},
+        OutputKeys.SUBDIRECTORIES: {"z": {OutputKeys.FILES: {}}, "y": {}},
+        OutputKeys.GENERAL: {OutputKeys.TOTAL: 1, OutputKeys.TIME: "0.001s"},
+        "sequence": [1, "two", None, True, []],
+    }
+
+    for sort_keys in (False, True):
+        output_filepath: Path = mock_dir / f"output_{sort_keys}.json"
+        dump_json_output(output_mapping, str(output_filepath), sort_keys=sort_keys)
+        assert output_filepath.read_text() == json.dumps(
+            output_mapping, indent=2, sort_keys=sort_keys
+        )
+
+    compressed_filepath: Path = mock_dir / "output.json.gz"
+    dump_json_output(output_mapping, str(compressed_filepath))
+    with gzip.open(compressed_filepath, "rt") as output_file:
+        assert json.load(output_file) == json.loads(json.dumps(output_mapping))
+
+
+def test_sqlite_output_appends_runs(mock_dir) -> None:
+    output_mapping: dict[str, Any] = {
+        OutputKeys.FILES: {
+            "/repo/a.py": {
+                OutputKeys.TOTAL: 3,
+                OutputKeys.LOC: 2,
+                OutputKeys.COMMENTED: 1,
+                OutputKeys.BLANK: 0,
+            }
+        },
+        OutputKeys.SUBDIRECTORIES: {
+            "pkg.d": {
+                OutputKeys.FILES: {
+                    "/repo/pkg.d/b.c": {
+                        OutputKeys.TOTAL: 4,
+                        OutputKeys.LOC: 4,
+                        OutputKeys.COMMENTED: 0,
+                        OutputKeys.BLANK: 0,
+                    },
+                    "/repo/pkg.d/Makefile": {
+                        OutputKeys.TOTAL: 0,
+                        OutputKeys.LOC: 0,
+                        OutputKeys.COMMENTED: 0,
+                        OutputKeys.BLANK: 0,
+                    },
+                },
+                OutputKeys.SUBDIRECTORIES: {},
+            }
+        },
+        OutputKeys.GENERAL: {
+            OutputKeys.TOTAL: 7,
+            OutputKeys.LOC: 6,
+            OutputKeys.COMMENTED: 1,
+            OutputKeys.BLANK: 0,
+            OutputKeys.TIME: "0.010s",
+            OutputKeys.SCANNED_AT: "19/10/26, at 10:00:00",
+            OutputKeys.PLATFORM: "Linux",
+        },
+        OutputKeys.LANGUAGES: {
+            "py": {
+                OutputKeys.FILES: 1,
+                OutputKeys.TOTAL: 3,
+                OutputKeys.LOC: 2,
+                OutputKeys.COMMENTED: 1,
+                OutputKeys.BLANK: 0,
+            }
+        },
+    }
+    database_filepath: str = str(mock_dir / "history.db")
+    dump_sqlite_output(output_mapping, database_filepath, root="/repo")
+    dump_sqlite_output(output_mapping, database_filepath, root="/repo")
+
+    connection: sqlite3.Connection = sqlite3.connect(database_filepath)
+    try:
+        assert connection.execute("SELECT COUNT(*) FROM runs").fetchone() == (2,)
+        assert connection.execute(
+            "SELECT run_id, loc FROM files WHERE path = ? ORDER BY run_id",
+            ("/repo/pkg.d/b.c",),
+        ).fetchall() == [(1, 4), (2, 4)]
+        # Extensions are taken from file names, never from dotted directories
+        assert connection.execute(
+            "SELECT DISTINCT path, extension FROM files ORDER BY path"
+        ).fetchall() == [
+            ("/repo/a.py", "py"),
+            ("/repo/pkg.d/Makefile", "Makefile"),
+            ("/repo/pkg.d/b.c", "c"),
+        ]
+        assert connection.execute(
+            "SELECT root, scanned_at, duration FROM runs WHERE id = 2"
+        ).fetchone() == ("/repo", "2026-10-19T10:00:00", 0.01)
+        assert connection.execute(
+            "SELECT SUM(files) FROM languages WHERE extension = 'py'"
+        ).fetchone() == (2,)
+    finally:
+        connection.close()
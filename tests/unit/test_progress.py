@@ -0,0 +1,81 @@
+"""Unit tests for live progress reporting"""
+
+import io
+from array import array
+from pathlib import Path
+
+import pytest
+
+from locstat.api import load_language_table
+from locstat.data_structures.parse_modes import ParseMode
+from locstat.parsing.directory import parse_directory
+from locstat.parsing.extensions._parsing import _get_progress, _set_progress_enabled
+from locstat.utilities.core import derive_file_parser
+from locstat.utilities.progress import ProgressReporter
+
+from tests.fixtures import mock_dir
+
+
+@pytest.mark.parametrize("parse_mode", tuple(ParseMode))
+def test_native_progress_counters(mock_dir: Path, parse_mode: ParseMode) -> None:
+    (mock_dir / "main.py").write_text("x = 1\n" * 100)
+    (mock_dir / "empty.py").touch()
+    parser = derive_file_parser(parse_mode)
+
+    _set_progress_enabled(True)
+    try:
+        for _ in range(2):
+            parser(str(mock_dir / "main.py"), b"#", None, None, 1)
+            parser(str(mock_dir / "empty.py"), b"#", None, None, 1)
+    finally:
+        _set_progress_enabled(False)
+    assert _get_progress() == (4, 2 * 600)
+
+    # Counts restart whenever counting is enabled
+    _set_progress_enabled(True)
+    _set_progress_enabled(False)
+    assert _get_progress() == (0, 0)
+
+
+def test_progress_reporter(mock_dir: Path) -> None:
+    for directory in ("src", "src/nested", "src/empty", "skipped", "skipped/deep"):
+        (mock_dir / directory).mkdir()
+    for filepath in ("main.py", "src/lib.py", "src/nested/deep.py", "skipped/x.py"):
+        (mock_dir / filepath).write_text("x = 1\n# comment\n")
+
+    stream: io.StringIO = io.StringIO()
+    assert not ProgressReporter.supported(stream)
+
+    reporter: ProgressReporter = ProgressReporter(stream, interval=0.001)
+    line_data: array = array("Q", (0, 0, 0))
+    reporter.line_data = line_data
+    reporter.start()
+    parse_directory(
+        reporter.scandir(str(mock_dir)),
+        load_language_table(),
+        line_data,
+        -1,
+        derive_file_parser(ParseMode.BUFFERED),
+        lambda file, extension: True,
+        reporter.filter_directories(lambda directory: "skipped" not in directory),
+        1,
+        reporter.scandir,
+    )
+    reporter.stop()
+
+    assert reporter.directories == 4
+    assert reporter.skipped == 1
+    assert _get_progress() == (3, 3 * len("x = 1\n# comment\n"))
+
+    # Every redraw overwrites the previous line, and the last one is terminated
+    output: str = stream.getvalue()
+    assert output.startswith("\r") and output.endswith("\x1b[K\n")
+    final_line: str = output.rsplit("\r", 1)[-1]
+    assert final_line.startswith("3 files")
+    assert "4 dirs | 0 pending | 6 lines (3 LOC)" in final_line
+
+    # Counting stops alongside the reporter
+    derive_file_parser(ParseMode.BUFFERED)(
+        str(mock_dir / "main.py"), b"#", None, None, 1
+    )
+    assert _get_progress()[0] == 3
@@ -0,0 +1,141 @@
+"""Unit tests for the columnar DETAILED result store"""
+
+import os
+import tracemalloc
+from pathlib import Path
+from typing import Any, Mapping
+
+import pytest
+
+from locstat.data_structures.output_keys import OutputKeys
+from locstat.data_structures.parse_modes import ParseMode
+from locstat.data_structures.results import DetailedResultStore, DirectoryView
+from locstat.parsing.directory import parse_directory_stream, parse_directory_verbose
+from locstat.utilities.core import derive_file_parser
+
+from tests.fixtures import mock_config, mock_dir
+
+
+def _materialize(node: Any) -> Any:
+    if isinstance(node, Mapping):
+        return {key: _materialize(value) for key, value in node.items()}
+    return node
+
+
+def _parse_kwargs(config: Any) -> dict[str, Any]:
+    object.__setattr__(config, "symbol_mapping", {"py": (b"#", None, None)})
+    return {
+        "config": config,
+        "depth": -1,
+        "file_parsing_function": derive_file_parser(ParseMode.BUFFERED),
+        "directory_filter_function": lambda _: True,
+    }
+
+
+def test_store_views_match_verbose_mapping(mock_dir, mock_config) -> None:
+    for directory in ("a/b/c", "a/d", "e", "ünïcode"):
+        (mock_dir / directory).mkdir(parents=True, exist_ok=True)
+    for filepath in (
+        "x.py",
+        "a/y.py",
+        "a/b/z.py",
+        "a/b/c/w.py",
+        "a/d/v.py",
+        "ünïcode/ü.py",
+    ):
+        (mock_dir / filepath).write_text(f"# {filepath}\nvalue = 1\n\n" * len(filepath))
+
+    kwargs: dict[str, Any] = _parse_kwargs(mock_config)
+
+    with os.scandir(mock_dir) as iterator:
+        expected: dict[str, Any] = parse_directory_verbose(
+            iterator, language_record={}, **kwargs
+        )
+
+    store: DetailedResultStore = DetailedResultStore()
+    with os.scandir(mock_dir) as iterator:
+        parse_directory_stream(
+            iterator,
+            str(mock_dir),
+            language_record={},
+            record_sink=store,
+            **kwargs,
+        )
+
+    assert store.file_count == 6
+    assert store.directory_count == 7
+
+    root: DirectoryView = store.root_view()
+    assert root.path == str(mock_dir)
+    assert _materialize(root) == expected
+
+    subdirectories: Mapping[str, Any] = root[OutputKeys.SUBDIRECTORIES]
+    nested: Path = mock_dir / "a" / "b" / "z.py"
+    assert (
+        len(subdirectories["a"][OutputKeys.SUBDIRECTORIES]["b"][OutputKeys.FILES]) == 1
+    )
+    assert (
+        subdirectories["a"][OutputKeys.SUBDIRECTORIES]["b"][OutputKeys.FILES][
+            str(nested)
+        ]
+        == expected[OutputKeys.SUBDIRECTORIES]["a"][OutputKeys.SUBDIRECTORIES]["b"][
+            OutputKeys.FILES
+        ][str(nested)]
+    )
+
+    files: Mapping[str, Any] = root[OutputKeys.FILES]
+    assert str(mock_dir / "x.py") in files
+    for missing in (str(mock_dir / "a" / "x.py"), "x.py", str(mock_dir / "y.py"), 1):
+        assert missing not in files
+    with pytest.raises(KeyError):
+        subdirectories["missing"]
+
+
+def test_store_widens_counters_on_overflow() -> None:
+    store: DetailedResultStore = DetailedResultStore()
+    store.enter_directory("/repo")
+    store.add_file("/repo/small.py", (3, 2, 1, 0))
+    store.add_file("/repo/huge.py", (2**32, 2**31, 2**30, 2**30))
+    store.exit_directory("/repo", (2**32 + 3, 2**31 + 2, 2**30 + 1, 2**30))
+
+    files: Mapping[str, Any] = store.root_view()[OutputKeys.FILES]
+    assert files["/repo/small.py"][OutputKeys.TOTAL] == 3
+    assert files["/repo/huge.py"][OutputKeys.TOTAL] == 2**32
+    assert files["/repo/huge.py"][OutputKeys.BLANK] == 2**30
+
+
+def test_store_memory_reduction(mock_dir, mock_config) -> None:
+    for directory in range(50):
+        (mock_dir / f"package_{directory}").mkdir()
+        for index in range(100):
+            (mock_dir / f"package_{directory}" / f"module_{index}.py").write_text(
+                "# comment\nvalue = 1\n\n"
+            )
+    kwargs: dict[str, Any] = _parse_kwargs(mock_config)
+
+    tracemalloc.start()
+    try:
+        with os.scandir(mock_dir) as iterator:
+            expected: dict[str, Any] = parse_directory_verbose(
+                iterator, language_record={}, **kwargs
+            )
+        mapping_size: int = tracemalloc.get_traced_memory()[0]
+        del expected
+        tracemalloc.clear_traces()
+
+        store: DetailedResultStore = DetailedResultStore()
+        with os.scandir(mock_dir) as iterator:
+            parse_directory_stream(
+                iterator,
+                str(mock_dir),
+                language_record={},
+                record_sink=store,
+                **kwargs,
+            )
+        store_size: int = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    assert store.file_count == 5000
+    # About 12x for trees of 5,000 and 50,000 files alike
+    assert mapping_size >= 10 * store_size
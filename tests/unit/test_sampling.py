@@ -0,0 +1,132 @@
+"""Unit tests for stratified sampling estimates"""
+
+import os
+import random
+from array import array
+from pathlib import Path
+
+import pytest
+
+from locstat.api import load_language_table
+from locstat.data_structures.output_keys import OutputKeys
+from locstat.data_structures.parse_modes import ParseMode
+from locstat.parsing.directory import parse_directory_record
+from locstat.utilities.core import derive_file_parser
+from locstat.utilities.sampling import (
+    SampleEstimate,
+    enumerate_files,
+    sample_directory,
+    size_bucket,
+)
+
+from tests.fixtures import mock_dir, mock_tree
+
+_generator: random.Random = random.Random(0)
+# Sources of varied lengths, alongside files left out by their extension or directory
+SAMPLED_TREE: dict[str, str] = {
+    **{
+        f"{'nested/' if index % 2 else ''}module_{index}.py": "# header\n"
+        + "x = 1\n\n" * _generator.randint(5, 60)
+        for index in range(200)
+    },
+    **{
+        f"source_{index}.c": "/* header */\nint x;\n" * _generator.randint(1, 200)
+        for index in range(40)
+    },
+    "notes.unknown": "text\n",
+    "skipped/ignored.py": "x = 1\n",
+}
+
+
+def test_size_bucket() -> None:
+    assert size_bucket(0) == 0
+    assert size_bucket(1) == size_bucket(3) == 1
+    assert size_bucket(4) == size_bucket(15) == 2
+    assert size_bucket(1024) == size_bucket(4095) == 6
+
+
+@pytest.mark.parametrize("mock_tree", (SAMPLED_TREE,), indirect=True)
+def test_enumerate_files(mock_tree: Path) -> None:
+    files = enumerate_files(
+        os.scandir(mock_tree),
+        load_language_table(),
+        directory_filter_function=lambda directory: "skipped" not in directory,
+    )
+    # Extensions without comment symbols and filtered directories are skipped
+    assert len(files) == 240
+    assert {file.extension for file in files} == {"py", "c"}
+    assert all(file.size == os.path.getsize(file.path) for file in files)
+
+
+@pytest.mark.parametrize("mock_tree", (SAMPLED_TREE,), indirect=True)
+def test_sample_directory(mock_tree: Path) -> None:
+    config = load_language_table()
+    parser = derive_file_parser(ParseMode.BUFFERED)
+    line_data: array = array("L", (0, 0, 0))
+    language_record: dict[str, dict[str, int]] = {}
+    parse_directory_record(
+        os.scandir(mock_tree),
+        config,
+        line_data,
+        language_record,
+        -1,
+        parser,
+        lambda file, extension: True,
+        lambda directory: True,
+        1,
+    )
+    exact: dict[str, int] = {
+        OutputKeys.TOTAL: line_data[0],
+        OutputKeys.LOC: line_data[1],
+        OutputKeys.COMMENTED: line_data[2],
+        OutputKeys.BLANK: line_data[0] - line_data[1] - line_data[2],
+    }
+
+    # Sampling every file is exact
+    estimate: SampleEstimate = sample_directory(
+        os.scandir(mock_tree), config, parser, 1.0, minimum_characters=1
+    )
+    assert estimate.files_parsed == estimate.files_total == 241
+    assert estimate.general == exact
+    assert estimate.languages == language_record
+    assert not any(estimate.margins.values())
+
+    # File counts remain exact, and estimates mostly fall within their margins
+    estimates: list[SampleEstimate] = [
+        sample_directory(
+            os.scandir(mock_tree),
+            config,
+            parser,
+            0.2,
+            minimum_characters=1,
+            seed=seed,
+        )
+        for seed in range(40)
+    ]
+    estimate = estimates[0]
+    assert estimate.files_parsed < estimate.files_total == 241
+    assert estimate.languages["py"][OutputKeys.FILES] == 201
+    assert estimate.margins[OutputKeys.TOTAL] > 0
+    for key, value in exact.items():
+        covered: int = sum(
+            abs(estimate.general[key] - value) <= estimate.margins[key]
+            for estimate in estimates
+        )
+        assert covered >= 32, f"{key} within margins for {covered} of 40 samples"
+
+    # Seeded samples are reproducible
+    assert (
+        sample_directory(
+            os.scandir(mock_tree),
+            config,
+            parser,
+            0.2,
+            minimum_characters=1,
+            seed=0,
+        )
+        == estimate
+    )
+
+    mapping = estimate.to_mapping()
+    assert mapping[OutputKeys.GENERAL] == estimate.general
+    assert set(mapping[OutputKeys.SAMPLE][OutputKeys.LANGUAGES]) == {"py", "c"}
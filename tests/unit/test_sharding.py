@@ -0,0 +1,169 @@
+"""Unit tests for sharded scans and merging their partial results"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from locstat.data_structures.output_keys import OutputKeys
+from locstat.utilities.sharding import (
+    load_partial,
+    merge_partials,
+    shard_entries,
+    shard_of,
+)
+
+from tests.fixtures import mock_dir, populate_tree, run_cli
+
+# Tree split across shards, each file longer than the previous
+SHARDED_TREE: dict[str, str] = {
+    filepath: "# comment\nx = 1\n\n" * (index + 1)
+    for index, filepath in enumerate(
+        (
+            "main.py",
+            "setup.c",
+            "src/lib.py",
+            "src/nested/deep.py",
+            "docs/conf.py",
+            "tests/test_lib.py",
+            "scripts/build.sh",
+        )
+    )
+}
+
+
+def test_shard_of(mock_dir: Path) -> None:
+    # Assignments are stable across processes and machines
+    assert shard_of("src", 4) == 2
+    assert shard_of("README.md", 4) == 3
+    assert {shard_of(f"directory_{index}", 4) for index in range(64)} == {1, 2, 3, 4}
+
+    for index in range(16):
+        (mock_dir / f"directory_{index}").mkdir()
+        (mock_dir / f"file_{index}.py").touch()
+    shards: list[set[str]] = [
+        {entry.name for entry in shard_entries(os.scandir(mock_dir), index, 3)}
+        for index in (1, 2, 3)
+    ]
+    # Shards partition the top level entries
+    assert sum(map(len, shards)) == 32
+    assert set.union(*shards) == set(os.listdir(mock_dir))
+
+
+@pytest.mark.parametrize("extended", (False, True))
+@pytest.mark.parametrize("verbosity", ("BARE", "REPORT", "DETAILED"))
+def test_merge_matches_single_scan(
+    mock_dir: Path, verbosity: str, extended: bool
+) -> None:
+    flags: tuple[str, ...] = ("-em",) if extended else ()
+    target: Path = populate_tree(mock_dir / "target", SHARDED_TREE)
+
+    partials: list[str] = []
+    for index in (1, 2, 3):
+        partials.append(str(mock_dir / f"part{index}.json.gz"))
+        run_cli(
+            "-d",
+            str(target),
+            "-vb",
+            verbosity,
+            "-sh",
+            f"{index}/3",
+            "-o",
+            partials[-1],
+            *flags,
+            check=True,
+        )
+    run_cli(
+        "--merge", *partials, "-o", str(mock_dir / "merged.json"), "-so", check=True
+    )
+    run_cli(
+        "-d",
+        str(target),
+        "-vb",
+        verbosity,
+        "-o",
+        str(mock_dir / "single.json"),
+        "-so",
+        *flags,
+        check=True,
+    )
+
+    results: list[dict[str, Any]] = []
+    for filename in ("merged.json", "single.json"):
+        result: dict[str, Any] = json.loads((mock_dir / filename).read_text())
+        for key in (OutputKeys.TIME, OutputKeys.SCANNED_AT):
+            del result[OutputKeys.GENERAL][key]
+        results.append(result)
+    assert results[0] == results[1]
+    assert results[0][OutputKeys.GENERAL][OutputKeys.TOTAL] == 3 * 28
+    # The root scanned is only recorded by partial results, needing it to merge
+    assert OutputKeys.ROOT not in results[1][OutputKeys.GENERAL]
+    assert (OutputKeys.BYTES in results[0][OutputKeys.GENERAL]) == extended
+
+    shards: list[dict[str, Any]] = [load_partial(partial) for partial in partials]
+    assert [shard[OutputKeys.SHARD]["index"] for shard in shards] == [1, 2, 3]
+    assert all(shard[OutputKeys.SHARD]["verbosity"] == verbosity for shard in shards)
+    assert all(shard[OutputKeys.SHARD]["root"] == str(target) for shard in shards)
+
+
+def _partial(
+    index: int, count: int = 2, root: str = "/target", **general: Any
+) -> dict[str, Any]:
+    return {
+        OutputKeys.GENERAL: {
+            OutputKeys.TOTAL: 3,
+            OutputKeys.LOC: 1,
+            OutputKeys.COMMENTED: 1,
+            OutputKeys.BLANK: 1,
+            OutputKeys.TIME: f"{index}.000s",
+            OutputKeys.SCANNED_AT: "",
+            OutputKeys.PLATFORM: "Linux",
+            **general,
+        },
+        OutputKeys.LANGUAGES: {
+            "py": {
+                OutputKeys.FILES: 1,
+                OutputKeys.TOTAL: 3,
+                OutputKeys.LOC: 1,
+                OutputKeys.COMMENTED: 1,
+                OutputKeys.BLANK: 1,
+            }
+        },
+        OutputKeys.SHARD: {
+            "index": index,
+            "count": count,
+            "verbosity": "REPORT",
+            "root": root,
+        },
+    }
+
+
+def test_merge_partials() -> None:
+    merged: dict[str, Any] = merge_partials([_partial(2), _partial(1)])
+    assert merged[OutputKeys.GENERAL][OutputKeys.TOTAL] == 6
+    # The slowest shard bounds the scan
+    assert merged[OutputKeys.GENERAL][OutputKeys.TIME] == "2.000s"
+    assert merged[OutputKeys.LANGUAGES]["py"][OutputKeys.FILES] == 2
+
+    for partials, message in (
+        ([], "No partial results"),
+        ([_partial(1)], r"Missing shards \[2\]"),
+        ([_partial(1), _partial(1), _partial(2)], "Duplicated shards"),
+        ([_partial(1), _partial(2, count=3)], "has count 3"),
+        ([_partial(1), _partial(2, root="/other")], "different root"),
+    ):
+        with pytest.raises(ValueError, match=message):
+            merge_partials(partials)
+
+
+def test_load_partial(mock_dir: Path) -> None:
+    (mock_dir / "partial.json").write_text(json.dumps(_partial(1)))
+    assert load_partial(mock_dir / "partial.json") == _partial(1)
+
+    (mock_dir / "complete.json").write_text(json.dumps({OutputKeys.GENERAL: {}}))
+    (mock_dir / "invalid.json").write_text("{")
+    for filename in ("complete.json", "invalid.json"):
+        with pytest.raises(ValueError):
+            load_partial(mock_dir / filename)
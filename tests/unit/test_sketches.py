@@ -0,0 +1,77 @@
+"""Unit tests for bounded memory rankings and distributions"""
+
+import math
+import random
+
+import pytest
+
+from locstat.data_structures.output_keys import OutputKeys
+from locstat.data_structures.results import DetailedResultStore
+from locstat.data_structures.sketches import DistributionReport, QuantileSketch, TopN
+
+
+def test_top_n_retains_highest_scores() -> None:
+    top: TopN = TopN(3)
+    for score, entry in ((5, "a"), (1, "b"), (9, "c"), (5, "d"), (7, "e"), (0, "f")):
+        top.push(score, entry)
+
+    assert len(top) == 3
+    # Ties are resolved in favour of earlier entries
+    assert top.ranked() == [(9, "c"), (7, "e"), (5, "a")]
+
+    with pytest.raises(ValueError):
+        TopN(0)
+
+
+@pytest.mark.parametrize("q", (0.0, 0.5, 0.9, 0.99, 1.0))
+def test_quantile_sketch_relative_error(q: float) -> None:
+    generator: random.Random = random.Random(1024)
+    values: list[int] = [int(generator.lognormvariate(4, 1.5)) for _ in range(10000)]
+    sketch: QuantileSketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    expected: int = sorted(values)[max(math.ceil(q * len(values)), 1) - 1]
+    # Allow for rounding estimates to integers
+    assert abs(sketch.quantile(q) - expected) <= expected * 0.01 + 1
+    assert sketch.count == len(values)
+    assert sketch.maximum == max(values)
+
+
+def test_distribution_report_forwards_records() -> None:
+    store: DetailedResultStore = DetailedResultStore()
+    report: DistributionReport = DistributionReport(2, downstream=store)
+
+    report.enter_directory("/repo")
+    report.add_file("/repo/a.py", (10, 6, 2, 2))
+    report.add_file("/repo/b.py", (40, 30, 0, 10))
+    report.add_file("/repo/c.c", (20, 10, 8, 2))
+    report.add_file("/repo/d.py", (0, 0, 0, 0))
+    report.exit_directory("/repo", (70, 46, 10, 14))
+
+    assert store.file_count == 4
+    assert store.directory_line_data(0) == (70, 46, 10, 14)
+
+    mapping = report.to_mapping()
+    top = mapping[OutputKeys.TOP]
+    assert [entry["path"] for entry in top[OutputKeys.TOTAL]] == [
+        "/repo/b.py",
+        "/repo/c.c",
+    ]
+    assert [entry["path"] for entry in top[DistributionReport.COMMENT_RATIO]] == [
+        "/repo/c.c",
+        "/repo/a.py",
+    ]
+    assert top[DistributionReport.COMMENT_RATIO][0][
+        DistributionReport.COMMENT_RATIO
+    ] == pytest.approx(0.4)
+
+    distribution = mapping[OutputKeys.DISTRIBUTION]
+    assert distribution["py"] == {
+        OutputKeys.FILES: 3,
+        "p50": 10,
+        "p90": 40,
+        "p99": 40,
+        "max": 40,
+    }
+    assert distribution["c"][OutputKeys.FILES] == 1
@@ -0,0 +1,110 @@
+"""Unit tests for binary snapshots and diffing"""
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from locstat.data_structures.output_keys import OutputKeys
+from locstat.utilities.snapshot import (
+    DeltaStatus,
+    Snapshot,
+    diff_snapshots,
+    dump_snapshot_output,
+)
+
+from tests.fixtures import mock_dir
+
+
+def _line_data(total: int, loc: int, commented: int) -> dict[str, int]:
+    return {
+        OutputKeys.TOTAL: total,
+        OutputKeys.LOC: loc,
+        OutputKeys.COMMENTED: commented,
+        OutputKeys.BLANK: total - loc - commented,
+    }
+
+
+def _output_mapping(files: dict[str, dict[str, int]]) -> dict[str, Any]:
+    general: dict[str, Any] = {
+        key: sum(file_data[key] for file_data in files.values())
+        for key in (
+            OutputKeys.TOTAL,
+            OutputKeys.LOC,
+            OutputKeys.COMMENTED,
+            OutputKeys.BLANK,
+        )
+    }
+    return {
+        OutputKeys.FILES: {
+            path: data for path, data in files.items() if path.count("/") == 2
+        },
+        OutputKeys.SUBDIRECTORIES: {
+            "pkg": {
+                OutputKeys.FILES: {
+                    path: data
+                    for path, data in files.items()
+                    if path.startswith("/repo/pkg/")
+                },
+                OutputKeys.SUBDIRECTORIES: {},
+            }
+        },
+        OutputKeys.GENERAL: general,
+        OutputKeys.LANGUAGES: {
+            "py": {OutputKeys.FILES: len(files), **general},
+        },
+    }
+
+
+def test_snapshot_roundtrip_and_diff(mock_dir) -> None:
+    before_filepath: Path = mock_dir / "before.lsnap"
+    after_filepath: Path = mock_dir / "after.lsnap"
+    dump_snapshot_output(
+        _output_mapping(
+            {
+                "/repo/setup.py": _line_data(10, 8, 1),
+                "/repo/pkg/b.py": _line_data(20, 15, 2),
+                "/repo/pkg/a.py": _line_data(5, 5, 0),
+            }
+        ),
+        str(before_filepath),
+        root="/repo",
+    )
+    dump_snapshot_output(
+        _output_mapping(
+            {
+                "/repo/setup.py": _line_data(10, 8, 1),
+                "/repo/pkg/b.py": _line_data(25, 19, 2),
+                "/repo/pkg/ü.py": _line_data(3, 1, 1),
+            }
+        ),
+        str(after_filepath),
+        root="/repo",
+    )
+
+    with Snapshot(before_filepath) as before, Snapshot(after_filepath) as after:
+        assert len(before) == 3
+        assert before.metadata[OutputKeys.GENERAL][OutputKeys.ROOT] == "/repo"
+        # Records are sorted by their path relative to the scanned root
+        assert list(before) == [
+            (b"pkg/a.py", 5, 5, 0),
+            (b"pkg/b.py", 20, 15, 2),
+            (b"setup.py", 10, 8, 1),
+        ]
+        diff: dict[str, Any] = diff_snapshots(before, after)
+
+    assert diff[OutputKeys.GENERAL][OutputKeys.TOTAL] == 3
+    assert diff[OutputKeys.LANGUAGES]["py"][OutputKeys.LOC] == 0
+    assert diff[OutputKeys.FILES] == {
+        "pkg/a.py": {OutputKeys.STATUS: DeltaStatus.REMOVED, **_line_data(-5, -5, 0)},
+        "pkg/b.py": {OutputKeys.STATUS: DeltaStatus.MODIFIED, **_line_data(5, 4, 0)},
+        "pkg/ü.py": {OutputKeys.STATUS: DeltaStatus.ADDED, **_line_data(3, 1, 1)},
+    }
+    assert diff[OutputKeys.DIRECTORIES] == {"pkg": _line_data(3, 0, 1)}
+
+
+def test_snapshot_rejects_foreign_files(mock_dir) -> None:
+    foreign_filepath: Path = mock_dir / "foreign.lsnap"
+    foreign_filepath.write_bytes(b"not a snapshot at all, but long enough" * 2)
+    with pytest.raises(ValueError):
+        Snapshot(foreign_filepath)
@@ -0,0 +1,93 @@
+"""Startup cost of the command line entry point"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from locstat.data_structures.config import LANGUAGE_CACHE_FILENAME, ClocConfig
+
+from tests.fixtures import mock_dir
+
+# Modules only needed by rarely used code paths, which must not be imported on startup.
+# Modules of the package import these within the functions needing them, rather than
+# at module level, so that scans not needing them do not pay for their import
+LAZY_MODULES: frozenset[str] = frozenset(
+    (
+        "urllib.request",
+        "uuid",
+        "importlib.metadata",
+        "sqlite3",
+        "platform",
+        "mmap",
+        "locstat.api",
+        "locstat.data_structures.results",
+        "locstat.data_structures.sketches",
+        "locstat.utilities.calibration",
+        "locstat.utilities.database",
+        "locstat.utilities.fleet",
+        "locstat.utilities.ignore",
+        "locstat.utilities.instrumentation",
+        "locstat.utilities.manifest",
+        "locstat.utilities.matching",
+        "locstat.utilities.progress",
+        "locstat.utilities.sampling",
+        "locstat.utilities.sharding",
+        "locstat.utilities.snapshot",
+        "locstat.utilities.tracing",
+    )
+)
+
+# Bound on the cumulative import time of the entry point, in microseconds, several
+# times what it takes on a developer machine to leave room for slower ones
+IMPORT_TIME_BUDGET: int = 250_000
+
+
+def test_entry_point_import_time() -> None:
+    process: subprocess.CompletedProcess[str] = subprocess.run(
+        (sys.executable, "-X", "importtime", "-c", "import locstat.__main__"),
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parents[2],
+    )
+
+    # Lines are formatted as "import time: self [us] | cumulative | imported package"
+    cumulative_times: dict[str, int] = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.removeprefix("import time:").split("|")
+        cumulative_times[module.strip()] = int(cumulative)
+
+    assert not LAZY_MODULES & cumulative_times.keys()
+    assert cumulative_times["locstat.__main__"] < IMPORT_TIME_BUDGET
+
+
+def test_language_table_cache(mock_dir) -> None:
+    languages_filepath: Path = mock_dir / "languages.json"
+    languages_filepath.write_text(json.dumps({"py": ["#", '"""', '"""']}))
+    cache_directory: Path = mock_dir / "cache"
+
+    expected = {"py": (b"#", b'"""', b'"""')}
+    assert (
+        ClocConfig.load_symbol_mapping(languages_filepath, cache_directory) == expected
+    )
+    assert (cache_directory / LANGUAGE_CACHE_FILENAME).is_file()
+    assert (
+        ClocConfig.load_symbol_mapping(languages_filepath, cache_directory) == expected
+    )
+
+    # Cache is invalidated once the source file changes
+    languages_filepath.write_text(json.dumps({"c": ["//", "/*", "*/"]}))
+    os.utime(languages_filepath, ns=(0, 0))
+    assert ClocConfig.load_symbol_mapping(languages_filepath, cache_directory) == {
+        "c": (b"//", b"/*", b"*/")
+    }
+
+    # Malformed caches are recompiled
+    (cache_directory / LANGUAGE_CACHE_FILENAME).write_bytes(b"garbage")
+    assert ClocConfig.load_symbol_mapping(languages_filepath, cache_directory) == {
+        "c": (b"//", b"/*", b"*/")
+    }
@@ -0,0 +1,149 @@
+"""Unit tests for Chrome trace export of scans"""
+
+import io
+import json
+import os
+import struct
+import threading
+from array import array
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from locstat.api import load_language_table
+from locstat.data_structures.parse_modes import ParseMode
+from locstat.parsing.directory import parse_directory
+from locstat.parsing.extensions._parsing import (
+    _get_trace,
+    _set_auto_thresholds,
+    _get_auto_thresholds,
+    _set_trace_enabled,
+)
+from locstat.utilities.core import derive_file_parser
+from locstat.utilities.tracing import NATIVE_SPANS, ScanTrace
+
+from tests.fixtures import mock_dir
+
+
+@pytest.mark.parametrize(
+    "parse_mode, spans, empty_spans",
+    (
+        # Empty files are read until their end, or left unread once their size is known
+        (ParseMode.BUFFERED, ("open", "read", "parse", "close"), ("open", "close")),
+        (ParseMode.COMPLETE, ("open", "read", "parse", "close"), ("open",)),
+        (ParseMode.MMAP, ("map", "parse", "close"), ("open",)),
+        (ParseMode.AUTO, ("open", "read", "parse", "close"), ("open",)),
+    ),
+)
+def test_native_spans(
+    mock_dir: Path,
+    parse_mode: ParseMode,
+    spans: tuple[str, ...],
+    empty_spans: tuple[str, ...],
+) -> None:
+    (mock_dir / "main.py").write_text("x = 1\n" * 100)
+    (mock_dir / "empty.py").touch()
+    parser = derive_file_parser(parse_mode)
+
+    _set_trace_enabled(True)
+    parser(str(mock_dir / "main.py"), b"#", None, None, 1)
+    parser(str(mock_dir / "empty.py"), b"#", None, None, 1)
+    with pytest.raises(RuntimeError):
+        _get_trace()
+    _set_trace_enabled(False)
+
+    events, dropped = _get_trace()
+    assert dropped == 0
+    native: list[tuple[int, ...]] = list(struct.iter_unpack("=QQII", events))
+    assert [NATIVE_SPANS[span] for *_, span in native] == [*spans, *empty_spans]
+    assert all(thread == threading.get_native_id() for _, _, thread, _ in native)
+    # Spans of a file follow each other
+    assert all(
+        start + duration == following
+        for (start, duration, _, _), (following, *_) in zip(
+            native[: len(spans) - 1], native[1 : len(spans)]
+        )
+    )
+
+    # Events are released once collected
+    assert _get_trace() == (b"", 0)
+
+
+def test_native_spans_dropped(mock_dir: Path) -> None:
+    (mock_dir / "main.py").write_text("x = 1\n")
+    parser = derive_file_parser(ParseMode.BUFFERED)
+
+    _set_trace_enabled(True, 3)
+    for _ in range(2):
+        parser(str(mock_dir / "main.py"), b"#", None, None, 1)
+    _set_trace_enabled(False)
+    events, dropped = _get_trace()
+    assert len(events) == 3 * struct.calcsize("=QQII")
+    assert dropped == 5
+
+
+def test_scan_trace(mock_dir: Path) -> None:
+    for directory in ("src", "src/nested", "skipped"):
+        (mock_dir / directory).mkdir()
+    for filepath in ("main.py", "src/lib.py", "src/nested/deep.py", "skipped/x.py"):
+        (mock_dir / filepath).write_text("x = 1\n# comment\n")
+
+    trace: ScanTrace = ScanTrace()
+    scandir = trace.trace_scandir(os.scandir)
+    file_filter, directory_filter = trace.trace_filters(
+        lambda file, extension: True, lambda directory: "skipped" not in directory
+    )
+    trace.start()
+    parse_directory(
+        scandir(str(mock_dir)),
+        load_language_table(),
+        array("L", (0, 0, 0)),
+        -1,
+        trace.trace_parser(derive_file_parser(ParseMode.BUFFERED)),
+        file_filter,
+        directory_filter,
+        1,
+        scandir,
+    )
+    trace.stop()
+
+    stream: io.StringIO = io.StringIO()
+    trace.dump(stream)
+    events: list[dict] = json.loads(stream.getvalue())["traceEvents"]
+    names: Counter[str] = Counter(event["name"] for event in events)
+    assert names["directory"] == names["scandir"] == 3
+    assert names["file"] == names["file_filter"] == names["parse"] == 3
+    assert names["directory_filter"] == 3
+
+    # Directories nest their subdirectories and files
+    spans: dict[str, dict] = {
+        event["args"]["path"]: event
+        for event in events
+        if event["name"] in ("directory", "file")
+    }
+    root: dict = spans[str(mock_dir)]
+    nested: dict = spans[str(mock_dir / "src" / "nested" / "deep.py")]
+    assert root["ts"] <= nested["ts"]
+    assert nested["ts"] + nested["dur"] <= root["ts"] + root["dur"]
+    assert all(event["ts"] >= 0 for event in events if event["ph"] == "X")
+
+
+def test_auto_spans_follow_strategy(mock_dir: Path) -> None:
+    (mock_dir / "main.py").write_text("x = 1\n" * 100)
+    original_thresholds: tuple[int, int, int] = _get_auto_thresholds()
+    _set_auto_thresholds(0, 1)
+    try:
+        _set_trace_enabled(True)
+        derive_file_parser(ParseMode.AUTO)(
+            str(mock_dir / "main.py"), b"#", None, None, 1
+        )
+        _set_trace_enabled(False)
+    finally:
+        _set_auto_thresholds(*original_thresholds)
+    events, _ = _get_trace()
+    assert [NATIVE_SPANS[span] for *_, span in struct.iter_unpack("=QQII", events)] == [
+        "map",
+        "parse",
+        "close",
+    ]